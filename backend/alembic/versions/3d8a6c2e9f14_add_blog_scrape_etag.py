@@ -0,0 +1,24 @@
+"""Add blog.scrape_etag for conditional scraping
+
+Revision ID: 3d8a6c2e9f14
+Revises: 7b2e9d4f1a86
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8a6c2e9f14'
+down_revision = '7b2e9d4f1a86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('blog', sa.Column('scrape_etag', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('blog', 'scrape_etag')
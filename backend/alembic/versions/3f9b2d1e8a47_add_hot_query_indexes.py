@@ -0,0 +1,60 @@
+"""Add indexes for hot query predicates
+
+Revision ID: 3f9b2d1e8a47
+Revises: c7de6a4578a1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9b2d1e8a47'
+down_revision = 'c7de6a4578a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Favorites list: user_id + is_favorite, newest first
+    op.create_index(
+        'ix_user_song_user_favorite_created', 'user_song',
+        ['user_id', 'is_favorite', 'created_at'], unique=False
+    )
+    # Recently played: only rows that have been played
+    op.create_index(
+        'ix_user_song_user_last_played', 'user_song',
+        ['user_id', 'last_played'], unique=False,
+        postgresql_where=sa.text('last_played IS NOT NULL')
+    )
+    # Popular songs: favorite counts per song within a time window
+    op.create_index(
+        'ix_user_song_favorited_created', 'user_song',
+        ['created_at', 'song_id'], unique=False,
+        postgresql_where=sa.text('is_favorite = true')
+    )
+
+    # Comments by target
+    op.create_index('ix_comment_target_song', 'comment', ['target_type', 'song_id'], unique=False)
+    op.create_index('ix_comment_target_band', 'comment', ['target_type', 'band_id'], unique=False)
+    op.create_index('ix_comment_target_blog', 'comment', ['target_type', 'blog_id'], unique=False)
+
+    # Followed blogs and user followers
+    op.create_index('ix_user_blog_user_following', 'user_blog', ['user_id', 'is_following'], unique=False)
+    op.create_index('ix_user_follow_followed_following', 'user_follow', ['followed_id', 'is_following'], unique=False)
+
+    # Feed and search ordering
+    op.create_index(op.f('ix_song_release_date'), 'song', ['release_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_song_release_date'), table_name='song')
+    op.drop_index('ix_user_follow_followed_following', table_name='user_follow')
+    op.drop_index('ix_user_blog_user_following', table_name='user_blog')
+    op.drop_index('ix_comment_target_blog', table_name='comment')
+    op.drop_index('ix_comment_target_band', table_name='comment')
+    op.drop_index('ix_comment_target_song', table_name='comment')
+    op.drop_index('ix_user_song_favorited_created', table_name='user_song')
+    op.drop_index('ix_user_song_user_last_played', table_name='user_song')
+    op.drop_index('ix_user_song_user_favorite_created', table_name='user_song')
@@ -0,0 +1,44 @@
+"""Add song fingerprint index and duplicate flag
+
+Revision ID: 5e7b3c9a1f20
+Revises: d2a9f4c61e3b
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7b3c9a1f20'
+down_revision = 'd2a9f4c61e3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('song_fingerprint',
+        sa.Column('song_id', sa.Integer(), nullable=False),
+        sa.Column('hash', sa.Integer(), nullable=False),
+        sa.Column('anchor', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['song_id'], ['song.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('song_id', 'hash', 'anchor')
+    )
+    # Candidate lookup by hash
+    op.create_index('ix_song_fingerprint_hash', 'song_fingerprint', ['hash'], unique=False)
+
+    op.add_column('song', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_song_duplicate_of_id_song', 'song', 'song', ['duplicate_of_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_song_duplicate_of_id'), 'song', ['duplicate_of_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_song_duplicate_of_id'), table_name='song')
+    op.drop_constraint('fk_song_duplicate_of_id_song', 'song', type_='foreignkey')
+    op.drop_column('song', 'duplicate_of_id')
+    op.drop_index('ix_song_fingerprint_hash', table_name='song_fingerprint')
+    op.drop_table('song_fingerprint')
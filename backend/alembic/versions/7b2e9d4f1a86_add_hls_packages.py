@@ -0,0 +1,41 @@
+"""Add hls_package table and song.playback_manifest for HLS playback
+
+Revision ID: 7b2e9d4f1a86
+Revises: e6f1b8d3c529
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e9d4f1a86'
+down_revision = 'e6f1b8d3c529'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('hls_package',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('progress', sa.Float(), nullable=False),
+        sa.Column('manifest_path', sa.String(), nullable=True),
+        sa.Column('renditions', sa.JSON(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_hls_package_file_path'), 'hls_package', ['file_path'], unique=True)
+    op.create_index(op.f('ix_hls_package_id'), 'hls_package', ['id'], unique=False)
+    op.add_column('song', sa.Column('playback_manifest', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('song', 'playback_manifest')
+    op.drop_index(op.f('ix_hls_package_id'), table_name='hls_package')
+    op.drop_index(op.f('ix_hls_package_file_path'), table_name='hls_package')
+    op.drop_table('hls_package')
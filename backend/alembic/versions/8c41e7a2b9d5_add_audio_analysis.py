@@ -0,0 +1,46 @@
+"""Add audio analysis table
+
+Revision ID: 8c41e7a2b9d5
+Revises: 3f9b2d1e8a47
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e7a2b9d5'
+down_revision = '3f9b2d1e8a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audio_analysis',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('format', sa.String(), nullable=True),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.Column('sample_rate', sa.Integer(), nullable=True),
+        sa.Column('channels', sa.Integer(), nullable=True),
+        sa.Column('bitrate', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('artist', sa.String(), nullable=True),
+        sa.Column('peaks', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audio_analysis_file_path'), 'audio_analysis', ['file_path'], unique=True)
+    op.create_index(op.f('ix_audio_analysis_id'), 'audio_analysis', ['id'], unique=False)
+    # Songs waiting for an analysed duration
+    op.create_index(op.f('ix_song_file_path'), 'song', ['file_path'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_song_file_path'), table_name='song')
+    op.drop_index(op.f('ix_audio_analysis_id'), table_name='audio_analysis')
+    op.drop_index(op.f('ix_audio_analysis_file_path'), table_name='audio_analysis')
+    op.drop_table('audio_analysis')
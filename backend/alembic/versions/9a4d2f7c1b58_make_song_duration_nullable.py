@@ -0,0 +1,27 @@
+"""Make song.duration nullable; NULL marks a duration not yet known
+
+Revision ID: 9a4d2f7c1b58
+Revises: 3d8a6c2e9f14
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4d2f7c1b58'
+down_revision = '3d8a6c2e9f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column('song', 'duration', existing_type=sa.Integer(), nullable=True)
+    # 0 was the placeholder for songs waiting for their audio analysis
+    op.execute("UPDATE song SET duration = NULL WHERE duration = 0")
+
+
+def downgrade():
+    op.execute("UPDATE song SET duration = 0 WHERE duration IS NULL")
+    op.alter_column('song', 'duration', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,43 @@
+"""Add upload_session table for resumable uploads
+
+Revision ID: a4c8e2f7b613
+Revises: 5e7b3c9a1f20
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e2f7b613'
+down_revision = '5e7b3c9a1f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_session',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('part_size', sa.Integer(), nullable=False),
+        sa.Column('received', sa.BigInteger(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=True),
+        sa.Column('s3_upload_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_session_user_id'), 'upload_session', ['user_id'], unique=False)
+    op.create_index('ix_upload_session_updated_at', 'upload_session', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_upload_session_updated_at', table_name='upload_session')
+    op.drop_index(op.f('ix_upload_session_user_id'), table_name='upload_session')
+    op.drop_table('upload_session')
@@ -0,0 +1,24 @@
+"""Add song.source_fingerprinted_at for fingerprinting scraped songs
+
+Revision ID: a4f8d3e6b217
+Revises: e7c2b9a4f603
+Create Date: 2026-10-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f8d3e6b217'
+down_revision = 'e7c2b9a4f603'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('song', sa.Column('source_fingerprinted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('song', 'source_fingerprinted_at')
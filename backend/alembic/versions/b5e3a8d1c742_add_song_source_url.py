@@ -0,0 +1,34 @@
+"""Add song.source_url for scraped songs; song.file_path becomes nullable
+
+Revision ID: b5e3a8d1c742
+Revises: 9a4d2f7c1b58
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e3a8d1c742'
+down_revision = '9a4d2f7c1b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('song', sa.Column('source_url', sa.String(), nullable=True))
+    op.create_index('ix_song_source_url', 'song', ['source_url'], unique=False)
+    op.alter_column('song', 'file_path', existing_type=sa.String(), nullable=True)
+    # Scraped songs stored their link as the S3 key
+    op.execute(
+        "UPDATE song SET source_url = file_path, file_path = NULL "
+        "WHERE file_path LIKE 'http://%' OR file_path LIKE 'https://%'"
+    )
+
+
+def downgrade():
+    op.execute("UPDATE song SET file_path = source_url WHERE file_path IS NULL")
+    op.alter_column('song', 'file_path', existing_type=sa.String(), nullable=False)
+    op.drop_index('ix_song_source_url', table_name='song')
+    op.drop_column('song', 'source_url')
@@ -0,0 +1,40 @@
+"""Add blob table for content-addressed uploads
+
+Revision ID: d2a9f4c61e3b
+Revises: 8c41e7a2b9d5
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a9f4c61e3b'
+down_revision = '8c41e7a2b9d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blob',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_blob_file_path'), 'blob', ['file_path'], unique=True)
+    op.create_index(op.f('ix_blob_id'), 'blob', ['id'], unique=False)
+    op.create_index(op.f('ix_blob_sha256'), 'blob', ['sha256'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_blob_sha256'), table_name='blob')
+    op.drop_index(op.f('ix_blob_id'), table_name='blob')
+    op.drop_index(op.f('ix_blob_file_path'), table_name='blob')
+    op.drop_table('blob')
@@ -0,0 +1,36 @@
+"""Add image_variants table for thumbnail variants of uploaded images
+
+Revision ID: e6f1b8d3c529
+Revises: a4c8e2f7b613
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f1b8d3c529'
+down_revision = 'a4c8e2f7b613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_variants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('variants', sa.JSON(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_image_variants_file_path'), 'image_variants', ['file_path'], unique=True)
+    op.create_index(op.f('ix_image_variants_id'), 'image_variants', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_image_variants_id'), table_name='image_variants')
+    op.drop_index(op.f('ix_image_variants_file_path'), table_name='image_variants')
+    op.drop_table('image_variants')
@@ -0,0 +1,27 @@
+"""Count blob references per song instead of per upload
+
+Revision ID: e7c2b9a4f603
+Revises: b5e3a8d1c742
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c2b9a4f603'
+down_revision = 'b5e3a8d1c742'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE blob SET ref_count = "
+        "(SELECT count(*) FROM song WHERE song.file_path = blob.file_path)"
+    )
+
+
+def downgrade():
+    # Per-upload counts are not recorded; each stored object keeps at least one
+    op.execute("UPDATE blob SET ref_count = 1 WHERE ref_count = 0")
@@ -0,0 +1,156 @@
+"""
+Conditional GET support (``ETag`` / ``Last-Modified``, ``304 Not Modified``).
+
+Validators are derived from ``updated_at``: a single row's id and timestamp,
+or a collection's newest ``updated_at`` and row count. Routes look them up
+with a single small query (``CRUDBase.get_updated_at`` /
+``CRUDBase.get_collection_version``), answer 304 before loading anything
+else, and attach the headers to full responses.
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+
+
+class Validators:
+    """Weak ETag and Last-Modified value for one representation."""
+
+    __slots__ = ("etag", "last_modified")
+
+    def __init__(self, etag: str, last_modified: Optional[datetime]):
+        """
+        Initialize validators.
+
+        Args:
+            etag: Weak entity tag, including the ``W/`` prefix and quotes
+            last_modified: Modification time (naive values are UTC)
+        """
+        self.etag = etag
+        self.last_modified = _as_utc(last_modified) if last_modified else None
+
+    @classmethod
+    def for_row(cls, id: Any, updated_at: datetime) -> "Validators":
+        """
+        Validators for a single row.
+
+        Args:
+            id: Row primary key
+            updated_at: Row ``updated_at``
+
+        Returns:
+            Validators: ETag ``W/"<id>-<updated_at µs>"``
+        """
+        return cls(f'W/"{id}-{_micros(updated_at)}"', updated_at)
+
+    @classmethod
+    def for_collection(cls, latest: Optional[datetime], count: int) -> "Validators":
+        """
+        Validators for a filtered collection.
+
+        The row count catches deletes, which do not move the newest
+        ``updated_at``.
+
+        Args:
+            latest: Newest ``updated_at`` in the collection, None when empty
+            count: Number of rows in the collection
+
+        Returns:
+            Validators: ETag ``W/"<count>-<latest µs>"``
+        """
+        return cls(f'W/"{count}-{_micros(latest) if latest else 0}"', latest)
+
+    def apply(self, response: Response) -> None:
+        """
+        Set the ``ETag`` and ``Last-Modified`` headers on a response.
+
+        Args:
+            response: Response (or the route's injected ``Response``)
+        """
+        response.headers["ETag"] = self.etag
+        if self.last_modified is not None:
+            response.headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+
+    def not_modified(self, request: Request) -> Optional[Response]:
+        """
+        Answer a conditional GET whose cached copy is still current.
+
+        ``If-None-Match`` takes precedence over ``If-Modified-Since``
+        (RFC 9110 section 13.2.2); ETags are compared weakly.
+
+        Args:
+            request: Incoming request
+
+        Returns:
+            Optional[Response]: Empty 304 response, or None to send the full body
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            matched = if_none_match.strip() == "*" or _opaque(self.etag) in {
+                _opaque(tag) for tag in if_none_match.split(",")
+            }
+        else:
+            matched = self._unmodified_since(request.headers.get("if-modified-since"))
+        if not matched:
+            return None
+        response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        self.apply(response)
+        return response
+
+    def _unmodified_since(self, header: Optional[str]) -> bool:
+        if header is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return self.last_modified.replace(microsecond=0) <= _as_utc(since)
+
+
+async def row_not_modified(
+    request: Request, db: AsyncSession, crud_obj: CRUDBase, id: Any, *, detail: str
+) -> Optional[Response]:
+    """
+    Check a conditional GET for one row using only its ``updated_at``.
+
+    Args:
+        request: Incoming request
+        db: Async database session
+        crud_obj: CRUD object of the row's model
+        id: Row ID
+        detail: 404 message if the row does not exist
+
+    Returns:
+        Optional[Response]: 304 response if the client's copy is current, else None
+
+    Raises:
+        HTTPException: If the row does not exist
+    """
+    updated_at = await crud_obj.get_updated_at(db, id=id)
+    if updated_at is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    return Validators.for_row(id, updated_at).not_modified(request)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _micros(value: datetime) -> int:
+    return (_as_utc(value) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _opaque(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
@@ -5,7 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db, get_async_db
+from app.db.session import get_db, get_async_db, set_sticky_key
 from app.models.user import User
 from app.services.auth import verify_token, verify_token_async
 
@@ -38,6 +38,8 @@ def get_current_user(
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        # Keep this user's reads on the primary shortly after they write
+        set_sticky_key(db, user.id)
         return user
     except Exception:
         raise HTTPException(
@@ -73,6 +75,8 @@ async def get_current_user_async(
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        # Keep this user's reads on the primary shortly after they write
+        set_sticky_key(db, user.id)
         return user
     except Exception:
         raise HTTPException(
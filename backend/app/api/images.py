@@ -0,0 +1,54 @@
+"""
+Image URLs for list responses.
+
+Rows store an uploaded image as its S3 key (or a third-party URL). With a
+display ``size`` hint, lists reference the matching thumbnail variant
+instead of the full-size original: variants of a whole page are looked up
+in one query and signed in one batch. Third-party images are served through
+the caching image proxy at the same size.
+"""
+from typing import Dict, Iterable, Literal, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.services.image_proxy import proxy_path
+from app.services.image_variants import pick_variant
+from app.services.s3 import IMAGE_RULES, S3Service
+
+ImageFormat = Literal["webp", "jpeg"]
+
+
+def is_uploaded_image(value: Optional[str]) -> bool:
+    """Whether an image field holds the S3 key of an uploaded image."""
+    return bool(value) and value.startswith(f"{IMAGE_RULES.prefix}/")
+
+
+async def image_variant_urls(
+    db: AsyncSession, s3_service: S3Service, images: Iterable[Optional[str]], size: int, fmt: ImageFormat = "webp"
+) -> Dict[str, str]:
+    """
+    Signed URLs of the variants best matching a display size.
+
+    Args:
+        db: Async database session
+        s3_service: Service the URLs are signed with
+        images: Image field values of the rows in a response
+        size: Display size hint in pixels
+        fmt: Preferred variant format
+
+    Returns:
+        Dict[str, str]: URL per image. Uploaded images without a fitting
+        variant (not generated yet, or smaller than ``size``) map to the
+        original; third-party http(s) URLs map to the image proxy.
+    """
+    images = set(images)
+    uploaded = {image for image in images if is_uploaded_image(image)}
+    variants = await crud.image_variants.get_by_file_paths(db, file_paths=list(uploaded))
+    chosen = {image: pick_variant(variants.get(image, []), size, fmt) or image for image in uploaded}
+    urls = s3_service.generate_presigned_urls(list(set(chosen.values())))
+    result = {image: urls[key] for image, key in chosen.items()}
+    for image in images:
+        if image and image.startswith(("http://", "https://")):
+            result[image] = proxy_path(image, size, fmt)
+    return result
@@ -0,0 +1,200 @@
+"""
+Lightweight JSON responses.
+
+Routes with a ``response_model`` that return ORM objects get one validation
+pass and Pydantic's ``dump_json`` from FastAPI itself; they should not
+validate by hand first. Two responses skip even that pass:
+
+- ``SchemaJSONResponse`` serializes schema instances a route has already
+  built (e.g. joined rows assembled into ``SongWithDetails``).
+- ``RowsJSONResponse`` serializes column rows selected with a
+  ``row_projection`` straight to JSON bytes with orjson, for list endpoints
+  that only echo column values.
+
+``MeteredFileResponse`` is Starlette's ``FileResponse`` (``Range``/206 and
+zero-copy ``pathsend`` where the server supports it) plus a count of the
+bytes it sends, and a background task that runs however the response ends.
+"""
+import functools
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect
+from sqlalchemy.engine import Row
+from starlette.responses import FileResponse, Response
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.metrics import AUDIO_STREAM_BYTES
+from app.db.base import Base
+
+
+class RowProjection:
+    """Columns to select for a response schema, plus defaults for the rest."""
+
+    __slots__ = ("columns", "constants")
+
+    def __init__(self, columns: List[Any], constants: Dict[str, Any]):
+        """
+        Initialize a projection.
+
+        Args:
+            columns: Model columns backing schema fields, in schema order
+            constants: Schema fields with no column, mapped to their defaults
+        """
+        self.columns = columns
+        self.constants = constants
+
+
+@functools.lru_cache(maxsize=None)
+def row_projection(model: Type[Base], schema: Type[BaseModel]) -> RowProjection:
+    """
+    Project a response schema onto a model's columns.
+
+    Fields backed by a column are selected; the others (e.g. ``favorite_count``
+    on ``Song``) are emitted with their schema default, which is what the ORM
+    path returns for them too.
+
+    Args:
+        model: SQLAlchemy model class
+        schema: Pydantic response schema
+
+    Returns:
+        RowProjection: Columns to select and constant fields
+    """
+    attrs = inspect(model).column_attrs
+    columns = []
+    constants = {}
+    for name, field in schema.model_fields.items():
+        if name in attrs:
+            columns.append(getattr(model, name))
+        else:
+            constants[name] = field.get_default(call_default_factory=True)
+    return RowProjection(columns, constants)
+
+
+class RowsJSONResponse(Response):
+    """JSON array of column rows, serialized without validation."""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        rows: Sequence[Row],
+        projection: RowProjection,
+        extras: Optional[Sequence[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize the response.
+
+        Args:
+            rows: Rows selected with ``projection.columns``
+            projection: Projection the rows were selected with
+            extras: Per-row fields merged over each row, aligned with ``rows``
+            **kwargs: Passed to ``Response``
+        """
+        self.projection = projection
+        self.extras = extras
+        super().__init__(rows, **kwargs)
+
+    def render(self, content: Sequence[Row]) -> bytes:
+        """
+        Serialize rows to JSON bytes.
+
+        Args:
+            content: Rows selected with the response's projection
+
+        Returns:
+            bytes: JSON array of objects
+        """
+        constants = self.projection.constants
+        if self.extras is not None:
+            return orjson.dumps([
+                {**row._asdict(), **constants, **extra} for row, extra in zip(content, self.extras)
+            ])
+        if constants:
+            return orjson.dumps([{**row._asdict(), **constants} for row in content])
+        return orjson.dumps([row._asdict() for row in content])
+
+
+
+@functools.lru_cache(maxsize=None)
+def type_adapter(schema_type: Any) -> TypeAdapter:
+    """
+    Shared ``TypeAdapter`` for a response type such as ``List[Blog]``.
+
+    Args:
+        schema_type: Schema class or typing construct
+
+    Returns:
+        TypeAdapter: Adapter built once per type
+    """
+    return TypeAdapter(schema_type)
+
+
+class SchemaJSONResponse(Response):
+    """
+    JSON for prebuilt schema instances, serialized without revalidation.
+
+    Return it from routes that construct their response schemas themselves;
+    keep ``response_model`` on the route for the OpenAPI document.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, schema_type: Any, **kwargs: Any):
+        """
+        Initialize the response.
+
+        Args:
+            content: Instance(s) of ``schema_type``
+            schema_type: Response type, e.g. ``List[SongWithDetails]``
+            **kwargs: Passed to ``Response``
+        """
+        self.adapter = type_adapter(schema_type)
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        """
+        Serialize with Pydantic's Rust JSON encoder.
+
+        Args:
+            content: Instance(s) of the response type
+
+        Returns:
+            bytes: JSON document
+        """
+        return self.adapter.dump_json(content)
+
+
+class MeteredFileResponse(FileResponse):
+    """``FileResponse`` that records the bytes it sends in ``audio_stream_bytes_total``."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Send the file, counting the length announced for the body.
+
+        The body may go out as ``pathsend`` without passing through ``send``
+        as chunks, so the count comes from the start message's
+        ``content-length`` (the range length for 206 responses). The
+        background task also runs when the response ends early (a 416 or
+        400 for the ``Range`` header, a disconnect, an error), so it can
+        clean up the file the response was given.
+        """
+        is_head = scope.get("method") == "HEAD"
+
+        async def metered_send(message: Message) -> None:
+            if message["type"] == "http.response.start" and not is_head:
+                for name, value in message.get("headers", []):
+                    if name == b"content-length":
+                        AUDIO_STREAM_BYTES.labels(str(message["status"])).inc(int(value))
+                        break
+            await send(message)
+
+        background, self.background = self.background, None
+        try:
+            await super().__call__(scope, receive, metered_send)
+        finally:
+            if background is not None:
+                await background()
@@ -8,6 +8,8 @@ from app.api.v1.tags.tags import router as tags_router
 from app.api.v1.comments.comments import router as comments_router
 from app.api.v1.songs import router as songs_router
 from app.api.v1.files import router as files_router
+from app.api.v1.images import router as images_router
+from app.api.v1.diagnostics import router as diagnostics_router
 
 # Create API router
 api_router = APIRouter()
@@ -20,4 +22,6 @@ api_router.include_router(blogs_router, prefix="/blogs", tags=["blogs"])
 api_router.include_router(tags_router, prefix="/tags", tags=["tags"])
 api_router.include_router(comments_router, prefix="/comments", tags=["comments"])
 api_router.include_router(songs_router, prefix="/songs", tags=["songs"])
-api_router.include_router(files_router, prefix="/files", tags=["files"]) 
\ No newline at end of file
+api_router.include_router(files_router, prefix="/files", tags=["files"])
+api_router.include_router(images_router, prefix="/images", tags=["images"])
+api_router.include_router(diagnostics_router, prefix="/diagnostics", tags=["diagnostics"])
\ No newline at end of file
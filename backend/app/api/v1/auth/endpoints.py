@@ -3,7 +3,6 @@ from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Security
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.encoders import jsonable_encoder
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -165,7 +164,7 @@ async def login(
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserSchema.model_validate(jsonable_encoder(user))
+        "user": user
     }
 
 
@@ -208,7 +207,7 @@ async def login_async(
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserSchema.model_validate(jsonable_encoder(user))
+        "user": user
     }
 
 
@@ -229,7 +228,7 @@ async def logout(
     """
     # Invalidate the token by adding it to the blacklist
     blacklist_token(token)
-    return {"message": "Successfully logged out", "user": UserSchema.model_validate(jsonable_encoder(current_user))}
+    return {"message": "Successfully logged out", "user": current_user}
 
 
 @router.api_route("/logout/async", response_model=LogoutResponse, methods=["GET", "POST"])
@@ -249,4 +248,4 @@ async def logout_async(
     """
     # Invalidate the token by adding it to the blacklist
     blacklist_token(token)
-    return {"message": "Successfully logged out", "user": UserSchema.model_validate(jsonable_encoder(current_user))} 
\ No newline at end of file
+    return {"message": "Successfully logged out", "user": current_user} 
\ No newline at end of file
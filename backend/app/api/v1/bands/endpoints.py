@@ -1,11 +1,16 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
 import fastapi
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.conditional import Validators, row_not_modified
+from app.api.images import ImageFormat, image_variant_urls
+from app.api.responses import RowsJSONResponse, row_projection
+from app.services.s3 import S3Service, get_s3_service
 
 router = APIRouter()
 
@@ -26,28 +31,46 @@ def create_band(
 
 
 @router.get("/", response_model=List[schemas.Band])
-def read_bands(
-    db: Session = Depends(deps.get_db),
+async def read_bands(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
+    size: Optional[int] = Query(None, ge=16, le=2048, description="Image display size in pixels"),
+    image_format: ImageFormat = Query("webp", description="Preferred image variant format"),
+    s3_service: S3Service = Depends(get_s3_service),
 ) -> Any:
-    """Retrieve bands."""
-    bands = crud.band.get_multi(db, skip=skip, limit=limit)
-    return bands
+    """
+    Retrieve bands.
+
+    With ``size``, uploaded images carry ``image_variant_url``, a signed URL
+    of the smallest thumbnail variant at least ``size`` pixels across.
+    """
+    projection = row_projection(models.Band, schemas.Band)
+    rows = await crud.band.get_rows(db, columns=projection.columns, skip=skip, limit=limit)
+    if size is None:
+        return RowsJSONResponse(rows, projection)
+    images = await image_variant_urls(db, s3_service, [row.image_url for row in rows], size, image_format)
+    return RowsJSONResponse(rows, projection, extras=[{"image_variant_url": images.get(row.image_url)} for row in rows])
 
 
 @router.get("/{band_id}", response_model=schemas.Band)
-def read_band_by_id(
+async def read_band_by_id(
     band_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
-    """Get band by ID."""
-    band = crud.band.get(db=db, id=band_id)
+    """Get band by ID. Supports conditional GETs (If-None-Match / If-Modified-Since)."""
+    not_modified = await row_not_modified(request, db, crud.band, band_id, detail="Band not found")
+    if not_modified:
+        return not_modified
+    band = await crud.band.get(db=db, id=band_id)
     if not band:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Band not found"
         )
+    Validators.for_row(band.id, band.updated_at).apply(response)
     return band
 
 
@@ -1,12 +1,16 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.encoders import jsonable_encoder
 
 from app.api import dependencies as deps
+from app.api.conditional import Validators, row_not_modified
+from app.api.images import ImageFormat, image_variant_urls
+from app.api.responses import RowsJSONResponse, row_projection
 from app.crud import blog as crud_blog
+from app.models.blog import Blog as BlogModel
 from app.models.user import User
 from app.schemas.blogs.blog import Blog, BlogCreate, BlogUpdate
+from app.services.s3 import S3Service, get_s3_service
 from .follows_api import router as follows_router
 
 router = APIRouter()
@@ -20,13 +24,23 @@ async def read_blogs(
     db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
+    size: Optional[int] = Query(None, ge=16, le=2048, description="Image display size in pixels"),
+    image_format: ImageFormat = Query("webp", description="Preferred image variant format"),
     current_user: User = Depends(deps.get_current_user_async),
+    s3_service: S3Service = Depends(get_s3_service),
 ) -> Any:
     """
     Retrieve blogs.
+
+    With ``size``, uploaded images carry ``image_variant_url``, a signed URL
+    of the smallest thumbnail variant at least ``size`` pixels across.
     """
-    blogs = await crud_blog.get_multi_async(db, skip=skip, limit=limit)
-    return [Blog.model_validate(jsonable_encoder(blog)) for blog in blogs]
+    projection = row_projection(BlogModel, Blog)
+    rows = await crud_blog.get_rows(db, columns=projection.columns, skip=skip, limit=limit)
+    if size is None:
+        return RowsJSONResponse(rows, projection)
+    images = await image_variant_urls(db, s3_service, [row.image_url for row in rows], size, image_format)
+    return RowsJSONResponse(rows, projection, extras=[{"image_variant_url": images.get(row.image_url)} for row in rows])
 
 
 @router.post("/", response_model=Blog)
@@ -40,12 +54,14 @@ async def create_blog(
     Create new blog.
     Only superusers can create blogs.
     """
-    blog = await crud_blog.create_async(db, obj_in=blog_in)
-    return Blog.model_validate(jsonable_encoder(blog))
+    blog = await crud_blog.create(db, obj_in=blog_in)
+    return blog
 
 
 @router.get("/active", response_model=List[Blog])
 async def read_active_blogs(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
@@ -53,25 +69,39 @@ async def read_active_blogs(
 ) -> Any:
     """
     Retrieve active blogs.
+    Supports conditional GETs; the ETag covers all active blogs, not just the page.
     """
+    latest, count = await crud_blog.get_collection_version(db, where=[BlogModel.is_active == True])
+    validators = Validators.for_collection(latest, count)
+    not_modified = validators.not_modified(request)
+    if not_modified:
+        return not_modified
     blogs = await crud_blog.get_active_blogs(db, skip=skip, limit=limit)
-    return [Blog.model_validate(jsonable_encoder(blog)) for blog in blogs]
+    validators.apply(response)
+    return blogs
 
 
 @router.get("/{blog_id}", response_model=Blog)
 async def read_blog(
     *,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_async_db),
     blog_id: int = Path(..., title="The ID of the blog to get"),
     current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
     """
     Get blog by ID.
+    Supports conditional GETs (If-None-Match / If-Modified-Since).
     """
-    blog = await crud_blog.get_async(db, id=blog_id)
+    not_modified = await row_not_modified(request, db, crud_blog, blog_id, detail="Blog not found")
+    if not_modified:
+        return not_modified
+    blog = await crud_blog.get(db, id=blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
-    return Blog.model_validate(jsonable_encoder(blog))
+    Validators.for_row(blog.id, blog.updated_at).apply(response)
+    return blog
 
 
 @router.put("/{blog_id}", response_model=Blog)
@@ -86,11 +116,11 @@ async def update_blog(
     Update a blog.
     Only superusers can update blogs.
     """
-    blog = await crud_blog.get_async(db, id=blog_id)
+    blog = await crud_blog.get(db, id=blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
-    blog = await crud_blog.update_async(db, db_obj=blog, obj_in=blog_in)
-    return Blog.model_validate(jsonable_encoder(blog))
+    blog = await crud_blog.update(db, db_obj=blog, obj_in=blog_in)
+    return blog
 
 
 @router.delete("/{blog_id}", response_model=Blog)
@@ -104,8 +134,8 @@ async def delete_blog(
     Delete a blog.
     Only superusers can delete blogs.
     """
-    blog = await crud_blog.get_async(db, id=blog_id)
+    blog = await crud_blog.get(db, id=blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
-    blog = await crud_blog.remove_async(db, id=blog_id)
-    return Blog.model_validate(jsonable_encoder(blog)) 
\ No newline at end of file
+    blog = await crud_blog.remove(db, id=blog_id)
+    return blog 
\ No newline at end of file
@@ -1,12 +1,15 @@
 from typing import Any, List, Optional, Union
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.api.conditional import Validators, row_not_modified
+from app.api.responses import RowsJSONResponse, row_projection
 from app.crud import comment as crud_comment
 from app.crud import blog as crud_blog
 from app.crud import song as crud_song
 from app.crud import band as crud_band
+from app.models.comment import Comment as CommentModel
 from app.models.user import User
 from app.schemas.comments.comment import Comment, CommentCreate, CommentUpdate
 
@@ -83,10 +86,15 @@ async def read_comments_by_target(
     """
     Retrieve comments by target type and ID.
     """
-    comments = await crud_comment.get_by_target(
-        db, target_type=target_type, target_id=target_id, skip=skip, limit=limit
+    projection = row_projection(CommentModel, Comment)
+    rows = await crud_comment.get_rows(
+        db,
+        columns=projection.columns,
+        where=crud_comment.target_criteria(target_type, target_id),
+        skip=skip,
+        limit=limit,
     )
-    return comments
+    return RowsJSONResponse(rows, projection)
 
 
 @router.get("/by-user/{user_id}", response_model=List[Comment])
@@ -110,16 +118,23 @@ async def read_comments_by_user(
 @router.get("/{comment_id}", response_model=Comment)
 async def read_comment(
     *,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_async_db),
     comment_id: int = Path(..., title="The ID of the comment to get"),
     current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
     """
     Get comment by ID.
+    Supports conditional GETs (If-None-Match / If-Modified-Since).
     """
+    not_modified = await row_not_modified(request, db, crud_comment, comment_id, detail="Comment not found")
+    if not_modified:
+        return not_modified
     comment = await crud_comment.get(db, id=comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
+    Validators.for_row(comment.id, comment.updated_at).apply(response)
     return comment
 
 
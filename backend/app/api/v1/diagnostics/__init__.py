@@ -0,0 +1 @@
+from app.api.v1.diagnostics.endpoints import router
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+
+from app import models
+from app.api.dependencies import get_current_active_superuser_async
+from app.db.instrumentation import route_sql_stats
+from app.db.slow_queries import slow_query_log
+
+router = APIRouter()
+
+
+class RouteSQLStatsResponse(BaseModel):
+    """Response model for per-route SQL usage."""
+    route: str
+    requests: int
+    queries: int
+    avg_queries: float
+    max_queries: int
+    db_time_ms: float
+    avg_db_time_ms: float
+    n_plus_one_requests: int
+    n_plus_one_shapes: List[str]
+
+
+class SlowQueryResponse(BaseModel):
+    """Response model for a slow query log entry."""
+    recorded_at: datetime
+    duration_ms: float
+    route: Optional[str] = None
+    statement: str
+    parameters: Any
+    plan: Optional[str] = None
+
+
+@router.get("/sql", response_model=List[RouteSQLStatsResponse])
+async def read_sql_stats(
+    current_user: models.User = Depends(get_current_active_superuser_async),
+) -> Any:
+    """
+    Get SQL statement counts and DB time aggregated per route (admin only).
+
+    Routes are ordered by total DB time. Routes that ran the same statement
+    shape more than SQL_N_PLUS_ONE_THRESHOLD times in a request are flagged
+    with the offending shapes.
+    """
+    return route_sql_stats.snapshot()
+
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+async def read_slow_queries(
+    current_user: models.User = Depends(get_current_active_superuser_async),
+) -> Any:
+    """
+    Get the most recent statements slower than SLOW_QUERY_THRESHOLD_MS (admin only).
+
+    Parameters are reported by type only. ``plan`` holds the captured
+    EXPLAIN (ANALYZE, BUFFERS) output for sampled Postgres SELECTs once the
+    background capture finishes.
+    """
+    return slow_query_log.entries()
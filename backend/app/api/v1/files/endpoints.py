@@ -1,19 +1,36 @@
-from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from typing import Dict, List, Literal, Optional, Any
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response, status, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
-from app import models
-from app.api.dependencies import get_db, get_current_active_user, get_current_active_superuser
-from app.services.s3 import S3Service
+from app import crud, models
+from app.api.dependencies import get_db, get_async_db, get_current_active_user, get_current_active_superuser
+from app.core.config import settings
+from app.services.blobs import register_stored_upload, store_upload
+from app.services.media_jobs import analyze_upload, generate_image_variants, package_hls
+from app.services.resumable_uploads import (
+    UploadOffsetMismatch,
+    UploadRejected,
+    abort,
+    append_chunk,
+    finalize,
+)
+from app.services.s3 import UPLOAD_RULES, S3Service, UploadQueueFull, get_s3_service
 
 router = APIRouter()
 
+# Keys signed per batch request, e.g. a page of songs
+MAX_PRESIGN_BATCH = 100
+
 
 class FileUploadResponse(BaseModel):
     """Response model for file uploads."""
     file_path: str
     url: str
+    # True when identical content was already stored and nothing was transferred
+    deduplicated: bool = False
 
 
 class PresignedUrlResponse(BaseModel):
@@ -21,24 +38,74 @@ class PresignedUrlResponse(BaseModel):
     url: str
 
 
+class PresignedUrlsRequest(BaseModel):
+    """Request model for signing several files at once."""
+    file_paths: List[str] = Field(..., min_length=1, max_length=MAX_PRESIGN_BATCH)
+    expires: int = Field(3600, gt=0, le=7 * 24 * 3600)
+
+
+class PresignedUrlsResponse(BaseModel):
+    """Response model for batch presigned URL requests."""
+    urls: Dict[str, str]
+
+
+class PresignedPostRequest(BaseModel):
+    """Request model for a direct-to-bucket upload policy."""
+    filename: str
+    content_type: str
+
+
+class PresignedPostResponse(BaseModel):
+    """Form target and fields for a direct-to-bucket upload."""
+    url: str
+    fields: Dict[str, str]
+    file_path: str
+    expires_in: int
+
+
+class UploadCompleteRequest(BaseModel):
+    """Request model for completing a direct-to-bucket upload."""
+    file_path: str
+
+
+class UploadSessionRequest(BaseModel):
+    """Request model for starting a resumable upload."""
+    filename: str
+    content_type: str
+    size: int = Field(..., gt=0)
+
+
+class UploadSessionResponse(BaseModel):
+    """State of a resumable upload."""
+    id: str
+    size: int
+    # Bytes stored so far; the next chunk starts here
+    offset: int
+    # Chunks should be a multiple of this, except the last
+    part_size: int
+
+
 @router.post("/upload/audio", response_model=FileUploadResponse)
 async def upload_audio_file(
     *,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     description: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
 ) -> Any:
     """
     Upload an audio file to the server.
     
     This endpoint allows users to upload audio files (MP3, WAV, etc.) to the server.
-    Files are validated for type and size before being stored in S3.
+    Files are validated for type and size before being stored in S3, then
+    analysed (duration, tags, waveform) and packaged for HLS in the
+    background. Content that is already stored is not transferred again;
+    its existing path is returned.
     
     Returns the file path and a presigned URL for immediate access.
     """
-    s3_service = S3Service()
-    
     # Validate the file
     is_valid, validation_message = s3_service.validate_audio_file(file)
     if not is_valid:
@@ -48,8 +115,12 @@ async def upload_audio_file(
         )
     
     try:
-        # Upload the file to S3
-        file_path = s3_service.upload_file(file, "audio")
+        # Upload the file to S3, unless the same content is already there
+        file_path, deduplicated = await store_upload(db, s3_service, file, "audio")
+        if settings.AUDIO_ANALYSIS_ENABLED and not deduplicated:
+            background_tasks.add_task(analyze_upload, file_path)
+        if settings.HLS_ENABLED and not deduplicated:
+            background_tasks.add_task(package_hls, file_path)
         
         # Generate a presigned URL for immediate access
         url = s3_service.generate_presigned_url(file_path)
@@ -57,7 +128,14 @@ async def upload_audio_file(
         # Return the file path and URL
         return FileUploadResponse(
             file_path=file_path,
-            url=url
+            url=url,
+            deduplicated=deduplicated,
+        )
+    except UploadQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many uploads in progress, retry shortly",
+            headers={"Retry-After": "5"},
         )
     except Exception as e:
         raise HTTPException(
@@ -69,20 +147,22 @@ async def upload_audio_file(
 @router.post("/upload/image", response_model=FileUploadResponse)
 async def upload_image_file(
     *,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
 ) -> Any:
     """
     Upload an image file to the server.
     
     This endpoint allows users to upload image files (JPEG, PNG, etc.) to the server.
-    Files are validated for type and size before being stored in S3.
+    Files are validated for type and size before being stored in S3; content
+    that is already stored is not transferred again. Thumbnail variants are
+    generated in the background.
     
     Returns the file path and a presigned URL for immediate access.
     """
-    s3_service = S3Service()
-    
     # Validate the file
     is_valid, validation_message = s3_service.validate_image_file(file)
     if not is_valid:
@@ -92,8 +172,10 @@ async def upload_image_file(
         )
     
     try:
-        # Upload the file to S3
-        file_path = s3_service.upload_file(file, "images")
+        # Upload the file to S3, unless the same content is already there
+        file_path, deduplicated = await store_upload(db, s3_service, file, "images")
+        if settings.IMAGE_VARIANTS_ENABLED and not deduplicated:
+            background_tasks.add_task(generate_image_variants, file_path)
         
         # Generate a presigned URL for immediate access
         url = s3_service.generate_presigned_url(file_path)
@@ -101,7 +183,14 @@ async def upload_image_file(
         # Return the file path and URL
         return FileUploadResponse(
             file_path=file_path,
-            url=url
+            url=url,
+            deduplicated=deduplicated,
+        )
+    except UploadQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many uploads in progress, retry shortly",
+            headers={"Retry-After": "5"},
         )
     except Exception as e:
         raise HTTPException(
@@ -117,6 +206,7 @@ async def get_presigned_url(
     expires: Optional[int] = 3600,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
 ) -> Any:
     """
     Generate a presigned URL for accessing a file.
@@ -131,8 +221,6 @@ async def get_presigned_url(
     Returns:
         A presigned URL for accessing the file
     """
-    s3_service = S3Service()
-    
     try:
         # Generate a presigned URL
         url = s3_service.generate_presigned_url(file_path, expires_in=expires)
@@ -143,4 +231,261 @@ async def get_presigned_url(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
+
+
+@router.post("/presigned-urls", response_model=PresignedUrlsResponse)
+async def get_presigned_urls(
+    *,
+    urls_in: PresignedUrlsRequest,
+    current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Any:
+    """
+    Generate presigned URLs for several files in one call.
+
+    URLs are served from the presigned URL cache where possible, so
+    expiries are rounded up to the cache's expiry bucket.
+    """
+    try:
+        return PresignedUrlsResponse(
+            urls=s3_service.generate_presigned_urls(urls_in.file_paths, expires_in=urls_in.expires)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/uploads/{kind}/presign", response_model=PresignedPostResponse)
+async def presign_upload(
+    *,
+    kind: Literal["audio", "image"],
+    upload_in: PresignedPostRequest,
+    current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Any:
+    """
+    Issue a presigned POST policy for uploading a file straight to storage.
+
+    The client sends a multipart form POST to ``url`` with every entry of
+    ``fields`` followed by the ``file`` part, then calls
+    ``/uploads/{kind}/complete``. The policy enforces the same type and size
+    rules as the API upload endpoints, so file bytes never pass through the API.
+    """
+    try:
+        post = s3_service.generate_presigned_post(
+            upload_in.filename,
+            upload_in.content_type,
+            UPLOAD_RULES[kind],
+            owner_id=current_user.id,
+            expires_in=settings.S3_PRESIGNED_POST_EXPIRES,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return PresignedPostResponse(expires_in=settings.S3_PRESIGNED_POST_EXPIRES, **post)
+
+
+@router.post("/uploads/{kind}/complete", response_model=FileUploadResponse)
+async def complete_upload(
+    *,
+    background_tasks: BackgroundTasks,
+    kind: Literal["audio", "image"],
+    upload_in: UploadCompleteRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Any:
+    """
+    Verify a direct-to-storage upload and record it for reference counting.
+
+    Checks the stored object's size and content type with a HEAD request;
+    objects that fail are deleted. The object is then hashed and recorded
+    like an API upload: if its content is already stored, the new object
+    is deleted and the existing path returned. New audio is analysed and
+    packaged for HLS, and new image variants generated, in the background.
+    Returns the same file path and presigned URL as the API upload endpoints.
+    """
+    try:
+        error = await run_in_threadpool(
+            s3_service.verify_upload, upload_in.file_path, UPLOAD_RULES[kind], current_user.id
+        )
+        if not error:
+            file_path, deduplicated = await register_stored_upload(db, s3_service, upload_in.file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    except UploadQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many uploads in progress, retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    if kind == "audio" and settings.AUDIO_ANALYSIS_ENABLED and not deduplicated:
+        background_tasks.add_task(analyze_upload, file_path)
+    if kind == "audio" and settings.HLS_ENABLED and not deduplicated:
+        background_tasks.add_task(package_hls, file_path)
+    if kind == "image" and settings.IMAGE_VARIANTS_ENABLED and not deduplicated:
+        background_tasks.add_task(generate_image_variants, file_path)
+    return FileUploadResponse(
+        file_path=file_path,
+        url=s3_service.generate_presigned_url(file_path),
+        deduplicated=deduplicated,
+    )
+
+
+def _session_response(upload: models.UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=upload.id, size=upload.size, offset=upload.received, part_size=upload.part_size
+    )
+
+
+def _offset_conflict(e: UploadOffsetMismatch) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=str(e),
+        headers={"Upload-Offset": str(e.offset)},
+    )
+
+
+async def _get_session(db: AsyncSession, session_id: str, user: models.User) -> models.UploadSession:
+    upload = await crud.upload_session.get_for_user(db, id=session_id, user_id=user.id)
+    if upload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return upload
+
+
+@router.post("/uploads/{kind}/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    *,
+    kind: Literal["audio", "image"],
+    session_in: UploadSessionRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Start a resumable upload.
+
+    Send the file with ``PATCH /uploads/sessions/{id}`` in chunks, each
+    with an ``Upload-Offset`` header equal to the current offset, then call
+    ``/uploads/sessions/{id}/complete``. After a dropped connection, read
+    the offset with ``GET /uploads/sessions/{id}`` and resume from it.
+    A declared size over the limit for ``kind`` is refused here; the rest
+    of the file is validated when its first chunk arrives.
+    """
+    if session_in.size > UPLOAD_RULES[kind].max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Maximum size: {UPLOAD_RULES[kind].max_size // (1024 * 1024)}MB",
+        )
+    upload = await crud.upload_session.open(
+        db,
+        user_id=current_user.id,
+        kind=kind,
+        filename=session_in.filename,
+        content_type=session_in.content_type,
+        size=session_in.size,
+        part_size=settings.UPLOAD_SESSION_PART_SIZE,
+    )
+    return _session_response(upload)
+
+
+@router.get("/uploads/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    *,
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get the offset a resumable upload continues from.
+    """
+    return _session_response(await _get_session(db, session_id, current_user))
+
+
+@router.patch("/uploads/sessions/{session_id}", response_model=UploadSessionResponse)
+async def append_upload_chunk(
+    *,
+    request: Request,
+    session_id: str,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Any:
+    """
+    Append a chunk to a resumable upload.
+
+    The request body is streamed to storage part by part. Only whole parts
+    are kept, so the returned offset may be short of the bytes sent when a
+    chunk is not a multiple of ``part_size``; continue from the returned offset.
+    Returns 409 with the current ``Upload-Offset`` if the chunk starts elsewhere.
+    """
+    upload = await _get_session(db, session_id, current_user)
+    try:
+        await append_chunk(db, s3_service, upload, upload_offset, request.stream())
+    except UploadOffsetMismatch as e:
+        raise _offset_conflict(e)
+    except UploadRejected as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many uploads in progress, retry shortly",
+            headers={"Retry-After": "5", "Upload-Offset": str(upload.received)},
+        )
+    return _session_response(upload)
+
+
+@router.post("/uploads/sessions/{session_id}/complete", response_model=FileUploadResponse)
+async def complete_upload_session(
+    *,
+    background_tasks: BackgroundTasks,
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Any:
+    """
+    Finish a resumable upload once every byte has been sent.
+
+    Returns the same file path and presigned URL as the API upload endpoints;
+    audio is analysed and packaged for HLS, and image variants generated,
+    in the background.
+    """
+    upload = await _get_session(db, session_id, current_user)
+    kind = upload.kind
+    try:
+        file_path = await finalize(db, s3_service, upload)
+    except UploadOffsetMismatch as e:
+        raise _offset_conflict(e)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if kind == "audio" and settings.AUDIO_ANALYSIS_ENABLED:
+        background_tasks.add_task(analyze_upload, file_path)
+    if kind == "audio" and settings.HLS_ENABLED:
+        background_tasks.add_task(package_hls, file_path)
+    if kind == "image" and settings.IMAGE_VARIANTS_ENABLED:
+        background_tasks.add_task(generate_image_variants, file_path)
+    return FileUploadResponse(file_path=file_path, url=s3_service.generate_presigned_url(file_path))
+
+
+@router.delete("/uploads/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_upload_session(
+    *,
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Response:
+    """
+    Cancel a resumable upload and discard the parts sent so far.
+    """
+    await abort(db, s3_service, await _get_session(db, session_id, current_user))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1 @@
+from app.api.v1.images.endpoints import router
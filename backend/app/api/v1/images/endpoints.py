@@ -0,0 +1,47 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+
+from app.api.images import ImageFormat
+from app.core.config import settings
+from app.services.image_proxy import ImageProxy, ImageProxyError, get_image_proxy, size_bucket, verify_signature
+from app.services.image_variants import VARIANT_FORMATS
+
+router = APIRouter()
+
+
+@router.get("/proxy", response_class=FileResponse)
+async def proxy_image(
+    *,
+    request: Request,
+    url: str = Query(..., max_length=2048, description="Source image URL"),
+    sig: str = Query(..., description="Signature issued with the URL"),
+    size: Optional[int] = Query(None, ge=1, le=4096, description="Display size in pixels"),
+    format: Optional[ImageFormat] = Query(None, description="Output format; negotiated from Accept when omitted"),
+    proxy: ImageProxy = Depends(get_image_proxy),
+) -> FileResponse:
+    """
+    Serve a third-party image through the caching proxy.
+
+    The image is resized to the smallest configured size covering ``size``
+    and cached, so repeat requests never reach the source. Responses are
+    cacheable for ``IMAGE_PROXY_MAX_AGE``; failures are cached briefly, by
+    the proxy and by clients. Proxy URLs come from list responses (see
+    ``proxy_path``); unsigned URLs are refused.
+    """
+    if not verify_signature(url, sig):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid image signature")
+    fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "jpeg")
+    try:
+        path = await proxy.get_path(url, size_bucket(size, settings.IMAGE_PROXY_SIZES), fmt)
+    except ImageProxyError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Cache-Control": f"public, max-age={e.ttl}"},
+        )
+    headers = {"Cache-Control": f"public, max-age={settings.IMAGE_PROXY_MAX_AGE}"}
+    if format is None:
+        headers["Vary"] = "Accept"
+    return FileResponse(path, media_type=VARIANT_FORMATS[fmt][2], headers=headers)
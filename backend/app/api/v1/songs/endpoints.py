@@ -1,37 +1,94 @@
+import math
+import mimetypes
 from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
 from app import crud, models, schemas
+from app.api.conditional import Validators, row_not_modified
+from app.api.images import ImageFormat, image_variant_urls
+from app.api.responses import MeteredFileResponse, RowsJSONResponse, row_projection
+from app.core.config import settings
+from app.core.middleware import cache_compressed_payload
 from app.api.dependencies import get_async_db, get_current_user_async, get_current_active_user_async, get_current_active_superuser_async
 from app.models.user import User
+from app.services.audio_cache import AudioFileCache, get_audio_cache
+from app.services.hls import MASTER_PLAYLIST, MEDIA_PLAYLIST, PLAYLIST_CONTENT_TYPE, hls_prefix, master_playlist, media_playlist
+from app.services.media_jobs import fingerprint_song, fingerprint_songs, package_hls
+from app.services.s3 import S3Service, get_s3_service
+from app.services.song_import import DEFAULT_BATCH_SIZE, import_songs
 
 router = APIRouter()
 
+# Minimum lifetime of signed HLS segment URLs
+SEGMENT_URL_SECONDS = 3600
+
+
+def _manifest_url(song_id: int) -> str:
+    return f"{settings.API_V1_STR}/songs/{song_id}/hls/{MASTER_PLAYLIST}"
+
 
 @router.get("/", response_model=List[schemas.Song])
 async def read_songs(
     db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 10,
+    signed_urls: bool = Query(False, description="Include a presigned playback URL per song"),
+    size: Optional[int] = Query(None, ge=16, le=2048, description="Cover display size in pixels"),
+    image_format: ImageFormat = Query("webp", description="Preferred cover variant format"),
     current_user: models.User = Depends(get_current_user_async),
+    s3_service: S3Service = Depends(get_s3_service),
 ) -> Any:
     """
     Retrieve all songs with pagination.
+
+    With ``signed_urls=true`` each song carries ``file_url``, saving clients a
+    presign round trip per track (songs linked from a blog carry their
+    ``source_url``), and packaged songs their HLS ``manifest_url``. With ``size``, uploaded covers carry
+    ``cover_image_variant_url``, a signed URL of the smallest thumbnail
+    variant at least ``size`` pixels across (the original if none fits).
     """
-    songs = await crud.song.get_multi(db, skip=skip, limit=limit)
-    return songs
+    projection = row_projection(models.Song, schemas.Song)
+    if not signed_urls and size is None:
+        rows = await crud.song.get_rows(db, columns=projection.columns, skip=skip, limit=limit)
+        return RowsJSONResponse(rows, projection)
+    columns = projection.columns
+    if signed_urls:
+        columns = [
+            *columns, models.Song.file_path.label("file_url"), models.Song.playback_manifest.label("manifest_url")
+        ]
+    rows = await crud.song.get_rows(db, columns=columns, skip=skip, limit=limit)
+    extras = [{} for _ in rows]
+    if signed_urls:
+        urls = s3_service.generate_presigned_urls([row.file_url for row in rows if row.file_url])
+        for extra, row in zip(extras, rows):
+            extra["file_url"] = urls[row.file_url] if row.file_url else row.source_url
+            extra["manifest_url"] = _manifest_url(row.id) if row.manifest_url else None
+    if size is not None:
+        covers = await image_variant_urls(db, s3_service, [row.cover_image_url for row in rows], size, image_format)
+        for extra, row in zip(extras, rows):
+            extra["cover_image_variant_url"] = covers.get(row.cover_image_url)
+    return RowsJSONResponse(rows, projection, extras=extras)
 
 
 @router.post("/", response_model=schemas.Song, status_code=status.HTTP_201_CREATED)
 async def create_song(
     *,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_async_db),
     song_in: schemas.SongCreate,
     current_user: models.User = Depends(get_current_active_superuser_async),
 ) -> Any:
     """
     Create new song (admin only).
+
+    When ``duration`` is omitted it is taken from the upload's audio
+    analysis; if that has not finished yet it is filled in when it does.
+    The audio is then fingerprinted in the background and the song flagged
+    (``duplicate_of_id``) if it duplicates an existing one. Songs of audio
+    already packaged for HLS get its manifest straight away.
     """
     # Validate band_id if provided
     if song_in.band_id:
@@ -50,10 +107,40 @@ async def create_song(
                 detail=f"Blog with id {song_in.blog_id} not found",
             )
             
-    song = await crud.song.create(db=db, obj_in=song_in)
+    if song_in.duration is None:
+        duration = await crud.audio_analysis.get_duration(db, file_path=song_in.file_path)
+        song_in.duration = round(duration) if duration else None
+    song = await crud.song.create_async(db=db, obj_in=song_in)
+    manifest = await crud.hls_package.get_manifest(db, file_path=song.file_path)
+    if manifest:
+        song = await crud.song.update_async(db, db_obj=song, obj_in={"playback_manifest": manifest})
+    if settings.FINGERPRINT_ENABLED:
+        background_tasks.add_task(fingerprint_song, song.id, song.file_path)
     return song
 
 
+@router.post("/bulk", response_model=schemas.SongBulkResult)
+async def bulk_create_songs(
+    *,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    request: Request,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    current_user: models.User = Depends(get_current_active_superuser_async),
+) -> Any:
+    """
+    Create songs from an NDJSON body, one song per line (admin only).
+
+    Rows are validated and inserted in batches as the body streams in.
+    Invalid rows are reported by line number without aborting the import.
+    Created songs are fingerprinted in the background to flag duplicates.
+    """
+    result = await import_songs(db, request.stream(), batch_size=batch_size)
+    if settings.FINGERPRINT_ENABLED and result["ids"]:
+        background_tasks.add_task(fingerprint_songs, result["ids"])
+    return result
+
+
 @router.get("/search", response_model=List[schemas.Song])
 async def search_songs(
     *,
@@ -92,6 +179,7 @@ async def search_songs(
 @router.get("/popular", response_model=List[schemas.Song])
 async def read_popular_songs(
     *,
+    request: Request,
     db: AsyncSession = Depends(get_async_db),
     time_period: str = Query("all_time", regex="^(week|month|year|all_time)$"),
     skip: int = 0,
@@ -113,6 +201,7 @@ async def read_popular_songs(
         skip=skip,
         limit=limit,
     )
+    cache_compressed_payload(request)
     return songs
 
 
@@ -139,13 +228,20 @@ async def read_user_feed(
 @router.get("/{song_id}", response_model=schemas.SongWithDetails)
 async def read_song(
     *,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_async_db),
     song_id: int,
     current_user: models.User = Depends(get_current_user_async),
 ) -> Any:
     """
     Get song by ID with additional details.
+
+    Supports conditional GETs (``If-None-Match`` / ``If-Modified-Since``).
     """
+    not_modified = await row_not_modified(request, db, crud.song, song_id, detail="Song not found")
+    if not_modified:
+        return not_modified
     song = await crud.song.get_song_with_details(
         db=db, id=song_id, user_id=current_user.id
     )
@@ -154,9 +250,170 @@ async def read_song(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Song not found",
         )
+    Validators.for_row(song["id"], song["updated_at"]).apply(response)
     return song
 
 
+@router.get(
+    "/{song_id}/stream",
+    response_class=MeteredFileResponse,
+    responses={
+        206: {"description": "Partial content for a Range request"},
+        307: {"description": "Redirect to the source of a song linked from a blog"},
+    },
+)
+async def stream_song(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    song_id: int,
+    current_user: models.User = Depends(get_current_user_async),
+    audio_cache: AudioFileCache = Depends(get_audio_cache),
+) -> Any:
+    """
+    Stream a song's audio, honouring ``Range`` requests with 206 responses.
+
+    Audio is served from the local hot-file cache, read through from S3 on
+    a miss. The file is leased until the response is sent, so eviction
+    cannot remove it before the response opens it. Songs linked from a blog
+    redirect to their ``source_url``.
+    """
+    rows = await crud.song.get_rows(
+        db, columns=[models.Song.file_path, models.Song.source_url], where=[models.Song.id == song_id], limit=1
+    )
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song not found")
+    file_path = rows[0].file_path
+    if file_path is None:
+        if rows[0].source_url is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+        return RedirectResponse(rows[0].source_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    try:
+        path = await audio_cache.lease(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    return MeteredFileResponse(path, media_type=media_type, background=BackgroundTask(audio_cache.release, path))
+
+
+@router.get("/{song_id}/waveform", response_model=schemas.SongWaveform)
+async def read_song_waveform(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    song_id: int,
+    current_user: models.User = Depends(get_current_user_async),
+) -> Any:
+    """
+    Get a song's waveform peaks and audio properties.
+
+    Peaks are computed once after upload, so players can draw the waveform
+    without downloading the track. Supports conditional GETs.
+    """
+    rows = await crud.song.get_rows(db, columns=[models.Song.file_path], where=[models.Song.id == song_id], limit=1)
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song not found")
+    analysis = await crud.audio_analysis.get_by_file_path(db, file_path=rows[0].file_path)
+    if analysis is None or analysis.peaks is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Waveform not available")
+    validators = Validators.for_row(analysis.id, analysis.updated_at)
+    not_modified = validators.not_modified(request)
+    if not_modified:
+        return not_modified
+    validators.apply(response)
+    return analysis
+
+
+@router.get("/{song_id}/playback", response_model=schemas.SongPlayback)
+async def read_song_playback(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    song_id: int,
+    current_user: models.User = Depends(get_current_user_async),
+) -> Any:
+    """
+    Get the state of a song's HLS packaging and, once done, its manifest URL.
+
+    Packaging runs in the background after upload; ``progress`` tracks it.
+    """
+    package = await crud.hls_package.get_by_song(db, song_id=song_id)
+    if package is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song is not packaged for HLS")
+    return schemas.SongPlayback(
+        status=package.status,
+        progress=package.progress,
+        manifest_url=_manifest_url(song_id) if package.status == "done" else None,
+        renditions=package.renditions,
+        error=package.error,
+    )
+
+
+@router.post("/{song_id}/playback", status_code=status.HTTP_202_ACCEPTED)
+async def package_song_playback(
+    *,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    song_id: int,
+    current_user: models.User = Depends(get_current_active_superuser_async),
+) -> Response:
+    """
+    (Re)package a song's audio for HLS in the background (admin only).
+
+    For songs uploaded before packaging existed, or whose packaging failed.
+    """
+    rows = await crud.song.get_rows(db, columns=[models.Song.file_path], where=[models.Song.id == song_id], limit=1)
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song not found")
+    if rows[0].file_path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song has no uploaded audio")
+    background_tasks.add_task(package_hls, rows[0].file_path)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/{song_id}/hls/{playlist:path}", response_class=Response)
+async def read_song_playlist(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    song_id: int,
+    playlist: str,
+    current_user: models.User = Depends(get_current_user_async),
+    s3_service: S3Service = Depends(get_s3_service),
+) -> Response:
+    """
+    Serve a song's HLS master playlist (``master.m3u8``) or a rendition's
+    media playlist (``<rendition>/index.m3u8``).
+
+    Media playlists list signed segment URLs, so players fetch segments
+    straight from the bucket. The URLs are signed for each request rather
+    than taken from the shared cache, with enough lifetime to play the whole
+    song from a cached copy of the playlist.
+    """
+    package = await crud.hls_package.get_by_song(db, song_id=song_id)
+    if package is None or package.status != "done":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song is not packaged for HLS")
+    margin = settings.S3_PRESIGN_SAFETY_MARGIN_SECONDS
+    max_age = margin
+    if playlist == MASTER_PLAYLIST:
+        text = master_playlist(package.renditions)
+    else:
+        rendition = next((r for r in package.renditions if playlist == f"{r['name']}/{MEDIA_PLAYLIST}"), None)
+        if rendition is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Playlist not found")
+        prefix = f"{hls_prefix(package.file_path)}/{rendition['name']}"
+        keys = [f"{prefix}/{segment['uri']}" for segment in rendition["segments"]]
+        length = math.ceil(sum(segment["duration"] for segment in rendition["segments"]))
+        lifetime = max(SEGMENT_URL_SECONDS, length + 2 * margin)
+        urls = s3_service.generate_presigned_urls(keys, expires_in=lifetime, cached=False)
+        text = media_playlist(rendition["segments"], [urls[key] for key in keys])
+        # Playback started from a cached copy still ends a margin before expiry
+        max_age = lifetime - length - margin
+    return Response(
+        content=text,
+        media_type=PLAYLIST_CONTENT_TYPE,
+        headers={"Cache-Control": f"private, max-age={max_age}"},
+    )
+
+
 @router.put("/{song_id}", response_model=schemas.Song)
 async def update_song(
     *,
@@ -178,6 +435,36 @@ async def update_song(
     return song
 
 
+@router.post("/{song_id}/merge", response_model=schemas.Song)
+async def merge_duplicate_song(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    song_id: int,
+    current_user: models.User = Depends(get_current_active_superuser_async),
+) -> Any:
+    """
+    Merge a song flagged as a duplicate into the original (admin only).
+
+    Favorites, play history, comments and tags move to the original, and
+    the duplicate is deleted, releasing its reference to its uploaded file.
+    Returns the original song.
+    """
+    song = await crud.song.get(db=db, id=song_id)
+    if not song:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Song not found",
+        )
+    if song.duplicate_of_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Song is not flagged as a duplicate",
+        )
+    original_id = song.duplicate_of_id
+    await crud.song.merge_duplicate(db, duplicate=song)
+    return await crud.song.get(db=db, id=original_id)
+
+
 @router.delete("/{song_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_song(
     *,
@@ -187,6 +474,9 @@ async def delete_song(
 ) -> None:
     """
     Delete a song (admin only).
+
+    Releases the song's reference to its uploaded file; the file is deleted
+    from storage some time after nothing references it.
     """
     song = await crud.song.get(db=db, id=song_id)
     if not song:
@@ -1,9 +1,13 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.api.conditional import Validators, row_not_modified
+from app.api.responses import RowsJSONResponse, row_projection
+from app.core.middleware import cache_compressed_payload
 from app.crud import tag as crud_tag
+from app.models.tag import Tag as TagModel
 from app.models.user import User
 from app.schemas.tags.tag import Tag, TagCreate, TagUpdate
 
@@ -12,6 +16,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[Tag])
 async def read_tags(
+    request: Request,
     db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
@@ -20,8 +25,10 @@ async def read_tags(
     """
     Retrieve tags.
     """
-    tags = await crud_tag.get_multi_async(db, skip=skip, limit=limit)
-    return tags
+    projection = row_projection(TagModel, Tag)
+    rows = await crud_tag.get_rows(db, columns=projection.columns, skip=skip, limit=limit)
+    cache_compressed_payload(request)
+    return RowsJSONResponse(rows, projection)
 
 
 @router.post("/", response_model=Tag)
@@ -40,23 +47,30 @@ async def create_tag(
     if existing_tag:
         raise HTTPException(status_code=400, detail="Tag with this name already exists")
     
-    tag = await crud_tag.create_async(db, obj_in=tag_in)
+    tag = await crud_tag.create(db, obj_in=tag_in)
     return tag
 
 
 @router.get("/{tag_id}", response_model=Tag)
 async def read_tag(
     *,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_async_db),
     tag_id: int = Path(..., title="The ID of the tag to get"),
     current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
     """
     Get tag by ID.
+    Supports conditional GETs (If-None-Match / If-Modified-Since).
     """
-    tag = await crud_tag.get_async(db, id=tag_id)
+    not_modified = await row_not_modified(request, db, crud_tag, tag_id, detail="Tag not found")
+    if not_modified:
+        return not_modified
+    tag = await crud_tag.get(db, id=tag_id)
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
+    Validators.for_row(tag.id, tag.updated_at).apply(response)
     return tag
 
 
@@ -72,7 +86,7 @@ async def update_tag(
     Update a tag.
     Only superusers can update tags.
     """
-    tag = await crud_tag.get_async(db, id=tag_id)
+    tag = await crud_tag.get(db, id=tag_id)
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     
@@ -82,7 +96,7 @@ async def update_tag(
         if existing_tag:
             raise HTTPException(status_code=400, detail="Tag with this name already exists")
     
-    tag = await crud_tag.update_async(db, db_obj=tag, obj_in=tag_in)
+    tag = await crud_tag.update(db, db_obj=tag, obj_in=tag_in)
     return tag
 
 
@@ -97,8 +111,8 @@ async def delete_tag(
     Delete a tag.
     Only superusers can delete tags.
     """
-    tag = await crud_tag.get_async(db, id=tag_id)
+    tag = await crud_tag.get(db, id=tag_id)
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
-    tag = await crud_tag.remove_async(db, id=tag_id)
+    tag = await crud_tag.remove(db, id=tag_id)
     return tag 
\ No newline at end of file
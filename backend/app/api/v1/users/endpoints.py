@@ -2,7 +2,6 @@ from typing import Any, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.encoders import jsonable_encoder
 
 from app.api.dependencies import get_current_user, get_current_user_async, get_async_db
 from app.db.session import get_db
@@ -56,7 +55,7 @@ async def get_current_user_info(
     Returns:
         User: Current user information
     """
-    return UserSchema.model_validate(jsonable_encoder(current_user))
+    return current_user
 
 
 @router.get("/me/async", response_model=UserSchema)
@@ -72,4 +71,4 @@ async def get_current_user_info_async(
     Returns:
         User: Current user information
     """
-    return UserSchema.model_validate(jsonable_encoder(current_user))
\ No newline at end of file
+    return current_user
\ No newline at end of file
@@ -2,9 +2,9 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi.encoders import jsonable_encoder
 
 from app.api import deps
+from app.api.responses import SchemaJSONResponse
 from app.models.user import User
 from app.models.song import Song
 from app.models.user_song import UserSong
@@ -26,7 +26,8 @@ async def read_user_favorites(
     """
     Get list of user's favorite songs with additional details.
     """
-    return await get_user_favorites_async(db, current_user.id)
+    favorites = await get_user_favorites_async(db, current_user.id)
+    return SchemaJSONResponse(favorites, List[SongWithDetails])
 
 
 @router.get("/sync", response_model=List[SongWithDetails])
@@ -37,7 +38,7 @@ def read_user_favorites_sync(
     """
     Get list of user's favorite songs with additional details (sync version).
     """
-    return get_user_favorites(db, current_user.id)
+    return SchemaJSONResponse(get_user_favorites(db, current_user.id), List[SongWithDetails])
 
 
 @router.post("", response_model=UserSongSchema, status_code=status.HTTP_201_CREATED)
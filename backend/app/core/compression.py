@@ -0,0 +1,234 @@
+"""
+Response body codecs and a cache of pre-compressed payloads.
+
+gzip is always available; brotli is used when the ``brotli`` package is
+installed and the client accepts it.
+"""
+import gzip
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import COMPRESSION_CACHE, COMPRESSION_RATIO, COMPRESSION_SECONDS
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Media types worth compressing; audio and images are already compressed
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/vnd.apple.mpegurl",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Encodings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick a response encoding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Header value, e.g. ``"gzip, deflate, br;q=0.9"``
+
+    Returns:
+        Optional[str]: "br" or "gzip", or None to send the body as is
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    for encoding in available_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    """
+    Whether a media type benefits from compression.
+
+    Args:
+        content_type: ``Content-Type`` header value
+
+    Returns:
+        bool: True for text-like payloads
+    """
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class StreamCompressor:
+    """Incremental compressor for one response body, recording metrics at the end."""
+
+    def __init__(self, encoding: str, *, gzip_level: int, brotli_quality: int):
+        """
+        Initialize a compressor.
+
+        Args:
+            encoding: "br" or "gzip"
+            gzip_level: zlib compression level (1-9)
+            brotli_quality: Brotli quality (0-11)
+        """
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor: Any = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, chunk: bytes) -> bytes:
+        """
+        Compress one chunk; output may be empty until enough input is buffered.
+
+        Args:
+            chunk: Uncompressed bytes
+
+        Returns:
+            bytes: Compressed bytes ready to send
+        """
+        start = time.thread_time()
+        if self.encoding == "br":
+            out = self._compressor.process(chunk)
+        else:
+            out = self._compressor.compress(chunk)
+        self.cpu_seconds += time.thread_time() - start
+        self.bytes_in += len(chunk)
+        self.bytes_out += len(out)
+        return out
+
+    def finish(self) -> bytes:
+        """
+        Flush remaining output and record ratio and CPU time.
+
+        Returns:
+            bytes: Final compressed bytes
+        """
+        start = time.thread_time()
+        out = self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+        self.cpu_seconds += time.thread_time() - start
+        self.bytes_out += len(out)
+        _observe(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+        return out
+
+
+def compress_body(body: bytes, encoding: str, *, gzip_level: int, brotli_quality: int) -> bytes:
+    """
+    Compress a complete body in one call, recording ratio and CPU time.
+
+    Args:
+        body: Uncompressed body
+        encoding: "br" or "gzip"
+        gzip_level: zlib compression level (1-9)
+        brotli_quality: Brotli quality (0-11)
+
+    Returns:
+        bytes: Compressed body
+    """
+    start = time.thread_time()
+    if encoding == "br":
+        out = brotli.compress(body, quality=brotli_quality)
+    else:
+        # mtime=0 keeps the output deterministic, so cached copies are interchangeable
+        out = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    _observe(encoding, len(body), len(out), time.thread_time() - start)
+    return out
+
+
+def _observe(encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+    if bytes_in:
+        COMPRESSION_RATIO.labels(encoding).observe(bytes_out / bytes_in)
+    COMPRESSION_SECONDS.labels(encoding).observe(cpu_seconds)
+
+
+class CompressedPayloadCache:
+    """
+    LRU of compressed bodies keyed by encoding and a digest of the original.
+
+    Keying on content makes a hit correct by construction: identical bytes
+    compress to interchangeable output, whatever route or user produced them.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes: Upper bound on the total size of stored compressed bodies
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(body: bytes, encoding: str) -> Tuple[str, bytes]:
+        """Cache key for a body; BLAKE2 hashes far faster than any codec compresses."""
+        return encoding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        """
+        Look up a compressed body.
+
+        Args:
+            key: Key from ``key()``
+
+        Returns:
+            Optional[bytes]: Compressed body, or None on a miss
+        """
+        payload = self._entries.get(key)
+        if payload is None:
+            COMPRESSION_CACHE.labels("miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        COMPRESSION_CACHE.labels("hit").inc()
+        return payload
+
+    def put(self, key: Tuple[str, bytes], payload: bytes) -> None:
+        """
+        Store a compressed body, evicting least recently used entries.
+
+        Args:
+            key: Key from ``key()``
+            payload: Compressed body
+        """
+        if len(payload) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = payload
+        self.size += len(payload)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and stored bytes."""
+        return {"entries": len(self._entries), "bytes": self.size}
+
+
+compressed_payload_cache = CompressedPayloadCache(max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES)
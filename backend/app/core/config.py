@@ -1,4 +1,5 @@
 import os
+import tempfile
 import secrets
 from typing import Any, Dict, List, Optional, Union
 
@@ -26,6 +27,34 @@ class Settings(BaseSettings):
     DB_NAME: str = "listener_db"
     DB_USER: str = "postgres"
     DB_PASSWORD: str = "postgres"
+    # Comma-separated read replica URLs; reads stay on DATABASE_URL when empty
+    DATABASE_REPLICA_URLS: str = ""
+    # "round_robin" or "least_loaded"
+    DATABASE_REPLICA_SELECTION: str = "round_robin"
+    # Seconds a client's reads stay on the primary after it writes (kept in a cookie, so on any worker)
+    DATABASE_REPLICA_STICKY_SECONDS: float = 5.0
+    # Per-request SQL instrumentation (Server-Timing header, N+1 detection)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+    # Statements slower than this are logged; a sample of slow SELECTs get an EXPLAIN on Postgres
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    # Per-process tag name -> id cache; bounds staleness after renames in other workers
+    TAG_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Response compression (gzip, and brotli when installed)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    # Memory for compressed copies of repeated shared payloads (tag lists, charts)
+    COMPRESSION_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    
+    # Metrics
+    METRICS_ENABLED: bool = True
+    # Shared directory for per-worker metric files; set when running several workers
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = None
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -60,6 +89,69 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_REGION: Optional[str] = None
     AWS_S3_BUCKET: Optional[str] = None
+    # Set to a MinIO/moto server URL to use an S3-compatible stand-in
+    AWS_S3_ENDPOINT_URL: Optional[str] = None
+    # One client is shared per process; its pool must cover every upload
+    # worker times the parts each transfer sends in parallel
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_UPLOAD_WORKERS: int = 8
+    S3_UPLOAD_PART_CONCURRENCY: int = 4
+    # Uploads waiting for a worker beyond this are rejected with 503
+    S3_UPLOAD_MAX_PENDING: int = 32
+    # Lifetime of presigned POST policies for direct-to-bucket uploads
+    S3_PRESIGNED_POST_EXPIRES: int = 900
+    # Signed GET URLs are cached; lifetimes are rounded up to the bucket so
+    # URLs are shared, and not handed out within the margin of expiry
+    S3_PRESIGN_CACHE_SIZE: int = 10000
+    S3_PRESIGN_EXPIRY_BUCKET_SECONDS: int = 900
+    S3_PRESIGN_SAFETY_MARGIN_SECONDS: int = 300
+    # Resumable uploads: bytes per multipart part (S3 minimum 5 MiB), and
+    # how long an idle session lives before its parts are discarded
+    UPLOAD_SESSION_PART_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+    UPLOAD_SESSION_GC_INTERVAL_SECONDS: int = 3600
+    # Stored objects no song references are deleted once they have not been
+    # uploaded (or referenced) for this long
+    BLOB_UNREFERENCED_TTL_SECONDS: int = 24 * 3600
+    BLOB_GC_INTERVAL_SECONDS: int = 3600
+    # Local disk cache of hot audio objects served by /songs/{id}/stream
+    AUDIO_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "listener-audio-cache")
+    AUDIO_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    # Post-upload analysis (duration, tags, waveform) in a process pool
+    AUDIO_ANALYSIS_ENABLED: bool = True
+    MEDIA_WORKERS: int = 2
+    AUDIO_WAVEFORM_PEAKS: int = 800
+    FFMPEG_PATH: str = "ffmpeg"
+    # Duplicate detection by audio fingerprint (new, imported and scraped songs)
+    FINGERPRINT_ENABLED: bool = True
+    FINGERPRINT_MIN_MATCHES: int = 20
+    FINGERPRINT_MATCH_THRESHOLD: float = 0.03
+    # Scraped songs' linked audio is fetched and fingerprinted by a sweep
+    FINGERPRINT_SOURCE_INTERVAL_SECONDS: int = 900
+    FINGERPRINT_SOURCE_BATCH_SIZE: int = 20
+    FINGERPRINT_SOURCE_TIMEOUT: float = 30.0
+    # Thumbnail variants of uploaded images (longest side in pixels), rendered
+    # as WebP and JPEG in the media process pool
+    IMAGE_VARIANTS_ENABLED: bool = True
+    IMAGE_VARIANT_SIZES: List[int] = [64, 128, 256, 512]
+    IMAGE_VARIANT_QUALITY: int = 80
+    # Caching proxy for third-party images: rendered sizes, local disk
+    # budget, source limits, and how long failures are remembered
+    IMAGE_PROXY_SIZES: List[int] = [64, 128, 256, 512, 1024]
+    IMAGE_PROXY_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "listener-image-cache")
+    IMAGE_PROXY_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    IMAGE_PROXY_MAX_SOURCE_BYTES: int = 10 * 1024 * 1024
+    IMAGE_PROXY_TIMEOUT: float = 10.0
+    IMAGE_PROXY_MAX_CONNECTIONS: int = 50
+    IMAGE_PROXY_NEGATIVE_TTL: int = 6 * 3600
+    IMAGE_PROXY_ERROR_TTL: int = 60
+    IMAGE_PROXY_MAX_AGE: int = 30 * 24 * 3600
+    # HLS packaging of uploaded audio: AAC bitrate ladder (kbit/s), segment
+    # length, and how often job progress is recorded
+    HLS_ENABLED: bool = True
+    HLS_BITRATES: List[int] = [64, 128, 192]
+    HLS_SEGMENT_SECONDS: int = 4
+    HLS_PROGRESS_INTERVAL: float = 2.0
     
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
@@ -80,4 +172,9 @@ settings = Settings()
 if os.environ.get("APP_ENV") == "test":
     settings.DEBUG = True
     settings.DATABASE_URL = "sqlite:///./test.db"
-    settings.REDIS_URL = "redis://localhost:6379/1" 
\ No newline at end of file
+    settings.REDIS_URL = "redis://localhost:6379/1"
+    # Tests that exercise analysis enable it explicitly
+    settings.AUDIO_ANALYSIS_ENABLED = False
+    settings.FINGERPRINT_ENABLED = False
+    settings.IMAGE_VARIANTS_ENABLED = False
+    settings.HLS_ENABLED = False
\ No newline at end of file
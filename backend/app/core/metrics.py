@@ -0,0 +1,240 @@
+"""
+Prometheus metrics shared by the API.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set, every uvicorn/gunicorn worker
+writes its samples to memory-mapped files in that directory and ``/metrics``
+aggregates them, so a scrape sees the whole pod rather than one worker.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from app.core.config import settings
+
+# prometheus_client picks its storage backend at import time
+if settings.PROMETHEUS_MULTIPROC_DIR and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.PROMETHEUS_MULTIPROC_DIR
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEPENDENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DEPENDENCY_LATENCY = Histogram(
+    "dependency_call_duration_seconds",
+    "Latency of calls to the database, Redis and S3",
+    ["service", "operation"],
+    buckets=DEPENDENCY_BUCKETS,
+)
+DEPENDENCY_ERRORS = Counter(
+    "dependency_call_errors_total",
+    "Failed calls to the database, Redis and S3",
+    ["service", "operation"],
+)
+
+COMPRESSION_RATIO = Histogram(
+    "http_response_compression_ratio",
+    "Compressed size divided by original size of compressed responses",
+    ["encoding"],
+    buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0),
+)
+COMPRESSION_SECONDS = Histogram(
+    "http_response_compression_seconds",
+    "CPU time spent compressing one response body",
+    ["encoding"],
+    buckets=DEPENDENCY_BUCKETS,
+)
+COMPRESSION_CACHE = Counter(
+    "http_response_compression_cache_total",
+    "Lookups of cached pre-compressed payloads",
+    ["result"],
+)
+
+S3_UPLOAD_BYTES = Counter(
+    "s3_upload_bytes_total",
+    "Bytes uploaded to S3",
+    ["prefix"],
+)
+S3_UPLOAD_THROUGHPUT = Histogram(
+    "s3_upload_throughput_bytes_per_second",
+    "Transfer rate of individual S3 uploads",
+    ["prefix"],
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8, 2.5e8),
+)
+S3_UPLOADS_IN_PROGRESS = Gauge(
+    "s3_uploads_in_progress",
+    "S3 uploads running or waiting for an upload worker",
+    multiprocess_mode="livesum",
+)
+S3_UPLOAD_QUEUE_SECONDS = Histogram(
+    "s3_upload_queue_wait_seconds",
+    "Time an upload waited for a free upload worker",
+    buckets=LATENCY_BUCKETS,
+)
+S3_UPLOAD_REJECTIONS = Counter(
+    "s3_upload_rejections_total",
+    "Uploads refused because the upload queue was full",
+)
+
+S3_UPLOAD_DEDUPLICATED = Counter(
+    "s3_upload_deduplicated_total",
+    "Uploads served by an existing object with the same content",
+    ["prefix"],
+)
+
+S3_UPLOAD_DEDUPLICATED_BYTES = Counter(
+    "s3_upload_deduplicated_bytes_total",
+    "Bytes not transferred to S3 because the content was already stored",
+    ["prefix"],
+)
+
+UPLOAD_SESSIONS_ABANDONED = Counter(
+    "upload_sessions_abandoned_total",
+    "Resumable upload sessions aborted after going idle",
+)
+
+S3_PRESIGN_CACHE = Counter(
+    "s3_presign_cache_total",
+    "Lookups of cached presigned S3 URLs",
+    ["result"],
+)
+
+AUDIO_CACHE_LOOKUPS = Counter(
+    "audio_cache_lookups_total",
+    "Audio stream cache lookups; hit ratio is hit / all results",
+    ["result"],
+)
+AUDIO_CACHE_BYTES = Gauge(
+    "audio_cache_bytes",
+    "Bytes of audio held in the local stream cache",
+    # Workers on a host share the cache directory
+    multiprocess_mode="max",
+)
+AUDIO_STREAM_BYTES = Counter(
+    "audio_stream_bytes_total",
+    "Audio bytes sent by the stream endpoint",
+    ["status"],
+)
+
+IMAGE_PROXY_LOOKUPS = Counter(
+    "image_proxy_lookups_total",
+    "Image proxy cache lookups by result (hit, miss, coalesced, negative)",
+    ["result"],
+)
+IMAGE_PROXY_CACHE_BYTES = Gauge(
+    "image_proxy_cache_bytes",
+    "Bytes of resized images held in the local image proxy cache",
+    multiprocess_mode="max",
+)
+
+MEDIA_JOB_SECONDS = Histogram(
+    "media_job_duration_seconds",
+    "Wall time of media jobs run in the worker process pool",
+    ["job"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+MEDIA_JOB_FAILURES = Counter(
+    "media_job_failures_total",
+    "Media jobs that raised",
+    ["job"],
+)
+
+SONG_DUPLICATES_FLAGGED = Counter(
+    "song_duplicates_flagged_total",
+    "Songs whose audio fingerprint matched an earlier song",
+)
+
+
+def _multiprocess_dir() -> Optional[str]:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+@contextmanager
+def track_dependency(service: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an external dependency.
+
+    Args:
+        service: "db", "redis" or "s3"
+        operation: Low-cardinality operation name, e.g. "upload"
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DEPENDENCY_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        DEPENDENCY_LATENCY.labels(service, operation).observe(time.perf_counter() - start)
+
+
+def observe_statement(conn: Any, statement: str, parameters: Any, duration: float) -> None:
+    """
+    Record one SQL statement, labelled by its leading verb.
+
+    Args:
+        conn: Connection the statement ran on
+        statement: SQL as sent to the DBAPI
+        parameters: Bound parameters (unused)
+        duration: Execution time in seconds
+    """
+    verb = statement.lstrip()[:6].upper()
+    if verb not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        verb = "OTHER"
+    DEPENDENCY_LATENCY.labels("db", verb.lower()).observe(duration)
+
+
+def render_metrics() -> bytes:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        bytes: Exposition payload, aggregated across workers in multiprocess mode
+    """
+    if _multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """
+    Drop a finished worker's live gauges from the multiprocess files.
+
+    Args:
+        pid: Worker process id (defaults to the current process)
+    """
+    if _multiprocess_dir():
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,313 @@
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, MutableMapping, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request, cookie_parser
+
+from app.core.compression import (
+    CompressedPayloadCache,
+    StreamCompressor,
+    compress_body,
+    is_compressible,
+    negotiate_encoding,
+)
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_PROGRESS, REQUESTS_TOTAL
+from app.core.routes import route_template
+from app.db.instrumentation import RouteSQLStats, capture_queries, route_sql_stats
+from app.db.session import STICKY_COOKIE, StickyWindow, sticky_window
+
+logger = logging.getLogger(__name__)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class SQLTimingMiddleware:
+    """
+    ASGI middleware that records the SQL issued by each request.
+
+    Adds a ``Server-Timing: db;dur=...`` header, folds the request into
+    per-route aggregates and logs statement shapes repeated more than
+    ``n_plus_one_threshold`` times in one request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        n_plus_one_threshold: int = 10,
+        stats: RouteSQLStats = route_sql_stats,
+    ):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            n_plus_one_threshold: Executions of one statement shape allowed per request
+            stats: Aggregator receiving per-request results
+        """
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with capture_queries(scope=scope) as query_stats:
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={query_stats.total_time * 1000:.2f};desc="{query_stats.count} queries"',
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = f"{scope['method']} {route_template(scope)}"
+                repeated = query_stats.repeated_shapes(self.n_plus_one_threshold)
+                if repeated:
+                    logger.warning(
+                        "Possible N+1 on %s: %s",
+                        route,
+                        "; ".join(f"{n}x {shape}" for shape, n in repeated.items()),
+                    )
+                self.stats.add(route, query_stats, repeated)
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording request latency, status counts and in-flight requests.
+
+    Metrics are labelled by route template so path parameters do not
+    explode label cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            route = route_template(scope)
+            REQUEST_LATENCY.labels(method, route).observe(duration)
+            REQUESTS_TOTAL.labels(method, route, str(status_code)).inc()
+
+
+# Set on the request scope state by routes whose payloads repeat across users
+_CACHE_COMPRESSED = "cache_compressed"
+
+
+class ReplicaStickinessMiddleware:
+    """
+    ASGI middleware carrying read-your-writes stickiness in a cookie.
+
+    A request that commits a write gets a ``db_primary_until`` cookie; while
+    it is fresh the client's reads stay on the primary, whichever worker
+    serves them.
+    """
+
+    def __init__(self, app: ASGIApp, *, sticky_seconds: float):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            sticky_seconds: How long reads stay on the primary after a write
+        """
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cookies = cookie_parser(Headers(scope=scope).get("cookie", ""))
+        try:
+            primary_until = float(cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            primary_until = 0.0
+        window = StickyWindow(primary_until)
+        token = sticky_window.set(window)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and window.wrote:
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie",
+                    f"{STICKY_COOKIE}={window.primary_until:.3f}; Max-Age={math.ceil(self.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            sticky_window.reset(token)
+
+
+def cache_compressed_payload(request: Request) -> None:
+    """
+    Let ``CompressionMiddleware`` reuse compressed copies of this response.
+
+    Use on routes whose body is the same for every caller and changes rarely
+    (tag lists, charts); per-user payloads would only churn the cache.
+
+    Args:
+        request: Current request
+    """
+    setattr(request.state, _CACHE_COMPRESSED, True)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware negotiating gzip/brotli response compression.
+
+    Bodies smaller than ``minimum_size``, non-text media types, ranged and
+    already-encoded responses pass through untouched. Streaming responses are
+    compressed chunk by chunk. Responses flagged with
+    ``cache_compressed_payload`` are looked up in a content-keyed cache, so
+    repeat hits skip compression entirely.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache: CompressedPayloadCache,
+    ):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            minimum_size: Smallest body worth compressing, in bytes
+            gzip_level: zlib compression level (1-9)
+            brotli_quality: Brotli quality (0-11)
+            cache: Store for compressed copies of flagged payloads
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the headers until the first body chunk shows the size
+                    start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body:
+                    await self._send_whole(scope, send, start_message, body, encoding)
+                    passthrough = True
+                    return
+                compressor = StreamCompressor(
+                    encoding, gzip_level=self.gzip_level, brotli_quality=self.brotli_quality
+                )
+                headers = MutableHeaders(scope=start_message)
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                await send(start_message)
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    async def _send_whole(
+        self, scope: Scope, send: Send, start_message: Message, body: bytes, encoding: str
+    ) -> None:
+        """Send a single-chunk body, compressed if it is large enough."""
+        if len(body) < self.minimum_size:
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+        cacheable = scope.get("state", {}).get(_CACHE_COMPRESSED, False)
+        payload = None
+        if cacheable:
+            key = self.cache.key(body, encoding)
+            payload = self.cache.get(key)
+        if payload is None:
+            payload = compress_body(
+                body, encoding, gzip_level=self.gzip_level, brotli_quality=self.brotli_quality
+            )
+            if cacheable:
+                self.cache.put(key, payload)
+        headers = MutableHeaders(scope=start_message)
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(payload))
+        headers.add_vary_header("Accept-Encoding")
+        await send(start_message)
+        await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,35 @@
+"""
+Route labels for per-route metrics and logs.
+
+Kept free of other app imports so both the HTTP middleware and the database
+instrumentation can use it.
+"""
+from typing import Any, MutableMapping
+
+
+def route_template(scope: MutableMapping[str, Any]) -> str:
+    """
+    Route template matched for a request, e.g. ``/api/v1/songs/{song_id}``.
+
+    Using the template rather than the raw path keeps per-route metrics
+    bounded in cardinality.
+
+    Args:
+        scope: ASGI scope after routing
+
+    Returns:
+        str: Route template, or "unmatched" for requests no route handled
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    # Routes of included routers may carry only their own path; recover the
+    # mount prefix from the longest path suffix the route pattern matches.
+    path = scope.get("path", "")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is not None and not path_regex.match(path):
+        for index, char in enumerate(path):
+            if char == "/" and path_regex.match(path[index:]):
+                return path[:index] + template
+    return template
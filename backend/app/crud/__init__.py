@@ -33,4 +33,10 @@ song = CRUDSong(Song)
 from .comment import comment
 # Use the instance named 'tag' from crud/tag.py
 from .tag import tag
+from .audio_analysis import audio_analysis
+from .blob import blob
+from .song_fingerprint import song_fingerprint
+from .upload_session import upload_session
+from .image_variants import image_variants
+from .hls_package import hls_package
 # etc. 
\ No newline at end of file
@@ -0,0 +1,65 @@
+from typing import Any, Dict, Optional, Sequence
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase, read_only
+from app.models.audio_analysis import AudioAnalysis
+from app.models.song import Song
+
+
+class CRUDAudioAnalysis(CRUDBase[AudioAnalysis, Dict[str, Any], Dict[str, Any]]):
+    """CRUD operations for AudioAnalysis model."""
+
+    @read_only
+    async def get_by_file_path(self, db: AsyncSession, *, file_path: str) -> Optional[AudioAnalysis]:
+        """Get the analysis of an uploaded file."""
+        result = await db.execute(select(self.model).where(self.model.file_path == file_path))
+        return result.scalars().first()
+
+    @read_only
+    async def get_duration(self, db: AsyncSession, *, file_path: str) -> Optional[float]:
+        """Get the analysed duration of an uploaded file, if known."""
+        return await db.scalar(select(self.model.duration).where(self.model.file_path == file_path))
+
+    @read_only
+    async def get_durations(self, db: AsyncSession, *, file_paths: Sequence[str]) -> Dict[str, float]:
+        """Get the analysed durations of several uploaded files, where known."""
+        if not file_paths:
+            return {}
+        result = await db.execute(
+            select(self.model.file_path, self.model.duration).where(
+                self.model.file_path.in_(set(file_paths)), self.model.duration.is_not(None)
+            )
+        )
+        return dict(result.all())
+
+    async def save(self, db: AsyncSession, *, file_path: str, values: Dict[str, Any]) -> AudioAnalysis:
+        """
+        Store the analysis of a file and fill in durations its songs lack.
+
+        Songs created before the analysis finished were stored without a
+        duration (NULL); they get the analysed duration here.
+
+        Args:
+            db: Async database session
+            file_path: S3 key of the analysed file
+            values: Analysis fields (see ``analyze_file``)
+
+        Returns:
+            AudioAnalysis: Inserted or updated row
+        """
+        (analysis,) = await self.upsert_many(
+            db, objs_in=[{**values, "file_path": file_path}], index_elements=["file_path"]
+        )
+        duration = values.get("duration")
+        if duration:
+            await db.execute(
+                update(Song)
+                .where(Song.file_path == file_path, Song.duration.is_(None))
+                .values(duration=round(duration))
+            )
+            await db.commit()
+        return analysis
+
+
+audio_analysis = CRUDAudioAnalysis(AudioAnalysis)
@@ -1,15 +1,54 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import functools
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import String, func, insert, inspect, select, update, delete
+from sqlalchemy.orm import MANYTOONE
 
 from app.db.base import Base
+from app.db.session import use_replica
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+ReturnType = TypeVar("ReturnType")
+
+# Rows per multi-row statement and per transaction in the bulk methods
+BULK_CHUNK_SIZE = 1000
+
+# Rows fetched per keyset query by ``CRUDBase.stream``
+STREAM_BATCH_SIZE = 1000
+
+# Dialects whose INSERT supports ON CONFLICT
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def read_only(
+    func: Callable[..., Awaitable[ReturnType]]
+) -> Callable[..., Awaitable[ReturnType]]:
+    """
+    Declare an async CRUD method as read-only so its queries may use a replica.
+
+    The session is taken from the ``db``/``db_session`` keyword or the first
+    positional argument. Only decorate methods that never write and whose
+    results are not used for a subsequent read-modify-write.
+    """
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> ReturnType:
+        db = kwargs.get("db", kwargs.get("db_session", args[0] if args else None))
+        if db is None:
+            return await func(self, *args, **kwargs)
+        with use_replica(db):
+            return await func(self, *args, **kwargs)
+    return wrapper
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
@@ -39,6 +78,42 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).filter(self.model.id == id))
         return result.scalars().first()
 
+    async def get_updated_at(self, db: AsyncSession, *, id: Any) -> Optional[datetime]:
+        """
+        Get a row's ``updated_at`` without loading the row (for conditional GETs).
+
+        Args:
+            db: Async database session
+            id: ID to look up
+
+        Returns:
+            Optional[datetime]: Last update time, None if the row does not exist
+        """
+        return await db.scalar(select(self.model.updated_at).where(self.model.id == id))
+
+    async def get_collection_version(
+        self, db: AsyncSession, *, where: Sequence[Any] = ()
+    ) -> Tuple[Optional[datetime], int]:
+        """
+        Newest ``updated_at`` and row count of a filtered collection, in one query.
+
+        Together they change whenever a matching row is inserted, updated or
+        deleted, so they can stand in for a collection version.
+
+        Args:
+            db: Async database session
+            where: Filter criteria
+
+        Returns:
+            Tuple[Optional[datetime], int]: Newest update time (None when empty) and row count
+        """
+        result = await db.execute(
+            select(func.max(self.model.updated_at), func.count()).select_from(self.model).where(*where)
+        )
+        latest, count = result.one()
+        return latest, count
+
+    @read_only
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
@@ -56,6 +131,86 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).offset(skip).limit(limit))
         return list(result.scalars().all())
 
+    @read_only
+    async def get_rows(
+        self,
+        db: AsyncSession,
+        *,
+        columns: Sequence[Any],
+        where: Sequence[Any] = (),
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Sequence[Row]:
+        """
+        Get a page of column values without loading ORM objects.
+
+        Same paging as ``get_multi``, but only ``columns`` are selected and
+        rows are returned as tuples, bypassing the identity map.
+
+        Args:
+            db: Async database session
+            columns: Columns to select
+            where: Filter criteria
+            skip: Number of records to skip
+            limit: Maximum number of records to get
+
+        Returns:
+            Sequence[Row]: Selected rows
+        """
+        result = await db.execute(select(*columns).where(*where).offset(skip).limit(limit))
+        return result.all()
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        where: Sequence[Any] = (),
+        columns: Optional[Sequence[Any]] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate over every matching row in primary key order.
+
+        Rows are fetched in keyset chunks (``WHERE id > :last ORDER BY id
+        LIMIT :batch_size``), so each chunk is an index range scan however far
+        the iteration has got, and no cursor or transaction is held open
+        between chunks. Memory is bounded by ``batch_size``.
+
+        Args:
+            db: Async database session
+            where: Filter criteria, e.g. ``[Blog.is_active == True]``
+            columns: Columns to select instead of full objects; rows are then
+                yielded as lightweight ``Row`` tuples without ORM hydration.
+                The primary key is appended if it is not among them.
+            batch_size: Rows fetched per query
+
+        Yields:
+            Any: Model instances, or ``Row`` tuples when ``columns`` is given
+        """
+        key = self.model.id
+        if columns is None:
+            stmt = select(self.model)
+        else:
+            columns = list(columns)
+            if not any(column is key for column in columns):
+                # The key is needed to continue after the last row
+                columns.append(key)
+            stmt = select(*columns)
+        stmt = stmt.where(*where).order_by(key).limit(batch_size)
+
+        last = None
+        while True:
+            page = stmt if last is None else stmt.where(key > last)
+            result = await db.execute(page)
+            rows = result.scalars().all() if columns is None else result.all()
+            if not rows:
+                return
+            last = getattr(rows[-1], key.key)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
         Create new object.
@@ -83,6 +238,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> ModelType:
         """
         Update object.
+
+        Only fields set on ``obj_in`` are written, with one
+        ``UPDATE ... RETURNING`` that also refreshes ``db_obj``.
         
         Args:
             db: Async database session
@@ -92,22 +250,28 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             ModelType: Updated object
         """
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        values = self._column_values(obj_in, exclude_unset=True)
+        if not values:
+            return db_obj
+        # UPDATE ... RETURNING refreshes db_obj in the same round trip
+        await db.execute(
+            update(self.model)
+            .where(*self._identity_criteria(db_obj))
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
         await db.commit()
-        await db.refresh(db_obj)
+        if db.sync_session.expire_on_commit:
+            await db.refresh(db_obj)
         return db_obj
 
     async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
         """
         Remove object.
+
+        Uses a single ``DELETE ... RETURNING`` unless the model has collections
+        the ORM must clean up first (association rows, child foreign keys).
         
         Args:
             db: Async database session
@@ -116,9 +280,232 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Optional[ModelType]: Removed object if found, else None
         """
-        result = await db.execute(select(self.model).filter(self.model.id == id))
-        obj = result.scalars().first()
-        if obj:
-            await db.delete(obj)
+        if self._has_dependent_rows():
+            # Let the ORM clear association rows and child foreign keys
+            result = await db.execute(select(self.model).filter(self.model.id == id))
+            obj = result.scalars().first()
+            if obj:
+                await db.delete(obj)
+                await db.commit()
+            return obj
+        obj = await db.scalar(delete(self.model).where(self.model.id == id).returning(self.model))
+        if obj is not None:
+            # Detach like a session delete so commit does not expire it
+            db.expunge(obj)
+        await db.commit()
+        return obj
+
+    def _column_values(self, obj_in: Union[BaseModel, Dict[str, Any]], *, exclude_unset: bool = False) -> Dict[str, Any]:
+        """
+        Keep only the fields of ``obj_in`` that are mapped columns.
+
+        Values for string columns are coerced with ``str`` so schema types
+        such as ``HttpUrl`` or ``date`` bind as text.
+        """
+        if isinstance(obj_in, BaseModel):
+            obj_in = obj_in.model_dump(exclude_unset=exclude_unset)
+        values = {}
+        for attr in inspect(self.model).column_attrs:
+            if attr.key in obj_in:
+                value = obj_in[attr.key]
+                if value is not None and not isinstance(value, str) and isinstance(attr.columns[0].type, String):
+                    value = str(value)
+                values[attr.key] = value
+        return values
+
+    def _identity_criteria(self, db_obj: ModelType) -> List[Any]:
+        """WHERE criteria matching ``db_obj`` by primary key."""
+        mapper = inspect(self.model)
+        identity = mapper.primary_key_from_instance(db_obj)
+        return [column == value for column, value in zip(mapper.primary_key, identity)]
+
+    def _has_dependent_rows(self) -> bool:
+        """Whether deleting a row needs the ORM to touch other tables first."""
+        return any(
+            rel.direction is not MANYTOONE and not rel.viewonly and not rel.passive_deletes
+            for rel in inspect(self.model).relationships
+        )
+
+    @staticmethod
+    def _chunks(rows: Sequence[Any], chunk_size: int) -> List[Sequence[Any]]:
+        return [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        commit: bool = True,
+    ) -> List[ModelType]:
+        """
+        Create objects with multi-row ``INSERT ... RETURNING`` statements.
+
+        Each chunk is inserted by one statement and committed on its own, so a
+        failure only rolls back the chunk being inserted. Fields that are not
+        columns (e.g. relationship lists on create schemas) are ignored.
+
+        Returned rows are matched to their input with a sentinel; dialects
+        without one (SQLite) fall back to a statement per row.
+
+        Args:
+            db: Async database session
+            objs_in: Objects to create
+            chunk_size: Rows per statement and transaction
+            commit: Commit each chunk; False leaves the transaction (e.g. a
+                SAVEPOINT) to the caller
+
+        Returns:
+            List[ModelType]: Created objects, in input order
+        """
+        created: List[ModelType] = []
+        for chunk in self._chunks(objs_in, chunk_size):
+            rows = [self._column_values(obj_in) for obj_in in chunk]
+            result = await db.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True), rows
+            )
+            created.extend(result.all())
+            if commit:
+                await db.commit()
+        return created
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[ModelType]:
+        """
+        Insert objects, updating rows that conflict on ``index_elements``.
+
+        Uses ``INSERT ... ON CONFLICT`` (PostgreSQL and SQLite), one statement
+        and one transaction per chunk.
+
+        Args:
+            db: Async database session
+            objs_in: Objects to insert or update
+            index_elements: Columns of the unique constraint to conflict on
+            update_fields: Columns overwritten on conflict; defaults to every
+                supplied column except ``index_elements`` and ``created_at``.
+                An empty sequence leaves existing rows untouched (``DO NOTHING``).
+            chunk_size: Rows per statement and transaction
+
+        Returns:
+            List[ModelType]: Inserted and updated objects. With ``DO NOTHING``
+            only newly inserted rows are returned.
+
+        Raises:
+            NotImplementedError: If the database has no ON CONFLICT support
+        """
+        upserted: List[ModelType] = []
+        for chunk in self._chunks(objs_in, chunk_size):
+            rows = [self._column_values(obj_in) for obj_in in chunk]
+            fields = update_fields
+            if fields is None:
+                fields = [key for key in rows[0] if key not in index_elements and key != "created_at"]
+            stmt = self._upsert_statement(db, index_elements=index_elements, update_fields=fields)
+            result = await db.scalars(
+                stmt.returning(self.model, sort_by_parameter_order=True),
+                rows,
+                execution_options={"populate_existing": True},
+            )
+            upserted.extend(result.all())
+            await db.commit()
+        return upserted
+
+    def _upsert_statement(
+        self, db: AsyncSession, *, index_elements: Sequence[str], update_fields: Sequence[str]
+    ) -> Any:
+        """
+        ``INSERT ... ON CONFLICT`` for the session's dialect.
+
+        Args:
+            db: Async database session
+            index_elements: Columns of the unique constraint to conflict on
+            update_fields: Columns overwritten on conflict; ``DO NOTHING`` when empty
+
+        Returns:
+            Any: Insert statement to execute with a list of rows
+
+        Raises:
+            NotImplementedError: If the database has no ON CONFLICT support
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            raise NotImplementedError(f"Upserts are not supported on {dialect}")
+        stmt = _UPSERT_INSERTS[dialect](self.model)
+        if update_fields:
+            set_ = {field: stmt.excluded[field] for field in update_fields}
+            # ON CONFLICT DO UPDATE does not fire column onupdate defaults
+            if "updated_at" not in set_ and "updated_at" in stmt.excluded:
+                set_["updated_at"] = stmt.excluded["updated_at"]
+            return stmt.on_conflict_do_update(index_elements=list(index_elements), set_=set_)
+        return stmt.on_conflict_do_nothing(index_elements=list(index_elements))
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> int:
+        """
+        Update objects by primary key without loading them.
+
+        Each dict must contain the primary key plus the columns to change.
+        Rows in a chunk are sent as one executemany ``UPDATE`` and committed
+        together. Keys that do not exist are skipped: the chunk's keys are
+        matched with one SELECT first, since executemany row counts are not
+        reliable on every driver.
+
+        Args:
+            db: Async database session
+            objs_in: Primary key and new values per object
+            chunk_size: Rows per statement and transaction
+
+        Returns:
+            int: Number of rows matched and updated
+        """
+        key = self.model.id
+        updated = 0
+        for chunk in self._chunks(objs_in, chunk_size):
+            rows = [self._column_values(obj_in) for obj_in in chunk]
+            existing = set(await db.scalars(select(key).where(key.in_([row["id"] for row in rows]))))
+            rows = [row for row in rows if row["id"] in existing]
+            if rows:
+                await db.execute(update(self.model), rows)
+            await db.commit()
+            updated += len(rows)
+        return updated
+
+    async def remove_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[Any],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[Any]:
+        """
+        Delete objects by ID with ``DELETE ... WHERE id IN (...) RETURNING id``.
+
+        Args:
+            db: Async database session
+            ids: IDs to delete
+            chunk_size: IDs per statement and transaction
+
+        Returns:
+            List[Any]: IDs that existed and were deleted
+        """
+        removed: List[Any] = []
+        for chunk in self._chunks(ids, chunk_size):
+            result = await db.scalars(
+                delete(self.model)
+                .where(self.model.id.in_(chunk))
+                .returning(self.model.id)
+            )
+            removed.extend(result.all())
             await db.commit()
-        return obj 
\ No newline at end of file
+        return removed
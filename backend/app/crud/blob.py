@@ -0,0 +1,152 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import _UPSERT_INSERTS, CRUDBase
+from app.models.blob import Blob
+
+
+class CRUDBlob(CRUDBase[Blob, Dict[str, Any], Dict[str, Any]]):
+    """CRUD operations for Blob model (reference-counted uploads)."""
+
+    async def touch(self, db: AsyncSession, *, sha256: str) -> Optional[str]:
+        """
+        Find already-stored content, marking it as just uploaded.
+
+        The new ``updated_at`` keeps an unreferenced blob from being collected
+        before the song for this upload is created.
+
+        Args:
+            db: Async database session
+            sha256: Hex SHA-256 of the content
+
+        Returns:
+            Optional[str]: S3 key of the stored content, or None if it is not stored
+        """
+        file_path = await db.scalar(
+            update(self.model)
+            .where(self.model.sha256 == sha256)
+            .values(updated_at=datetime.utcnow())
+            .returning(self.model.file_path)
+        )
+        await db.commit()
+        return file_path
+
+    async def register(
+        self, db: AsyncSession, *, sha256: str, file_path: str, size: int, content_type: Optional[str]
+    ) -> str:
+        """
+        Record content that was just stored, without any references yet.
+
+        If the content is already recorded (a concurrent upload of it, or an
+        upload under a key of the client's choosing), the blob is touched and
+        its existing key returned.
+
+        Args:
+            db: Async database session
+            sha256: Hex SHA-256 of the content
+            file_path: S3 key the content was stored under
+            size: Content size in bytes
+            content_type: MIME type the object was stored with
+
+        Returns:
+            str: S3 key the content is recorded under
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            raise NotImplementedError(f"Upserts are not supported on {dialect}")
+        stmt = _UPSERT_INSERTS[dialect](self.model).values(
+            sha256=sha256, file_path=file_path, size=size, content_type=content_type, ref_count=0
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sha256"], set_={"updated_at": datetime.utcnow()}
+        )
+        stored = await db.scalar(stmt.returning(self.model.file_path))
+        await db.commit()
+        return stored
+
+    async def add_references(self, db: AsyncSession, *, file_paths: Sequence[Optional[str]]) -> None:
+        """
+        Take a reference for each song created with one of ``file_paths``.
+
+        Does not commit: call in the transaction that inserts the songs.
+        Files without a blob row (stored before deduplication, or links)
+        are not counted.
+
+        Args:
+            db: Async database session
+            file_paths: File path of each new song; repeats take several references
+        """
+        await self._shift(db, file_paths, 1)
+
+    async def release(self, db: AsyncSession, *, file_paths: Sequence[Optional[str]]) -> None:
+        """
+        Drop the reference of each song deleted with one of ``file_paths``.
+
+        Does not commit: call in the transaction that deletes the songs.
+        Blobs left without references are deleted by
+        ``collect_unreferenced_blobs``.
+
+        Args:
+            db: Async database session
+            file_paths: File path of each deleted song
+        """
+        await self._shift(db, file_paths, -1)
+
+    async def _shift(self, db: AsyncSession, file_paths: Sequence[Optional[str]], step: int) -> None:
+        by_count: Dict[int, List[str]] = {}
+        for file_path, count in Counter(path for path in file_paths if path).items():
+            by_count.setdefault(count, []).append(file_path)
+        for count, paths in by_count.items():
+            await db.execute(
+                update(self.model)
+                .where(self.model.file_path.in_(paths))
+                .values(ref_count=self.model.ref_count + step * count)
+            )
+
+    async def get_unreferenced(self, db: AsyncSession, *, before: datetime, limit: int) -> List[Blob]:
+        """
+        Get blobs no song references that were last uploaded before ``before``.
+
+        Args:
+            db: Async database session
+            before: Upload time cutoff
+            limit: Maximum number of blobs
+
+        Returns:
+            List[Blob]: Unreferenced blobs, oldest first
+        """
+        result = await db.scalars(
+            select(self.model)
+            .where(self.model.ref_count == 0, self.model.updated_at < before)
+            .order_by(self.model.updated_at)
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def remove_unreferenced(self, db: AsyncSession, *, id: int, before: datetime) -> Optional[str]:
+        """
+        Delete a blob row if it is still unreferenced and not re-uploaded.
+
+        Does not commit: the caller deletes the object first, while the row
+        is locked, so an upload or song creation for the same content waits
+        instead of racing the delete.
+
+        Args:
+            db: Async database session
+            id: Blob ID
+            before: Upload time cutoff the blob was selected with
+
+        Returns:
+            Optional[str]: S3 key of the deleted blob, or None if it was kept
+        """
+        return await db.scalar(
+            delete(self.model)
+            .where(self.model.id == id, self.model.ref_count == 0, self.model.updated_at < before)
+            .returning(self.model.file_path)
+        )
+
+
+blob = CRUDBlob(Blob)
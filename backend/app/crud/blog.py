@@ -1,9 +1,9 @@
-from typing import List, Optional, Union, Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.crud.base import STREAM_BATCH_SIZE, CRUDBase, read_only
 from app.models.blog import Blog
 from app.schemas.blogs.blog import BlogCreate, BlogUpdate
 
@@ -29,6 +29,7 @@ class CRUDBlog(CRUDBase[Blog, BlogCreate, BlogUpdate]):
         """Get a blog by URL (synchronous version)."""
         return db_session.execute(select(self.model).where(self.model.url == url)).scalars().first()
     
+    @read_only
     async def get_active_blogs(self, db_session: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[Blog]:
         """Get all active blogs."""
         result = await db_session.execute(
@@ -39,6 +40,18 @@ class CRUDBlog(CRUDBase[Blog, BlogCreate, BlogUpdate]):
         )
         return result.scalars().all()
     
+    def stream_active_blogs(
+        self,
+        db_session: AsyncSession,
+        *,
+        columns: Optional[Sequence[Any]] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> AsyncIterator[Any]:
+        """Iterate over all active blogs without offset paging (for the scraper and jobs)."""
+        return self.stream(
+            db_session, where=[self.model.is_active == True], columns=columns, batch_size=batch_size
+        )
+    
     def get_active_blogs_sync(self, db_session: Session, *, skip: int = 0, limit: int = 100) -> List[Blog]:
         """Get all active blogs (synchronous version)."""
         return db_session.execute(
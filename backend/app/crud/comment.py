@@ -3,7 +3,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, read_only
 from app.models.comment import Comment
 from app.schemas.comments.comment import CommentCreate, CommentUpdate
 
@@ -67,6 +67,7 @@ class CRUDComment(CRUDBase[Comment, CommentCreate, CommentUpdate]):
         db_session.refresh(db_obj)
         return db_obj
     
+    @read_only
     async def get_by_target(
         self, 
         db_session: AsyncSession, 
@@ -77,6 +78,16 @@ class CRUDComment(CRUDBase[Comment, CommentCreate, CommentUpdate]):
         limit: int = 100
     ) -> List[Comment]:
         """Get comments by target type and ID."""
+        result = await db_session.execute(
+            select(self.model)
+            .where(*self.target_criteria(target_type, target_id))
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+    
+    def target_criteria(self, target_type: str, target_id: int) -> List[Any]:
+        """WHERE criteria selecting the comments on one song, band or blog."""
         # Define the filter based on target type
         if target_type == "song":
             filter_condition = self.model.song_id == target_id
@@ -86,16 +97,9 @@ class CRUDComment(CRUDBase[Comment, CommentCreate, CommentUpdate]):
             filter_condition = self.model.blog_id == target_id
         else:
             raise ValueError(f"Invalid target type: {target_type}")
-        
-        result = await db_session.execute(
-            select(self.model)
-            .where(self.model.target_type == target_type)
-            .where(filter_condition)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return [self.model.target_type == target_type, filter_condition]
     
+    @read_only
     async def get_by_blog(
         self, db_session: AsyncSession, *, blog_id: int, skip: int = 0, limit: int = 100
     ) -> List[Comment]:
@@ -136,6 +140,7 @@ class CRUDComment(CRUDBase[Comment, CommentCreate, CommentUpdate]):
             .limit(limit)
         ).scalars().all()
     
+    @read_only
     async def get_by_user(
         self, db_session: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100
     ) -> List[Comment]:
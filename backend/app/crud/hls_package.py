@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase, read_only
+from app.models.hls_package import HlsPackage
+from app.models.song import Song
+
+
+class CRUDHlsPackage(CRUDBase[HlsPackage, Dict[str, Any], Dict[str, Any]]):
+    """CRUD operations for HlsPackage model."""
+
+    @read_only
+    async def get_by_file_path(self, db: AsyncSession, *, file_path: str) -> Optional[HlsPackage]:
+        """Get the HLS package of an uploaded file."""
+        result = await db.execute(select(self.model).where(self.model.file_path == file_path))
+        return result.scalars().first()
+
+    @read_only
+    async def get_by_song(self, db: AsyncSession, *, song_id: int) -> Optional[HlsPackage]:
+        """Get the HLS package of a song's file."""
+        result = await db.execute(
+            select(self.model).join(Song, Song.file_path == self.model.file_path).where(Song.id == song_id)
+        )
+        return result.scalars().first()
+
+    @read_only
+    async def get_manifest(self, db: AsyncSession, *, file_path: str) -> Optional[str]:
+        """Get the master playlist key of an uploaded file, if packaged."""
+        return await db.scalar(
+            select(self.model.manifest_path).where(self.model.file_path == file_path, self.model.status == "done")
+        )
+
+    async def start(self, db: AsyncSession, *, file_path: str) -> HlsPackage:
+        """
+        Record that packaging of a file started, resetting an earlier attempt.
+
+        Args:
+            db: Async database session
+            file_path: S3 key of the original audio
+
+        Returns:
+            HlsPackage: Inserted or updated row
+        """
+        (row,) = await self.upsert_many(
+            db,
+            objs_in=[{
+                "file_path": file_path, "status": "running", "progress": 0.0,
+                "manifest_path": None, "renditions": [], "error": None,
+            }],
+            index_elements=["file_path"],
+        )
+        return row
+
+    async def set_progress(self, db: AsyncSession, *, file_path: str, progress: float) -> None:
+        """
+        Update the progress of a running job.
+
+        Args:
+            db: Async database session
+            file_path: S3 key of the original audio
+            progress: Fraction done, 0-1
+        """
+        await db.execute(
+            update(self.model)
+            .where(self.model.file_path == file_path, self.model.status == "running")
+            .values(progress=progress)
+        )
+        await db.commit()
+
+    async def finish(
+        self,
+        db: AsyncSession,
+        *,
+        file_path: str,
+        manifest_path: Optional[str] = None,
+        renditions: Optional[List[Dict[str, Any]]] = None,
+        error: Optional[str] = None,
+    ) -> HlsPackage:
+        """
+        Store the outcome of a job and point the file's songs at the manifest.
+
+        Args:
+            db: Async database session
+            file_path: S3 key of the original audio
+            manifest_path: S3 key of the master playlist, on success
+            renditions: Packaged renditions, on success
+            error: Why packaging failed, if it did
+
+        Returns:
+            HlsPackage: Inserted or updated row
+        """
+        done = error is None
+        (row,) = await self.upsert_many(
+            db,
+            objs_in=[{
+                "file_path": file_path,
+                "status": "done" if done else "failed",
+                "progress": 1.0 if done else 0.0,
+                "manifest_path": manifest_path if done else None,
+                "renditions": renditions or [],
+                "error": error,
+            }],
+            index_elements=["file_path"],
+        )
+        if done:
+            await db.execute(
+                update(Song).where(Song.file_path == file_path).values(playback_manifest=manifest_path)
+            )
+            await db.commit()
+        return row
+
+
+hls_package = CRUDHlsPackage(HlsPackage)
@@ -0,0 +1,56 @@
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase, read_only
+from app.models.image_variants import ImageVariants
+
+
+class CRUDImageVariants(CRUDBase[ImageVariants, Dict[str, Any], Dict[str, Any]]):
+    """CRUD operations for ImageVariants model."""
+
+    async def save(
+        self, db: AsyncSession, *, file_path: str, variants: List[Dict[str, Any]], error: Optional[str] = None
+    ) -> ImageVariants:
+        """
+        Record the variants generated for an image, replacing earlier ones.
+
+        Args:
+            db: Async database session
+            file_path: S3 key of the original image
+            variants: Stored variants (size, format, width, height, file_path)
+            error: Why generation failed, if it did
+
+        Returns:
+            ImageVariants: Inserted or updated row
+        """
+        (row,) = await self.upsert_many(
+            db,
+            objs_in=[{"file_path": file_path, "variants": variants, "error": error}],
+            index_elements=["file_path"],
+        )
+        return row
+
+    @read_only
+    async def get_by_file_paths(
+        self, db: AsyncSession, *, file_paths: Sequence[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Variants of several images in one query, e.g. the covers of a page.
+
+        Args:
+            db: Async database session
+            file_paths: S3 keys of original images
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Variants per original that has any
+        """
+        if not file_paths:
+            return {}
+        result = await db.execute(
+            select(self.model.file_path, self.model.variants).where(self.model.file_path.in_(set(file_paths)))
+        )
+        return {file_path: variants for file_path, variants in result if variants}
+
+
+image_variants = CRUDImageVariants(ImageVariants)
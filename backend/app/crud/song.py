@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,7 +6,8 @@ from sqlalchemy.sql import text, func
 from sqlalchemy import select
 from fastapi.encoders import jsonable_encoder
 
-from app.crud.base import CRUDBase
+from app.crud.base import BULK_CHUNK_SIZE, CRUDBase, read_only
+from app.crud.blob import blob as crud_blob
 from app.models.song import Song
 from app.models.user_song import UserSong
 from app.models.band import Band
@@ -15,10 +16,14 @@ from app.models.tag import Tag
 from app.models.user_band import UserBand
 from app.models.user_blog import UserBlog
 from app.schemas.songs.song import SongCreate, SongUpdate
-from app.crud import tag as crud_tag
+from app.crud.tag import tag as crud_tag
+from app.models.song_tag import SongTag
+from app.models.comment import Comment
+from app.models.song_fingerprint import SongFingerprint
 
 
 class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
+    @read_only
     async def search(
         self,
         db: AsyncSession,
@@ -107,6 +112,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = await db.execute(stmt)
         return list(result.scalars().all())  # Convert to list
 
+    @read_only
     async def get_popular_songs(
         self,
         db: AsyncSession,
@@ -156,6 +162,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = await db.execute(stmt)
         return list(result.scalars().all())  # Convert to list
 
+    @read_only
     async def get_song_with_details(
         self,
         db: AsyncSession,
@@ -231,7 +238,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
             if user_song:
                 song_data["user_data"] = {
                     "is_favorite": user_song.is_favorite,
-                    "last_played_at": user_song.last_played_at,
+                    "last_played_at": user_song.last_played,
                     "play_count": user_song.play_count
                 }
             else:
@@ -243,6 +250,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
 
         return song_data
 
+    @read_only
     async def get_feed_for_user(
         self,
         db: AsyncSession,
@@ -282,6 +290,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = await db.execute(feed_stmt)
         return list(result.scalars().all()) # Convert to list
 
+    @read_only
     async def get_user_favorites(
         self,
         db: AsyncSession,
@@ -306,6 +315,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    @read_only
     async def get_user_recently_played(
         self,
         db: AsyncSession,
@@ -321,8 +331,8 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
             select(self.model)
             .join(UserSong, UserSong.song_id == Song.id)
             .where(UserSong.user_id == user_id)
-            .where(UserSong.last_played_at.isnot(None))
-            .order_by(sa.desc(UserSong.last_played_at))
+            .where(UserSong.last_played.isnot(None))
+            .order_by(sa.desc(UserSong.last_played))
             .offset(skip)
             .limit(limit)
         )
@@ -330,6 +340,7 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    @read_only
     async def get_similar_songs(
         self,
         db: AsyncSession,
@@ -367,19 +378,24 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    async def _replace_tags(self, db: AsyncSession, *, song_id: int, tag_ids: List[int]) -> None:
+        """Point a song's song_tag rows at ``tag_ids``."""
+        await db.execute(sa.delete(SongTag).where(SongTag.song_id == song_id))
+        if tag_ids:
+            await db.execute(sa.insert(SongTag), [{"song_id": song_id, "tag_id": tag_id} for tag_id in tag_ids])
+
     async def create_async(self, db: AsyncSession, *, obj_in: SongCreate) -> Song:
         """Create a new song, handling tags."""
         obj_in_data = jsonable_encoder(obj_in, exclude={"tags"})
         db_obj = self.model(**obj_in_data)
-        
+        db.add(db_obj)
+        await crud_blob.add_references(db, file_paths=[db_obj.file_path])
+
         if obj_in.tags:
-            tags_to_add = []
-            for tag_name in obj_in.tags:
-                tag = await crud_tag.get_or_create(db, name=tag_name.strip())
-                tags_to_add.append(tag)
-            db_obj.tags = tags_to_add
+            tag_ids = await crud_tag.resolve_ids(db, names=obj_in.tags)
+            await db.flush()
+            await self._replace_tags(db, song_id=db_obj.id, tag_ids=list(tag_ids.values()))
 
-        db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
@@ -393,24 +409,165 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
     ) -> Song:
         """Update a song, handling tags."""
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = dict(obj_in)
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
         
         # Handle tags separately if present in update_data
         if "tags" in update_data:
-            tag_names = update_data.pop("tags")
-            if tag_names is not None: # Allow setting tags to [] or null/None
-                tags_to_set = []
-                for tag_name in tag_names:
-                    tag = await crud_tag.get_or_create(db, name=tag_name.strip())
-                    tags_to_set.append(tag)
-                db_obj.tags = tags_to_set
-            else:
-                 db_obj.tags = [] # Clear tags if None/null is passed
+            # Setting tags to [] or null/None clears them
+            tag_ids = await crud_tag.resolve_ids(db, names=update_data.pop("tags") or [])
+            await self._replace_tags(db, song_id=db_obj.id, tag_ids=list(tag_ids.values()))
+            db.expire(db_obj, ["tags"])
+            if not update_data:
+                await db.commit()
+                await db.refresh(db_obj)
+                return db_obj
 
         # Update other fields
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        return await self.update(db, db_obj=db_obj, obj_in=update_data)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Song,
+        obj_in: Union[SongUpdate, Dict[str, Any]]
+    ) -> Song:
+        """Update a song, moving its file reference when the file changes."""
+        file_path = self._column_values(obj_in, exclude_unset=True).get("file_path", db_obj.file_path)
+        if file_path != db_obj.file_path:
+            await crud_blob.release(db, file_paths=[db_obj.file_path])
+            await crud_blob.add_references(db, file_paths=[file_path])
+        return await super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[SongCreate, Dict[str, Any]]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        commit: bool = True,
+    ) -> List[Song]:
+        """Create songs in bulk, taking each one's file reference in its chunk's transaction."""
+        created: List[Song] = []
+        for chunk in self._chunks(objs_in, chunk_size):
+            songs = await super().create_many(db, objs_in=chunk, chunk_size=chunk_size, commit=False)
+            await crud_blob.add_references(db, file_paths=[song.file_path for song in songs])
+            created.extend(songs)
+            if commit:
+                await db.commit()
+        return created
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Song]:
+        """Remove a song, releasing its file reference in the same transaction."""
+        file_path = await db.scalar(select(Song.file_path).where(Song.id == id))
+        await crud_blob.release(db, file_paths=[file_path])
+        return await super().remove(db, id=id)
+
+    async def claim_sources_to_fingerprint(self, db: AsyncSession, *, limit: int) -> List[Tuple[int, str]]:
+        """
+        Claim scraped songs whose linked audio was never fetched for fingerprinting.
+
+        Claimed songs are marked with ``source_fingerprinted_at`` up front,
+        so each is tried once, by one worker.
+
+        Args:
+            db: Async database session
+            limit: Maximum number of songs
+
+        Returns:
+            List[Tuple[int, str]]: ID and source URL of each claimed song
+        """
+        unclaimed = [
+            Song.file_path.is_(None), Song.source_url.is_not(None), Song.source_fingerprinted_at.is_(None)
+        ]
+        ids = (await db.scalars(select(Song.id).where(*unclaimed).order_by(Song.id).limit(limit))).all()
+        if not ids:
+            return []
+        result = await db.execute(
+            sa.update(Song)
+            .where(Song.id.in_(ids), *unclaimed)
+            .values(source_fingerprinted_at=datetime.utcnow())
+            .returning(Song.id, Song.source_url)
+        )
+        claimed = [tuple(row) for row in result.all()]
+        await db.commit()
+        return claimed
+
+    async def mark_duplicate(self, db: AsyncSession, *, song_id: int, duplicate_of_id: int) -> None:
+        """
+        Flag a song as a duplicate of another.
+
+        Args:
+            db: Async database session
+            song_id: The duplicate
+            duplicate_of_id: The song it duplicates
+        """
+        await db.execute(
+            sa.update(Song).where(Song.id == song_id).values(duplicate_of_id=duplicate_of_id)
+        )
+        await db.commit()
+
+    async def merge_duplicate(self, db: AsyncSession, *, duplicate: Song) -> None:
+        """
+        Fold a flagged duplicate into the song it duplicates, then delete it.
+
+        Favorites and play history move to the original (combined for users
+        who have both), as do comments, tags and songs flagged as duplicates
+        of the duplicate. The duplicate's file reference is released; the
+        original keeps its own.
+
+        Args:
+            db: Async database session
+            duplicate: Song with ``duplicate_of_id`` set
+        """
+        original_id, duplicate_id, file_path = duplicate.duplicate_of_id, duplicate.id, duplicate.file_path
+
+        history = (await db.execute(select(UserSong).where(UserSong.song_id == duplicate_id))).scalars().all()
+        existing = {
+            row.user_id: row
+            for row in (
+                await db.execute(
+                    select(UserSong).where(
+                        UserSong.song_id == original_id,
+                        UserSong.user_id.in_([row.user_id for row in history]),
+                    )
+                )
+            ).scalars()
+        }
+        for row in history:
+            kept = existing.get(row.user_id)
+            if kept is None:
+                continue
+            kept.is_favorite = kept.is_favorite or row.is_favorite
+            kept.play_count = (kept.play_count or 0) + (row.play_count or 0)
+            if row.last_played and (kept.last_played is None or row.last_played > kept.last_played):
+                kept.last_played = row.last_played
+            await db.delete(row)
+        await db.flush()
+        await db.execute(
+            sa.update(UserSong).where(UserSong.song_id == duplicate_id).values(song_id=original_id)
+        )
+
+        await db.execute(sa.update(Comment).where(Comment.song_id == duplicate_id).values(song_id=original_id))
+        await db.execute(
+            sa.update(Song).where(Song.duplicate_of_id == duplicate_id).values(duplicate_of_id=original_id)
+        )
+        tag_ids = select(SongTag.tag_id).where(SongTag.song_id == original_id)
+        await db.execute(
+            sa.insert(SongTag).from_select(
+                ["song_id", "tag_id"],
+                select(sa.literal(original_id), SongTag.tag_id).where(
+                    SongTag.song_id == duplicate_id, SongTag.tag_id.not_in(tag_ids)
+                ),
+            )
+        )
+        await db.execute(sa.delete(SongTag).where(SongTag.song_id == duplicate_id))
+        await db.execute(sa.delete(SongFingerprint).where(SongFingerprint.song_id == duplicate_id))
+        await db.execute(sa.delete(Song).where(Song.id == duplicate_id))
+        await crud_blob.release(db, file_paths=[file_path])
+        await db.commit()
 
 
 song = CRUDSong(Song) 
\ No newline at end of file
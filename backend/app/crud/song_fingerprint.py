@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import BULK_CHUNK_SIZE, CRUDBase, read_only
+from app.models.song import Song
+from app.models.song_fingerprint import SongFingerprint
+from app.services.fingerprint import best_alignment
+
+# Hashes per candidate lookup (bound parameters per statement)
+LOOKUP_CHUNK_SIZE = 500
+
+
+class CRUDSongFingerprint(CRUDBase[SongFingerprint, Dict[str, Any], Dict[str, Any]]):
+    """CRUD operations for the fingerprint hash index."""
+
+    async def replace(self, db: AsyncSession, *, song_id: int, fingerprint: np.ndarray) -> int:
+        """
+        Store a song's fingerprint, replacing any previous one.
+
+        Args:
+            db: Async database session
+            song_id: Song the fingerprint belongs to
+            fingerprint: ``(n, 2)`` array of ``(hash, anchor frame)``
+
+        Returns:
+            int: Number of hashes stored
+        """
+        await db.execute(delete(self.model).where(self.model.song_id == song_id))
+        rows = [
+            {"song_id": song_id, "hash": int(hash_), "anchor": int(anchor)}
+            for hash_, anchor in fingerprint.tolist()
+        ]
+        for chunk in self._chunks(rows, BULK_CHUNK_SIZE):
+            await db.execute(insert(self.model), chunk)
+        await db.commit()
+        return len(rows)
+
+    @read_only
+    async def find_match(
+        self, db: AsyncSession, *, fingerprint: np.ndarray, exclude_song_id: Optional[int] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Find the indexed song whose fingerprint best aligns with ``fingerprint``.
+
+        Candidates come from the hash index; the winner is the song with the
+        most hashes agreeing on one time offset.
+
+        Args:
+            db: Async database session
+            fingerprint: ``(n, 2)`` array of ``(hash, anchor frame)``
+            exclude_song_id: Song to ignore (the one being checked)
+
+        Returns:
+            Optional[Tuple[int, int]]: Song ID and aligned hash count, or None
+        """
+        hashes = np.unique(fingerprint[:, 0]).tolist() if len(fingerprint) else []
+        found = []
+        for chunk in self._chunks(hashes, LOOKUP_CHUNK_SIZE):
+            stmt = (
+                select(self.model.song_id, self.model.hash, self.model.anchor)
+                # Joining skips rows of deleted songs where foreign keys are not enforced
+                .join(Song, Song.id == self.model.song_id)
+                .where(self.model.hash.in_(chunk))
+            )
+            if exclude_song_id is not None:
+                stmt = stmt.where(self.model.song_id != exclude_song_id)
+            found.extend((await db.execute(stmt)).all())
+        if not found:
+            return None
+        song_ids, matched, anchors = np.array(found, dtype=np.int64).T
+        return best_alignment(fingerprint, song_ids, matched, anchors)
+
+
+song_fingerprint = CRUDSongFingerprint(SongFingerprint)
@@ -1,15 +1,156 @@
-from typing import List, Optional, Union, Dict, Any
+import time
+from typing import Iterable, List, Optional, Tuple, Union, Dict, Any
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.tag import Tag
 from app.schemas.tags.tag import TagCreate, TagUpdate
 
 
+class TagCache:
+    """
+    Process-wide tag name -> id map.
+
+    The tag vocabulary is small and read on every tagged write, so ids are
+    kept in memory. Renames and deletes in this process invalidate entries
+    immediately; the TTL bounds staleness caused by other workers.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int = 10000):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl_seconds: Seconds an entry stays valid
+            max_size: Entries kept before the cache is cleared
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: Dict[str, Tuple[int, float]] = {}
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Cached ids for the given names.
+
+        Args:
+            names: Tag names
+
+        Returns:
+            Dict[str, int]: Ids of the names that are cached and fresh
+        """
+        now = time.monotonic()
+        found = {}
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is not None and entry[1] > now:
+                found[name] = entry[0]
+        return found
+
+    def set_many(self, ids: Dict[str, int]) -> None:
+        """Cache tag ids by name."""
+        if len(self._entries) + len(ids) > self.max_size:
+            self._entries.clear()
+        expires_at = time.monotonic() + self.ttl_seconds
+        for name, tag_id in ids.items():
+            self._entries[name] = (tag_id, expires_at)
+
+    def invalidate(self, *, name: Optional[str] = None, tag_id: Optional[int] = None) -> None:
+        """
+        Drop entries for a tag name and/or id.
+
+        Args:
+            name: Tag name to drop
+            tag_id: Drop every name cached for this id
+        """
+        if name is not None:
+            self._entries.pop(name, None)
+        if tag_id is not None:
+            for cached_name in [n for n, (i, _) in self._entries.items() if i == tag_id]:
+                del self._entries[cached_name]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+tag_cache = TagCache(ttl_seconds=settings.TAG_CACHE_TTL_SECONDS)
+
+
+def normalize_tag_names(names: Iterable[str]) -> List[str]:
+    """
+    Strip tag names and drop blanks and duplicates, keeping first-seen order.
+
+    Args:
+        names: Raw tag names
+
+    Returns:
+        List[str]: Names as stored
+    """
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+
 class CRUDTag(CRUDBase[Tag, TagCreate, TagUpdate]):
     """CRUD operations for Tag model."""
+
+    async def resolve_ids(self, db_session: AsyncSession, *, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Map tag names to ids, creating missing tags.
+
+        Cache misses cost one ``INSERT ... ON CONFLICT DO NOTHING RETURNING``
+        for all missing names plus, for names that already existed, one
+        SELECT. New tags join the caller's transaction and are only cached
+        once they are read back as existing rows, so a rollback never leaves
+        dangling ids in the cache.
+
+        Args:
+            db_session: Async database session
+            names: Tag names; stripped and deduplicated
+
+        Returns:
+            Dict[str, int]: Tag id per normalized name, in first-seen order
+        """
+        names = normalize_tag_names(names)
+        ids = tag_cache.get_many(names)
+        missing = [name for name in names if name not in ids]
+        if not missing:
+            return ids
+
+        stmt = self._upsert_statement(db_session, index_elements=["name"], update_fields=[])
+        result = await db_session.execute(
+            stmt.returning(self.model.name, self.model.id), [{"name": name} for name in missing]
+        )
+        ids.update(result.tuples().all())
+        existing = [name for name in missing if name not in ids]
+        if existing:
+            result = await db_session.execute(
+                select(self.model.name, self.model.id).where(self.model.name.in_(existing))
+            )
+            fetched = dict(result.tuples().all())
+            tag_cache.set_many(fetched)
+            ids.update(fetched)
+        return {name: ids[name] for name in names}
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Tag,
+        obj_in: Union[TagUpdate, Dict[str, Any]]
+    ) -> Tag:
+        """Update a tag, dropping its cached id on rename."""
+        tag_id = db_obj.id
+        tag = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        tag_cache.invalidate(tag_id=tag_id)
+        return tag
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Tag]:
+        """Delete a tag and drop its cached id."""
+        tag = await super().remove(db, id=id)
+        tag_cache.invalidate(tag_id=id)
+        return tag
     
     async def get_by_name(self, db_session: AsyncSession, *, name: str) -> Optional[Tag]:
         """Get a tag by name."""
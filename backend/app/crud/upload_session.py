@@ -0,0 +1,145 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.upload_session import UploadSession
+
+
+class CRUDUploadSession(CRUDBase[UploadSession, Dict[str, Any], Dict[str, Any]]):
+    """CRUD operations for UploadSession model (resumable uploads)."""
+
+    async def open(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        kind: str,
+        filename: str,
+        content_type: str,
+        size: int,
+        part_size: int,
+    ) -> UploadSession:
+        """
+        Start a resumable upload session.
+
+        Args:
+            db: Async database session
+            user_id: Owner of the upload
+            kind: Upload kind, a key of ``UPLOAD_RULES``
+            filename: Client-side file name
+            content_type: Declared content type
+            size: Declared total size in bytes
+            part_size: Bytes per multipart part
+
+        Returns:
+            UploadSession: The new session
+        """
+        db_obj = self.model(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            kind=kind,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            part_size=part_size,
+            received=0,
+        )
+        db.add(db_obj)
+        await db.commit()
+        return db_obj
+
+    async def get_for_user(self, db: AsyncSession, *, id: str, user_id: int) -> Optional[UploadSession]:
+        """
+        Get a session owned by a user.
+
+        Args:
+            db: Async database session
+            id: Session token
+            user_id: ID of the requesting user
+
+        Returns:
+            Optional[UploadSession]: The session, or None if missing or owned by someone else
+        """
+        return await db.scalar(
+            select(self.model).where(self.model.id == id, self.model.user_id == user_id)
+        )
+
+    async def start_multipart(
+        self, db: AsyncSession, *, db_obj: UploadSession, file_path: str, s3_upload_id: str
+    ) -> bool:
+        """
+        Record the multipart upload backing a session.
+
+        Args:
+            db: Async database session
+            db_obj: Session whose first chunk passed validation
+            file_path: S3 key of the upload
+            s3_upload_id: Multipart upload ID
+
+        Returns:
+            bool: False if a concurrent first chunk already started one
+        """
+        started = await db.scalar(
+            update(self.model)
+            .where(self.model.id == db_obj.id, self.model.s3_upload_id.is_(None))
+            .values(file_path=file_path, s3_upload_id=s3_upload_id)
+            .returning(self.model.id)
+        )
+        await db.commit()
+        if started is None:
+            return False
+        db_obj.file_path, db_obj.s3_upload_id = file_path, s3_upload_id
+        return True
+
+    async def advance(self, db: AsyncSession, *, db_obj: UploadSession, expected: int, received: int) -> bool:
+        """
+        Move a session's offset forward after storing parts.
+
+        The update only applies if the offset is still ``expected``, so of
+        two concurrent appends at the same offset only one is recorded.
+
+        Args:
+            db: Async database session
+            db_obj: Session to advance
+            expected: Offset the parts were appended at
+            received: New offset
+
+        Returns:
+            bool: Whether the offset was updated
+        """
+        updated = await db.scalar(
+            update(self.model)
+            .where(self.model.id == db_obj.id, self.model.received == expected)
+            .values(received=received, updated_at=datetime.utcnow())
+            .returning(self.model.id)
+        )
+        await db.commit()
+        if updated is not None:
+            db_obj.received = received
+        return updated is not None
+
+    async def get_stale(self, db: AsyncSession, *, before: datetime, limit: int = 100) -> List[UploadSession]:
+        """
+        Sessions with no activity since a cut-off, oldest first.
+
+        Args:
+            db: Async database session
+            before: Last-activity cut-off
+            limit: Maximum number of sessions
+
+        Returns:
+            List[UploadSession]: Abandoned sessions
+        """
+        result = await db.scalars(
+            select(self.model)
+            .where(self.model.updated_at < before)
+            .order_by(self.model.updated_at)
+            .limit(limit)
+        )
+        return list(result.all())
+
+
+upload_session = CRUDUploadSession(UploadSession)
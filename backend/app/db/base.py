@@ -28,5 +28,6 @@ class Base:
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, 
         default=datetime.utcnow, 
+        onupdate=datetime.utcnow,
         nullable=False
     ) 
\ No newline at end of file
@@ -0,0 +1,253 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Placeholders emitted by the DBAPIs we use: ?, %s, %(name)s, $1
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)" % (_PLACEHOLDER, _PLACEHOLDER))
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so executions differing only in parameters match.
+
+    Whitespace is collapsed and expanded ``IN (?, ?, ...)`` lists are folded
+    to a single placeholder.
+
+    Args:
+        statement: SQL as sent to the DBAPI
+
+    Returns:
+        str: Normalized statement shape
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+class QueryStats:
+    """Statement count, DB time and statement shapes recorded for one scope."""
+
+    def __init__(self, parent: Optional["QueryStats"] = None, scope: Optional[Dict[str, Any]] = None):
+        """
+        Initialize empty stats.
+
+        Args:
+            parent: Enclosing stats that should also receive every record
+            scope: ASGI scope of the request being recorded, if any
+        """
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self.parent = parent
+        self.scope = scope
+
+    def record(self, statement: str, duration: float) -> None:
+        """
+        Record one executed statement.
+
+        Args:
+            statement: SQL as sent to the DBAPI
+            duration: Execution time in seconds
+        """
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement_shape(statement)] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        """
+        Statement shapes executed more than ``threshold`` times (likely N+1).
+
+        Args:
+            threshold: Maximum allowed executions of one shape
+
+        Returns:
+            Dict[str, int]: Offending shapes and their execution counts
+        """
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats collector for the current request or capture block, if any."""
+    return _current_stats.get()
+
+
+def current_request_scope() -> Optional[Dict[str, Any]]:
+    """ASGI scope of the request whose statements are being recorded, if any."""
+    stats = _current_stats.get()
+    while stats is not None:
+        if stats.scope is not None:
+            return stats.scope
+        stats = stats.parent
+    return None
+
+
+@contextmanager
+def capture_queries(scope: Optional[Dict[str, Any]] = None) -> Iterator[QueryStats]:
+    """
+    Record every statement executed on instrumented engines inside the block.
+
+    Captures nest: statements are also recorded by any enclosing capture.
+
+    Args:
+        scope: ASGI scope when capturing a whole request
+
+    Yields:
+        QueryStats: Stats populated as statements execute
+    """
+    stats = QueryStats(parent=_current_stats.get(), scope=scope)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def suspend_capture() -> Iterator[None]:
+    """Stop recording statements into the current request or capture block."""
+    token = _current_stats.set(None)
+    try:
+        yield
+    finally:
+        _current_stats.reset(token)
+
+
+StatementListener = Callable[[Any, str, Any, float], None]
+_statement_listeners: List[StatementListener] = []
+
+
+def add_statement_listener(listener: StatementListener) -> None:
+    """
+    Call ``listener(conn, statement, parameters, duration)`` after every
+    statement on instrumented engines.
+
+    Args:
+        listener: Callback; must be cheap as it runs on every statement
+    """
+    if listener not in _statement_listeners:
+        _statement_listeners.append(listener)
+
+
+def remove_statement_listener(listener: StatementListener) -> None:
+    """
+    Stop calling a listener added with ``add_statement_listener``.
+
+    Args:
+        listener: Previously added callback
+    """
+    if listener in _statement_listeners:
+        _statement_listeners.remove(listener)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for listener in _statement_listeners:
+        listener(conn, statement, parameters, duration)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Attach statement timing hooks to an engine. Safe to call more than once.
+
+    Args:
+        engine: Sync engine (``AsyncEngine.sync_engine`` for async engines)
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteSQLStats:
+    """Process-wide SQL usage aggregated per route template."""
+
+    def __init__(self):
+        """Initialize empty aggregates."""
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, stats: QueryStats, repeated: Dict[str, int]) -> None:
+        """
+        Fold one request's stats into its route aggregate.
+
+        Args:
+            route: Route template, e.g. ``/api/v1/songs/{song_id}``
+            stats: Stats recorded for the request
+            repeated: Shapes flagged as N+1 for the request
+        """
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "db_time_ms": 0.0,
+                    "max_queries": 0,
+                    "n_plus_one_requests": 0,
+                    "n_plus_one_shapes": Counter(),
+                }
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["db_time_ms"] += stats.total_time * 1000
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            if repeated:
+                entry["n_plus_one_requests"] += 1
+                entry["n_plus_one_shapes"].update(repeated.keys())
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Current aggregates, busiest routes (by DB time) first.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per route
+        """
+        with self._lock:
+            rows = []
+            for route, entry in self._routes.items():
+                requests = entry["requests"]
+                rows.append({
+                    "route": route,
+                    "requests": requests,
+                    "queries": entry["queries"],
+                    "avg_queries": entry["queries"] / requests,
+                    "max_queries": entry["max_queries"],
+                    "db_time_ms": round(entry["db_time_ms"], 3),
+                    "avg_db_time_ms": round(entry["db_time_ms"] / requests, 3),
+                    "n_plus_one_requests": entry["n_plus_one_requests"],
+                    "n_plus_one_shapes": [shape for shape, _ in entry["n_plus_one_shapes"].most_common(5)],
+                })
+        return sorted(rows, key=lambda row: row["db_time_ms"], reverse=True)
+
+    def reset(self) -> None:
+        """Drop all aggregates."""
+        with self._lock:
+            self._routes.clear()
+
+
+route_sql_stats = RouteSQLStats()
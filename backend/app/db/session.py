@@ -1,10 +1,160 @@
-from typing import Generator, AsyncGenerator
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Generator, AsyncGenerator, Hashable, Iterator, List, Optional, Union
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql.dml import UpdateBase
 
 from app.core.config import settings
+from app.db.instrumentation import add_statement_listener, instrument_engine
+from app.db.slow_queries import slow_query_log
+
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a database URL to its async driver equivalent.
+
+    Args:
+        url: Sync database URL
+
+    Returns:
+        str: URL using aiosqlite/asyncpg
+    """
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://")
+    return url
+
+
+# Cookie carrying a client's read-your-writes deadline between requests
+STICKY_COOKIE = "db_primary_until"
+
+
+@dataclass
+class StickyWindow:
+    """
+    Read-your-writes state of the client making the current request.
+
+    Set per request by ``ReplicaStickinessMiddleware`` from the
+    ``STICKY_COOKIE`` cookie, which is sent back after a write. Unlike the
+    router's in-process map, the cookie holds across workers and hosts.
+    """
+
+    primary_until: float = 0.0  # Unix time
+    wrote: bool = False
+
+
+sticky_window: ContextVar[Optional[StickyWindow]] = ContextVar("sticky_window", default=None)
+
+
+class ReplicaRouter:
+    """
+    Selects read replica engines and tracks read-your-writes stickiness.
+
+    Stickiness is tracked per key (usually the user id) within the process
+    and, for requests passing through ``ReplicaStickinessMiddleware``, per
+    client in a cookie, so it also holds when the next request lands on
+    another worker.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Engine],
+        *,
+        selection: str = "round_robin",
+        sticky_seconds: float = 5.0,
+    ):
+        """
+        Initialize with the sync engines backing each replica.
+
+        Args:
+            replicas: Replica engines (``AsyncEngine.sync_engine`` for async use)
+            selection: "round_robin" or "least_loaded"
+            sticky_seconds: How long reads stay on the primary after a write
+        """
+        self.replicas = replicas
+        self.selection = selection
+        self.sticky_seconds = sticky_seconds
+        self._counter = itertools.count()
+        self._sticky_until: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def choose(self) -> Optional[Engine]:
+        """
+        Pick the replica to serve the next read.
+
+        Returns:
+            Optional[Engine]: Replica engine, or None when no replicas are configured
+        """
+        if not self.replicas:
+            return None
+        start = next(self._counter) % len(self.replicas)
+        if self.selection != "least_loaded":
+            return self.replicas[start]
+        # Rotate before taking the minimum so ties are spread round-robin
+        rotated = self.replicas[start:] + self.replicas[:start]
+        return min(rotated, key=self._checked_out)
+
+    @staticmethod
+    def _checked_out(engine: Engine) -> int:
+        """Number of connections currently checked out of an engine's pool."""
+        checkedout = getattr(engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    def mark_write(self, key: Optional[Hashable]) -> None:
+        """
+        Pin reads for ``key`` and the current client to the primary for the sticky window.
+
+        Args:
+            key: Sticky key (usually the user id); None for the client only
+        """
+        if not self.replicas:
+            return
+        window = sticky_window.get()
+        if window is not None:
+            window.primary_until = time.time() + self.sticky_seconds
+            window.wrote = True
+        if key is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._sticky_until) > 10000:
+                self._sticky_until = {
+                    k: until for k, until in self._sticky_until.items() if until > now
+                }
+            self._sticky_until[key] = now + self.sticky_seconds
+
+    def is_sticky(self, key: Optional[Hashable]) -> bool:
+        """
+        Check whether ``key`` or the current client wrote recently enough that reads must use the primary.
+
+        Args:
+            key: Sticky key (usually the user id)
+
+        Returns:
+            bool: True if reads should stay on the primary
+        """
+        window = sticky_window.get()
+        if window is not None and window.primary_until > time.time():
+            return True
+        if key is None:
+            return False
+        until = self._sticky_until.get(key)
+        return until is not None and until > time.monotonic()
+
+
+def _replica_urls() -> List[str]:
+    """Parse the comma-separated DATABASE_REPLICA_URLS setting."""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
 
 # Create database engine
 engine = create_engine(str(settings.DATABASE_URL))
@@ -13,19 +163,106 @@ engine = create_engine(str(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create async database engine - convert URL to async format
-async_db_url = str(settings.DATABASE_URL)
-if async_db_url.startswith("sqlite:///"):
-    async_db_url = async_db_url.replace("sqlite:///", "sqlite+aiosqlite:///")
-elif async_db_url.startswith("postgresql://"):
-    async_db_url = async_db_url.replace("postgresql://", "postgresql+asyncpg://")
+async_db_url = to_async_url(str(settings.DATABASE_URL))
 
-# Create async engine and session factory
+# Create async engine and read replicas
 async_engine = create_async_engine(async_db_url)
+replica_async_engines = [create_async_engine(to_async_url(url)) for url in _replica_urls()]
+replica_router = ReplicaRouter(
+    [replica.sync_engine for replica in replica_async_engines],
+    selection=settings.DATABASE_REPLICA_SELECTION,
+    sticky_seconds=settings.DATABASE_REPLICA_STICKY_SECONDS,
+)
+
+if settings.SQL_INSTRUMENTATION_ENABLED or settings.METRICS_ENABLED:
+    for _engine in [engine, async_engine.sync_engine, *replica_router.replicas]:
+        instrument_engine(_engine)
+
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    for _async_engine in [async_engine, *replica_async_engines]:
+        slow_query_log.register_engine(_async_engine)
+    add_statement_listener(slow_query_log)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads inside a read-only scope to a replica.
+
+    Everything else - flushes, DML, reads after a write in the same
+    transaction and reads by a user who wrote within the sticky window -
+    goes to the primary bind.
+    """
+
+    replica_router: ReplicaRouter = replica_router
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        if (
+            self.info.get("read_only")
+            and not self._flushing
+            and not self.info.get("has_writes")
+            and not isinstance(clause, UpdateBase)
+            and not self.replica_router.is_sticky(self.info.get("sticky_key"))
+        ):
+            replica = self.replica_router.choose()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _record_flush(session: Session, flush_context: Any) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _record_dml(orm_execute_state: Any) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_commit(session: Session) -> None:
+    if session.info.pop("has_writes", False):
+        session.replica_router.mark_write(session.info.get("sticky_key"))
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _record_rollback(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+
 AsyncSessionLocal = sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
+    async_engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
 )
 
 
+@contextmanager
+def use_replica(db: Union[Session, AsyncSession]) -> Iterator[None]:
+    """
+    Route reads issued by ``db`` inside this block to a read replica.
+
+    Args:
+        db: Sync or async database session
+    """
+    previous = db.info.get("read_only", False)
+    db.info["read_only"] = True
+    try:
+        yield
+    finally:
+        db.info["read_only"] = previous
+
+
+def set_sticky_key(db: Union[Session, AsyncSession], key: Optional[Hashable]) -> None:
+    """
+    Associate a session with a user for read-your-writes stickiness.
+
+    Args:
+        db: Sync or async database session
+        key: Sticky key (usually the user id)
+    """
+    db.info["sticky_key"] = key
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Get database session.
@@ -51,4 +288,4 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
         try:
             yield db
         finally:
-            await db.close() 
\ No newline at end of file
+            await db.close()
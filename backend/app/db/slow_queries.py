@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Set
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.routes import route_template
+from app.db.instrumentation import current_request_scope, statement_shape, suspend_capture
+
+logger = logging.getLogger(__name__)
+
+# Plan capture statements per dialect. ANALYZE executes the statement, so
+# only SELECTs are explained and always inside a rolled-back transaction.
+EXPLAIN_PREFIXES: Dict[str, str] = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS) ",
+}
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """
+    Describe bound parameters by type only so values never reach the logs.
+
+    Args:
+        parameters: DBAPI parameters (dict, sequence, or list of either for executemany)
+
+    Returns:
+        Any: Same structure with each value replaced by its type name
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return {"executemany": len(parameters), "row": parameter_shape(parameters[0])}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of recent statements slower than a threshold.
+
+    Slow SELECTs on dialects listed in ``EXPLAIN_PREFIXES`` are sampled
+    for plan capture. The EXPLAIN runs later as a separate asyncio task on
+    its own connection, so the request that hit the slow query never waits
+    for it.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold_ms: float = 200.0,
+        max_entries: int = 100,
+        explain_sample_rate: float = 0.1,
+        explain_cooldown_seconds: float = 60.0,
+    ):
+        """
+        Initialize an empty log.
+
+        Args:
+            threshold_ms: Statements at or above this duration are recorded
+            max_entries: Ring buffer size
+            explain_sample_rate: Fraction of slow SELECTs whose plan is captured
+            explain_cooldown_seconds: Minimum time between plans for one statement shape
+        """
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_cooldown_seconds = explain_cooldown_seconds
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._explain_engines: Dict[Engine, AsyncEngine] = {}
+        self._last_explained: Dict[str, float] = {}
+        self._explaining = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def register_engine(self, engine: AsyncEngine) -> None:
+        """
+        Allow plan capture for statements that ran on ``engine``.
+
+        Args:
+            engine: Async engine whose connections may run EXPLAIN
+        """
+        self._explain_engines[engine.sync_engine] = engine
+
+    def __call__(self, conn: Any, statement: str, parameters: Any, duration: float) -> None:
+        """Statement listener; see ``add_statement_listener``."""
+        duration_ms = duration * 1000
+        if duration_ms < self.threshold_ms or statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        self.record(conn, statement, parameters, duration_ms)
+
+    def record(self, conn: Any, statement: str, parameters: Any, duration_ms: float) -> Dict[str, Any]:
+        """
+        Log a slow statement and possibly schedule plan capture.
+
+        Args:
+            conn: Connection the statement ran on
+            statement: SQL as sent to the DBAPI
+            parameters: Bound parameters
+            duration_ms: Execution time in milliseconds
+
+        Returns:
+            Dict[str, Any]: The ring buffer entry
+        """
+        scope = current_request_scope()
+        route = f"{scope['method']} {route_template(scope)}" if scope else None
+        shape = statement_shape(statement)
+        entry = {
+            "recorded_at": datetime.utcnow(),
+            "duration_ms": round(duration_ms, 3),
+            "route": route,
+            "statement": shape,
+            "parameters": parameter_shape(parameters),
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s params=%s",
+            duration_ms, route or "-", shape, entry["parameters"],
+        )
+        if self._should_explain(conn, shape):
+            self._schedule_explain(entry, conn, statement, parameters)
+        return entry
+
+    def _should_explain(self, conn: Any, shape: str) -> bool:
+        if conn.dialect.name not in EXPLAIN_PREFIXES or conn.engine not in self._explain_engines:
+            return False
+        if not shape.upper().startswith("SELECT") or self._explaining:
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        now = time.monotonic()
+        if now - self._last_explained.get(shape, float("-inf")) < self.explain_cooldown_seconds:
+            return False
+        self._last_explained[shape] = now
+        return True
+
+    def _schedule_explain(self, entry: Dict[str, Any], conn: Any, statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sync engine outside the event loop; nothing to schedule on
+            return
+        engine = self._explain_engines[conn.engine]
+        prefix = EXPLAIN_PREFIXES[conn.dialect.name]
+        self._explaining = True
+        task = loop.create_task(self._explain(entry, engine, prefix + statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, entry: Dict[str, Any], engine: AsyncEngine, statement: str, parameters: Any) -> None:
+        try:
+            # The task inherited the request's context; keep EXPLAIN out of its stats
+            with suspend_capture():
+                async with engine.connect() as conn:
+                    transaction = await conn.begin()
+                    try:
+                        result = await conn.exec_driver_sql(statement, parameters)
+                        entry["plan"] = "\n".join(" ".join(str(col) for col in row) for row in result)
+                    finally:
+                        await transaction.rollback()
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+        finally:
+            self._explaining = False
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Recorded slow statements, newest first.
+
+        Returns:
+            List[Dict[str, Any]]: Ring buffer entries
+        """
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._last_explained.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_entries=settings.SLOW_QUERY_LOG_SIZE,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+)
@@ -11,4 +11,10 @@ from app.models.user_follow import UserFollow  # noqa
 from app.models.song_tag import SongTag  # noqa
 from app.models.band_tag import BandTag  # noqa
 from app.models.blog_tag import BlogTag  # noqa
-from app.models.user_band import UserBand  # noqa 
\ No newline at end of file
+from app.models.user_band import UserBand  # noqa
+from app.models.audio_analysis import AudioAnalysis  # noqa
+from app.models.blob import Blob  # noqa
+from app.models.song_fingerprint import SongFingerprint  # noqa
+from app.models.upload_session import UploadSession  # noqa
+from app.models.image_variants import ImageVariants  # noqa
+from app.models.hls_package import HlsPackage  # noqa
\ No newline at end of file
@@ -0,0 +1,31 @@
+from typing import List, Optional
+from sqlalchemy import Float, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class AudioAnalysis(Base):
+    """
+    Results of analysing an uploaded audio file.
+
+    Keyed by the S3 key rather than a song, because analysis starts at upload
+    time, before the song row exists; songs find theirs by ``file_path``.
+    """
+
+    __allow_unmapped__ = True
+
+    __tablename__ = "audio_analysis"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    file_path: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    format: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    duration: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # in seconds
+    sample_rate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    channels: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    bitrate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # bits per second
+    title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    artist: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Waveform peak amplitudes, 0-255
+    peaks: Mapped[Optional[List[int]]] = mapped_column(JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -0,0 +1,26 @@
+from typing import Optional
+from sqlalchemy import BigInteger, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class Blob(Base):
+    """
+    A stored upload, identified by the SHA-256 of its content.
+
+    Uploads of identical content share one S3 object; ``ref_count`` counts
+    the songs that play it. Objects left without references are deleted
+    some time after their last upload.
+    """
+
+    __allow_unmapped__ = True
+
+    __tablename__ = "blob"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
+    file_path: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -23,6 +23,8 @@ class Blog(Base):
         Boolean, server_default=expression.true(), nullable=False
     )
     last_scraped_at: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # ISO format date
+    # ETag of the last scraped response, sent back as If-None-Match
+    scrape_etag: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     
     # Relationships
     songs = relationship("Song", back_populates="blog")
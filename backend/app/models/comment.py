@@ -1,5 +1,5 @@
 from typing import Optional, List
-from sqlalchemy import String, Integer, ForeignKey, Text
+from sqlalchemy import String, Integer, ForeignKey, Index, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -11,6 +11,13 @@ class Comment(Base):
     # Allow unmapped attributes for backward compatibility
     __allow_unmapped__ = True
     
+    # One index per target column for get_by_target
+    __table_args__ = (
+        Index("ix_comment_target_song", "target_type", "song_id"),
+        Index("ix_comment_target_band", "target_type", "band_id"),
+        Index("ix_comment_target_blog", "target_type", "blog_id"),
+    )
+    
     # Columns with proper typing for SQLAlchemy 2.0
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
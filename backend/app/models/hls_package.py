@@ -0,0 +1,29 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Float, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class HlsPackage(Base):
+    """
+    HLS renditions transcoded from an uploaded audio file, and job progress.
+
+    Keyed by the original's S3 key, like ``AudioAnalysis``: packaging starts
+    at upload time, and songs pick up ``manifest_path`` when it is done.
+    """
+
+    __allow_unmapped__ = True
+
+    __tablename__ = "hls_package"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    file_path: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    # "running", "done" or "failed"
+    status: Mapped[str] = mapped_column(String, nullable=False, default="running")
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # 0-1
+    # S3 key of the master playlist, once done
+    manifest_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # One entry per rendition: name, bitrate, bandwidth and segments (uri, duration)
+    renditions: Mapped[List[Dict[str, Any]]] = mapped_column(JSON, nullable=False, default=list)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -0,0 +1,24 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ImageVariants(Base):
+    """
+    Downscaled variants generated for an uploaded image.
+
+    Keyed by the original's S3 key, like ``AudioAnalysis``, since covers
+    are uploaded before the song, blog or band that uses them exists.
+    """
+
+    __allow_unmapped__ = True
+
+    __tablename__ = "image_variants"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    file_path: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    # One entry per variant: size, format, width, height and file_path (S3 key)
+    variants: Mapped[List[Dict[str, Any]]] = mapped_column(JSON, nullable=False, default=list)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import String, Integer, ForeignKey
+from sqlalchemy import DateTime, String, Integer, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -14,12 +15,24 @@ class Song(Base):
     # Columns with proper typing for SQLAlchemy 2.0
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String, nullable=False, index=True)
-    duration: Mapped[int] = mapped_column(Integer, nullable=False)  # in seconds
-    file_path: Mapped[str] = mapped_column(String, nullable=False)
+    # In seconds; NULL until known (e.g. the upload's analysis is pending)
+    duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # S3 key of the uploaded audio; NULL for songs only linked from a blog
+    file_path: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    # Link a scraped song was found at
+    source_url: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    # When the linked audio was fetched for fingerprinting (successfully or not)
+    source_fingerprinted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     band_id: Mapped[Optional[int]] = mapped_column(ForeignKey("band.id"), nullable=True, index=True)
     blog_id: Mapped[Optional[int]] = mapped_column(ForeignKey("blog.id"), nullable=True, index=True)
     cover_image_url: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    release_date: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # ISO format date
+    release_date: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)  # ISO format date
+    # Set when the audio fingerprint matches an earlier song
+    duplicate_of_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("song.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    # S3 key of the HLS master playlist, once packaged
+    playback_manifest: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     
     # Relationships
     band = relationship("Band", back_populates="songs")
@@ -0,0 +1,27 @@
+from sqlalchemy import ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SongFingerprint(Base):
+    """
+    Inverted index of audio fingerprint hashes.
+
+    One row per landmark hash of a song (see ``services.fingerprint``);
+    looking up a new song's hashes finds candidate duplicates.
+    """
+
+    # Allow unmapped attributes for backward compatibility
+    __allow_unmapped__ = True
+
+    __tablename__ = "song_fingerprint"
+
+    __table_args__ = (
+        Index("ix_song_fingerprint_hash", "hash"),
+    )
+
+    # Composite primary key
+    song_id: Mapped[int] = mapped_column(ForeignKey("song.id", ondelete="CASCADE"), primary_key=True)
+    hash: Mapped[int] = mapped_column(Integer, primary_key=True)
+    anchor: Mapped[int] = mapped_column(Integer, primary_key=True)  # frame of the hash's first peak
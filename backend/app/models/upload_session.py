@@ -0,0 +1,39 @@
+from typing import Optional
+from sqlalchemy import BigInteger, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UploadSession(Base):
+    """
+    A resumable upload in progress, backed by an S3 multipart upload.
+
+    ``received`` counts the bytes stored as completed parts; it only moves
+    in whole parts (or to ``size`` with the final part), so it is where the
+    client resumes after a dropped connection. The multipart upload is
+    started by the first chunk, once it has passed validation.
+    """
+
+    __allow_unmapped__ = True
+
+    __tablename__ = "upload_session"
+
+    __table_args__ = (
+        # Abandoned sessions are found by last activity
+        Index("ix_upload_session_updated_at", "updated_at"),
+    )
+
+    # Opaque token handed to the client
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    kind: Mapped[str] = mapped_column(String, nullable=False)  # "audio" or "image"
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    part_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    received: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    file_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    s3_upload_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
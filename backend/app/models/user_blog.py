@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, DateTime
+from sqlalchemy import Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import expression
 from datetime import datetime
@@ -15,6 +15,10 @@ class UserBlog(Base):
     # Table name explicitly set for the association
     __tablename__ = "user_blog"
     
+    __table_args__ = (
+        Index("ix_user_blog_user_following", "user_id", "is_following"),
+    )
+    
     # Composite primary key
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
     blog_id: Mapped[int] = mapped_column(ForeignKey("blog.id"), primary_key=True)
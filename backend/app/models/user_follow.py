@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, DateTime
+from sqlalchemy import Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import expression
 from datetime import datetime
@@ -15,6 +15,11 @@ class UserFollow(Base):
     # Table name explicitly set for the association
     __tablename__ = "user_follow"
     
+    # The primary key covers lookups by follower; this covers the followers list
+    __table_args__ = (
+        Index("ix_user_follow_followed_following", "followed_id", "is_following"),
+    )
+    
     # Composite primary key - follower_id is the user doing the following, followed_id is the user being followed
     follower_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
     followed_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, DateTime, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import expression
 from datetime import datetime
@@ -15,6 +15,21 @@ class UserSong(Base):
     # Table name explicitly set for the association
     __tablename__ = "user_song"
     
+    # Indexes for the favorites, recently played and popular songs queries
+    __table_args__ = (
+        Index("ix_user_song_user_favorite_created", "user_id", "is_favorite", "created_at"),
+        Index(
+            "ix_user_song_user_last_played", "user_id", "last_played",
+            postgresql_where=text("last_played IS NOT NULL"),
+            sqlite_where=text("last_played IS NOT NULL"),
+        ),
+        Index(
+            "ix_user_song_favorited_created", "created_at", "song_id",
+            postgresql_where=text("is_favorite = true"),
+            sqlite_where=text("is_favorite = 1"),
+        ),
+    )
+    
     # Composite primary key
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
     song_id: Mapped[int] = mapped_column(ForeignKey("song.id"), primary_key=True)
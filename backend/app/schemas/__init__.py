@@ -1,5 +1,5 @@
 # Schema package initialization
-from app.schemas.songs.song import Song, SongCreate, SongUpdate, SongWithDetails
+from app.schemas.songs.song import Song, SongBulkResult, SongCreate, SongPlayback, SongUpdate, SongWaveform, SongWithDetails
 from app.schemas.tags.tag import Tag, TagCreate, TagUpdate
 from app.schemas.blogs.blog import Blog, BlogCreate, BlogUpdate
 from app.schemas.bands.band import Band, BandCreate, BandUpdate
@@ -42,7 +42,9 @@ class BlogInDBBase(BlogBase):
 
 class Blog(BlogInDBBase):
     """Schema for returning a Blog."""
-    pass
+    image_variant_url: Optional[str] = Field(
+        None, description="Signed URL of the image thumbnail matching the requested size"
+    )
 
 
 class BlogInDB(BlogInDBBase):
@@ -1 +1 @@
-from app.schemas.songs.song import Song, SongCreate, SongUpdate, SongWithDetails 
\ No newline at end of file
+from app.schemas.songs.song import Song, SongBulkResult, SongCreate, SongPlayback, SongUpdate, SongWaveform, SongWithDetails 
\ No newline at end of file
@@ -6,7 +6,7 @@ from datetime import datetime, date
 class SongBase(BaseModel):
     """Base schema for Song model."""
     title: str
-    duration: int = Field(..., description="Duration in seconds")
+    duration: Optional[int] = Field(None, description="Duration in seconds, if known")
     band_id: Optional[int] = None
     blog_id: Optional[int] = None
     cover_image_url: Optional[str] = None
@@ -15,6 +15,9 @@ class SongBase(BaseModel):
 
 class SongCreate(SongBase):
     """Schema for creating a new song."""
+    duration: Optional[int] = Field(
+        None, description="Duration in seconds; taken from the upload's analysis when omitted"
+    )
     file_path: str = Field(..., description="Path to the song file")
     tags: Optional[List[str]] = None
 
@@ -38,6 +41,8 @@ class SongInDBBase(SongBase):
     blog_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
+    duplicate_of_id: Optional[int] = Field(None, description="Earlier song this one duplicates, if detected")
+    source_url: Optional[str] = Field(None, description="Link the song was found at, for songs scraped from blogs")
 
     class Config:
         # orm_mode = True
@@ -47,9 +52,58 @@ class SongInDBBase(SongBase):
 class Song(SongInDBBase):
     """Schema for returning a Song."""
     favorite_count: Optional[int] = 0
+    file_url: Optional[str] = Field(None, description="Presigned playback URL, when requested")
+    cover_image_variant_url: Optional[str] = Field(
+        None, description="Signed URL of the cover thumbnail matching the requested size"
+    )
+    manifest_url: Optional[str] = Field(
+        None, description="HLS master playlist URL, when playback URLs are requested and the song is packaged"
+    )
 
 
 class SongWithDetails(Song):
     """Schema for returning a Song with additional details."""
     band_name: Optional[str] = None
-    is_favorited: Optional[bool] = False 
\ No newline at end of file
+    is_favorited: Optional[bool] = False 
+
+class SongBulkError(BaseModel):
+    """A row rejected by the bulk import."""
+    line: int
+    error: str
+
+
+class SongBulkResult(BaseModel):
+    """Outcome of a bulk song import."""
+    created: int
+    failed: int
+    ids: List[int]
+    errors: List[SongBulkError]
+
+
+class SongWaveform(BaseModel):
+    """Waveform and audio properties of a song's file."""
+    duration: Optional[float] = Field(None, description="Duration in seconds")
+    format: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bitrate: Optional[int] = None
+    peaks: List[int] = Field(..., description="Peak amplitudes (0-255) evenly spaced over the track")
+
+    class Config:
+        from_attributes = True
+
+
+class SongRendition(BaseModel):
+    """One rendition of a song's HLS package."""
+    name: str
+    bitrate: int = Field(..., description="AAC bitrate in kbit/s")
+    bandwidth: int = Field(..., description="Peak bits per second")
+
+
+class SongPlayback(BaseModel):
+    """State of a song's HLS packaging."""
+    status: str = Field(..., description='"running", "done" or "failed"')
+    progress: float = Field(..., description="Fraction done, 0-1")
+    manifest_url: Optional[str] = Field(None, description="HLS master playlist URL, once done")
+    renditions: List[SongRendition] = []
+    error: Optional[str] = None
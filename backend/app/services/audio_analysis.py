@@ -0,0 +1,501 @@
+"""
+Audio analysis: container probing, PCM decoding and waveform peaks.
+
+``probe`` reads only the container headers it needs (ID3v2 and the first
+MPEG frame, MP4 ``moov``, FLAC metadata blocks, Ogg header pages, WAV
+chunks). ``analyze_file`` adds a PCM decode and NumPy-computed peaks; it is
+the entry point run in worker processes, so this module depends on the
+standard library and NumPy only.
+"""
+import os
+import struct
+import subprocess
+import wave
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Bytes searched for the first MPEG frame after any ID3v2 tag
+MPEG_SYNC_WINDOW = 64 * 1024
+# Ogg header packets and the last page are looked for within this many bytes
+OGG_WINDOW = 64 * 1024
+# MP4 metadata larger than this is treated as corrupt
+MAX_MOOV_BYTES = 16 * 1024 * 1024
+# Rate non-WAV audio is decoded at; plenty for peaks and duration
+DECODE_SAMPLE_RATE = 8000
+
+
+class AudioDecodeError(Exception):
+    """Raised when audio cannot be decoded to PCM."""
+
+
+class AudioInfo(NamedTuple):
+    """What a container's headers say about the audio."""
+
+    format: str
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bitrate: Optional[int] = None
+    title: Optional[str] = None
+    artist: Optional[str] = None
+
+
+def probe(f: BinaryIO) -> AudioInfo:
+    """
+    Read format, duration and tags from a file's headers.
+
+    Args:
+        f: Seekable binary file
+
+    Returns:
+        AudioInfo: Header information; ``format`` is "unknown" if unrecognised
+    """
+    head = _read_at(f, 0, 12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return _probe_wav(f)
+    if head[:4] == b"fLaC":
+        return _probe_flac(f)
+    if head[:4] == b"OggS":
+        return _probe_ogg(f)
+    if head[4:8] == b"ftyp":
+        return _probe_mp4(f)
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return _probe_mp3(f)
+    return AudioInfo(format="unknown")
+
+
+def decode_pcm(path: str, info: AudioInfo, ffmpeg: str = "ffmpeg") -> Tuple[np.ndarray, int]:
+    """
+    Decode audio to mono float32 samples in [-1, 1].
+
+    Integer PCM WAV is decoded in-process; everything else goes through
+    ``ffmpeg``, resampled to ``DECODE_SAMPLE_RATE``.
+
+    Args:
+        path: Local audio file
+        info: Result of ``probe`` for the file
+        ffmpeg: ffmpeg executable
+
+    Returns:
+        Tuple[np.ndarray, int]: Samples and their sample rate
+
+    Raises:
+        AudioDecodeError: If the audio cannot be decoded
+    """
+    if info.format == "wav":
+        try:
+            return _decode_wav(path)
+        except (wave.Error, EOFError, ValueError):
+            pass  # e.g. float WAV; let ffmpeg handle it
+    command = [
+        ffmpeg, "-v", "error", "-nostdin", "-i", path,
+        "-f", "f32le", "-ac", "1", "-ar", str(DECODE_SAMPLE_RATE), "-",
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise AudioDecodeError(f"ffmpeg is required to decode {info.format} audio")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(e.stderr.decode(errors="replace").strip()[:500] or "ffmpeg failed")
+    return np.frombuffer(result.stdout, dtype="<f4"), DECODE_SAMPLE_RATE
+
+
+def waveform_peaks(samples: np.ndarray, count: int) -> List[int]:
+    """
+    Downsample audio to ``count`` peak amplitudes.
+
+    Each value is the largest absolute sample in its slice of the track,
+    scaled so 255 is full scale.
+
+    Args:
+        samples: Mono samples in [-1, 1]
+        count: Number of peaks wanted
+
+    Returns:
+        List[int]: Up to ``count`` values in 0-255
+    """
+    count = min(count, samples.size)
+    if count == 0:
+        return []
+    per_peak = -(-samples.size // count)
+    padded = np.zeros(per_peak * count, dtype=np.float32)
+    np.abs(samples, out=padded[:samples.size])
+    peaks = padded.reshape(count, per_peak).max(axis=1)
+    return np.rint(np.clip(peaks, 0.0, 1.0) * 255).astype(np.uint8).tolist()
+
+
+def analyze_file(path: str, peak_count: int, ffmpeg: str = "ffmpeg") -> Dict[str, Any]:
+    """
+    Probe, decode and summarise one audio file.
+
+    Runs in a worker process. Decoding failures are reported in ``error``
+    alongside whatever the headers provided.
+
+    Args:
+        path: Local audio file
+        peak_count: Number of waveform peaks to compute
+        ffmpeg: ffmpeg executable
+
+    Returns:
+        Dict[str, Any]: ``AudioInfo`` fields plus ``peaks`` and ``error``
+    """
+    with open(path, "rb") as f:
+        info = probe(f)
+    result: Dict[str, Any] = {**info._asdict(), "peaks": None, "error": None}
+    try:
+        samples, sample_rate = decode_pcm(path, info, ffmpeg)
+    except AudioDecodeError as e:
+        result["error"] = str(e)
+        return result
+    if samples.size:
+        # The decoded length is exact; headers can be estimates (CBR MP3)
+        result["duration"] = samples.size / sample_rate
+    result["peaks"] = waveform_peaks(samples, peak_count)
+    return result
+
+
+def _read_at(f: BinaryIO, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    return f.read(size)
+
+
+def _file_size(f: BinaryIO) -> int:
+    return f.seek(0, os.SEEK_END)
+
+
+# WAV
+
+
+def _probe_wav(f: BinaryIO) -> AudioInfo:
+    offset, size = 12, _file_size(f)
+    channels = sample_rate = byte_rate = None
+    data_size = None
+    while offset + 8 <= size:
+        chunk_id, chunk_size = struct.unpack("<4sI", _read_at(f, offset, 8))
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, byte_rate = struct.unpack("<HHII", f.read(12))
+        elif chunk_id == b"data":
+            data_size = min(chunk_size, size - offset - 8)
+            break
+        offset += 8 + chunk_size + (chunk_size & 1)
+    duration = data_size / byte_rate if data_size is not None and byte_rate else None
+    bitrate = byte_rate * 8 if byte_rate else None
+    return AudioInfo("wav", duration, sample_rate, channels, bitrate)
+
+
+def _decode_wav(path: str) -> Tuple[np.ndarray, int]:
+    with wave.open(path, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 3:
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)
+        samples = (np.where(ints & 0x800000, ints - (1 << 24), ints) / float(1 << 23)).astype(np.float32)
+    elif width in (2, 4):
+        dtype = "<i2" if width == 2 else "<i4"
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(1 << (8 * width - 1))
+    else:
+        raise ValueError(f"Unsupported sample width: {width}")
+    # Downmix like ffmpeg's -ac 1
+    frames = samples[: samples.size - samples.size % channels].reshape(-1, channels)
+    return frames.mean(axis=1), rate
+
+
+# FLAC
+
+
+def _probe_flac(f: BinaryIO) -> AudioInfo:
+    offset = 4
+    sample_rate = channels = total = None
+    tags: Dict[str, str] = {}
+    while True:
+        header = _read_at(f, offset, 4)
+        if len(header) < 4:
+            break
+        last, block_type = header[0] & 0x80, header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 0:  # STREAMINFO
+            info = f.read(18)
+            packed = int.from_bytes(info[10:18], "big")
+            sample_rate = packed >> 44
+            channels = ((packed >> 41) & 0x7) + 1
+            total = packed & 0xFFFFFFFFF
+        elif block_type == 4:  # VORBIS_COMMENT
+            tags = _vorbis_comments(f.read(length))
+        offset += 4 + length
+        if last:
+            break
+    duration = total / sample_rate if total and sample_rate else None
+    bitrate = None
+    if duration:
+        bitrate = int((_file_size(f) - offset) * 8 / duration)
+    return AudioInfo("flac", duration, sample_rate, channels, bitrate, tags.get("title"), tags.get("artist"))
+
+
+def _vorbis_comments(data: bytes) -> Dict[str, str]:
+    """Parse a Vorbis comment block (without packet type/magic)."""
+    tags: Dict[str, str] = {}
+    try:
+        (vendor_length,) = struct.unpack_from("<I", data, 0)
+        offset = 4 + vendor_length
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for _ in range(count):
+            (length,) = struct.unpack_from("<I", data, offset)
+            key, _, value = data[offset + 4:offset + 4 + length].decode("utf-8", "replace").partition("=")
+            tags.setdefault(key.lower(), value)
+            offset += 4 + length
+    except struct.error:
+        pass  # Truncated block; keep what was read
+    return tags
+
+
+# Ogg (Vorbis, Opus)
+
+
+def _ogg_packets(data: bytes, wanted: int) -> List[bytes]:
+    """First ``wanted`` complete packets of the first logical stream in ``data``."""
+    packets: List[bytes] = []
+    current = b""
+    offset = 0
+    while len(packets) < wanted and data[offset:offset + 4] == b"OggS" and offset + 27 <= len(data):
+        segments = data[offset + 26]
+        table = data[offset + 27:offset + 27 + segments]
+        body = offset + 27 + segments
+        for lacing in table:
+            current += data[body:body + lacing]
+            body += lacing
+            if lacing < 255:
+                packets.append(current)
+                current = b""
+        offset = body
+    return packets[:wanted]
+
+
+def _probe_ogg(f: BinaryIO) -> AudioInfo:
+    head = _read_at(f, 0, OGG_WINDOW)
+    packets = _ogg_packets(head, 2)
+    ident = packets[0] if packets else b""
+    comments = packets[1] if len(packets) > 1 else b""
+    if ident.startswith(b"\x01vorbis") and len(ident) >= 16:
+        codec, channels = "vorbis", ident[11]
+        (sample_rate,) = struct.unpack_from("<I", ident, 12)
+        # Vorbis granule positions count samples at the stream rate
+        granule_rate = sample_rate
+        tags = _vorbis_comments(comments[7:]) if comments.startswith(b"\x03vorbis") else {}
+    elif ident.startswith(b"OpusHead") and len(ident) >= 16:
+        codec, channels = "opus", ident[9]
+        (sample_rate,) = struct.unpack_from("<I", ident, 12)
+        # Opus granule positions are always at 48 kHz
+        granule_rate = 48000
+        tags = _vorbis_comments(comments[8:]) if comments.startswith(b"OpusTags") else {}
+    else:
+        return AudioInfo("ogg")
+
+    size = _file_size(f)
+    tail = _read_at(f, max(0, size - OGG_WINDOW), OGG_WINDOW)
+    duration = None
+    last_page = tail.rfind(b"OggS")
+    if last_page >= 0 and last_page + 14 <= len(tail):
+        (granule,) = struct.unpack_from("<q", tail, last_page + 6)
+        if granule > 0:
+            duration = granule / granule_rate
+    bitrate = int(size * 8 / duration) if duration else None
+    return AudioInfo(codec, duration, sample_rate, channels, bitrate, tags.get("title"), tags.get("artist"))
+
+
+# MP4 / M4A
+
+
+def _boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield ``(type, payload_start, payload_end)`` for boxes in ``data[start:end]``."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _child(data: bytes, start: int, end: int, *path: bytes) -> Optional[Tuple[int, int]]:
+    for box_type in path:
+        for found_type, child_start, child_end in _boxes(data, start, end):
+            if found_type == box_type:
+                start, end = child_start, child_end
+                if box_type == b"meta":
+                    start += 4  # full box version and flags
+                break
+        else:
+            return None
+    return start, end
+
+
+def _probe_mp4(f: BinaryIO) -> AudioInfo:
+    # Walk top-level box headers (reading 16 bytes each) until moov
+    size = _file_size(f)
+    offset = 0
+    moov = None
+    while offset + 8 <= size:
+        header = _read_at(f, offset, 16)
+        box_size, box_type = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if box_size == 1:
+            (box_size,) = struct.unpack_from(">Q", header, 8)
+            header_size = 16
+        elif box_size == 0:
+            box_size = size - offset
+        if box_size < header_size:
+            break
+        if box_type == b"moov":
+            if box_size > MAX_MOOV_BYTES:
+                break
+            moov = _read_at(f, offset + header_size, box_size - header_size)
+            break
+        offset += box_size
+    if moov is None:
+        return AudioInfo("mp4")
+
+    duration = sample_rate = channels = None
+    mvhd = _child(moov, 0, len(moov), b"mvhd")
+    if mvhd:
+        version = moov[mvhd[0]]
+        if version == 1:
+            timescale, length = struct.unpack_from(">IQ", moov, mvhd[0] + 20)
+        else:
+            timescale, length = struct.unpack_from(">II", moov, mvhd[0] + 12)
+        duration = length / timescale if timescale else None
+
+    for box_type, trak_start, trak_end in _boxes(moov):
+        if box_type != b"trak":
+            continue
+        stsd = _child(moov, trak_start, trak_end, b"mdia", b"minf", b"stbl", b"stsd")
+        # stsd: version/flags + entry count, then the first sample entry
+        entry = stsd[0] + 8 if stsd else None
+        if entry is not None and entry + 36 <= stsd[1] and moov[entry + 4:entry + 8] in (b"mp4a", b"alac"):
+            channels, = struct.unpack_from(">H", moov, entry + 24)
+            sample_rate = struct.unpack_from(">I", moov, entry + 32)[0] >> 16
+            break
+
+    tags = {}
+    ilst = _child(moov, 0, len(moov), b"udta", b"meta", b"ilst")
+    if ilst:
+        for item, item_start, item_end in _boxes(moov, *ilst):
+            data = _child(moov, item_start, item_end, b"data")
+            if data and item in (b"\xa9nam", b"\xa9ART"):
+                # data: type indicator (4) + locale (4) + UTF-8 value
+                tags[item] = moov[data[0] + 8:data[1]].decode("utf-8", "replace")
+    bitrate = int(size * 8 / duration) if duration else None
+    return AudioInfo("mp4", duration, sample_rate, channels, bitrate, tags.get(b"\xa9nam"), tags.get(b"\xa9ART"))
+
+
+# MP3
+
+_MPEG_BITRATES = {
+    # (version is MPEG-1, layer): kbit/s by index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _id3v2(f: BinaryIO) -> Tuple[int, Dict[str, str]]:
+    """Size of a leading ID3v2 tag and its title/artist frames."""
+    header = _read_at(f, 0, 10)
+    if header[:3] != b"ID3" or len(header) < 10:
+        return 0, {}
+    major, flags = header[3], header[5]
+    size = _syncsafe(header[6:10])
+    total = 10 + size + (10 if flags & 0x10 else 0)
+    data = f.read(size)
+    tags: Dict[str, str] = {}
+    wanted = {b"TIT2": "title", b"TPE1": "artist", b"TT2": "title", b"TP1": "artist"}
+    offset = 0
+    id_length, header_length = (3, 6) if major == 2 else (4, 10)
+    while offset + header_length <= len(data) and data[offset] != 0:
+        frame_id = data[offset:offset + id_length]
+        raw_size = data[offset + id_length:offset + header_length - (0 if major == 2 else 2)]
+        if major == 2:
+            frame_size = int.from_bytes(raw_size, "big")
+        elif major == 4:
+            frame_size = _syncsafe(raw_size)
+        else:
+            frame_size = int.from_bytes(raw_size, "big")
+        body = data[offset + header_length:offset + header_length + frame_size]
+        if frame_id in wanted and body:
+            tags.setdefault(wanted[frame_id], _id3_text(body))
+        offset += header_length + frame_size
+    return total, tags
+
+
+def _syncsafe(data: bytes) -> int:
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _id3_text(body: bytes) -> str:
+    encoding, text = body[0], body[1:]
+    codec = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}.get(encoding, "latin-1")
+    return text.decode(codec, "replace").rstrip("\x00")
+
+
+def _probe_mp3(f: BinaryIO) -> AudioInfo:
+    audio_start, tags = _id3v2(f)
+    window = _read_at(f, audio_start, MPEG_SYNC_WINDOW)
+    offset = 0
+    while True:
+        offset = window.find(b"\xff", offset)
+        if offset < 0 or offset + 4 > len(window):
+            return AudioInfo("mp3", title=tags.get("title"), artist=tags.get("artist"))
+        header = int.from_bytes(window[offset:offset + 4], "big")
+        version_bits = (header >> 19) & 0x3
+        layer = 4 - ((header >> 17) & 0x3)
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 0x3
+        if (header >> 21) & 0x7FF == 0x7FF and version_bits != 1 and layer != 4 \
+                and bitrate_index not in (0, 15) and rate_index != 3:
+            break
+        offset += 1
+
+    mpeg1 = version_bits == 3
+    sample_rate = _MPEG_SAMPLE_RATES[version_bits][rate_index]
+    bitrate = _MPEG_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    channels = 1 if (header >> 6) & 0x3 == 3 else 2
+    samples_per_frame = 384 if layer == 1 else 1152 if (layer == 2 or mpeg1) else 576
+
+    # Xing/Info (LAME) or VBRI headers carry the frame count of VBR files
+    frames = None
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing = window[offset + 4 + side_info:offset + 4 + side_info + 12]
+    if xing[:4] in (b"Xing", b"Info") and int.from_bytes(xing[4:8], "big") & 0x1:
+        frames = int.from_bytes(xing[8:12], "big")
+    vbri = window[offset + 36:offset + 36 + 18]
+    if frames is None and vbri[:4] == b"VBRI":
+        frames = int.from_bytes(vbri[14:18], "big")
+
+    stream_bytes = _file_size(f) - audio_start - offset
+    if _read_at(f, _file_size(f) - 128, 3) == b"TAG":
+        stream_bytes -= 128
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+        bitrate = int(stream_bytes * 8 / duration) if duration else bitrate
+    else:
+        duration = stream_bytes * 8 / bitrate
+    return AudioInfo("mp3", duration, sample_rate, channels, bitrate, tags.get("title"), tags.get("artist"))
+
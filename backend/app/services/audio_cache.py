@@ -0,0 +1,147 @@
+"""
+Local disk cache of hot audio objects for the stream endpoint.
+
+Objects are read through from S3 on a miss and kept in a size-bounded LRU
+directory, so repeat plays start from local disk (and the server can use
+``sendfile``) instead of a cold S3 GET. Concurrent misses for one object
+share a single download. Callers that read a file after handing its path
+on (a streamed response, a media job) lease it, so eviction cannot remove
+it under them.
+"""
+import contextlib
+import hashlib
+import os
+import uuid
+from functools import lru_cache
+from typing import AsyncIterator, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import AUDIO_CACHE_BYTES, AUDIO_CACHE_LOOKUPS
+from app.services.disk_cache import LEASE_DIRECTORY, DiskCache
+from app.services.s3 import get_s3_service
+
+
+class AudioFileCache(DiskCache):
+    """
+    Size-bounded LRU of audio files on local disk.
+
+    Several workers may share the directory: files are published with an
+    atomic rename, and an entry whose file another worker evicted is
+    treated as a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, download: Callable[[str, str], None]):
+        """
+        Initialize the cache, indexing files left by a previous run.
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Upper bound on the total size of cached files
+            download: Blocking ``download(s3_key, path)`` used on a miss
+        """
+        self.download = download
+        super().__init__(directory, max_bytes)
+
+    async def get_path(self, s3_key: str) -> str:
+        """
+        Local path of an object, downloading it on a miss.
+
+        Args:
+            s3_key: The S3 key (path) of the object
+
+        Returns:
+            str: Path of the cached file
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        return await self._get_or_fill(
+            self._name(s3_key), lambda partial: run_in_threadpool(self.download, s3_key, partial)
+        )
+
+    async def lease(self, s3_key: str) -> str:
+        """
+        Private path to an object's file that survives eviction.
+
+        The path is a hard link to the cached file: evicting the entry, in
+        this process or in another worker sharing the directory, leaves the
+        content readable through it until ``release``.
+
+        Args:
+            s3_key: The S3 key (path) of the object
+
+        Returns:
+            str: Path to pass to ``release`` once the file has been read
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        leases = os.path.join(self.directory, LEASE_DIRECTORY)
+        os.makedirs(leases, exist_ok=True)
+        while True:
+            path = await self.get_path(s3_key)
+            # Same extension, for content-type guessing and ffmpeg probing
+            lease = os.path.join(leases, uuid.uuid4().hex + os.path.splitext(path)[1])
+            try:
+                os.link(path, lease)
+                return lease
+            except FileNotFoundError:
+                # Evicted between the lookup and the link; fetch it again
+                continue
+
+    @staticmethod
+    def release(lease: str) -> None:
+        """
+        Remove a path returned by ``lease``.
+
+        Args:
+            lease: Leased path
+        """
+        try:
+            os.unlink(lease)
+        except FileNotFoundError:
+            pass
+
+    @contextlib.asynccontextmanager
+    async def leased(self, s3_key: str) -> AsyncIterator[str]:
+        """
+        ``lease`` for the duration of a block.
+
+        Args:
+            s3_key: The S3 key (path) of the object
+
+        Yields:
+            str: Leased path of the cached file
+        """
+        lease = await self.lease(s3_key)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def _record_lookup(self, result: str) -> None:
+        AUDIO_CACHE_LOOKUPS.labels(result).inc()
+
+    def _record_size(self) -> None:
+        AUDIO_CACHE_BYTES.set(self.size)
+
+    @staticmethod
+    def _name(s3_key: str) -> str:
+        # Hashing keeps names flat and safe; the extension helps content-type guessing
+        extension = os.path.splitext(s3_key)[1].lower()
+        return hashlib.sha256(s3_key.encode()).hexdigest()[:32] + extension
+
+
+@lru_cache(maxsize=None)
+def get_audio_cache() -> AudioFileCache:
+    """
+    Process-wide audio cache, for use as a FastAPI dependency.
+
+    Returns:
+        AudioFileCache: Cache reading through the shared S3 service
+    """
+    return AudioFileCache(
+        settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_MAX_BYTES, get_s3_service().download_file
+    )
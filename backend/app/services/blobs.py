@@ -0,0 +1,212 @@
+"""
+Content-addressed storage of uploads.
+
+Uploads are hashed (SHA-256) before transfer and stored under a key
+derived from the hash, so identical files share one S3 object: an upload
+of content that is already stored returns the existing key without
+transferring anything. A ``blob`` row per object counts the songs that
+play it; songs take and release their reference in the transaction that
+creates or deletes them. Objects no song references are deleted by a
+sweep once they have not been uploaded for ``BLOB_UNREFERENCED_TTL_SECONDS``,
+which leaves time to create the song for a fresh upload.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.core.metrics import S3_UPLOAD_DEDUPLICATED, S3_UPLOAD_DEDUPLICATED_BYTES
+from app.db.session import AsyncSessionLocal
+from app.services.s3 import S3Service, get_s3_service
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Blobs deleted per query while collecting unreferenced objects
+COLLECT_BATCH_SIZE = 100
+
+
+class StoredUpload(NamedTuple):
+    """Where an upload was stored."""
+
+    file_path: str
+    deduplicated: bool
+
+
+def hash_file(fileobj: BinaryIO, chunk_size: int = HASH_CHUNK_SIZE) -> Tuple[str, int]:
+    """
+    SHA-256 a file in chunks, leaving it rewound.
+
+    Args:
+        fileobj: Seekable binary file
+        chunk_size: Bytes read per step
+
+    Returns:
+        Tuple[str, int]: Hex digest and size in bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    while chunk := fileobj.read(chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def content_key(prefix: str, sha256: str, filename: str) -> str:
+    """
+    S3 key for content with a given hash.
+
+    Args:
+        prefix: The prefix/folder, e.g. "audio"
+        sha256: Hex digest of the content
+        filename: Original filename, for its extension
+
+    Returns:
+        str: ``<prefix>/<sha256><extension>``
+    """
+    return f"{prefix}/{sha256}{os.path.splitext(filename)[1].lower()}"
+
+
+async def store_upload(db: AsyncSession, s3_service: S3Service, file: UploadFile, prefix: str) -> StoredUpload:
+    """
+    Store an upload, reusing the existing object for known content.
+
+    Hashing runs on the upload pool with the transfer, so it is subject to
+    the same backpressure. Concurrent first uploads of the same content
+    write identical bytes to the same key and share its blob row. No
+    reference is taken: the song created with the returned path takes it.
+
+    Args:
+        db: Async database session
+        s3_service: Service the upload is stored with
+        file: The validated upload
+        prefix: The prefix/folder in S3
+
+    Returns:
+        StoredUpload: Key of the object and whether the transfer was skipped
+
+    Raises:
+        UploadQueueFull: If the upload pool is saturated
+        Exception: If the upload fails
+    """
+    sha256, size = await s3_service.pool.run(hash_file, file.file)
+    existing = await crud.blob.touch(db, sha256=sha256)
+    if existing is not None:
+        S3_UPLOAD_DEDUPLICATED.labels(prefix).inc()
+        S3_UPLOAD_DEDUPLICATED_BYTES.labels(prefix).inc(size)
+        return StoredUpload(existing, True)
+    file_path = await s3_service.upload_file_async(file, prefix, content_key(prefix, sha256, file.filename))
+    await crud.blob.register(
+        db, sha256=sha256, file_path=file_path, size=size, content_type=file.content_type
+    )
+    return StoredUpload(file_path, False)
+
+
+async def register_stored_upload(db: AsyncSession, s3_service: S3Service, file_path: str) -> StoredUpload:
+    """
+    Record an object the client stored directly, reusing known content.
+
+    Objects uploaded with a presigned POST are stored under a key issued
+    before their content was known, so they are hashed after the fact. If
+    the content is already stored, the new object is deleted and the
+    existing key returned, as for an upload through the API.
+
+    Args:
+        db: Async database session
+        s3_service: Service the object is stored with
+        file_path: S3 key the client uploaded to
+
+    Returns:
+        StoredUpload: Key of the object to use and whether the upload was a duplicate
+
+    Raises:
+        UploadQueueFull: If the upload pool is saturated
+        FileNotFoundError: If the object does not exist
+    """
+    sha256, size, content_type = await s3_service.pool.run(s3_service.hash_object, file_path)
+    stored = await crud.blob.register(
+        db, sha256=sha256, file_path=file_path, size=size, content_type=content_type
+    )
+    if stored == file_path:
+        return StoredUpload(file_path, False)
+    await run_in_threadpool(s3_service.delete_file, file_path)
+    prefix = file_path.split("/", 1)[0]
+    S3_UPLOAD_DEDUPLICATED.labels(prefix).inc()
+    S3_UPLOAD_DEDUPLICATED_BYTES.labels(prefix).inc(size)
+    return StoredUpload(stored, True)
+
+
+async def collect_unreferenced_blobs(
+    *,
+    max_age: Optional[int] = None,
+    s3_service: Optional[S3Service] = None,
+    session_factory=AsyncSessionLocal,
+) -> int:
+    """
+    Delete objects no song has referenced for ``max_age`` seconds.
+
+    Meant to run as a background task; failures are logged and the blob
+    is retried on the next sweep.
+
+    Args:
+        max_age: Time since the last upload or reference change in seconds
+            (default: ``BLOB_UNREFERENCED_TTL_SECONDS``)
+        s3_service: Service the objects are stored with (default: the shared service)
+        session_factory: Factory for the job's own database session
+
+    Returns:
+        int: Number of objects deleted
+    """
+    s3_service = s3_service or get_s3_service()
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=settings.BLOB_UNREFERENCED_TTL_SECONDS if max_age is None else max_age
+    )
+    collected = 0
+    async with session_factory() as db:
+        while True:
+            unreferenced = await crud.blob.get_unreferenced(db, before=cutoff, limit=COLLECT_BATCH_SIZE)
+            failed = False
+            for blob in unreferenced:
+                try:
+                    file_path = await crud.blob.remove_unreferenced(db, id=blob.id, before=cutoff)
+                    if file_path is not None:
+                        # Delete before committing, while the row is still locked
+                        await run_in_threadpool(s3_service.delete_file, file_path)
+                        collected += 1
+                    await db.commit()
+                except Exception:
+                    logger.exception("Failed to delete unreferenced blob %s", blob.file_path)
+                    await db.rollback()
+                    failed = True
+                    break
+            if failed or len(unreferenced) < COLLECT_BATCH_SIZE:
+                break
+    return collected
+
+
+async def collect_unreferenced_blobs_forever(interval: Optional[int] = None) -> None:
+    """
+    Sweep unreferenced objects now and then every ``interval`` seconds.
+
+    Started with the application; runs until cancelled.
+
+    Args:
+        interval: Seconds between sweeps (default: ``BLOB_GC_INTERVAL_SECONDS``)
+    """
+    interval = settings.BLOB_GC_INTERVAL_SECONDS if interval is None else interval
+    while True:
+        try:
+            await collect_unreferenced_blobs()
+        except Exception:
+            logger.exception("Sweeping unreferenced blobs failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,139 @@
+"""
+Size-bounded LRU directory of cached files.
+
+Shared by the audio stream cache and the image proxy. Entries are written
+to a partial file and published with an atomic rename, so several workers
+may share a directory; an entry whose file another worker evicted is
+treated as a miss. Concurrent misses for one entry share a single fill.
+Readers that need a file to outlive eviction take a hard link to it in
+``LEASE_DIRECTORY``, which is not counted against the budget.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict
+
+PARTIAL_SUFFIX = ".part"
+LEASE_DIRECTORY = "leases"
+STALE_PARTIAL_SECONDS = 3600
+
+
+class DiskCache:
+    """
+    Base class for LRU caches of files on local disk.
+
+    Subclasses name their entries and supply the coroutine that fills one;
+    ``_record_lookup`` and ``_record_size`` report to their metrics.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the cache, indexing files left by a previous run.
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Upper bound on the total size of cached files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    async def _get_or_fill(self, name: str, fill: Callable[[str], Awaitable[None]]) -> str:
+        """
+        Path of an entry, filling it on a miss.
+
+        Args:
+            name: File name of the entry within the directory
+            fill: Writes the entry's content to the path it is given
+
+        Returns:
+            str: Path of the cached file
+        """
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            if name in self._entries:
+                self._entries.move_to_end(name)
+            else:
+                # Filled by another worker sharing the directory
+                self._add(name, os.path.getsize(path))
+            self._record_lookup("hit")
+            return path
+        self._forget(name)
+
+        pending = self._inflight.get(name)
+        if pending is not None:
+            self._record_lookup("coalesced")
+        else:
+            self._record_lookup("miss")
+            pending = asyncio.ensure_future(self._fill(name, path, fill))
+            self._inflight[name] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(name, None))
+        # A cancelled request must not cancel a fill others are waiting on
+        return await asyncio.shield(pending)
+
+    async def _fill(self, name: str, path: str, fill: Callable[[str], Awaitable[None]]) -> str:
+        partial = f"{path}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+        try:
+            await fill(partial)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+        self._add(name, os.path.getsize(path))
+        return path
+
+    def _add(self, name: str, size: int) -> None:
+        self._forget(name)
+        self._entries[name] = size
+        self.size += size
+        # Keep the newest entry even if it alone exceeds the budget
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            evicted, evicted_size = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            try:
+                os.unlink(os.path.join(self.directory, evicted))
+            except FileNotFoundError:
+                pass
+        self._record_size()
+
+    def _forget(self, name: str) -> None:
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self.size -= size
+
+    def _load_index(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith(PARTIAL_SUFFIX):
+                # Old partials are fills interrupted by a crash; newer
+                # ones may belong to another worker
+                if time.time() - stat.st_mtime > STALE_PARTIAL_SECONDS:
+                    os.unlink(entry.path)
+                continue
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+        leases = os.path.join(self.directory, LEASE_DIRECTORY)
+        if os.path.isdir(leases):
+            for entry in os.scandir(leases):
+                # Linking sets the change time; old leases were never released
+                if time.time() - entry.stat().st_ctime > STALE_PARTIAL_SECONDS:
+                    os.unlink(entry.path)
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.size += size
+        self._record_size()
+
+    def _record_lookup(self, result: str) -> None:
+        """Count a lookup ("hit", "miss" or "coalesced")."""
+
+    def _record_size(self) -> None:
+        """Report ``size`` after it changed."""
@@ -0,0 +1,187 @@
+"""
+Perceptual audio fingerprints for duplicate detection.
+
+A fingerprint is a set of landmark hashes: local maxima of the log
+spectrogram ("peaks") are paired with a few peaks that follow them, and
+each pair is packed with the frequency of both peaks and the time between
+them into one integer. Peaks survive re-encoding, resampling and mild
+noise, so two encodings of a track share many hashes at a constant time
+offset, while different tracks share few.
+
+Only NumPy is needed; decoding reuses ``audio_analysis``. Functions that
+take a path are meant to run in the media process pool.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.services.audio_analysis import DECODE_SAMPLE_RATE, decode_pcm, probe
+
+FRAME_SIZE = 1024
+HOP_SIZE = 512  # 64 ms at 8 kHz
+# Neighbourhood a peak must dominate, in frames and frequency bins
+PEAK_TIME_RADIUS = 6
+PEAK_FREQ_RADIUS = 12
+PEAKS_PER_SECOND = 30
+# Each peak is paired with the next FAN_OUT peaks up to MAX_DELTA frames later
+FAN_OUT = 5
+MAX_DELTA = 63
+FREQ_BITS = 9  # FRAME_SIZE // 2 bins
+DELTA_BITS = 6
+
+
+def spectral_peaks(samples: np.ndarray, sample_rate: int = DECODE_SAMPLE_RATE) -> np.ndarray:
+    """
+    Find the constellation of spectrogram peaks.
+
+    Args:
+        samples: Mono samples in [-1, 1]
+        sample_rate: Rate of ``samples``; resampled to ``DECODE_SAMPLE_RATE``
+
+    Returns:
+        np.ndarray: ``(n, 2)`` array of ``(frame, frequency bin)``, sorted by time
+    """
+    samples = _resample(np.asarray(samples, dtype=np.float32), sample_rate, DECODE_SAMPLE_RATE)
+    if samples.size < FRAME_SIZE:
+        return np.empty((0, 2), dtype=np.int64)
+    frames = sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE] * np.hanning(FRAME_SIZE).astype(np.float32)
+    # Drop the Nyquist bin so bins fit in FREQ_BITS
+    spectrum = np.log1p(np.abs(np.fft.rfft(frames, axis=1))[:, : FRAME_SIZE // 2] * 100)
+
+    # Separable maximum filter over the peak neighbourhood
+    local_max = _max_filter(_max_filter(spectrum, PEAK_TIME_RADIUS, axis=0), PEAK_FREQ_RADIUS, axis=1)
+    candidates = (spectrum == local_max) & (spectrum > spectrum.mean() + spectrum.std())
+    times, freqs = np.nonzero(candidates)
+
+    # Keep the strongest peaks to bound the fingerprint size
+    limit = max(1, int(PEAKS_PER_SECOND * samples.size / DECODE_SAMPLE_RATE))
+    if times.size > limit:
+        strongest = np.argpartition(spectrum[times, freqs], -limit)[-limit:]
+        times, freqs = times[strongest], freqs[strongest]
+    order = np.lexsort((freqs, times))
+    return np.stack([times[order], freqs[order]], axis=1).astype(np.int64)
+
+
+def landmark_hashes(peaks: np.ndarray) -> np.ndarray:
+    """
+    Pair peaks into landmark hashes.
+
+    Args:
+        peaks: Result of ``spectral_peaks``
+
+    Returns:
+        np.ndarray: Unique ``(n, 2)`` array of ``(hash, anchor frame)``
+    """
+    pairs = []
+    for step in range(1, FAN_OUT + 1):
+        anchors, targets = peaks[:-step], peaks[step:]
+        delta = targets[:, 0] - anchors[:, 0]
+        keep = delta <= MAX_DELTA
+        hashes = (
+            (anchors[keep, 1] << (FREQ_BITS + DELTA_BITS))
+            | (targets[keep, 1] << DELTA_BITS)
+            | delta[keep]
+        )
+        pairs.append(np.stack([hashes, anchors[keep, 0]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def fingerprint_samples(samples: np.ndarray, sample_rate: int = DECODE_SAMPLE_RATE) -> np.ndarray:
+    """
+    Fingerprint decoded audio.
+
+    Args:
+        samples: Mono samples in [-1, 1]
+        sample_rate: Rate of ``samples``
+
+    Returns:
+        np.ndarray: ``(n, 2)`` array of ``(hash, anchor frame)``
+    """
+    return landmark_hashes(spectral_peaks(samples, sample_rate))
+
+
+def fingerprint_file(path: str, ffmpeg: str = "ffmpeg") -> np.ndarray:
+    """
+    Decode and fingerprint an audio file.
+
+    Runs in a worker process.
+
+    Args:
+        path: Local audio file
+        ffmpeg: ffmpeg executable
+
+    Returns:
+        np.ndarray: ``(n, 2)`` array of ``(hash, anchor frame)``
+
+    Raises:
+        AudioDecodeError: If the audio cannot be decoded
+    """
+    with open(path, "rb") as f:
+        info = probe(f)
+    samples, sample_rate = decode_pcm(path, info, ffmpeg)
+    return fingerprint_samples(samples, sample_rate)
+
+
+def best_alignment(
+    query: np.ndarray, song_ids: np.ndarray, hashes: np.ndarray, offsets: np.ndarray
+) -> Optional[Tuple[int, int]]:
+    """
+    Find the stored song sharing the most time-aligned hashes with a query.
+
+    Every (query hash, stored hash) pair votes for the time offset between
+    them; a true match piles its votes onto one offset. Votes one frame
+    apart are pooled, since re-encoding can shift peaks across a frame
+    boundary.
+
+    Args:
+        query: Fingerprint of the new song, ``(hash, anchor frame)``
+        song_ids: Song of each stored hash that matched a query hash
+        hashes: The matching stored hashes
+        offsets: Anchor frames of the stored hashes
+
+    Returns:
+        Optional[Tuple[int, int]]: Best song ID and its aligned hash count,
+        or None if nothing matched
+    """
+    if not len(song_ids) or not len(query):
+        return None
+    order = np.argsort(query[:, 0], kind="stable")
+    query_hashes, query_times = query[order, 0], query[order, 1]
+    left = np.searchsorted(query_hashes, hashes, "left")
+    counts = np.searchsorted(query_hashes, hashes, "right") - left
+    total = int(counts.sum())
+    if total == 0:
+        return None
+    # Expand each stored hash into one vote per query occurrence of the hash
+    starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+    query_index = starts + np.arange(total)
+    votes = np.stack([np.repeat(song_ids, counts), np.repeat(offsets, counts) - query_times[query_index]], axis=1)
+
+    pairs, tally = np.unique(votes, axis=0, return_counts=True)
+    adjacent = (pairs[1:, 0] == pairs[:-1, 0]) & (pairs[1:, 1] == pairs[:-1, 1] + 1)
+    pooled = tally.copy()
+    pooled[:-1] += np.where(adjacent, tally[1:], 0)
+    best = int(np.argmax(pooled))
+    return int(pairs[best, 0]), int(pooled[best])
+
+
+def _resample(samples: np.ndarray, rate: int, target: int) -> np.ndarray:
+    if rate == target or samples.size == 0:
+        return samples
+    if rate > target:
+        # Box filter against aliasing before linear interpolation
+        width = int(rate // target)
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1 / width, dtype=np.float32), mode="same")
+    positions = np.arange(int(samples.size * target / rate)) * (rate / target)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+def _max_filter(values: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius, radius)
+    padded = np.pad(values, pad, mode="constant", constant_values=-np.inf)
+    return sliding_window_view(padded, 2 * radius + 1, axis=axis).max(axis=-1)
@@ -0,0 +1,191 @@
+"""
+HLS packaging: AAC renditions in short MPEG-TS segments.
+
+``segment_rendition`` transcodes one rendition of the bitrate ladder with
+ffmpeg; it is the entry point run in worker processes, so this module
+depends on the standard library only. Playlists are rendered from the
+segment lists it returns: the stored copies use relative URIs, the API
+serves media playlists with signed segment URLs.
+"""
+import math
+import os
+import subprocess
+from typing import Any, Dict, List, Optional, Sequence
+
+MASTER_PLAYLIST = "master.m3u8"
+MEDIA_PLAYLIST = "index.m3u8"
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+SEGMENT_CONTENT_TYPE = "video/mp2t"
+# AAC-LC
+AUDIO_CODEC = "mp4a.40.2"
+SAMPLE_RATE = 44100
+
+
+class HlsError(Exception):
+    """Raised when a rendition cannot be transcoded."""
+
+
+def hls_prefix(file_path: str) -> str:
+    """
+    Key prefix of the HLS package of an uploaded file.
+
+    Args:
+        file_path: S3 key of the original audio, e.g. ``audio/abc.mp3``
+
+    Returns:
+        str: e.g. ``hls/abc``
+    """
+    return f"hls/{os.path.splitext(os.path.basename(file_path))[0]}"
+
+
+def rendition_name(bitrate: int) -> str:
+    """Directory name of a rendition, e.g. ``128k``."""
+    return f"{bitrate}k"
+
+
+def segment_rendition(
+    path: str,
+    directory: str,
+    bitrate: int,
+    segment_seconds: int,
+    ffmpeg: str = "ffmpeg",
+    progress_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Transcode audio to one AAC rendition split into MPEG-TS segments.
+
+    Runs in a worker process. Segments and ffmpeg's playlist are written to
+    ``<directory>/<bitrate>k/``.
+
+    Args:
+        path: Local audio file
+        directory: Output directory of the package
+        bitrate: AAC bitrate in kbit/s
+        segment_seconds: Target segment duration
+        ffmpeg: ffmpeg executable
+        progress_path: File ffmpeg reports its progress to (see ``read_progress``)
+
+    Returns:
+        Dict[str, Any]: ``name``, ``bitrate``, ``bandwidth`` (peak bits per
+        second) and ``segments`` (``uri`` and ``duration`` of each)
+
+    Raises:
+        HlsError: If ffmpeg fails or is missing
+    """
+    name = rendition_name(bitrate)
+    output = os.path.join(directory, name)
+    os.makedirs(output, exist_ok=True)
+    command = [
+        ffmpeg, "-v", "error", "-nostdin", "-y", "-i", path,
+        "-vn", "-map", "0:a:0", "-c:a", "aac", "-b:a", f"{bitrate}k", "-ac", "2", "-ar", str(SAMPLE_RATE),
+        "-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+        "-hls_segment_type", "mpegts", "-hls_segment_filename", os.path.join(output, "%05d.ts"),
+    ]
+    if progress_path:
+        command += ["-progress", progress_path]
+    command.append(os.path.join(output, MEDIA_PLAYLIST))
+    try:
+        subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise HlsError("ffmpeg is required for HLS packaging")
+    except subprocess.CalledProcessError as e:
+        raise HlsError(e.stderr.decode(errors="replace").strip()[:500] or "ffmpeg failed")
+    with open(os.path.join(output, MEDIA_PLAYLIST)) as f:
+        segments = parse_media_playlist(f.read())
+    if not segments:
+        raise HlsError("ffmpeg produced no segments")
+    peak = max(
+        os.path.getsize(os.path.join(output, segment["uri"])) * 8 / max(segment["duration"], 0.001)
+        for segment in segments
+    )
+    return {"name": name, "bitrate": bitrate, "bandwidth": math.ceil(peak), "segments": segments}
+
+
+def parse_media_playlist(text: str) -> List[Dict[str, Any]]:
+    """
+    Segments of a media playlist.
+
+    Args:
+        text: Playlist content
+
+    Returns:
+        List[Dict[str, Any]]: ``uri`` and ``duration`` of each segment, in order
+    """
+    segments, duration = [], None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#EXTINF:"):
+            duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+        elif line and not line.startswith("#") and duration is not None:
+            segments.append({"uri": line, "duration": duration})
+            duration = None
+    return segments
+
+
+def media_playlist(segments: Sequence[Dict[str, Any]], uris: Optional[Sequence[str]] = None) -> str:
+    """
+    Render a VOD media playlist.
+
+    Args:
+        segments: ``uri`` and ``duration`` of each segment
+        uris: URIs to list instead of the segments' own (e.g. signed URLs)
+
+    Returns:
+        str: Playlist content
+    """
+    uris = uris or [segment["uri"] for segment in segments]
+    target = max((math.ceil(segment["duration"]) for segment in segments), default=0)
+    lines = [
+        "#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{target}",
+        "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for segment, uri in zip(segments, uris):
+        lines += [f"#EXTINF:{segment['duration']:.6f},", uri]
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def master_playlist(renditions: Sequence[Dict[str, Any]]) -> str:
+    """
+    Render the index playlist listing each rendition, lowest bitrate first.
+
+    Args:
+        renditions: Results of ``segment_rendition``
+
+    Returns:
+        str: Playlist content referencing ``<name>/index.m3u8``
+    """
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for rendition in sorted(renditions, key=lambda r: r["bandwidth"]):
+        lines += [
+            f'#EXT-X-STREAM-INF:BANDWIDTH={rendition["bandwidth"]},'
+            f'AVERAGE-BANDWIDTH={rendition["bitrate"] * 1000},CODECS="{AUDIO_CODEC}"',
+            f'{rendition["name"]}/{MEDIA_PLAYLIST}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def read_progress(progress_path: str) -> float:
+    """
+    Seconds of audio transcoded so far, from an ffmpeg ``-progress`` file.
+
+    Args:
+        progress_path: File passed to ``segment_rendition``
+
+    Returns:
+        float: Position of the latest report; 0 before the first
+    """
+    try:
+        with open(progress_path) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return 0.0
+    position = 0.0
+    for line in text.splitlines():
+        # out_time_ms is in microseconds as well
+        if line.startswith("out_time_us=") or line.startswith("out_time_ms="):
+            try:
+                position = max(position, int(line.split("=", 1)[1]) / 1_000_000)
+            except ValueError:
+                pass  # "N/A" before the first packet
+    return position
@@ -0,0 +1,451 @@
+"""
+Caching proxy for third-party cover art.
+
+Scraped songs, blogs and bands point at images on arbitrary hosts, which
+are slow, sometimes huge and sometimes gone. The proxy fetches an image
+once with a shared, pooled HTTP client, re-encodes it in the media process
+pool at the smallest of ``IMAGE_PROXY_SIZES`` that covers the requested
+size, and keeps the result in a size-bounded disk cache. Concurrent
+requests share one fetch per URL and one resize per variant; failures are
+remembered for a while so dead links are not fetched on every page view.
+
+Proxy URLs carry an HMAC of the source URL (``proxy_path``), so the
+endpoint only fetches URLs the API handed out and cannot be used as an
+open proxy. Only public http(s) hosts are contacted, every redirect hop
+included: the client's transport (``PublicTransport``) resolves each host
+itself and connects to the address it checked, so a second DNS answer
+cannot point the connection at an internal service.
+"""
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import httpcore
+import httpx
+from PIL import UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import IMAGE_PROXY_CACHE_BYTES, IMAGE_PROXY_LOOKUPS
+from app.services.disk_cache import DiskCache
+from app.services.image_variants import VARIANT_FORMATS, resize_image
+from app.services.media_jobs import run_media_job
+
+MAX_REDIRECTS = 3
+USER_AGENT = "ListenerImageProxy/1.0"
+
+
+class ImageProxyError(Exception):
+    """Raised when an image cannot be served; cached for ``ttl`` seconds."""
+
+    def __init__(self, status_code: int, detail: str, ttl: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.ttl = ttl
+
+
+class HostNotPublic(Exception):
+    """Raised when a host resolves to a loopback, private or reserved address."""
+
+
+class PublicAddressBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that only connects to public addresses.
+
+    The host is resolved here, refused if any of its addresses is not
+    global, and the connection is made to a vetted address rather than the
+    name. TLS still sends the host name (SNI) and verifies the certificate
+    against it.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend):
+        """
+        Initialize the backend.
+
+        Args:
+            backend: Backend that opens the connections
+        """
+        self.backend = backend
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(f"{host} does not resolve") from e
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if any(not ipaddress.ip_address(address.split("%")[0]).is_global for address in addresses):
+            raise HostNotPublic(host)
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except httpcore.ConnectError as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path: str, *args: Any, **kwargs: Any) -> httpcore.AsyncNetworkStream:
+        raise httpcore.ConnectError("Unix sockets are not public hosts")
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+# httpcore errors raised as the httpx errors clients handle
+HTTPCORE_ERRORS: Tuple[Tuple[type, type], ...] = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextlib.contextmanager
+def _httpx_errors() -> Iterator[None]:
+    try:
+        yield
+    except tuple(core for core, _ in HTTPCORE_ERRORS) as e:
+        mapped = next(error for core, error in HTTPCORE_ERRORS if isinstance(e, core))
+        raise mapped(str(e)) from e
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: AsyncIterable[bytes]):
+        self.stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for chunk in self.stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self.stream, "aclose"):
+            await self.stream.aclose()
+
+
+class PublicTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport that only connects to public addresses.
+
+    A plain httpcore connection pool whose network backend is a
+    ``PublicAddressBackend``; internal hosts raise ``HostNotPublic``.
+    """
+
+    def __init__(
+        self,
+        limits: httpx.Limits = httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            limits: Connection pool limits
+            backend: Backend that opens the vetted connections (default: anyio)
+        """
+        self.network_backend = PublicAddressBackend(backend or httpcore.AnyIOBackend())
+        self.pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=self.network_backend,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """
+        Send a request through the pool.
+
+        Args:
+            request: Request built by the client
+
+        Returns:
+            httpx.Response: Response with a streamed body
+        """
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self.pool.aclose()
+
+
+def sign_url(url: str) -> str:
+    """
+    Signature authorizing the proxy to fetch a URL.
+
+    Args:
+        url: Source image URL
+
+    Returns:
+        str: Hex HMAC-SHA256 of the URL, truncated to 32 characters
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), url.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_signature(url: str, signature: str) -> bool:
+    """Whether ``signature`` was issued for ``url`` by ``sign_url``."""
+    return hmac.compare_digest(sign_url(url), signature)
+
+
+def proxy_path(url: str, size: Optional[int] = None, fmt: Optional[str] = None) -> str:
+    """
+    Signed proxy path for a third-party image.
+
+    Args:
+        url: Source image URL
+        size: Display size hint in pixels
+        fmt: Output format; negotiated from ``Accept`` when omitted
+
+    Returns:
+        str: ``/api/v1/images/proxy?...`` path
+    """
+    params = {"url": url, "sig": sign_url(url)}
+    if size is not None:
+        params["size"] = size
+    if fmt is not None:
+        params["format"] = fmt
+    return f"{settings.API_V1_STR}/images/proxy?{urlencode(params)}"
+
+
+def size_bucket(size: Optional[int], buckets: Sequence[int]) -> int:
+    """
+    The bucket an image is rendered at for a requested size.
+
+    Args:
+        size: Requested longest side, or None for the largest bucket
+        buckets: Available sizes
+
+    Returns:
+        int: Smallest bucket of at least ``size``, else the largest bucket
+    """
+    ordered = sorted(buckets)
+    if size is None:
+        return ordered[-1]
+    return next((bucket for bucket in ordered if bucket >= size), ordered[-1])
+
+
+class ImageProxy(DiskCache):
+    """Fetches, resizes and caches remote images."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        client: httpx.AsyncClient,
+        *,
+        max_source_bytes: int,
+        negative_ttl: int,
+        error_ttl: int,
+        quality: int = 80,
+        max_negative_entries: int = 10000,
+    ):
+        """
+        Initialize the proxy, indexing images cached by a previous run.
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Upper bound on the total size of cached images
+            client: Pooled HTTP client for fetching sources; give it a
+                ``PublicTransport`` unless internal hosts are trusted (tests)
+            max_source_bytes: Larger sources are refused
+            negative_ttl: Seconds to remember permanent failures (404, not an image)
+            error_ttl: Seconds to remember transient failures (timeouts, 5xx)
+            quality: Encoder quality of the resized images
+            max_negative_entries: Failures remembered at most
+        """
+        self.client = client
+        self.max_source_bytes = max_source_bytes
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.quality = quality
+        self.max_negative_entries = max_negative_entries
+        self._negative: "OrderedDict[str, Tuple[float, ImageProxyError]]" = OrderedDict()
+        self._fetches: Dict[str, "asyncio.Future[bytes]"] = {}
+        super().__init__(directory, max_bytes)
+
+    async def get_path(self, url: str, size: int, fmt: str) -> str:
+        """
+        Local path of a resized image, fetching and resizing it on a miss.
+
+        Args:
+            url: Source image URL
+            size: Bucket from ``size_bucket``
+            fmt: A key of ``VARIANT_FORMATS``
+
+        Returns:
+            str: Path of the cached image
+
+        Raises:
+            ImageProxyError: If the image cannot be served (possibly cached)
+        """
+        failure = self._negative.get(url)
+        if failure is not None:
+            if failure[0] > time.monotonic():
+                self._record_lookup("negative")
+                raise failure[1]
+            del self._negative[url]
+        try:
+            return await self._get_or_fill(
+                self._name(url, size, fmt), lambda partial: self._render(url, size, fmt, partial)
+            )
+        except ImageProxyError as e:
+            self._remember_failure(url, e)
+            raise
+
+    async def _render(self, url: str, size: int, fmt: str, path: str) -> None:
+        data = await self._fetch_shared(url)
+        try:
+            rendered = await run_media_job("image_proxy", resize_image, data, size, fmt, self.quality)
+        except (UnidentifiedImageError, OSError, ValueError) as e:
+            raise ImageProxyError(415, f"Not a supported image: {e}", self.negative_ttl)
+        await run_in_threadpool(_write, path, rendered)
+
+    async def _fetch_shared(self, url: str) -> bytes:
+        # Every size and format of one URL waits on the same fetch
+        pending = self._fetches.get(url)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(url))
+            self._fetches[url] = pending
+            pending.add_done_callback(lambda _: self._fetches.pop(url, None))
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, url: str) -> bytes:
+        for _ in range(MAX_REDIRECTS + 1):
+            self._check_url(url)
+            try:
+                async with self.client.stream("GET", url, headers={"Accept": "image/*"}) as response:
+                    if response.is_redirect and "location" in response.headers:
+                        url = urljoin(url, response.headers["location"])
+                        continue
+                    return await self._read(response)
+            except HostNotPublic:
+                raise ImageProxyError(400, "Image host is not public", self.negative_ttl)
+            except httpx.HTTPError as e:
+                raise ImageProxyError(502, f"Fetching the image failed: {type(e).__name__}", self.error_ttl)
+        raise ImageProxyError(502, "Too many redirects", self.negative_ttl)
+
+    async def _read(self, response: httpx.Response) -> bytes:
+        if response.status_code in (404, 410):
+            raise ImageProxyError(404, "Image not found at its source", self.negative_ttl)
+        if response.status_code != 200:
+            ttl = self.error_ttl if response.status_code >= 500 or response.status_code == 429 else self.negative_ttl
+            raise ImageProxyError(502, f"Image source returned {response.status_code}", ttl)
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith("image/"):
+            raise ImageProxyError(415, f"Not an image: {content_type or 'no content type'}", self.negative_ttl)
+        too_large = ImageProxyError(413, "Image is too large", self.negative_ttl)
+        if int(response.headers.get("content-length") or 0) > self.max_source_bytes:
+            raise too_large
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > self.max_source_bytes:
+                raise too_large
+        return bytes(body)
+
+    def _check_url(self, url: str) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ImageProxyError(400, "Only http(s) URLs can be proxied", self.negative_ttl)
+
+    def _remember_failure(self, url: str, error: ImageProxyError) -> None:
+        self._negative[url] = (time.monotonic() + error.ttl, error)
+        self._negative.move_to_end(url)
+        while len(self._negative) > self.max_negative_entries:
+            self._negative.popitem(last=False)
+
+    def _record_lookup(self, result: str) -> None:
+        IMAGE_PROXY_LOOKUPS.labels(result).inc()
+
+    def _record_size(self) -> None:
+        IMAGE_PROXY_CACHE_BYTES.set(self.size)
+
+    @staticmethod
+    def _name(url: str, size: int, fmt: str) -> str:
+        digest = hashlib.sha256(url.encode()).hexdigest()[:32]
+        return f"{digest}_{size}{VARIANT_FORMATS[fmt][1]}"
+
+
+@lru_cache(maxsize=None)
+def get_image_proxy() -> ImageProxy:
+    """
+    Process-wide image proxy, for use as a FastAPI dependency.
+
+    Returns:
+        ImageProxy: Proxy with the shared HTTP connection pool
+    """
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.IMAGE_PROXY_TIMEOUT),
+        transport=PublicTransport(
+            limits=httpx.Limits(
+                max_connections=settings.IMAGE_PROXY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.IMAGE_PROXY_MAX_CONNECTIONS,
+            ),
+        ),
+        headers={"User-Agent": USER_AGENT},
+    )
+    return ImageProxy(
+        settings.IMAGE_PROXY_CACHE_DIR,
+        settings.IMAGE_PROXY_CACHE_MAX_BYTES,
+        client,
+        max_source_bytes=settings.IMAGE_PROXY_MAX_SOURCE_BYTES,
+        negative_ttl=settings.IMAGE_PROXY_NEGATIVE_TTL,
+        error_ttl=settings.IMAGE_PROXY_ERROR_TTL,
+        quality=settings.IMAGE_VARIANT_QUALITY,
+    )
+
+
+async def close_image_proxy() -> None:
+    """Close the shared proxy's HTTP connections, if it was created."""
+    if get_image_proxy.cache_info().currsize:
+        await get_image_proxy().client.aclose()
+        get_image_proxy.cache_clear()
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
@@ -0,0 +1,143 @@
+"""
+Fixed-size WebP and JPEG variants of uploaded images.
+
+Cover art is uploaded at full size, but lists show it at thumbnail size.
+After an image upload, ``render_variants`` runs in the media process pool
+and produces a downscaled copy per size in ``IMAGE_VARIANT_SIZES`` (never
+upscaling) and format; they are stored next to the original as
+``<original stem>_<size>.<ext>``, and the keys recorded per original.
+List endpoints then pick the variant that matches a requested display size.
+"""
+import io
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+from PIL import Image, ImageOps
+
+# Formats rendered per size: format -> (Pillow format, extension, content type)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+_SAVE_OPTIONS = {"WEBP": {"method": 4}, "JPEG": {"optimize": True, "progressive": True}}
+
+
+def variant_key(file_path: str, size: int, fmt: str) -> str:
+    """
+    S3 key of an image variant, next to the original.
+
+    Args:
+        file_path: S3 key of the original image
+        size: Longest side of the variant in pixels
+        fmt: A key of ``VARIANT_FORMATS``
+
+    Returns:
+        str: e.g. ``images/<sha256>_128.webp`` for ``images/<sha256>.png``
+    """
+    return f"{os.path.splitext(file_path)[0]}_{size}{VARIANT_FORMATS[fmt][1]}"
+
+
+def render_variants(path: str, sizes: Sequence[int], quality: int = 80) -> List[Dict[str, Any]]:
+    """
+    Render the downscaled variants of an image.
+
+    Runs in a worker process. Sizes at or above the original's longest side
+    are skipped. JPEG decoding uses draft mode, which decodes at a reduced
+    scale when the largest variant is much smaller than the original.
+
+    Args:
+        path: Local image file
+        sizes: Longest sides to render, in pixels
+        quality: Encoder quality for both formats
+
+    Returns:
+        List[Dict[str, Any]]: Per variant, ``size``, ``format``, ``width``,
+        ``height`` and the encoded ``data``
+    """
+    with Image.open(path) as image:
+        longest = max(image.size)
+        sizes = sorted({size for size in sizes if size < longest}, reverse=True)
+        if not sizes:
+            return []
+        image = _prepare(image, sizes[0])
+
+    variants = []
+    for size in sizes:
+        # Downscale from the previous, larger variant: cheaper and as sharp
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt in VARIANT_FORMATS:
+            variants.append({
+                "size": size,
+                "format": fmt,
+                "width": image.width,
+                "height": image.height,
+                "data": _encode(image, fmt, quality),
+            })
+    return variants
+
+
+def resize_image(data: bytes, size: int, fmt: str, quality: int = 80) -> bytes:
+    """
+    Re-encode an image to fit a size, without upscaling.
+
+    Runs in a worker process.
+
+    Args:
+        data: Encoded source image
+        size: Longest side of the result in pixels
+        fmt: A key of ``VARIANT_FORMATS``
+        quality: Encoder quality
+
+    Returns:
+        bytes: Encoded image
+
+    Raises:
+        PIL.UnidentifiedImageError: If ``data`` is not an image Pillow reads
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = _prepare(image, size)
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return _encode(image, fmt, quality)
+
+
+def pick_variant(variants: Sequence[Dict[str, Any]], size: int, fmt: str) -> Optional[str]:
+    """
+    Choose the variant to show an image at a display size.
+
+    Args:
+        variants: Stored variants of one image (``size``, ``format``, ``file_path``)
+        size: Display size hint in pixels
+        fmt: Preferred format; the other format is used if it is missing
+
+    Returns:
+        Optional[str]: S3 key of the smallest variant of at least ``size``
+        pixels, or None if the original is the best fit
+    """
+    candidates = [v for v in variants if v["format"] == fmt] or list(variants)
+    large_enough = [v for v in candidates if v["size"] >= size]
+    if not large_enough:
+        return None
+    return min(large_enough, key=lambda v: v["size"])["file_path"]
+
+
+def _prepare(image: Image.Image, size: int) -> Image.Image:
+    """Decode an opened image at no less than ``size``, upright, as RGB(A)."""
+    image.draft("RGB", (size, size))
+    # Apply EXIF rotation; GIFs contribute their first frame
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    image.load()
+    return image
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    pil_format = VARIANT_FORMATS[fmt][0]
+    if pil_format == "JPEG" and image.mode == "RGBA":
+        # Flatten transparency onto white
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel("A"))
+        image = flat
+    out = io.BytesIO()
+    image.save(out, pil_format, quality=quality, **_SAVE_OPTIONS[pil_format])
+    return out.getvalue()
@@ -0,0 +1,402 @@
+"""
+Background media processing triggered by uploads.
+
+CPU-heavy steps (decoding, NumPy analysis) run in a process pool so they
+neither block the event loop nor hold the GIL while requests are served.
+Jobs are started with FastAPI ``BackgroundTasks`` and write their results
+with their own database session.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.core.metrics import MEDIA_JOB_FAILURES, MEDIA_JOB_SECONDS, SONG_DUPLICATES_FLAGGED
+from app.db.session import AsyncSessionLocal
+from app.models.audio_analysis import AudioAnalysis
+from app.models.hls_package import HlsPackage
+from app.models.image_variants import ImageVariants
+from app.models.song import Song
+from app.services.audio_analysis import analyze_file, probe
+from app.services.audio_cache import AudioFileCache, get_audio_cache
+from app.services.fingerprint import fingerprint_file
+from app.services.hls import (
+    MASTER_PLAYLIST,
+    MEDIA_PLAYLIST,
+    PLAYLIST_CONTENT_TYPE,
+    SEGMENT_CONTENT_TYPE,
+    hls_prefix,
+    master_playlist,
+    media_playlist,
+    read_progress,
+    segment_rendition,
+)
+from app.services.image_variants import VARIANT_FORMATS, render_variants, variant_key
+from app.services.s3 import S3Service, get_s3_service
+
+logger = logging.getLogger(__name__)
+
+# Variant and HLS keys are derived from content-addressed originals, so never change
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Share of an HLS job's progress taken by transcoding; the rest is uploading
+HLS_TRANSCODE_SHARE = 0.9
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_media_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide pool for CPU-bound media jobs.
+
+    Workers are spawned rather than forked, so they do not inherit the
+    server's threads, sockets or locks.
+
+    Returns:
+        ProcessPoolExecutor: Pool of ``MEDIA_WORKERS`` processes
+    """
+    return ProcessPoolExecutor(
+        max_workers=settings.MEDIA_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def shutdown_media_pool() -> None:
+    """Stop the media worker processes, if started."""
+    if get_media_pool.cache_info().currsize:
+        get_media_pool().shutdown(wait=True, cancel_futures=True)
+        get_media_pool.cache_clear()
+
+
+async def run_media_job(job: str, fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run a picklable function in the media pool, timing it.
+
+    Args:
+        job: Low-cardinality job name for metrics, e.g. "audio_analysis"
+        fn: Module-level function
+        *args: Picklable arguments
+
+    Returns:
+        T: Result of ``fn``
+    """
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_media_pool(), fn, *args)
+    except Exception:
+        MEDIA_JOB_FAILURES.labels(job).inc()
+        raise
+    finally:
+        MEDIA_JOB_SECONDS.labels(job).observe(time.perf_counter() - start)
+
+
+async def analyze_upload(
+    file_path: str,
+    *,
+    audio_cache: Optional[AudioFileCache] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> Optional[AudioAnalysis]:
+    """
+    Analyse an uploaded audio file and store the result.
+
+    The file is fetched through the stream cache, which also warms it for
+    the first play. Never raises: it runs after the response is sent.
+
+    Args:
+        file_path: S3 key of the upload
+        audio_cache: Cache to read the file through (default: the shared cache)
+        session_factory: Creates the session the result is written with
+
+    Returns:
+        Optional[AudioAnalysis]: Stored analysis (failures are recorded in
+        ``error``), or None if it could not be stored
+    """
+    try:
+        async with (audio_cache or get_audio_cache()).leased(file_path) as path:
+            values = await run_media_job(
+                "audio_analysis", analyze_file, path, settings.AUDIO_WAVEFORM_PEAKS, settings.FFMPEG_PATH
+            )
+    except Exception as e:
+        logger.exception("Audio analysis failed for %s", file_path)
+        values = {"error": str(e)[:500] or type(e).__name__}
+    try:
+        async with session_factory() as db:
+            return await crud.audio_analysis.save(db, file_path=file_path, values=values)
+    except Exception:
+        logger.exception("Could not store the audio analysis of %s", file_path)
+        return None
+
+
+async def fingerprint_song(
+    song_id: int,
+    file_path: str,
+    *,
+    audio_cache: Optional[AudioFileCache] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> Optional[int]:
+    """
+    Fingerprint a song's uploaded audio and flag it if it duplicates another.
+
+    See ``index_fingerprint``. Never raises.
+
+    Args:
+        song_id: Song to fingerprint
+        file_path: S3 key of its audio
+        audio_cache: Cache to read the file through (default: the shared cache)
+        session_factory: Creates the session results are written with
+
+    Returns:
+        Optional[int]: ID of the song it duplicates, if any
+    """
+    try:
+        async with (audio_cache or get_audio_cache()).leased(file_path) as path:
+            fingerprint = await run_media_job("fingerprint", fingerprint_file, path, settings.FFMPEG_PATH)
+        return await index_fingerprint(song_id, fingerprint, session_factory=session_factory)
+    except Exception:
+        logger.exception("Fingerprinting failed for song %s", song_id)
+        return None
+
+
+async def index_fingerprint(
+    song_id: int,
+    fingerprint: np.ndarray,
+    *,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> Optional[int]:
+    """
+    Store a song's fingerprint and flag the song if it duplicates another.
+
+    A song is a duplicate when at least ``FINGERPRINT_MIN_MATCHES`` of its
+    hashes, and ``FINGERPRINT_MATCH_THRESHOLD`` of them as a fraction, line
+    up with an indexed song at one time offset. Duplicates point at the
+    original (never at another duplicate).
+
+    Args:
+        song_id: Song the fingerprint belongs to
+        fingerprint: ``(n, 2)`` array of ``(hash, anchor frame)``
+        session_factory: Creates the session results are written with
+
+    Returns:
+        Optional[int]: ID of the song it duplicates, if any
+    """
+    async with session_factory() as db:
+        match = await crud.song_fingerprint.find_match(db, fingerprint=fingerprint, exclude_song_id=song_id)
+        await crud.song_fingerprint.replace(db, song_id=song_id, fingerprint=fingerprint)
+        if match is None:
+            return None
+        matched_id, aligned = match
+        if aligned < settings.FINGERPRINT_MIN_MATCHES or aligned < settings.FINGERPRINT_MATCH_THRESHOLD * len(fingerprint):
+            return None
+        matched = await crud.song.get(db, id=matched_id)
+        if matched is None:
+            return None
+        original_id = matched.duplicate_of_id or matched.id
+        await crud.song.mark_duplicate(db, song_id=song_id, duplicate_of_id=original_id)
+        SONG_DUPLICATES_FLAGGED.inc()
+        logger.info("Song %s duplicates song %s (%s aligned hashes)", song_id, original_id, aligned)
+        return original_id
+
+
+async def fingerprint_songs(
+    song_ids: Sequence[int],
+    *,
+    audio_cache: Optional[AudioFileCache] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> None:
+    """
+    Fingerprint imported songs one after another.
+
+    Args:
+        song_ids: Songs to fingerprint
+        audio_cache: Cache to read files through (default: the shared cache)
+        session_factory: Creates the sessions results are written with
+    """
+    try:
+        async with session_factory() as db:
+            rows = await crud.song.get_rows(
+                db, columns=[Song.id, Song.file_path], where=[Song.id.in_(song_ids)], limit=len(song_ids)
+            )
+    except Exception:
+        logger.exception("Could not load %d songs to fingerprint", len(song_ids))
+        return
+    for row in rows:
+        await fingerprint_song(row.id, row.file_path, audio_cache=audio_cache, session_factory=session_factory)
+
+
+async def generate_image_variants(
+    file_path: str,
+    *,
+    s3_service: Optional[S3Service] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> Optional[ImageVariants]:
+    """
+    Render and store the thumbnail variants of an uploaded image.
+
+    The original is downloaded to a temporary file, resized in the media
+    pool, and each variant is stored next to it with a long-lived
+    Cache-Control header. Never raises: it runs after the response is sent.
+
+    Args:
+        file_path: S3 key of the original image
+        s3_service: Service the images are read and stored with (default: the shared service)
+        session_factory: Creates the session the variant keys are written with
+
+    Returns:
+        Optional[ImageVariants]: Stored variants (failures are recorded in
+        ``error``), or None if they could not be stored
+    """
+    s3_service = s3_service or get_s3_service()
+    variants, error = [], None
+    try:
+        with tempfile.TemporaryDirectory(prefix="image-variants-") as directory:
+            path = os.path.join(directory, "original")
+            await run_in_threadpool(s3_service.download_file, file_path, path)
+            rendered = await run_media_job(
+                "image_variants", render_variants, path, settings.IMAGE_VARIANT_SIZES, settings.IMAGE_VARIANT_QUALITY
+            )
+        keys = [variant_key(file_path, variant["size"], variant["format"]) for variant in rendered]
+        await asyncio.gather(*(
+            s3_service.pool.run(
+                s3_service.put_bytes, key, variant.pop("data"), VARIANT_FORMATS[variant["format"]][2], VARIANT_CACHE_CONTROL
+            )
+            for key, variant in zip(keys, rendered)
+        ))
+        variants = [{**variant, "file_path": key} for key, variant in zip(keys, rendered)]
+    except Exception as e:
+        logger.exception("Image variants failed for %s", file_path)
+        error = str(e)[:500] or type(e).__name__
+    try:
+        async with session_factory() as db:
+            return await crud.image_variants.save(db, file_path=file_path, variants=variants, error=error)
+    except Exception:
+        logger.exception("Could not store the image variants of %s", file_path)
+        return None
+
+
+async def package_hls(
+    file_path: str,
+    *,
+    audio_cache: Optional[AudioFileCache] = None,
+    s3_service: Optional[S3Service] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> Optional[HlsPackage]:
+    """
+    Transcode an uploaded audio file to HLS and store the package.
+
+    Each rendition of ``HLS_BITRATES`` is a separate media pool job, so the
+    ladder is transcoded in parallel. Progress, read from ffmpeg's progress
+    reports, is recorded every ``HLS_PROGRESS_INTERVAL`` seconds. Segments
+    and playlists are stored under ``hls_prefix(file_path)``, and songs of
+    the file get the master playlist as ``playback_manifest``. Never raises.
+
+    Args:
+        file_path: S3 key of the original audio
+        audio_cache: Cache to read the file through (default: the shared cache)
+        s3_service: Service the package is stored with (default: the shared service)
+        session_factory: Creates the sessions progress and results are written with
+
+    Returns:
+        Optional[HlsPackage]: Stored package (failures are recorded in
+        ``error``), or None if it could not be stored
+    """
+    s3_service = s3_service or get_s3_service()
+    prefix = hls_prefix(file_path)
+    try:
+        async with session_factory() as db:
+            await crud.hls_package.start(db, file_path=file_path)
+        with tempfile.TemporaryDirectory(prefix="hls-") as directory:
+            async with (audio_cache or get_audio_cache()).leased(file_path) as path:
+                renditions = await _transcode_renditions(file_path, path, directory, session_factory)
+            segments = [
+                f"{rendition['name']}/{segment['uri']}" for rendition in renditions for segment in rendition["segments"]
+            ]
+            playlists = {f"{rendition['name']}/{MEDIA_PLAYLIST}": media_playlist(rendition["segments"]) for rendition in renditions}
+            playlists[MASTER_PLAYLIST] = master_playlist(renditions)
+            # Segments first, so stored playlists never reference missing objects
+            await _store_all([
+                (_put_file, s3_service, f"{prefix}/{name}", os.path.join(directory, name)) for name in segments
+            ])
+            await _store_all([
+                (s3_service.put_bytes, f"{prefix}/{name}", text.encode(), PLAYLIST_CONTENT_TYPE, VARIANT_CACHE_CONTROL)
+                for name, text in playlists.items()
+            ])
+        async with session_factory() as db:
+            return await crud.hls_package.finish(
+                db, file_path=file_path, manifest_path=f"{prefix}/{MASTER_PLAYLIST}", renditions=renditions
+            )
+    except Exception as e:
+        logger.exception("HLS packaging failed for %s", file_path)
+        error = str(e)[:500] or type(e).__name__
+    try:
+        async with session_factory() as db:
+            return await crud.hls_package.finish(db, file_path=file_path, error=error)
+    except Exception:
+        logger.exception("Could not store the HLS packaging failure of %s", file_path)
+        return None
+
+
+async def _transcode_renditions(
+    file_path: str, path: str, directory: str, session_factory: Callable[[], AsyncSession]
+) -> List[Dict[str, Any]]:
+    duration = await run_in_threadpool(_duration, path)
+    progress_paths = [os.path.join(directory, f"{bitrate}k.progress") for bitrate in settings.HLS_BITRATES]
+    jobs = [
+        asyncio.ensure_future(run_media_job(
+            "hls", segment_rendition, path, directory, bitrate, settings.HLS_SEGMENT_SECONDS,
+            settings.FFMPEG_PATH, progress_path,
+        ))
+        for bitrate, progress_path in zip(settings.HLS_BITRATES, progress_paths)
+    ]
+    reported = 0.0
+    try:
+        while True:
+            done, pending = await asyncio.wait(jobs, timeout=settings.HLS_PROGRESS_INTERVAL)
+            failed = next((job for job in done if job.exception() is not None), None)
+            if failed is not None:
+                raise failed.exception()
+            if not pending:
+                return [job.result() for job in jobs]
+            fractions = [
+                1.0 if job.done() else min(read_progress(progress_path) / duration, 1.0) if duration else 0.0
+                for job, progress_path in zip(jobs, progress_paths)
+            ]
+            progress = round(HLS_TRANSCODE_SHARE * sum(fractions) / len(fractions), 2)
+            if progress > reported:
+                async with session_factory() as db:
+                    await crud.hls_package.set_progress(db, file_path=file_path, progress=progress)
+                reported = progress
+    finally:
+        for job in jobs:
+            job.cancel()
+
+
+async def _store_all(calls: Sequence[tuple]) -> None:
+    # A package has hundreds of segments: bounded concurrency on the shared
+    # threadpool rather than the upload pool, which refuses work when busy
+    semaphore = asyncio.Semaphore(settings.S3_UPLOAD_PART_CONCURRENCY)
+
+    async def store(fn: Callable[..., Any], *args: Any) -> None:
+        async with semaphore:
+            await run_in_threadpool(fn, *args)
+
+    await asyncio.gather(*(store(*call) for call in calls))
+
+
+def _duration(path: str) -> Optional[float]:
+    with open(path, "rb") as f:
+        return probe(f).duration
+
+
+def _put_file(s3_service: S3Service, s3_key: str, path: str) -> None:
+    with open(path, "rb") as f:
+        s3_service.put_bytes(s3_key, f.read(), SEGMENT_CONTENT_TYPE, VARIANT_CACHE_CONTROL)
@@ -0,0 +1,271 @@
+"""
+Resumable uploads on top of S3 multipart uploads.
+
+A client opens a session with the file's name, type and size, then sends
+the bytes in one or more chunks, each starting at the session's current
+offset. Chunks are cut into parts of the session's ``part_size`` as they
+stream in, and up to ``S3_UPLOAD_PART_CONCURRENCY`` parts are transferred
+while the next one is read, so memory per upload stays at a few parts
+whatever the file size. Only whole parts (and the final, shorter part)
+are kept: if a connection drops, the offset reports how far the stored
+parts reach and the client resends from there. Finalizing assembles the
+parts into the object.
+
+The first chunk runs the same validation as the direct upload endpoints
+before anything is sent to S3. Sessions idle for longer than
+``UPLOAD_SESSION_TTL_SECONDS`` are aborted, freeing their parts, by a
+sweep each worker runs every ``UPLOAD_SESSION_GC_INTERVAL_SECONDS``.
+"""
+import asyncio
+import io
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Optional, Set
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app import crud
+from app.core.config import settings
+from app.core.metrics import UPLOAD_SESSIONS_ABANDONED
+from app.db.session import AsyncSessionLocal
+from app.models.upload_session import UploadSession
+from app.services.s3 import UPLOAD_RULES, S3Service, get_s3_service
+
+logger = logging.getLogger(__name__)
+
+# Sessions aborted per query while collecting abandoned uploads
+COLLECT_BATCH_SIZE = 100
+
+
+class UploadRejected(Exception):
+    """Raised when a chunk fails validation or overruns the declared size."""
+
+
+class UploadOffsetMismatch(Exception):
+    """Raised when a chunk does not start at the session's offset."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+async def append_chunk(
+    db: AsyncSession, s3_service: S3Service, upload: UploadSession, offset: int, body: AsyncIterator[bytes]
+) -> int:
+    """
+    Store a chunk of a resumable upload.
+
+    Parts that were fully transferred are recorded even if reading the
+    chunk or another part fails, so the client can resume after them.
+
+    Args:
+        db: Async database session
+        s3_service: Service the parts are stored with
+        upload: Session the chunk belongs to
+        offset: Offset the client sends the chunk at
+        body: Chunk content, e.g. ``request.stream()``
+
+    Returns:
+        int: New offset, i.e. bytes stored so far
+
+    Raises:
+        UploadOffsetMismatch: If ``offset`` is not the session's offset
+        UploadRejected: If the first chunk fails validation, or the chunk
+            runs past the declared size
+        UploadQueueFull: If the upload pool is saturated
+    """
+    if offset != upload.received or upload.received >= upload.size:
+        raise UploadOffsetMismatch(upload.received)
+    part_size = upload.part_size
+    first_part = offset // part_size + 1
+    in_flight: Dict["asyncio.Future[str]", int] = {}
+    stored: Set[int] = set()
+
+    async def collect(wait_for: str) -> None:
+        done, _ = await asyncio.wait(in_flight, return_when=wait_for)
+        for future in done:
+            part_number = in_flight.pop(future)
+            future.result()
+            stored.add(part_number)
+
+    async def send(part_number: int, data: bytes) -> None:
+        if upload.s3_upload_id is None:
+            await _start(db, s3_service, upload, data)
+        if len(in_flight) >= settings.S3_UPLOAD_PART_CONCURRENCY:
+            await collect(asyncio.FIRST_COMPLETED)
+        future = asyncio.ensure_future(
+            s3_service.pool.run(s3_service.upload_part, upload.file_path, upload.s3_upload_id, part_number, data)
+        )
+        in_flight[future] = part_number
+
+    error: Optional[Exception] = None
+    try:
+        buffer = bytearray()
+        part_number = first_part
+        position = offset
+        async for data in body:
+            position += len(data)
+            if position > upload.size:
+                raise UploadRejected(f"Chunk runs past the declared size of {upload.size} bytes")
+            buffer += data
+            while len(buffer) >= part_size:
+                await send(part_number, bytes(buffer[:part_size]))
+                del buffer[:part_size]
+                part_number += 1
+        if buffer and position == upload.size:
+            await send(part_number, bytes(buffer))
+        if in_flight:
+            await collect(asyncio.ALL_COMPLETED)
+    except Exception as e:
+        error = e
+        if in_flight:
+            # Keep whatever was transferred
+            await asyncio.wait(in_flight)
+            stored.update(
+                part_number for future, part_number in in_flight.items()
+                if not future.cancelled() and future.exception() is None
+            )
+
+    part_number = first_part
+    while part_number in stored:
+        part_number += 1
+    received = min(offset + (part_number - first_part) * part_size, upload.size)
+    if received > offset and not await crud.upload_session.advance(
+        db, db_obj=upload, expected=offset, received=received
+    ):
+        # A concurrent append at the same offset won; it stored the same parts
+        await db.refresh(upload)
+        error = error or UploadOffsetMismatch(upload.received)
+    if error is not None:
+        raise error
+    return received
+
+
+async def finalize(db: AsyncSession, s3_service: S3Service, upload: UploadSession) -> str:
+    """
+    Assemble a fully received upload into its object and close the session.
+
+    Args:
+        db: Async database session
+        s3_service: Service the object is stored with
+        upload: Session with every byte received
+
+    Returns:
+        str: S3 key of the stored file
+
+    Raises:
+        UploadOffsetMismatch: If bytes are still missing
+    """
+    if upload.received != upload.size:
+        raise UploadOffsetMismatch(upload.received)
+    part_count = -(-upload.size // upload.part_size)
+    await run_in_threadpool(
+        s3_service.complete_multipart_upload, upload.file_path, upload.s3_upload_id, part_count
+    )
+    file_path = upload.file_path
+    await crud.upload_session.remove(db, id=upload.id)
+    return file_path
+
+
+async def abort(db: AsyncSession, s3_service: S3Service, upload: UploadSession) -> None:
+    """
+    Cancel a session, discarding the parts stored so far.
+
+    Args:
+        db: Async database session
+        s3_service: Service the parts were stored with
+        upload: Session to cancel
+    """
+    if upload.s3_upload_id is not None:
+        await run_in_threadpool(s3_service.abort_multipart_upload, upload.file_path, upload.s3_upload_id)
+    await crud.upload_session.remove(db, id=upload.id)
+
+
+async def collect_abandoned_uploads(
+    *,
+    max_age: Optional[int] = None,
+    s3_service: Optional[S3Service] = None,
+    session_factory=AsyncSessionLocal,
+) -> int:
+    """
+    Abort sessions without activity for ``max_age`` seconds.
+
+    Meant to run as a background task; failures are logged and the
+    session is retried on the next sweep.
+
+    Args:
+        max_age: Idle time in seconds (default: ``UPLOAD_SESSION_TTL_SECONDS``)
+        s3_service: Service the parts are stored with (default: the shared service)
+        session_factory: Factory for the job's own database session
+
+    Returns:
+        int: Number of sessions aborted
+    """
+    s3_service = s3_service or get_s3_service()
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=settings.UPLOAD_SESSION_TTL_SECONDS if max_age is None else max_age
+    )
+    collected = 0
+    async with session_factory() as db:
+        while True:
+            stale = await crud.upload_session.get_stale(db, before=cutoff, limit=COLLECT_BATCH_SIZE)
+            failed = False
+            for upload in stale:
+                try:
+                    await abort(db, s3_service, upload)
+                    collected += 1
+                except Exception:
+                    logger.exception("Failed to abort abandoned upload %s", upload.id)
+                    await db.rollback()
+                    failed = True
+            if failed or len(stale) < COLLECT_BATCH_SIZE:
+                break
+    if collected:
+        UPLOAD_SESSIONS_ABANDONED.inc(collected)
+    return collected
+
+
+async def collect_abandoned_uploads_forever(interval: Optional[int] = None) -> None:
+    """
+    Sweep abandoned sessions now and then every ``interval`` seconds.
+
+    Started with the application; runs until cancelled.
+
+    Args:
+        interval: Seconds between sweeps (default: ``UPLOAD_SESSION_GC_INTERVAL_SECONDS``)
+    """
+    interval = settings.UPLOAD_SESSION_GC_INTERVAL_SECONDS if interval is None else interval
+    while True:
+        try:
+            await collect_abandoned_uploads()
+        except Exception:
+            logger.exception("Sweeping abandoned uploads failed")
+        await asyncio.sleep(interval)
+
+
+async def _start(db: AsyncSession, s3_service: S3Service, upload: UploadSession, head: bytes) -> None:
+    """Validate the first part and start the multipart upload behind a session."""
+    file = UploadFile(
+        io.BytesIO(head),
+        size=upload.size,
+        filename=upload.filename,
+        headers=Headers({"content-type": upload.content_type}),
+    )
+    validate = {"audio": s3_service.validate_audio_file, "image": s3_service.validate_image_file}[upload.kind]
+    is_valid, message = validate(file)
+    if not is_valid:
+        raise UploadRejected(message)
+    rules = UPLOAD_RULES[upload.kind]
+    file_path = f"{rules.prefix}/{uuid.uuid4()}{os.path.splitext(upload.filename.lower())[1]}"
+    upload_id = await run_in_threadpool(s3_service.create_multipart_upload, file_path, upload.content_type)
+    if not await crud.upload_session.start_multipart(
+        db, db_obj=upload, file_path=file_path, s3_upload_id=upload_id
+    ):
+        await run_in_threadpool(s3_service.abort_multipart_upload, file_path, upload_id)
+        await db.refresh(upload)
+        raise UploadOffsetMismatch(upload.received)
@@ -1,33 +1,259 @@
-from typing import Tuple, Optional
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple, TypeVar
+import asyncio
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import threading
+import time
 import uuid
 import os
 from fastapi import UploadFile
 
 from app.core.config import settings
+from app.core.metrics import (
+    S3_PRESIGN_CACHE,
+    S3_UPLOAD_BYTES,
+    S3_UPLOAD_QUEUE_SECONDS,
+    S3_UPLOAD_REJECTIONS,
+    S3_UPLOAD_THROUGHPUT,
+    S3_UPLOADS_IN_PROGRESS,
+    track_dependency,
+)
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_s3_client() -> Any:
+    """
+    Process-wide S3 client.
+
+    boto3 clients are thread-safe, so one client (and its connection pool) is
+    shared by every request and upload worker instead of paying for client
+    construction and fresh TLS connections per request.
+
+    Returns:
+        Any: botocore S3 client
+    """
+    return boto3.client(
+        "s3",
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        # Blank values from an env file mean "use boto3's defaults"
+        region_name=settings.AWS_REGION or None,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL or None,
+        config=Config(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": 3, "mode": "standard"},
+            tcp_keepalive=True,
+        ),
+    )
+
+
+class UploadQueueFull(Exception):
+    """Raised when too many uploads are already waiting for a worker."""
+
+
+class UploadPool:
+    """
+    Bounded thread pool that runs blocking S3 transfers off the event loop.
+
+    At most ``workers`` transfers run at once; at most ``max_pending`` may be
+    running or queued, beyond which new uploads are refused rather than
+    piling up spooled request bodies.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        """
+        Initialize the pool; threads are started on first use.
+
+        Args:
+            workers: Maximum concurrent transfers
+            max_pending: Maximum running plus queued transfers
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run a blocking transfer on an upload worker.
+
+        Args:
+            fn: Blocking callable
+            *args: Arguments for ``fn``
+
+        Returns:
+            T: Result of ``fn``
+
+        Raises:
+            UploadQueueFull: If ``max_pending`` transfers are already in flight
+        """
+        if self.pending >= self.max_pending:
+            S3_UPLOAD_REJECTIONS.inc()
+            raise UploadQueueFull(f"{self.pending} uploads already in progress")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="s3-upload")
+        submitted = time.perf_counter()
+
+        def timed() -> T:
+            S3_UPLOAD_QUEUE_SECONDS.observe(time.perf_counter() - submitted)
+            return fn(*args)
+
+        self.pending += 1
+        S3_UPLOADS_IN_PROGRESS.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+            S3_UPLOADS_IN_PROGRESS.dec()
+
+    def shutdown(self) -> None:
+        """Wait for running transfers and stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+upload_pool = UploadPool(workers=settings.S3_UPLOAD_WORKERS, max_pending=settings.S3_UPLOAD_MAX_PENDING)
+
+
+class PresignedUrlCache:
+    """
+    LRU of signed GET URLs, reused until they are close to expiring.
+
+    Requested lifetimes are rounded up to a multiple of ``bucket_seconds``,
+    so callers asking for slightly different expiries, and every user
+    playing the same track, share one signed URL.
+    """
+
+    def __init__(self, max_entries: int, bucket_seconds: int, margin_seconds: int):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of cached URLs
+            bucket_seconds: Granularity of URL lifetimes
+            margin_seconds: Stop handing out a URL this long before it expires
+        """
+        self.max_entries = max_entries
+        self.bucket_seconds = bucket_seconds
+        self.margin_seconds = margin_seconds
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lifetime(self, expires_in: int) -> int:
+        """
+        Lifetime to sign with for a requested expiry.
+
+        Args:
+            expires_in: Requested expiry in seconds
+
+        Returns:
+            int: ``expires_in`` rounded up to a whole bucket
+        """
+        return max(1, -(-expires_in // self.bucket_seconds)) * self.bucket_seconds
+
+    def get(self, bucket: str, s3_key: str, lifetime: int) -> Optional[str]:
+        """
+        Look up a URL that is still outside the safety margin.
+
+        Args:
+            bucket: Bucket name
+            s3_key: Object key
+            lifetime: Lifetime from ``lifetime()``
+
+        Returns:
+            Optional[str]: Signed URL, or None on a miss
+        """
+        key = (bucket, s3_key, lifetime)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry[1] - min(self.margin_seconds, lifetime / 2):
+                self._entries.move_to_end(key)
+                S3_PRESIGN_CACHE.labels("hit").inc()
+                return entry[0]
+        S3_PRESIGN_CACHE.labels("miss").inc()
+        return None
+
+    def put(self, bucket: str, s3_key: str, lifetime: int, url: str) -> None:
+        """
+        Store a URL signed just now for ``lifetime`` seconds.
+
+        Args:
+            bucket: Bucket name
+            s3_key: Object key
+            lifetime: Lifetime the URL was signed with
+            url: Signed URL
+        """
+        key = (bucket, s3_key, lifetime)
+        with self._lock:
+            self._entries[key] = (url, time.time() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+presigned_url_cache = PresignedUrlCache(
+    max_entries=settings.S3_PRESIGN_CACHE_SIZE,
+    bucket_seconds=settings.S3_PRESIGN_EXPIRY_BUCKET_SECONDS,
+    margin_seconds=settings.S3_PRESIGN_SAFETY_MARGIN_SECONDS,
+)
 
 
 class S3Service:
     """Service for interacting with AWS S3 storage."""
     
-    def __init__(self):
-        """Initialize S3 client using AWS credentials from settings."""
-        self.s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+    def __init__(
+        self,
+        client: Any = None,
+        pool: Optional[UploadPool] = None,
+        url_cache: Optional[PresignedUrlCache] = None,
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            client: S3 client (default: the shared process-wide client)
+            pool: Pool that runs async uploads (default: the shared upload pool)
+            url_cache: Cache of signed GET URLs (default: the shared cache)
+        """
+        self._client = client
+        self.pool = pool if pool is not None else upload_pool
+        self.url_cache = url_cache if url_cache is not None else presigned_url_cache
         self.bucket_name = settings.AWS_S3_BUCKET
+        self.transfer_config = TransferConfig(max_concurrency=settings.S3_UPLOAD_PART_CONCURRENCY)
+
+    @property
+    def s3_client(self) -> Any:
+        """S3 client, resolved on first use so routes that never call S3 do not build one."""
+        if self._client is None:
+            self._client = get_s3_client()
+        return self._client
     
-    def upload_file(self, file: UploadFile, prefix: str) -> str:
+    def upload_file(self, file: UploadFile, prefix: str, s3_key: Optional[str] = None) -> str:
         """
         Upload a file to S3 storage.
+
+        Blocks until the transfer completes; use ``upload_file_async`` from
+        request handlers.
         
         Args:
             file: The file to upload
             prefix: The prefix/folder in S3 where the file should be stored
+            s3_key: Key to store the file under (default: a new unique key
+                under ``prefix``)
             
         Returns:
             str: The S3 key (path) where the file was stored
@@ -36,20 +262,29 @@ class S3Service:
             Exception: If the upload fails
         """
         try:
-            # Create a unique filename to avoid collisions
-            file_extension = os.path.splitext(file.filename)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            
-            # Create the S3 key (path)
-            s3_key = f"{prefix}/{unique_filename}"
+            if s3_key is None:
+                # Create a unique filename to avoid collisions
+                file_extension = os.path.splitext(file.filename)[1]
+                unique_filename = f"{uuid.uuid4()}{file_extension}"
+
+                # Create the S3 key (path)
+                s3_key = f"{prefix}/{unique_filename}"
             
+            # s3transfer may close the file, so measure it first
+            size = file.file.seek(0, os.SEEK_END)
+            file.file.seek(0)
+
             # Upload the file to S3
-            self.s3_client.upload_fileobj(
-                file.file,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs={"ContentType": file.content_type}
-            )
+            start = time.perf_counter()
+            with track_dependency("s3", "upload"):
+                self.s3_client.upload_fileobj(
+                    file.file,
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs={"ContentType": file.content_type},
+                    Config=self.transfer_config,
+                )
+            _observe_upload(prefix, size, time.perf_counter() - start)
             
             return s3_key
         except ClientError as e:
@@ -59,10 +294,197 @@ class S3Service:
         except Exception as e:
             print(f"Unexpected error during S3 upload: {e}")
             raise Exception(f"Failed to upload file {file.filename}: {str(e)}")
+
+    async def upload_file_async(self, file: UploadFile, prefix: str, s3_key: Optional[str] = None) -> str:
+        """
+        Upload a file to S3 on the bounded upload pool.
+
+        Args:
+            file: The file to upload
+            prefix: The prefix/folder in S3 where the file should be stored
+            s3_key: Key to store the file under (default: a new unique key)
+
+        Returns:
+            str: The S3 key (path) where the file was stored
+
+        Raises:
+            UploadQueueFull: If the upload pool is saturated
+            Exception: If the upload fails
+        """
+        return await self.pool.run(self.upload_file, file, prefix, s3_key)
     
+    def put_bytes(self, s3_key: str, body: bytes, content_type: str, cache_control: Optional[str] = None) -> None:
+        """
+        Store a small in-memory object, such as a generated thumbnail (blocking).
+
+        Args:
+            s3_key: Key to store the object under
+            body: Object content
+            content_type: Content type of the object
+            cache_control: Cache-Control header served with the object
+        """
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        start = time.perf_counter()
+        with track_dependency("s3", "upload"):
+            self.s3_client.put_object(
+                Bucket=self.bucket_name, Key=s3_key, Body=body, ContentType=content_type, **extra
+            )
+        _observe_upload(s3_key.split("/", 1)[0], len(body), time.perf_counter() - start)
+
+    def delete_file(self, s3_key: str) -> None:
+        """
+        Delete an object (blocking); deleting a missing object is not an error.
+
+        Args:
+            s3_key: The S3 key (path) of the file
+        """
+        with track_dependency("s3", "delete"):
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+
+    def create_multipart_upload(self, s3_key: str, content_type: str) -> str:
+        """
+        Start a multipart upload (blocking).
+
+        Args:
+            s3_key: Key the object will be stored under
+            content_type: Content type of the object
+
+        Returns:
+            str: Multipart upload ID
+        """
+        with track_dependency("s3", "create_multipart"):
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=s3_key, ContentType=content_type
+            )
+        return response["UploadId"]
+
+    def upload_part(self, s3_key: str, upload_id: str, part_number: int, body: bytes) -> str:
+        """
+        Upload one part of a multipart upload (blocking).
+
+        Re-uploading a part number replaces the earlier part.
+
+        Args:
+            s3_key: Key of the multipart upload
+            upload_id: Multipart upload ID
+            part_number: 1-based part number
+            body: Part content; at least 5 MiB except for the last part
+
+        Returns:
+            str: ETag of the part
+        """
+        start = time.perf_counter()
+        with track_dependency("s3", "upload_part"):
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id, PartNumber=part_number, Body=body
+            )
+        _observe_upload(s3_key.split("/", 1)[0], len(body), time.perf_counter() - start)
+        return response["ETag"]
+
+    def complete_multipart_upload(self, s3_key: str, upload_id: str, part_count: int) -> None:
+        """
+        Assemble the first ``part_count`` parts into the object (blocking).
+
+        Part ETags are listed from S3, so callers only track how many parts
+        they stored.
+
+        Args:
+            s3_key: Key of the multipart upload
+            upload_id: Multipart upload ID
+            part_count: Number of parts in the object
+        """
+        parts = []
+        with track_dependency("s3", "list_parts"):
+            paginator = self.s3_client.get_paginator("list_parts")
+            for page in paginator.paginate(Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id):
+                parts.extend(
+                    {"PartNumber": part["PartNumber"], "ETag": part["ETag"]}
+                    for part in page.get("Parts", [])
+                    if part["PartNumber"] <= part_count
+                )
+        if len(parts) != part_count:
+            raise Exception(f"Expected {part_count} parts for {s3_key}, found {len(parts)}")
+        with track_dependency("s3", "complete_multipart"):
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+            )
+
+    def abort_multipart_upload(self, s3_key: str, upload_id: str) -> None:
+        """
+        Abort a multipart upload and free its parts (blocking).
+
+        Aborting an upload that no longer exists is not an error.
+
+        Args:
+            s3_key: Key of the multipart upload
+            upload_id: Multipart upload ID
+        """
+        try:
+            with track_dependency("s3", "abort_multipart"):
+                self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+
+    def download_file(self, s3_key: str, path: str) -> None:
+        """
+        Download an object to a local file (blocking).
+
+        Args:
+            s3_key: The S3 key (path) of the file
+            path: Local destination path
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+            ClientError: If the download fails otherwise
+        """
+        try:
+            with track_dependency("s3", "download"):
+                self.s3_client.download_file(self.bucket_name, s3_key, path, Config=self.transfer_config)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(s3_key)
+            raise
+
+    def hash_object(self, s3_key: str, chunk_size: int = 1024 * 1024) -> Tuple[str, int, Optional[str]]:
+        """
+        SHA-256 an object by streaming it (blocking).
+
+        Args:
+            s3_key: The S3 key (path) of the file
+            chunk_size: Bytes read per step
+
+        Returns:
+            Tuple[str, int, Optional[str]]: Hex digest, size in bytes and content type
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+            ClientError: If the download fails otherwise
+        """
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with track_dependency("s3", "download"):
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+                while chunk := response["Body"].read(chunk_size):
+                    digest.update(chunk)
+                    size += len(chunk)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(s3_key)
+            raise
+        return digest.hexdigest(), size, response.get("ContentType")
+
     def generate_presigned_url(self, s3_key: str, expires_in: int = 3600) -> str:
         """
         Generate a presigned URL for accessing a file in S3.
+
+        URLs come from the shared ``PresignedUrlCache`` while they have more
+        than its safety margin left, so the lifetime is ``expires_in``
+        rounded up to the cache's expiry bucket.
         
         Args:
             s3_key: The S3 key (path) of the file
@@ -74,16 +496,52 @@ class S3Service:
         Raises:
             Exception: If URL generation fails
         """
+        return self.generate_presigned_urls([s3_key], expires_in=expires_in)[s3_key]
+
+    def generate_presigned_urls(
+        self, s3_keys: Sequence[str], expires_in: int = 3600, cached: bool = True
+    ) -> Dict[str, str]:
+        """
+        Generate presigned URLs for several files, signing only cache misses.
+
+        Args:
+            s3_keys: The S3 keys (paths) of the files
+            expires_in: URL expiration time in seconds (default: 1 hour)
+            cached: Use the shared cache; without it every URL is signed now
+                and valid for exactly ``expires_in``
+
+        Returns:
+            Dict[str, str]: Presigned URL per key
+
+        Raises:
+            Exception: If URL generation fails
+        """
+        if not cached:
+            return {s3_key: self._sign_get(s3_key, expires_in) for s3_key in s3_keys}
+        lifetime = self.url_cache.lifetime(expires_in)
+        urls = {}
+        for s3_key in s3_keys:
+            if s3_key in urls:
+                continue
+            url = self.url_cache.get(self.bucket_name, s3_key, lifetime)
+            if url is None:
+                url = self._sign_get(s3_key, lifetime)
+                self.url_cache.put(self.bucket_name, s3_key, lifetime, url)
+            urls[s3_key] = url
+        return urls
+
+    def _sign_get(self, s3_key: str, expires_in: int) -> str:
         try:
             # Generate presigned URL
-            url = self.s3_client.generate_presigned_url(
-                ClientMethod="get_object",
-                Params={
-                    "Bucket": self.bucket_name,
-                    "Key": s3_key
-                },
-                ExpiresIn=expires_in
-            )
+            with track_dependency("s3", "presign"):
+                url = self.s3_client.generate_presigned_url(
+                    ClientMethod="get_object",
+                    Params={
+                        "Bucket": self.bucket_name,
+                        "Key": s3_key
+                    },
+                    ExpiresIn=expires_in
+                )
             return url
         except ClientError as e:
             # Log the error
@@ -93,6 +551,89 @@ class S3Service:
             print(f"Unexpected error during presigned URL generation: {e}")
             raise Exception(f"Failed to generate presigned URL for {s3_key}: {str(e)}")
     
+    def generate_presigned_post(
+        self, filename: str, content_type: str, rules: "UploadRules", owner_id: int, expires_in: int = 900
+    ) -> Dict[str, Any]:
+        """
+        Issue a presigned POST policy for uploading straight to the bucket.
+
+        The policy pins the key, the content type, the size range and an
+        ``x-amz-meta-uploaded-by`` field, so S3 itself rejects anything
+        ``validate_file`` would.
+
+        Args:
+            filename: Client-side file name (for the extension)
+            content_type: Content type the client will send
+            rules: Validation rules for this kind of upload
+            owner_id: ID of the user the upload is issued to
+            expires_in: Policy lifetime in seconds
+
+        Returns:
+            Dict[str, Any]: ``url`` and ``fields`` for the form POST, and the ``file_path`` (S3 key)
+
+        Raises:
+            ValueError: If the file name or content type is not allowed
+            Exception: If signing fails
+        """
+        error = rules.check(filename, content_type)
+        if error:
+            raise ValueError(error)
+        s3_key = f"{rules.prefix}/{uuid.uuid4()}{os.path.splitext(filename.lower())[1]}"
+        fields = {"Content-Type": content_type, UPLOADED_BY_FIELD: str(owner_id)}
+        conditions = [
+            {"Content-Type": content_type},
+            {UPLOADED_BY_FIELD: str(owner_id)},
+            ["content-length-range", 1, rules.max_size],
+        ]
+        try:
+            with track_dependency("s3", "presign"):
+                post = self.s3_client.generate_presigned_post(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Fields=fields,
+                    Conditions=conditions,
+                    ExpiresIn=expires_in,
+                )
+        except ClientError as e:
+            raise Exception(f"Failed to generate presigned POST for {filename}: {str(e)}")
+        return {"url": post["url"], "fields": post["fields"], "file_path": s3_key}
+
+    def verify_upload(self, s3_key: str, rules: "UploadRules", owner_id: int) -> Optional[str]:
+        """
+        Check an object uploaded with a presigned POST.
+
+        Objects that fail the size or type checks are deleted.
+
+        Args:
+            s3_key: The S3 key (path) that was issued
+            rules: Validation rules for this kind of upload
+            owner_id: ID of the user completing the upload
+
+        Returns:
+            Optional[str]: Error message, or None if the object is acceptable
+
+        Raises:
+            FileNotFoundError: If no object exists under the key, or it was
+                issued to another user
+        """
+        if not s3_key.startswith(f"{rules.prefix}/"):
+            raise FileNotFoundError(s3_key)
+        try:
+            with track_dependency("s3", "head"):
+                head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(s3_key)
+            raise
+        if head.get("Metadata", {}).get(UPLOADED_BY_FIELD[len("x-amz-meta-"):]) != str(owner_id):
+            raise FileNotFoundError(s3_key)
+
+        error = rules.check(s3_key, head.get("ContentType"), head.get("ContentLength"))
+        if error:
+            with track_dependency("s3", "delete"):
+                self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+        return error
+
     def validate_audio_file(self, file: UploadFile) -> Tuple[bool, Optional[str]]:
         """
         Validate that an uploaded file is an acceptable audio file.
@@ -103,31 +644,7 @@ class S3Service:
         Returns:
             Tuple[bool, Optional[str]]: (is_valid, error_message)
         """
-        # Validate file type
-        allowed_content_types = [
-            "audio/mpeg",        # MP3
-            "audio/wav",         # WAV
-            "audio/ogg",         # OGG
-            "audio/flac",        # FLAC
-            "audio/x-m4a",       # M4A
-            "audio/aac"          # AAC
-        ]
-        
-        if file.content_type not in allowed_content_types:
-            return False, f"Invalid file type: {file.content_type}. Allowed types: {', '.join(allowed_content_types)}"
-        
-        # Check file extension
-        valid_extensions = [".mp3", ".wav", ".ogg", ".flac", ".m4a", ".aac"]
-        file_ext = os.path.splitext(file.filename.lower())[1]
-        if file_ext not in valid_extensions:
-            return False, f"Invalid file extension: {file_ext}. Allowed extensions: {', '.join(valid_extensions)}"
-        
-        # Validate file size (max 50MB)
-        max_size = 50 * 1024 * 1024  # 50 MB in bytes
-        if hasattr(file, "size") and file.size > max_size:
-            return False, f"File too large. Maximum size: 50MB"
-        
-        return True, None
+        return AUDIO_RULES.validate(file)
     
     def validate_image_file(self, file: UploadFile) -> Tuple[bool, Optional[str]]:
         """
@@ -139,26 +656,98 @@ class S3Service:
         Returns:
             Tuple[bool, Optional[str]]: (is_valid, error_message)
         """
-        # Validate file type
-        allowed_content_types = [
-            "image/jpeg",        # JPEG
-            "image/png",         # PNG
-            "image/gif",         # GIF
-            "image/webp"         # WEBP
-        ]
-        
-        if file.content_type not in allowed_content_types:
-            return False, f"Invalid file type: {file.content_type}. Allowed types: {', '.join(allowed_content_types)}"
-        
-        # Check file extension
-        valid_extensions = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
-        file_ext = os.path.splitext(file.filename.lower())[1]
-        if file_ext not in valid_extensions:
-            return False, f"Invalid file extension: {file_ext}. Allowed extensions: {', '.join(valid_extensions)}"
-        
-        # Validate file size (max 5MB)
-        max_size = 5 * 1024 * 1024  # 5 MB in bytes
-        if hasattr(file, "size") and file.size > max_size:
-            return False, f"File too large. Maximum size: 5MB"
-        
-        return True, None 
\ No newline at end of file
+        return IMAGE_RULES.validate(file)
+
+
+# Form field (and object metadata) recording who a presigned upload was issued to
+UPLOADED_BY_FIELD = "x-amz-meta-uploaded-by"
+
+
+class UploadRules(NamedTuple):
+    """What an upload of one kind may contain, shared by API and presigned uploads."""
+
+    prefix: str
+    content_types: Tuple[str, ...]
+    extensions: Tuple[str, ...]
+    max_size: int
+
+    def check(self, filename: str, content_type: Optional[str], size: Optional[int] = None) -> Optional[str]:
+        """
+        Check a file's type, extension and size.
+
+        Args:
+            filename: File name or S3 key
+            content_type: Declared content type
+            size: Size in bytes, if known
+
+        Returns:
+            Optional[str]: Error message, or None if the file is acceptable
+        """
+        if content_type not in self.content_types:
+            return f"Invalid file type: {content_type}. Allowed types: {', '.join(self.content_types)}"
+        file_ext = os.path.splitext(filename.lower())[1]
+        if file_ext not in self.extensions:
+            return f"Invalid file extension: {file_ext}. Allowed extensions: {', '.join(self.extensions)}"
+        if size is not None and size > self.max_size:
+            return f"File too large. Maximum size: {self.max_size // (1024 * 1024)}MB"
+        if size == 0:
+            return "File is empty"
+        return None
+
+    def validate(self, file: UploadFile) -> Tuple[bool, Optional[str]]:
+        """
+        Validate a file uploaded through the API.
+
+        Args:
+            file: The file to validate
+
+        Returns:
+            Tuple[bool, Optional[str]]: (is_valid, error_message)
+        """
+        # Bodies of unknown size are not size-checked here
+        error = self.check(file.filename, file.content_type, getattr(file, "size", None) or None)
+        return error is None, error
+
+
+AUDIO_RULES = UploadRules(
+    prefix="audio",
+    content_types=(
+        "audio/mpeg",        # MP3
+        "audio/wav",         # WAV
+        "audio/ogg",         # OGG
+        "audio/flac",        # FLAC
+        "audio/x-m4a",       # M4A
+        "audio/aac",         # AAC
+    ),
+    extensions=(".mp3", ".wav", ".ogg", ".flac", ".m4a", ".aac"),
+    max_size=50 * 1024 * 1024,
+)
+IMAGE_RULES = UploadRules(
+    prefix="images",
+    content_types=(
+        "image/jpeg",        # JPEG
+        "image/png",         # PNG
+        "image/gif",         # GIF
+        "image/webp",        # WEBP
+    ),
+    extensions=(".jpg", ".jpeg", ".png", ".gif", ".webp"),
+    max_size=5 * 1024 * 1024,
+)
+UPLOAD_RULES: Dict[str, UploadRules] = {"audio": AUDIO_RULES, "image": IMAGE_RULES}
+
+
+def _observe_upload(prefix: str, size: int, seconds: float) -> None:
+    S3_UPLOAD_BYTES.labels(prefix).inc(size)
+    if seconds > 0:
+        S3_UPLOAD_THROUGHPUT.labels(prefix).observe(size / seconds)
+
+
+@lru_cache(maxsize=None)
+def get_s3_service() -> S3Service:
+    """
+    Shared S3 service, for use as a FastAPI dependency.
+
+    Returns:
+        S3Service: Service bound to the shared client and upload pool
+    """
+    return S3Service()
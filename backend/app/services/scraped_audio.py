@@ -0,0 +1,156 @@
+"""
+Fingerprinting of scraped songs.
+
+The scraper stores songs that only link to their audio (``source_url``),
+so they never pass through the upload path that fingerprints new songs.
+A sweep each worker runs every ``FINGERPRINT_SOURCE_INTERVAL_SECONDS``
+claims songs whose link was never fetched, downloads the audio to a
+temporary file and indexes its fingerprint like an upload's, flagging
+reposts of songs already in the catalog.
+
+Links point at arbitrary hosts, so they are fetched with the image
+proxy's ``PublicTransport`` (public addresses only, every redirect hop
+included) and the same size limit as audio uploads. Links that are not
+audio (player embeds, pages), too large or unreachable are skipped; each
+song is tried once.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from typing import Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.fingerprint import fingerprint_file
+from app.services.image_proxy import MAX_REDIRECTS, HostNotPublic, PublicTransport
+from app.services.media_jobs import index_fingerprint, run_media_job
+from app.services.s3 import UPLOAD_RULES
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "ListenerFingerprinter/1.0"
+
+
+class SourceNotAudio(Exception):
+    """Raised when a song's link does not lead to audio that can be fetched."""
+
+
+async def download_audio(client: httpx.AsyncClient, url: str, path: str, max_bytes: int) -> None:
+    """
+    Download linked audio to a local file, following redirects.
+
+    Args:
+        client: Client to fetch with
+        url: The song's link
+        path: File to write
+        max_bytes: Largest accepted download
+
+    Raises:
+        SourceNotAudio: If the link is not http(s), fails, is not audio or is too large
+        HostNotPublic: If a host resolves to a non-public address
+        httpx.HTTPError: If the connection fails
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        if urlsplit(url).scheme not in ("http", "https"):
+            raise SourceNotAudio("Only http(s) links are fetched")
+        async with client.stream("GET", url, headers={"Accept": "audio/*"}) as response:
+            if response.is_redirect and "location" in response.headers:
+                url = urljoin(url, response.headers["location"])
+                continue
+            if response.status_code != 200:
+                raise SourceNotAudio(f"Source returned {response.status_code}")
+            content_type = response.headers.get("content-type", "")
+            if not content_type.startswith("audio/"):
+                raise SourceNotAudio(f"Not audio: {content_type or 'no content type'}")
+            too_large = SourceNotAudio("Audio is too large")
+            if int(response.headers.get("content-length") or 0) > max_bytes:
+                raise too_large
+            size = 0
+            with open(path, "wb") as f:
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise too_large
+                    await run_in_threadpool(f.write, chunk)
+            return
+    raise SourceNotAudio("Too many redirects")
+
+
+async def fingerprint_scraped_songs(
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    batch_size: Optional[int] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> int:
+    """
+    Fingerprint every scraped song whose link was never fetched.
+
+    Meant to run as a background task; a song that fails is logged and not
+    tried again.
+
+    Args:
+        client: Client to fetch links with (default: one over ``PublicTransport``)
+        batch_size: Songs claimed at a time (default: ``FINGERPRINT_SOURCE_BATCH_SIZE``)
+        session_factory: Factory for the job's own database sessions
+
+    Returns:
+        int: Number of songs fingerprinted
+    """
+    batch_size = settings.FINGERPRINT_SOURCE_BATCH_SIZE if batch_size is None else batch_size
+    owned = client is None
+    if owned:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.FINGERPRINT_SOURCE_TIMEOUT),
+            transport=PublicTransport(),
+            headers={"User-Agent": USER_AGENT},
+        )
+    fingerprinted = 0
+    try:
+        while True:
+            async with session_factory() as db:
+                songs = await crud.song.claim_sources_to_fingerprint(db, limit=batch_size)
+            for song_id, url in songs:
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, "source")
+                    try:
+                        await download_audio(client, url, path, UPLOAD_RULES["audio"].max_size)
+                        fingerprint = await run_media_job("fingerprint", fingerprint_file, path, settings.FFMPEG_PATH)
+                        await index_fingerprint(song_id, fingerprint, session_factory=session_factory)
+                        fingerprinted += 1
+                    except (SourceNotAudio, HostNotPublic, httpx.HTTPError) as e:
+                        logger.info("Not fingerprinting song %s from %s: %s", song_id, url, e)
+                    except Exception:
+                        logger.exception("Fingerprinting failed for song %s", song_id)
+            if len(songs) < batch_size:
+                return fingerprinted
+    finally:
+        if owned:
+            await client.aclose()
+
+
+async def fingerprint_scraped_songs_forever(interval: Optional[int] = None) -> None:
+    """
+    Fingerprint newly scraped songs now and then every ``interval`` seconds.
+
+    Started with the application; runs until cancelled. Does nothing when
+    ``FINGERPRINT_ENABLED`` is off.
+
+    Args:
+        interval: Seconds between sweeps (default: ``FINGERPRINT_SOURCE_INTERVAL_SECONDS``)
+    """
+    if not settings.FINGERPRINT_ENABLED:
+        return
+    interval = settings.FINGERPRINT_SOURCE_INTERVAL_SECONDS if interval is None else interval
+    while True:
+        try:
+            await fingerprint_scraped_songs()
+        except Exception:
+            logger.exception("Fingerprinting scraped songs failed")
+        await asyncio.sleep(interval)
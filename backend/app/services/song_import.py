@@ -0,0 +1,188 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.crud.tag import normalize_tag_names
+from app.models.band import Band
+from app.models.blog import Blog
+from app.models.song_tag import SongTag
+from app.schemas.songs.song import SongCreate
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a byte stream into numbered, non-blank lines.
+
+    Args:
+        chunks: Request body chunks
+
+    Yields:
+        Tuple[int, bytes]: 1-based line number and line content
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in error.errors()
+    )
+
+
+class SongImport:
+    """Accumulates the outcome of one bulk import."""
+
+    def __init__(self):
+        """Initialize an empty result."""
+        self.ids: List[int] = []
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, line: int, error: str) -> None:
+        """Record a rejected row."""
+        self.errors.append({"line": line, "error": error})
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Summary returned by the bulk endpoint.
+
+        Returns:
+            Dict[str, Any]: Created ids, error count and per-row errors
+        """
+        return {
+            "created": len(self.ids),
+            "failed": len(self.errors),
+            "ids": self.ids,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+
+async def _existing_ids(db: AsyncSession, model: Any, ids: set) -> set:
+    if not ids:
+        return set()
+    result = await db.scalars(select(model.id).where(model.id.in_(ids)))
+    return set(result.all())
+
+
+async def _create_with_tags(db: AsyncSession, rows: List[Tuple[int, SongCreate]]) -> List[int]:
+    """
+    Insert songs and link their tags inside one SAVEPOINT.
+
+    Ids are read before the SAVEPOINT is left, so a later rollback that
+    expires the ORM objects never needs them.
+
+    Returns:
+        List[int]: Ids of the created songs, in input order
+
+    Raises:
+        IntegrityError: If the database rejects a song or tag link; nothing
+            from ``rows`` is kept and the outer transaction stays usable
+    """
+    async with db.begin_nested():
+        songs = await crud.song.create_many(
+            db, objs_in=[song_in for _, song_in in rows], chunk_size=len(rows), commit=False
+        )
+        ids = [song.id for song in songs]
+        names = [name for _, song_in in rows for name in song_in.tags or ()]
+        if names:
+            tag_ids = await crud.tag.resolve_ids(db, names=names)
+            await db.execute(insert(SongTag), [
+                {"song_id": song_id, "tag_id": tag_ids[name]}
+                for song_id, (_, song_in) in zip(ids, rows)
+                for name in normalize_tag_names(song_in.tags or ())
+            ])
+    return ids
+
+
+async def _insert_batch(db: AsyncSession, batch: List[Tuple[int, SongCreate]], outcome: SongImport) -> None:
+    """Insert one validated batch in one transaction, isolating rows the database rejects."""
+    band_ids = await _existing_ids(db, Band, {song_in.band_id for _, song_in in batch if song_in.band_id})
+    blog_ids = await _existing_ids(db, Blog, {song_in.blog_id for _, song_in in batch if song_in.blog_id})
+    rows = []
+    for line, song_in in batch:
+        if song_in.band_id and song_in.band_id not in band_ids:
+            outcome.fail(line, f"Band with id {song_in.band_id} not found")
+        elif song_in.blog_id and song_in.blog_id not in blog_ids:
+            outcome.fail(line, f"Blog with id {song_in.blog_id} not found")
+        else:
+            rows.append((line, song_in))
+    if not rows:
+        return
+    # Like create_song: a missing duration comes from the upload's analysis,
+    # or stays NULL until the analysis stores it
+    missing = [song_in for _, song_in in rows if song_in.duration is None]
+    durations = await crud.audio_analysis.get_durations(db, file_paths=[song_in.file_path for song_in in missing])
+    for song_in in missing:
+        duration = durations.get(song_in.file_path)
+        song_in.duration = round(duration) if duration else None
+
+    ids: List[int] = []
+    try:
+        ids = await _create_with_tags(db, rows)
+    except IntegrityError:
+        # Retry row by row, each in its own SAVEPOINT, so one bad row does
+        # not reject its neighbours
+        for line, song_in in rows:
+            try:
+                ids += await _create_with_tags(db, [(line, song_in)])
+            except IntegrityError as e:
+                outcome.fail(line, str(e.orig))
+    await db.commit()
+    outcome.ids.extend(ids)
+
+
+async def import_songs(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Create songs from an NDJSON stream, one ``SongCreate`` object per line.
+
+    Lines are validated as they arrive and inserted in batches with
+    ``CRUDBase.create_many``, one transaction per batch. Invalid rows, and
+    rows the database rejects, are reported by line number and never abort
+    the rest of the import.
+
+    Args:
+        db: Async database session
+        chunks: Request body chunks
+        batch_size: Rows per insert statement and transaction
+
+    Returns:
+        Dict[str, Any]: Created ids, error count and per-row errors
+    """
+    outcome = SongImport()
+    batch: List[Tuple[int, SongCreate]] = []
+    async for line, raw in iter_lines(chunks):
+        try:
+            song_in = SongCreate.model_validate(json.loads(raw))
+        except json.JSONDecodeError as e:
+            outcome.fail(line, f"Invalid JSON: {e.msg}")
+            continue
+        except ValidationError as e:
+            outcome.fail(line, _format_validation_error(e))
+            continue
+        batch.append((line, song_in))
+        if len(batch) >= batch_size:
+            await _insert_batch(db, batch, outcome)
+            batch = []
+    if batch:
+        await _insert_batch(db, batch, outcome)
+    return outcome.result()
@@ -1,7 +1,24 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.metrics import METRICS_CONTENT_TYPE, mark_process_dead, observe_statement, render_metrics
+from app.core.compression import compressed_payload_cache
+from app.core.middleware import (
+    CompressionMiddleware,
+    PrometheusMiddleware,
+    ReplicaStickinessMiddleware,
+    SQLTimingMiddleware,
+)
+from app.db.instrumentation import add_statement_listener
+from app.services.blobs import collect_unreferenced_blobs_forever
+from app.services.image_proxy import close_image_proxy
+from app.services.media_jobs import shutdown_media_pool
+from app.services.resumable_uploads import collect_abandoned_uploads_forever
+from app.services.scraped_audio import fingerprint_scraped_songs_forever
+from app.services.s3 import upload_pool
 from app.api.v1.api import api_router
 
 # Create FastAPI application
@@ -22,6 +39,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress text responses (innermost, so latency metrics include compression)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache=compressed_payload_cache,
+    )
+
+# Keep a client's reads on the primary shortly after it writes, on any worker
+if settings.DATABASE_REPLICA_URLS:
+    app.add_middleware(
+        ReplicaStickinessMiddleware, sticky_seconds=settings.DATABASE_REPLICA_STICKY_SECONDS
+    )
+
+# Record per-request SQL usage
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(
+        SQLTimingMiddleware, n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD
+    )
+
+# Record route latency/status metrics and DB statement timings
+if settings.METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
+    add_statement_listener(observe_statement)
+
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    def metrics() -> Response:
+        """
+        Prometheus scrape endpoint.
+
+        Returns:
+            Response: Metrics in the Prometheus text format
+        """
+        return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+    @app.on_event("shutdown")
+    def remove_worker_metrics() -> None:
+        """Drop this worker's live gauges from the shared metrics directory."""
+        mark_process_dead()
+
+
+@app.on_event("startup")
+async def start_upload_collector() -> None:
+    """Sweep abandoned resumable uploads from startup on."""
+    app.state.upload_collector = asyncio.create_task(collect_abandoned_uploads_forever())
+
+
+@app.on_event("shutdown")
+def stop_upload_collector() -> None:
+    """Stop the abandoned upload sweep."""
+    app.state.upload_collector.cancel()
+
+
+@app.on_event("startup")
+async def start_blob_collector() -> None:
+    """Sweep stored objects no song references from startup on."""
+    app.state.blob_collector = asyncio.create_task(collect_unreferenced_blobs_forever())
+
+
+@app.on_event("shutdown")
+def stop_blob_collector() -> None:
+    """Stop the unreferenced object sweep."""
+    app.state.blob_collector.cancel()
+
+
+@app.on_event("startup")
+async def start_scraped_song_fingerprinter() -> None:
+    """Fingerprint scraped songs from startup on."""
+    app.state.scraped_song_fingerprinter = asyncio.create_task(fingerprint_scraped_songs_forever())
+
+
+@app.on_event("shutdown")
+def stop_scraped_song_fingerprinter() -> None:
+    """Stop fingerprinting scraped songs."""
+    app.state.scraped_song_fingerprinter.cancel()
+
+
+@app.on_event("shutdown")
+def stop_upload_workers() -> None:
+    """Let in-flight S3 uploads finish before the worker exits."""
+    upload_pool.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_media_workers() -> None:
+    """Stop the media analysis worker processes."""
+    shutdown_media_pool()
+
+
+@app.on_event("shutdown")
+async def close_image_proxy_connections() -> None:
+    """Close the image proxy's pooled HTTP connections."""
+    await close_image_proxy()
+
+
 # Health check endpoint
 @app.get("/health", tags=["Health"])
 def health_check():
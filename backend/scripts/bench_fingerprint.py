@@ -0,0 +1,127 @@
+"""
+Throughput benchmark for audio fingerprinting.
+
+Fingerprints a set of synthetic tracks (or the audio files given with
+``--files``) serially and on a process pool of each requested size, the
+way the media workers run it, and reports songs per second per core.
+Candidate lookup against the hash index is timed separately on an
+in-memory SQLite database:
+
+    python scripts/bench_fingerprint.py
+    python scripts/bench_fingerprint.py --workers 1 2 4 --songs 32 --seconds 180
+    python scripts/bench_fingerprint.py --files ~/Music/*.mp3
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.models import Song  # noqa: E402
+from app.services.fingerprint import fingerprint_file  # noqa: E402
+
+RATE = 8000
+
+
+def synthetic_track(seed: int, seconds: float) -> np.ndarray:
+    """Random melody of decaying equal-tempered notes with harmonics."""
+    rng = np.random.default_rng(seed)
+    out = np.zeros(int(seconds * RATE), dtype=np.float32)
+    start = 0
+    while start < out.size:
+        length = int(RATE * rng.choice([0.125, 0.25, 0.375, 0.5]))
+        t = np.arange(min(length, out.size - start)) / RATE
+        pitch = 110 * 2 ** (rng.integers(0, 48) / 12)
+        envelope = np.exp(-t * rng.uniform(4, 10))
+        for harmonic in (1, 2, 3):
+            out[start:start + t.size] += np.sin(2 * np.pi * pitch * harmonic * t) * envelope / harmonic
+        start += length
+    return out / np.abs(out).max() * 0.8
+
+
+def write_tracks(directory: str, songs: int, seconds: float) -> List[str]:
+    paths = []
+    for seed in range(songs):
+        path = os.path.join(directory, f"track-{seed}.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(RATE)
+            w.writeframes((synthetic_track(seed, seconds) * 32767).astype("<i2").tobytes())
+        paths.append(path)
+    return paths
+
+
+def run_pool(paths: List[str], workers: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Start the workers before timing
+        list(pool.map(int, range(workers)))
+        start = time.perf_counter()
+        list(pool.map(fingerprint_file, paths))
+        return time.perf_counter() - start
+
+
+async def bench_lookup(paths: List[str]) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    fingerprints = [fingerprint_file(path) for path in paths]
+    async with session() as db:
+        songs = [Song(title=os.path.basename(path), duration=0, file_path=path) for path in paths]
+        db.add_all(songs)
+        await db.commit()
+        start = time.perf_counter()
+        for song, fingerprint in zip(songs, fingerprints):
+            await crud.song_fingerprint.replace(db, song_id=song.id, fingerprint=fingerprint)
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        for song, fingerprint in zip(songs, fingerprints):
+            await crud.song_fingerprint.find_match(db, fingerprint=fingerprint, exclude_song_id=song.id)
+        looked_up = time.perf_counter() - start
+    await engine.dispose()
+    hashes = sum(len(fingerprint) for fingerprint in fingerprints)
+    print(f"\nindex: {hashes / len(paths):.0f} hashes/song, "
+          f"{len(paths) / indexed:.1f} songs/s stored, {len(paths) / looked_up:.1f} songs/s matched")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--songs", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--files", nargs="*", help="Audio files to use instead of synthetic tracks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = args.files or write_tracks(directory, args.songs, args.seconds)
+        start = time.perf_counter()
+        for path in paths:
+            fingerprint_file(path)
+        serial = time.perf_counter() - start
+
+        print(f"{len(paths)} songs")
+        print(f"{'workers':>7} {'songs/s':>9} {'songs/s/core':>13}")
+        print(f"{'serial':>7} {len(paths) / serial:9.2f} {len(paths) / serial:13.2f}")
+        for workers in sorted(set(args.workers)):
+            elapsed = run_pool(paths, workers)
+            print(f"{workers:7d} {len(paths) / elapsed:9.2f} {len(paths) / elapsed / workers:13.2f}")
+        asyncio.run(bench_lookup(paths))
+
+
+if __name__ == "__main__":
+    main()
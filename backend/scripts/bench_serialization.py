@@ -0,0 +1,132 @@
+"""
+Microbenchmark for response serialization.
+
+For each endpoint, compares the CPU time to turn a result of 10, 100 and
+1000 items into JSON bytes:
+
+- ``double``: validate by hand with ``model_validate(jsonable_encoder(...))``,
+  then again through the route's ``response_model`` (the old blog/user routes)
+- ``single``: return ORM objects and let the ``response_model`` validate once
+  and ``dump_json`` (what FastAPI does for routes with a default response class)
+- ``prebuilt``: serialize already-built schema instances with
+  ``SchemaJSONResponse``, skipping validation
+
+    python scripts/bench_serialization.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.api.responses import SchemaJSONResponse  # noqa: E402
+from app.api.v1.blogs.blogs import router as blogs_router  # noqa: E402
+from app.api.v1.users.endpoints import router as users_router  # noqa: E402
+from app.api.v1.users.favorites import router as favorites_router  # noqa: E402
+from app.models import Blog, User  # noqa: E402
+from app.schemas.blogs.blog import Blog as BlogSchema  # noqa: E402
+from app.schemas.songs.song import SongWithDetails  # noqa: E402
+from app.schemas.users.user import User as UserSchema  # noqa: E402
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def route_field(router: Any, path: str) -> Any:
+    """Response field FastAPI validates and serializes with for a GET route."""
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+def blogs(n: int) -> List[Blog]:
+    return [
+        Blog(id=i, name=f"Blog {i}", url=f"https://blog{i}.example.com", description="A music blog",
+             is_active=True, created_at=NOW, updated_at=NOW)
+        for i in range(n)
+    ]
+
+
+def users(n: int) -> List[User]:
+    return [
+        User(id=i, email=f"user{i}@example.com", username=f"user{i}", is_active=True,
+             is_superuser=False, created_at=NOW, updated_at=NOW)
+        for i in range(n)
+    ]
+
+
+def favorites(n: int) -> List[SongWithDetails]:
+    return [
+        SongWithDetails(id=i, title=f"Song {i}", duration=200, created_at=NOW, updated_at=NOW,
+                        favorite_count=1, band_name="Band", is_favorited=True)
+        for i in range(n)
+    ]
+
+
+async def cpu_us(render: Callable[[], Any], repeat: int) -> float:
+    """Mean CPU microseconds per call of ``render`` (which may be a coroutine)."""
+    start = time.process_time()
+    for _ in range(repeat):
+        result = render()
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.process_time() - start) / repeat * 1e6
+
+
+async def run(args: argparse.Namespace) -> None:
+    blogs_field = route_field(blogs_router, "/active")
+    followed_field = route_field(users_router, "/me/followed-users")
+    favorites_field = route_field(favorites_router, "")
+
+    def double(schema: Any, field: Any, objs: List[Any]) -> Callable[[], Any]:
+        return lambda: serialize_response(
+            field=field, response_content=[schema.model_validate(jsonable_encoder(obj)) for obj in objs], dump_json=True
+        )
+
+    def single(field: Any, objs: List[Any]) -> Callable[[], Any]:
+        return lambda: serialize_response(field=field, response_content=objs, dump_json=True)
+
+    def prebuilt(schema_type: Any, instances: List[Any]) -> Callable[[], Any]:
+        return lambda: SchemaJSONResponse(instances, schema_type).body
+
+    results: Dict[tuple, float] = {}
+    for n in args.sizes:
+        repeat = max(1, args.items // n)
+        blog_objs, user_objs, favorite_objs = blogs(n), users(n), favorites(n)
+        cases = {
+            ("GET /blogs/active", "double"): double(BlogSchema, blogs_field, blog_objs),
+            ("GET /blogs/active", "single"): single(blogs_field, blog_objs),
+            ("GET /blogs/active", "prebuilt"): prebuilt(
+                List[BlogSchema], [BlogSchema.model_validate(blog) for blog in blog_objs]
+            ),
+            ("GET /users/me/followed-users", "double"): double(UserSchema, followed_field, user_objs),
+            ("GET /users/me/followed-users", "single"): single(followed_field, user_objs),
+            ("GET /users/me/favorites", "single"): single(favorites_field, favorite_objs),
+            ("GET /users/me/favorites", "prebuilt"): prebuilt(List[SongWithDetails], favorite_objs),
+        }
+        for (endpoint, path), render in cases.items():
+            await cpu_us(render, 1)
+            results[(endpoint, path, n)] = await cpu_us(render, repeat)
+
+    print(f"{'endpoint':30} {'path':9}" + "".join(f"{f'{n} items us':>15}" for n in args.sizes))
+    for endpoint, path in dict.fromkeys((endpoint, path) for endpoint, path, _ in results):
+        row = "".join(f"{results[(endpoint, path, n)]:15.0f}" for n in args.sizes)
+        print(f"{endpoint:30} {path:9}{row}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--items", type=int, default=50000, help="Items serialized per case and size")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import io
+import math
+import struct
+import wave
+from functools import partial
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import (
+    get_async_db,
+    get_current_active_superuser_async,
+    get_current_user_async,
+)
+from app.models.song import Song
+from app.models.user import User
+from app.services.audio_analysis import analyze_file, probe, waveform_peaks
+from app.services.audio_cache import AudioFileCache
+from app.services.media_jobs import analyze_upload, shutdown_media_pool
+from main import app as main_app
+from tests.conftest import AsyncTestingSessionLocal
+
+# Like the application's sessions, keep loaded values after commit
+session_factory = partial(AsyncTestingSessionLocal, expire_on_commit=False)
+
+
+def _wav(seconds: float = 2.0, rate: int = 8000, amplitude: float = 0.5, channels: int = 1) -> bytes:
+    frames = np.sin(np.arange(int(seconds * rate)) * 2 * math.pi * 440 / rate) * amplitude
+    ints = np.repeat((frames * 32767).astype("<i2"), channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(ints.tobytes())
+    return buffer.getvalue()
+
+
+def _vorbis_comment(**tags: str) -> bytes:
+    entries = [f"{key.upper()}={value}".encode() for key, value in tags.items()]
+    body = struct.pack("<I", 4) + b"test" + struct.pack("<I", len(entries))
+    return body + b"".join(struct.pack("<I", len(entry)) + entry for entry in entries)
+
+
+def _flac(rate: int, channels: int, total_samples: int, **tags: str) -> bytes:
+    packed = (rate << 44) | ((channels - 1) << 41) | (15 << 36) | total_samples
+    streaminfo = b"\x10\x00\x10\x00" + b"\x00" * 6 + packed.to_bytes(8, "big") + b"\x00" * 16
+    comment = _vorbis_comment(**tags)
+    return (
+        b"fLaC"
+        + bytes([0]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+        + bytes([0x80 | 4]) + len(comment).to_bytes(3, "big") + comment
+        + b"\x00" * 1000
+    )
+
+
+def _ogg_page(packets, granule: int, sequence: int) -> bytes:
+    table, body = b"", b""
+    for packet in packets:
+        table += b"\xff" * (len(packet) // 255) + bytes([len(packet) % 255])
+        body += packet
+    header = b"OggS" + struct.pack("<BBqIII", 0, 0, granule, 1, sequence, 0)
+    return header + bytes([len(table)]) + table + body
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+
+def _mp4(timescale: int, length: int, title: str) -> bytes:
+    mvhd = _box(b"mvhd", b"\x00" * 12 + struct.pack(">II", timescale, length) + b"\x00" * 80)
+    mp4a = _box(b"mp4a", b"\x00" * 6 + b"\x00\x01" + b"\x00" * 8 + struct.pack(">HHHHI", 2, 16, 0, 0, 44100 << 16))
+    stsd = _box(b"stsd", b"\x00" * 4 + struct.pack(">I", 1) + mp4a)
+    trak = _box(b"trak", _box(b"mdia", _box(b"minf", _box(b"stbl", stsd))))
+    nam = _box(b"\xa9nam", _box(b"data", b"\x00\x00\x00\x01\x00\x00\x00\x00" + title.encode()))
+    udta = _box(b"udta", _box(b"meta", b"\x00" * 4 + _box(b"ilst", nam)))
+    return _box(b"ftyp", b"M4A \x00\x00\x00\x00") + _box(b"moov", mvhd + trak + udta) + _box(b"mdat", b"\x00" * 64)
+
+
+def _id3(**frames: str) -> bytes:
+    body = b""
+    for frame_id, text in frames.items():
+        payload = b"\x03" + text.encode()
+        body += frame_id.encode() + struct.pack(">I", len(payload)) + b"\x00\x00" + payload
+    size = bytes((len(body) >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x03\x00\x00" + size + body
+
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, joint stereo: 417-byte frames
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def test_probe_wav():
+    info = probe(io.BytesIO(_wav(seconds=2.0, channels=2)))
+
+    assert info.format == "wav"
+    assert info.duration == pytest.approx(2.0)
+    assert (info.sample_rate, info.channels, info.bitrate) == (8000, 2, 256000)
+
+
+def test_probe_flac_reads_streaminfo_and_tags():
+    info = probe(io.BytesIO(_flac(44100, 2, 44100 * 3, title="Flac Song", artist="Band")))
+
+    assert info.format == "flac"
+    assert info.duration == pytest.approx(3.0)
+    assert (info.sample_rate, info.channels) == (44100, 2)
+    assert (info.title, info.artist) == ("Flac Song", "Band")
+
+
+def test_probe_ogg_uses_last_granule_position():
+    ident = b"\x01vorbis" + struct.pack("<IBI", 0, 2, 48000) + b"\x00" * 14
+    comments = b"\x03vorbis" + _vorbis_comment(title="Ogg Song")
+    data = (
+        _ogg_page([ident], 0, 0)
+        + _ogg_page([comments], 0, 1)
+        + _ogg_page([b"\x00" * 300], 48000 * 5, 2)
+    )
+
+    info = probe(io.BytesIO(data))
+
+    assert info.format == "vorbis"
+    assert info.duration == pytest.approx(5.0)
+    assert (info.sample_rate, info.channels, info.title) == (48000, 2, "Ogg Song")
+
+
+def test_probe_mp4_reads_moov():
+    info = probe(io.BytesIO(_mp4(timescale=1000, length=4500, title="M4A Song")))
+
+    assert info.format == "mp4"
+    assert info.duration == pytest.approx(4.5)
+    assert (info.sample_rate, info.channels, info.title) == (44100, 2, "M4A Song")
+
+
+def test_probe_mp3_cbr_and_xing():
+    cbr = probe(io.BytesIO(_id3(TIT2="Mp3 Song", TPE1="Band") + MP3_FRAME * 100))
+    xing_frame = bytearray(MP3_FRAME)
+    xing_frame[36:48] = b"Xing" + struct.pack(">II", 1, 1000)
+    vbr = probe(io.BytesIO(bytes(xing_frame) + MP3_FRAME * 10))
+
+    assert cbr.format == "mp3"
+    assert cbr.duration == pytest.approx(417 * 100 * 8 / 128000)
+    assert (cbr.sample_rate, cbr.channels, cbr.bitrate) == (44100, 2, 128000)
+    assert (cbr.title, cbr.artist) == ("Mp3 Song", "Band")
+    assert vbr.duration == pytest.approx(1000 * 1152 / 44100)
+
+
+def test_probe_unknown_format():
+    assert probe(io.BytesIO(b"not audio at all")).format == "unknown"
+
+
+def test_waveform_peaks():
+    samples = np.array([0.1, -0.5, 0.2, 1.0, -0.25, 0.0, 0.0], dtype=np.float32)
+
+    assert waveform_peaks(samples, 4) == [128, 255, 64, 0]
+    assert waveform_peaks(samples, 100) == [26, 128, 51, 255, 64, 0, 0]
+    assert waveform_peaks(np.zeros(0, dtype=np.float32), 10) == []
+
+
+def test_analyze_wav_file(tmp_path):
+    path = tmp_path / "tone.wav"
+    path.write_bytes(_wav(seconds=2.0, amplitude=0.5))
+
+    result = analyze_file(str(path), peak_count=50)
+
+    assert result["error"] is None
+    assert result["duration"] == pytest.approx(2.0)
+    assert len(result["peaks"]) == 50
+    assert all(120 <= peak <= 130 for peak in result["peaks"])
+
+
+def test_analyze_reports_decode_failures(tmp_path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(MP3_FRAME * 10)
+
+    result = analyze_file(str(path), peak_count=50, ffmpeg=str(tmp_path / "no-ffmpeg"))
+
+    assert result["format"] == "mp3" and result["duration"] > 0
+    assert result["peaks"] is None
+    assert "ffmpeg" in result["error"]
+
+
+class FakeStore:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def download(self, s3_key: str, path: str) -> None:
+        if s3_key not in self.objects:
+            raise FileNotFoundError(s3_key)
+        with open(path, "wb") as f:
+            f.write(self.objects[s3_key])
+
+
+@pytest_asyncio.fixture
+async def analysis_db(async_db: AsyncSession, tmp_path):
+    async_db.sync_session.expire_on_commit = False
+    cache = AudioFileCache(
+        str(tmp_path / "cache"), max_bytes=1 << 24, download=FakeStore({"audio/tone.wav": _wav()}).download
+    )
+    yield async_db, cache
+    shutdown_media_pool()
+
+
+@pytest.mark.asyncio
+async def test_analyze_upload_stores_result_and_backfills_songs(analysis_db):
+    db, cache = analysis_db
+    song = Song(title="Early", file_path="audio/tone.wav")
+    db.add(song)
+    await db.commit()
+
+    analysis = await analyze_upload("audio/tone.wav", audio_cache=cache, session_factory=session_factory)
+    await db.refresh(song)
+
+    assert analysis.duration == pytest.approx(2.0)
+    assert len(analysis.peaks) == 800
+    assert song.duration == 2
+    assert await crud.audio_analysis.get_duration(db, file_path="audio/tone.wav") == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_analyze_upload_records_missing_files(analysis_db):
+    _, cache = analysis_db
+
+    analysis = await analyze_upload("audio/missing.wav", audio_cache=cache, session_factory=session_factory)
+
+    assert analysis.peaks is None
+    assert "audio/missing.wav" in analysis.error
+
+
+@pytest_asyncio.fixture
+async def api(analysis_db):
+    db, _ = analysis_db
+    user = User(id=1, email="wave@example.com", username="wave", is_superuser=True)
+
+    async def override_db():
+        yield db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = lambda: user
+    main_app.dependency_overrides[get_current_active_superuser_async] = lambda: user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_waveform_endpoint(api, analysis_db):
+    db, _ = analysis_db
+    await crud.audio_analysis.save(
+        db, file_path="audio/wave.mp3", values={"format": "mp3", "duration": 3.2, "peaks": [0, 128, 255]}
+    )
+    song = Song(title="Wave", duration=3, file_path="audio/wave.mp3")
+    pending = Song(title="Pending", file_path="audio/pending.mp3")
+    db.add_all([song, pending])
+    await db.commit()
+
+    response = await api.get(f"/api/v1/songs/{song.id}/waveform")
+    revalidated = await api.get(
+        f"/api/v1/songs/{song.id}/waveform", headers={"If-None-Match": response.headers["etag"]}
+    )
+    missing = await api.get(f"/api/v1/songs/{pending.id}/waveform")
+
+    assert response.status_code == 200
+    assert response.json()["peaks"] == [0, 128, 255]
+    assert response.json()["duration"] == pytest.approx(3.2)
+    assert revalidated.status_code == 304
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_song_takes_duration_from_analysis(api, analysis_db):
+    db, _ = analysis_db
+    await crud.audio_analysis.save(db, file_path="audio/known.mp3", values={"duration": 187.6})
+
+    known = await api.post("/api/v1/songs/", json={"title": "Known", "file_path": "audio/known.mp3"})
+    unknown = await api.post("/api/v1/songs/", json={"title": "Unknown", "file_path": "audio/new.mp3"})
+
+    assert known.status_code == 201
+    assert known.json()["duration"] == 188
+    assert unknown.json()["duration"] is None
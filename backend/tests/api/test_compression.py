@@ -0,0 +1,165 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_async_db, get_current_user_async
+from app.core import compression
+from app.core.compression import CompressedPayloadCache, compressed_payload_cache, negotiate_encoding
+from app.core.middleware import CompressionMiddleware, cache_compressed_payload
+from app.models.tag import Tag
+from app.models.user import User
+from main import app as main_app
+
+BIG = json.dumps([{"id": i, "name": f"item {i}"} for i in range(200)])
+
+
+def _app(cache: CompressedPayloadCache) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, cache=cache)
+
+    @app.get("/big")
+    def big() -> Response:
+        return Response(BIG, media_type="application/json")
+
+    @app.get("/shared")
+    def shared(request: Request) -> Response:
+        cache_compressed_payload(request)
+        return Response(BIG, media_type="application/json")
+
+    @app.get("/small")
+    def small() -> Response:
+        return Response('{"ok": true}', media_type="application/json")
+
+    @app.get("/audio")
+    def audio() -> Response:
+        return Response(b"\0" * 5000, media_type="audio/mpeg")
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        return StreamingResponse((f"line {i}\n" * 50 for i in range(20)), media_type="text/plain")
+
+    @app.get("/encoded")
+    def encoded() -> Response:
+        return PlainTextResponse("x" * 5000, headers={"Content-Encoding": "identity"})
+
+    return app
+
+
+@pytest_asyncio.fixture
+async def client():
+    cache = CompressedPayloadCache(max_bytes=1 << 20)
+    async with AsyncClient(transport=ASGITransport(app=_app(cache)), base_url="http://test") as client:
+        client.cache = cache
+        yield client
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_negotiate_encoding_honours_quality_values():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("deflate") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") in compression.available_encodings()
+    assert negotiate_encoding("") is None
+
+
+@pytest.mark.asyncio
+async def test_gzip_large_json_and_record_metrics(client):
+    compressed_before = _sample("http_response_compression_ratio_count", encoding="gzip")
+
+    response = await client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BIG) / 3
+    assert response.text == BIG
+    assert _sample("http_response_compression_ratio_count", encoding="gzip") == compressed_before + 1
+    assert _sample("http_response_compression_seconds_count", encoding="gzip") >= 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path,headers", [
+    ("/big", {"Accept-Encoding": "identity"}),
+    ("/small", {"Accept-Encoding": "gzip"}),
+    ("/audio", {"Accept-Encoding": "gzip"}),
+    ("/encoded", {"Accept-Encoding": "gzip"}),
+])
+async def test_skipped_responses_pass_through(client, path, headers):
+    response = await client.get(path, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") in (None, "identity")
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_are_compressed_incrementally(client):
+    response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"line {i}\n" * 50 for i in range(20))
+
+
+@pytest.mark.asyncio
+async def test_shared_payloads_are_compressed_once(client):
+    with patch("app.core.middleware.compress_body", wraps=compression.compress_body) as compress:
+        first = await client.get("/shared", headers={"Accept-Encoding": "gzip"})
+        second = await client.get("/shared", headers={"Accept-Encoding": "gzip"})
+        # Unflagged routes are never cached
+        await client.get("/big", headers={"Accept-Encoding": "gzip"})
+        await client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert compress.call_count == 3
+    assert first.headers["content-encoding"] == second.headers["content-encoding"] == "gzip"
+    assert first.text == second.text == BIG
+    assert client.cache.stats()["entries"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompressedPayloadCache(max_bytes=10)
+    a, b, c = (cache.key(body, "gzip") for body in (b"a", b"b", b"c"))
+    cache.put(a, b"12345")
+    cache.put(b, b"12345")
+    assert cache.get(a) == b"12345"
+    cache.put(c, b"12345")
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None
+    assert cache.stats() == {"entries": 2, "bytes": 10}
+
+
+@pytest.mark.asyncio
+async def test_tag_list_is_served_compressed_from_cache(async_db: AsyncSession):
+    user = User(email="gzip@example.com", username="gzip", password="password123")
+    async_db.add(user)
+    await async_db.execute(insert(Tag), [{"name": f"tag-{i}", "description": "A genre"} for i in range(50)])
+    await async_db.commit()
+    compressed_payload_cache.clear()
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = lambda: user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            hits_before = _sample("http_response_compression_cache_total", result="hit")
+            first = await client.get("/api/v1/tags/", headers={"Accept-Encoding": "gzip"})
+            second = await client.get("/api/v1/tags/", headers={"Accept-Encoding": "gzip"})
+    finally:
+        main_app.dependency_overrides.clear()
+        compressed_payload_cache.clear()
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert len(second.json()) == 50
+    assert _sample("http_response_compression_cache_total", result="hit") == hits_before + 1
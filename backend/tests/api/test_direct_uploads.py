@@ -0,0 +1,129 @@
+import boto3
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_user
+from app.core.config import settings
+from app.models.user import User
+from app.services.s3 import AUDIO_RULES, S3Service, get_s3_service
+from main import app as main_app
+
+moto = pytest.importorskip("moto")
+requests = pytest.importorskip("requests")
+
+BUCKET = "listener-direct-uploads"
+USER = User(id=7, email="direct@example.com", username="direct")
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", BUCKET)
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest_asyncio.fixture
+async def api(s3_client, async_db: AsyncSession):
+    async_db.sync_session.expire_on_commit = False
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_s3_service] = lambda: S3Service(client=s3_client)
+    main_app.dependency_overrides[get_current_active_user] = lambda: USER
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+def test_policy_carries_validation_rules(s3_client):
+    post = S3Service(client=s3_client).generate_presigned_post("Song.MP3", "audio/mpeg", AUDIO_RULES, owner_id=7)
+
+    assert post["file_path"].startswith("audio/") and post["file_path"].endswith(".mp3")
+    assert post["fields"]["key"] == post["file_path"]
+    assert post["fields"]["Content-Type"] == "audio/mpeg"
+    assert post["fields"]["x-amz-meta-uploaded-by"] == "7"
+    assert "policy" in post["fields"]
+
+    with pytest.raises(ValueError, match="Invalid file type"):
+        S3Service(client=s3_client).generate_presigned_post("song.mp3", "text/plain", AUDIO_RULES, owner_id=7)
+
+
+async def _direct_upload(api, content: bytes) -> str:
+    presigned = await api.post("/api/v1/files/uploads/audio/presign",
+                               json={"filename": "take.mp3", "content_type": "audio/mpeg"})
+    assert presigned.status_code == 200
+    body = presigned.json()
+
+    # The client uploads straight to the bucket
+    uploaded = requests.post(body["url"], data=body["fields"], files={"file": ("take.mp3", content)})
+    assert uploaded.status_code in (200, 204)
+    return body["file_path"]
+
+
+@pytest.mark.asyncio
+async def test_presign_upload_complete_round_trip(api, s3_client, async_db):
+    file_path = await _direct_upload(api, b"ID3" + b"\0" * 512)
+
+    completed = await api.post("/api/v1/files/uploads/audio/complete", json={"file_path": file_path})
+
+    assert completed.status_code == 200
+    assert completed.json()["file_path"] == file_path
+    assert completed.json()["deduplicated"] is False
+    assert BUCKET in completed.json()["url"]
+    [blob] = await crud.blob.get_multi(async_db)
+    assert (blob.file_path, blob.size, blob.ref_count) == (file_path, 515, 0)
+
+
+@pytest.mark.asyncio
+async def test_completing_known_content_returns_the_stored_object(api, s3_client):
+    first = await _direct_upload(api, b"ID3" + b"\0" * 512)
+    await api.post("/api/v1/files/uploads/audio/complete", json={"file_path": first})
+    second = await _direct_upload(api, b"ID3" + b"\0" * 512)
+
+    completed = await api.post("/api/v1/files/uploads/audio/complete", json={"file_path": second})
+
+    assert completed.status_code == 200
+    assert completed.json()["file_path"] == first
+    assert completed.json()["deduplicated"] is True
+    assert [obj["Key"] for obj in s3_client.list_objects_v2(Bucket=BUCKET)["Contents"]] == [first]
+
+
+@pytest.mark.asyncio
+async def test_presign_rejects_disallowed_files(api):
+    response = await api.post("/api/v1/files/uploads/image/presign",
+                              json={"filename": "cover.bmp", "content_type": "image/png"})
+
+    assert response.status_code == 400
+    assert "Invalid file extension" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_complete_deletes_objects_that_break_the_rules(api, s3_client):
+    key = "images/oversized.png"
+    s3_client.put_object(Bucket=BUCKET, Key=key, Body=b"\0" * (5 * 1024 * 1024 + 1),
+                         ContentType="image/png", Metadata={"uploaded-by": "7"})
+
+    response = await api.post("/api/v1/files/uploads/image/complete", json={"file_path": key})
+
+    assert response.status_code == 400
+    assert "File too large" in response.json()["detail"]
+    assert s3_client.list_objects_v2(Bucket=BUCKET).get("KeyCount") == 0
+
+
+@pytest.mark.asyncio
+async def test_complete_only_accepts_the_callers_uploads(api, s3_client):
+    s3_client.put_object(Bucket=BUCKET, Key="audio/theirs.mp3", Body=b"ID3",
+                         ContentType="audio/mpeg", Metadata={"uploaded-by": "8"})
+
+    for path in ("audio/theirs.mp3", "audio/missing.mp3", "images/theirs.mp3"):
+        response = await api.post("/api/v1/files/uploads/audio/complete", json={"file_path": path})
+        assert response.status_code == 404, path
@@ -0,0 +1,207 @@
+import io
+import shutil
+import time
+import wave
+from functools import partial
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_superuser_async, get_current_user_async
+from app.core.config import settings
+from app.models.song import Song
+from app.models.user import User
+from app.services.audio_cache import AudioFileCache
+from app.services.hls import master_playlist, media_playlist, parse_media_playlist, read_progress
+from app.services.media_jobs import package_hls, shutdown_media_pool
+from app.services.s3 import S3Service, get_s3_service
+from main import app as main_app
+from tests.conftest import AsyncTestingSessionLocal
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "listener-hls"
+USER = User(id=9, email="hls@example.com", username="hls", is_superuser=True)
+session_factory = partial(AsyncTestingSessionLocal, expire_on_commit=False)
+
+
+def _ffmpeg():
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    imageio_ffmpeg = pytest.importorskip("imageio_ffmpeg", reason="HLS packaging needs ffmpeg")
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _wav(seconds: float, rate: int = 22050) -> bytes:
+    t = np.arange(int(seconds * rate)) / rate
+    samples = 0.5 * np.sin(2 * np.pi * 440 * t)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def test_playlists_round_trip():
+    segments = [{"uri": "00000.ts", "duration": 4.0}, {"uri": "00001.ts", "duration": 1.5}]
+    renditions = [
+        {"name": "128k", "bitrate": 128, "bandwidth": 140000, "segments": segments},
+        {"name": "64k", "bitrate": 64, "bandwidth": 70000, "segments": segments},
+    ]
+
+    playlist = media_playlist(segments, ["https://cdn/a.ts", "https://cdn/b.ts"])
+    master = master_playlist(renditions)
+
+    assert parse_media_playlist(media_playlist(segments)) == segments
+    assert "#EXT-X-TARGETDURATION:4" in playlist and playlist.endswith("#EXT-X-ENDLIST\n")
+    assert [s["uri"] for s in parse_media_playlist(playlist)] == ["https://cdn/a.ts", "https://cdn/b.ts"]
+    assert master.index("64k/index.m3u8") < master.index("128k/index.m3u8")
+    assert 'BANDWIDTH=70000,AVERAGE-BANDWIDTH=64000,CODECS="mp4a.40.2"' in master
+
+
+def test_read_progress(tmp_path):
+    path = tmp_path / "64k.progress"
+
+    assert read_progress(str(path)) == 0.0
+    path.write_text("out_time_us=N/A\nprogress=continue\nout_time_us=1500000\nprogress=continue\nout_time_us=3250000\n")
+    assert read_progress(str(path)) == 3.25
+
+
+@pytest_asyncio.fixture
+async def api(async_db: AsyncSession, monkeypatch, tmp_path):
+    async_db.sync_session.expire_on_commit = False
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", BUCKET)
+    monkeypatch.setattr(settings, "HLS_BITRATES", [64, 128])
+    monkeypatch.setattr(settings, "HLS_SEGMENT_SECONDS", 2)
+    monkeypatch.setattr(settings, "HLS_PROGRESS_INTERVAL", 0.02)
+    with moto.mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET)
+        service = S3Service(client=s3_client)
+        cache = AudioFileCache(str(tmp_path / "cache"), max_bytes=1 << 26, download=service.download_file)
+
+        async def override_db():
+            yield async_db
+
+        main_app.dependency_overrides[get_async_db] = override_db
+        main_app.dependency_overrides[get_s3_service] = lambda: service
+        main_app.dependency_overrides[get_current_user_async] = lambda: USER
+        main_app.dependency_overrides[get_current_active_superuser_async] = lambda: USER
+        try:
+            async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+                client.s3 = s3_client
+                client.db = async_db
+                client.package = partial(package_hls, audio_cache=cache, s3_service=service, session_factory=session_factory)
+                yield client
+        finally:
+            main_app.dependency_overrides.clear()
+            shutdown_media_pool()
+
+
+@pytest.mark.asyncio
+async def test_song_is_packaged_and_served(api, monkeypatch):
+    monkeypatch.setattr(settings, "FFMPEG_PATH", _ffmpeg())
+    api.s3.put_object(Bucket=BUCKET, Key="audio/track.wav", Body=_wav(9))
+    song = Song(title="Packaged", duration=9, file_path="audio/track.wav")
+    api.db.add(song)
+    await api.db.commit()
+    reported = []
+    set_progress = crud.hls_package.set_progress
+
+    async def record_progress(db, *, file_path, progress):
+        reported.append(progress)
+        await set_progress(db, file_path=file_path, progress=progress)
+
+    monkeypatch.setattr(crud.hls_package, "set_progress", record_progress)
+
+    package = await api.package("audio/track.wav")
+    await api.db.refresh(song)
+    playback = (await api.get(f"/api/v1/songs/{song.id}/playback")).json()
+    master = await api.get(playback["manifest_url"])
+    media = await api.get(f"/api/v1/songs/{song.id}/hls/64k/index.m3u8")
+    listed = (await api.get("/api/v1/songs/", params={"signed_urls": True})).json()
+
+    assert package.status == "done" and package.error is None
+    assert [r["name"] for r in package.renditions] == ["64k", "128k"]
+    assert sum(s["duration"] for s in package.renditions[0]["segments"]) == pytest.approx(9, abs=0.2)
+    assert len(package.renditions[0]["segments"]) == 5
+    assert reported == sorted(reported) and all(0 < p <= 0.9 for p in reported)
+    keys = {o["Key"] for o in api.s3.list_objects_v2(Bucket=BUCKET, Prefix="hls/track/")["Contents"]}
+    assert {"hls/track/master.m3u8", "hls/track/64k/index.m3u8", "hls/track/128k/00004.ts"} <= keys
+    head = api.s3.head_object(Bucket=BUCKET, Key="hls/track/64k/00000.ts")
+    assert head["ContentType"] == "video/mp2t" and "immutable" in head["CacheControl"]
+    assert song.playback_manifest == "hls/track/master.m3u8"
+
+    assert playback["status"] == "done" and playback["progress"] == 1.0
+    assert playback["manifest_url"] == f"/api/v1/songs/{song.id}/hls/master.m3u8"
+    assert master.headers["content-type"] == "application/vnd.apple.mpegurl"
+    assert "64k/index.m3u8" in master.text and "128k/index.m3u8" in master.text
+    segment_urls = [s["uri"] for s in parse_media_playlist(media.text)]
+    assert len(segment_urls) == 5
+    assert segment_urls[0].startswith("https://") and "/hls/track/64k/00000.ts?" in segment_urls[0], segment_urls[0]
+    assert listed[0]["manifest_url"] == playback["manifest_url"]
+    assert (await api.get(f"/api/v1/songs/{song.id}/hls/256k/index.m3u8")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_new_song_of_packaged_audio_gets_the_manifest(api):
+    await crud.hls_package.finish(
+        api.db, file_path="audio/ready.wav", manifest_path="hls/ready/master.m3u8", renditions=[]
+    )
+
+    response = await api.post(
+        "/api/v1/songs/", json={"title": "Ready", "duration": 5, "file_path": "audio/ready.wav"}
+    )
+    song = await api.db.get(Song, response.json()["id"])
+
+    assert response.status_code == 201
+    assert song.playback_manifest == "hls/ready/master.m3u8"
+
+
+@pytest.mark.asyncio
+async def test_failure_is_recorded(api, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "FFMPEG_PATH", str(tmp_path / "no-ffmpeg"))
+    api.s3.put_object(Bucket=BUCKET, Key="audio/broken.wav", Body=_wav(1))
+    song = Song(title="Broken", duration=1, file_path="audio/broken.wav")
+    api.db.add(song)
+    await api.db.commit()
+
+    package = await api.package("audio/broken.wav")
+    playback = (await api.get(f"/api/v1/songs/{song.id}/playback")).json()
+
+    assert package.status == "failed" and "ffmpeg" in package.error
+    assert playback["status"] == "failed" and playback["manifest_url"] is None
+    assert (await api.get(f"/api/v1/songs/{song.id}/hls/master.m3u8")).status_code == 404
+    assert (await api.get("/api/v1/songs/12345/playback")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_segment_urls_outlive_playback_of_a_cached_playlist(api, monkeypatch):
+    monkeypatch.setattr(settings, "S3_PRESIGN_SAFETY_MARGIN_SECONDS", 300)
+    # Two hours of audio
+    segments = [{"uri": f"{i:05d}.ts", "duration": 6.0} for i in range(1200)]
+    await crud.hls_package.finish(
+        api.db, file_path="audio/long.wav", manifest_path="hls/long/master.m3u8",
+        renditions=[{"name": "64k", "bitrate": 64, "bandwidth": 70000, "segments": segments}],
+    )
+    song = Song(title="Long", duration=7200, file_path="audio/long.wav")
+    api.db.add(song)
+    await api.db.commit()
+
+    media = await api.get(f"/api/v1/songs/{song.id}/hls/64k/index.m3u8")
+
+    first = parse_media_playlist(media.text)[0]["uri"]
+    expires_in = int(parse_qs(urlparse(first).query)["Expires"][0]) - time.time()
+    max_age = int(media.headers["cache-control"].rsplit("=", 1)[1])
+    # Song length plus a margin on each side of the playlist's max-age
+    assert expires_in == pytest.approx(7200 + 2 * 300, abs=5)
+    assert max_age == 300
@@ -0,0 +1,227 @@
+import asyncio
+import io
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpcore
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+
+from app.services.image_proxy import (
+    ImageProxy,
+    HostNotPublic,
+    ImageProxyError,
+    PublicTransport,
+    get_image_proxy,
+    proxy_path,
+    size_bucket,
+)
+from app.services.media_jobs import shutdown_media_pool
+from main import app as main_app
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (20, 120, 220)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+COVER = _png(900, 600)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits: dict = {}
+
+    def do_GET(self):
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path.startswith("/cover.png") or self.path == "/slow.png":
+            if self.path == "/slow.png":
+                time.sleep(0.3)
+            self._send(200, "image/png", COVER)
+        elif self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/cover.png?via=redirect")
+            self.end_headers()
+        elif self.path == "/page.html":
+            self._send(200, "text/html", b"<html></html>")
+        else:
+            self._send(404, "text/plain", b"gone")
+
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest_asyncio.fixture
+async def api(tmp_path):
+    _Handler.hits.clear()
+    proxy = ImageProxy(
+        str(tmp_path), 10 * 1024 * 1024, httpx.AsyncClient(),
+        max_source_bytes=1024 * 1024, negative_ttl=3600, error_ttl=60,
+    )
+    main_app.dependency_overrides[get_image_proxy] = lambda: proxy
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            client.proxy = proxy
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+        await proxy.client.aclose()
+        shutdown_media_pool()
+
+
+def test_size_bucket():
+    assert size_bucket(100, [64, 128, 256]) == 128
+    assert size_bucket(64, [256, 64, 128]) == 64
+    assert size_bucket(1000, [64, 128, 256]) == 256
+    assert size_bucket(None, [64, 128, 256]) == 256
+
+
+@pytest.mark.asyncio
+async def test_resized_image_is_cached(api, origin):
+    url = f"{origin}/cover.png"
+
+    first = await api.get(proxy_path(url, 100, "jpeg"))
+    second = await api.get(proxy_path(url, 120, "jpeg"))
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["content-type"] == "image/jpeg"
+    assert "max-age" in first.headers["cache-control"]
+    assert Image.open(io.BytesIO(first.content)).size == (128, 85)
+    assert second.content == first.content
+    assert _Handler.hits["/cover.png"] == 1
+
+
+@pytest.mark.asyncio
+async def test_format_is_negotiated_from_accept(api, origin):
+    response = await api.get(proxy_path(f"{origin}/cover.png", 64), headers={"Accept": "image/webp,*/*"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "Accept" in response.headers["vary"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch(api, origin):
+    url = f"{origin}/slow.png"
+
+    responses = await asyncio.gather(
+        *(api.get(proxy_path(url, size, fmt)) for size in (64, 256) for fmt in ("webp", "jpeg") for _ in range(3))
+    )
+
+    assert {r.status_code for r in responses} == {200}
+    assert _Handler.hits["/slow.png"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redirects_are_followed(api, origin):
+    response = await api.get(proxy_path(f"{origin}/redirect", 64, "jpeg"))
+
+    assert response.status_code == 200
+    assert _Handler.hits["/cover.png?via=redirect"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_are_cached(api, origin):
+    missing = [await api.get(proxy_path(f"{origin}/missing.png", 64, "jpeg")) for _ in range(2)]
+    page = await api.get(proxy_path(f"{origin}/page.html", 64, "jpeg"))
+
+    assert [r.status_code for r in missing] == [404, 404]
+    assert missing[1].headers["cache-control"] == "public, max-age=3600"
+    assert _Handler.hits["/missing.png"] == 1
+    assert page.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_unsigned_urls_are_refused(api, origin):
+    response = await api.get("/api/v1/images/proxy", params={"url": f"{origin}/cover.png", "sig": "0" * 32})
+
+    assert response.status_code == 403
+    assert not _Handler.hits
+
+
+@pytest.mark.asyncio
+async def test_private_hosts_are_refused(tmp_path, origin):
+    async with httpx.AsyncClient(transport=PublicTransport()) as client:
+        proxy = ImageProxy(str(tmp_path), 1024, client, max_source_bytes=1024, negative_ttl=60, error_ttl=60)
+        for url in (f"{origin}/cover.png", "file:///etc/passwd"):
+            with pytest.raises(ImageProxyError) as exc_info:
+                await proxy.get_path(url, 64, "jpeg")
+            assert exc_info.value.status_code == 400
+    assert not _Handler.hits
+
+
+@pytest.mark.asyncio
+async def test_transport_refuses_internal_hosts(origin):
+    async with httpx.AsyncClient(transport=PublicTransport()) as client:
+        with pytest.raises(HostNotPublic):
+            await client.get(f"{origin}/cover.png")
+        with pytest.raises(httpx.ConnectError):
+            await client.get("http://does-not-resolve.invalid/cover.png")
+
+    assert not _Handler.hits
+
+
+class _RecordingBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self):
+        self.connects = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.connects.append((host, port))
+        raise httpcore.ConnectError("recorded")
+
+
+@pytest.mark.asyncio
+async def test_connections_go_to_the_vetted_address(tmp_path, monkeypatch):
+    answers = {
+        "cdn.example": ["93.184.216.34"],
+        "rebind.example": ["93.184.216.34", "10.0.0.7"],
+    }
+
+    async def getaddrinfo(host, port, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in answers[host]]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    recorder = _RecordingBackend()
+    async with httpx.AsyncClient(transport=PublicTransport(backend=recorder)) as client:
+        proxy = ImageProxy(str(tmp_path), 1024, client, max_source_bytes=1024, negative_ttl=60, error_ttl=60)
+        with pytest.raises(ImageProxyError) as public:
+            await proxy.get_path("http://cdn.example/cover.png", 64, "jpeg")
+        with pytest.raises(ImageProxyError) as mixed:
+            await proxy.get_path("https://rebind.example/cover.png", 64, "jpeg")
+
+    # The name is never handed to the connection, so it cannot be resolved again
+    assert recorder.connects == [("93.184.216.34", 80)]
+    assert public.value.status_code == 502
+    assert mixed.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(api, origin):
+    api.proxy.max_bytes = 1
+    for size in (64, 128):
+        assert (await api.get(proxy_path(f"{origin}/cover.png", size, "jpeg"))).status_code == 200
+
+    assert len(api.proxy._entries) == 1
+    assert len(os.listdir(api.proxy.directory)) == 1
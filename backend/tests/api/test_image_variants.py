@@ -0,0 +1,160 @@
+import io
+from functools import partial
+from urllib.parse import urlparse
+
+import boto3
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_user, get_current_user_async
+from app.api.v1.files import endpoints as file_endpoints
+from app.core.config import settings
+from app.models.band import Band
+from app.models.blog import Blog
+from app.models.song import Song
+from app.models.user import User
+from app.services.image_proxy import proxy_path
+from app.services.image_variants import pick_variant, render_variants
+from app.services.media_jobs import generate_image_variants, shutdown_media_pool
+from app.services.s3 import S3Service, get_s3_service
+from main import app as main_app
+from tests.conftest import AsyncTestingSessionLocal
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "listener-image-variants"
+USER = User(id=7, email="covers@example.com", username="covers")
+
+
+def _image(width: int, height: int, fmt: str = "PNG", mode: str = "RGBA") -> bytes:
+    image = Image.new(mode, (width, height), (200, 30, 60, 128) if mode == "RGBA" else (200, 30, 60))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def test_render_variants_downscales_without_upscaling(tmp_path):
+    path = tmp_path / "cover.png"
+    path.write_bytes(_image(1000, 600))
+    small = tmp_path / "small.jpg"
+    small.write_bytes(_image(50, 50, "JPEG", "RGB"))
+
+    variants = render_variants(str(path), [64, 512, 2000])
+
+    assert [(v["size"], v["format"], v["width"], v["height"]) for v in variants] == [
+        (512, "webp", 512, 307), (512, "jpeg", 512, 307), (64, "webp", 64, 38), (64, "jpeg", 64, 38),
+    ]
+    webp = Image.open(io.BytesIO(variants[0]["data"]))
+    jpeg = Image.open(io.BytesIO(variants[1]["data"]))
+    assert (webp.format, webp.mode) == ("WEBP", "RGBA")
+    assert (jpeg.format, jpeg.mode) == ("JPEG", "RGB")
+    assert render_variants(str(small), [64, 128]) == []
+
+
+def test_pick_variant_prefers_smallest_large_enough():
+    variants = [
+        {"size": size, "format": fmt, "file_path": f"images/a_{size}.{fmt}"}
+        for size in (64, 256) for fmt in ("webp", "jpeg")
+    ]
+
+    assert pick_variant(variants, 48, "webp") == "images/a_64.webp"
+    assert pick_variant(variants, 100, "jpeg") == "images/a_256.jpeg"
+    assert pick_variant(variants, 300, "webp") is None
+    assert pick_variant([v for v in variants if v["format"] == "jpeg"], 64, "webp") == "images/a_64.jpeg"
+    assert pick_variant([], 64, "webp") is None
+
+
+@pytest_asyncio.fixture
+async def api(async_db: AsyncSession, monkeypatch):
+    async_db.sync_session.expire_on_commit = False
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", BUCKET)
+    monkeypatch.setattr(settings, "IMAGE_VARIANTS_ENABLED", True)
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_SIZES", [64, 256])
+    with moto.mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET)
+        service = S3Service(client=s3_client)
+        # Variants are written to the test database and bucket
+        monkeypatch.setattr(file_endpoints, "generate_image_variants", partial(
+            generate_image_variants,
+            s3_service=service,
+            session_factory=partial(AsyncTestingSessionLocal, expire_on_commit=False),
+        ))
+
+        async def override_db():
+            yield async_db
+
+        main_app.dependency_overrides[get_async_db] = override_db
+        main_app.dependency_overrides[get_s3_service] = lambda: service
+        main_app.dependency_overrides[get_current_active_user] = lambda: USER
+        main_app.dependency_overrides[get_current_user_async] = lambda: USER
+        try:
+            async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+                client.s3 = s3_client
+                client.db = async_db
+                yield client
+        finally:
+            main_app.dependency_overrides.clear()
+            shutdown_media_pool()
+
+
+def _key(url: str) -> str:
+    return urlparse(url).path.split(f"/{BUCKET}/", 1)[-1].lstrip("/")
+
+
+@pytest.mark.asyncio
+async def test_uploaded_cover_is_listed_at_the_requested_size(api):
+    upload = await api.post(
+        "/api/v1/files/upload/image", files={"file": ("cover.png", _image(800, 800), "image/png")}
+    )
+    file_path = upload.json()["file_path"]
+    stem = file_path.rsplit(".", 1)[0]
+    api.db.add_all([
+        Song(title="Uploaded cover", duration=10, file_path="audio/a.mp3", cover_image_url=file_path),
+        Song(title="Hotlinked cover", duration=10, file_path="audio/b.mp3", cover_image_url="https://example.com/c.jpg"),
+        Blog(name="Blog", url="https://blog.example.com", image_url=file_path),
+        Band(name="Band", image_url=file_path),
+    ])
+    await api.db.commit()
+
+    thumbs = (await api.get("/api/v1/songs/", params={"size": 64})).json()
+    medium = (await api.get("/api/v1/songs/", params={"size": 200, "image_format": "jpeg"})).json()
+    large = (await api.get("/api/v1/songs/", params={"size": 1024})).json()
+    plain = (await api.get("/api/v1/songs/")).json()
+    blogs = (await api.get("/api/v1/blogs/", params={"size": 64})).json()
+    bands = (await api.get("/api/v1/bands/", params={"size": 64})).json()
+
+    assert upload.status_code == 200
+    stored = await crud.image_variants.get_by_file_paths(api.db, file_paths=[file_path])
+    assert sorted((v["size"], v["format"]) for v in stored[file_path]) == [
+        (64, "jpeg"), (64, "webp"), (256, "jpeg"), (256, "webp"),
+    ]
+    head = api.s3.head_object(Bucket=BUCKET, Key=f"{stem}_64.webp")
+    assert head["ContentType"] == "image/webp"
+    assert "immutable" in head["CacheControl"]
+    assert _key(thumbs[0]["cover_image_variant_url"]) == f"{stem}_64.webp"
+    assert _key(medium[0]["cover_image_variant_url"]) == f"{stem}_256.jpg"
+    # Nothing large enough: the original
+    assert _key(large[0]["cover_image_variant_url"]) == file_path
+    assert thumbs[1]["cover_image_variant_url"] == proxy_path("https://example.com/c.jpg", 64, "webp")
+    assert plain[0]["cover_image_variant_url"] is None
+    assert _key(blogs[0]["image_variant_url"]) == f"{stem}_64.webp"
+    assert _key(bands[0]["image_variant_url"]) == f"{stem}_64.webp"
+
+
+@pytest.mark.asyncio
+async def test_unreadable_image_records_the_error(api):
+    api.s3.put_object(Bucket=BUCKET, Key="images/broken.png", Body=b"not an image")
+
+    result = await generate_image_variants(
+        "images/broken.png",
+        s3_service=S3Service(client=api.s3),
+        session_factory=partial(AsyncTestingSessionLocal, expire_on_commit=False),
+    )
+
+    assert result.variants == []
+    assert result.error
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.metrics import track_dependency
+from app.core.middleware import PrometheusMiddleware
+from main import app as main_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    client = TestClient(main_app)
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
+    assert "http_request_duration_seconds_bucket" in response.text
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    def read_thing(thing_id: int):
+        return {"id": thing_id}
+
+    client = TestClient(PrometheusMiddleware(app))
+    before = _sample("http_requests_total", method="GET", route="/things/{thing_id}", status="200")
+    client.get("/things/1")
+    client.get("/things/2")
+    client.get("/nowhere")
+
+    assert _sample("http_requests_total", method="GET", route="/things/{thing_id}", status="200") == before + 2
+    assert _sample("http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    assert _sample("http_request_duration_seconds_count", method="GET", route="/things/{thing_id}") >= 2
+    assert _sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_track_dependency_records_latency_and_errors():
+    before = _sample("dependency_call_errors_total", service="redis", operation="get")
+
+    with track_dependency("redis", "get"):
+        pass
+    with pytest.raises(RuntimeError):
+        with track_dependency("redis", "get"):
+            raise RuntimeError("boom")
+
+    assert _sample("dependency_call_errors_total", service="redis", operation="get") == before + 1
+    assert _sample("dependency_call_duration_seconds_count", service="redis", operation="get") >= 2
+
+
+def test_multiprocess_collector_aggregates_workers(tmp_path):
+    env = dict(os.environ, APP_ENV="test", PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    worker = (
+        "from app.core.metrics import DEPENDENCY_ERRORS\n"
+        "DEPENDENCY_ERRORS.labels('s3', 'upload').inc(3)\n"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], cwd=BACKEND_DIR, env=env, check=True)
+
+    scrape = subprocess.run(
+        [sys.executable, "-c", "from app.core.metrics import render_metrics; print(render_metrics().decode())"],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    )
+    assert 'dependency_call_errors_total{operation="upload",service="s3"} 6.0' in scrape.stdout
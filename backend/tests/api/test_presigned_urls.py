@@ -0,0 +1,143 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_async_db, get_current_active_user, get_current_user_async
+from app.models.song import Song
+from app.models.user import User
+from app.services.s3 import PresignedUrlCache, S3Service, get_s3_service
+from main import app as main_app
+
+USER = User(id=1, email="presign@example.com", username="presign")
+
+
+def _signer() -> MagicMock:
+    client = MagicMock()
+    client.generate_presigned_url.side_effect = (
+        lambda ClientMethod, Params, ExpiresIn: f"https://s3.test/{Params['Key']}?expires={ExpiresIn}"
+    )
+    return client
+
+
+@pytest.fixture
+def service() -> S3Service:
+    cache = PresignedUrlCache(max_entries=100, bucket_seconds=900, margin_seconds=300)
+    return S3Service(client=_signer(), url_cache=cache)
+
+
+def test_cache_buckets_lifetimes_and_reuses_urls(service):
+    first = service.generate_presigned_url("audio/a.mp3", expires_in=3000)
+    second = service.generate_presigned_url("audio/a.mp3", expires_in=3600)
+
+    assert first == second == "https://s3.test/audio/a.mp3?expires=3600"
+    service.s3_client.generate_presigned_url.assert_called_once()
+    # A different bucket is signed separately
+    assert service.generate_presigned_url("audio/a.mp3", expires_in=60).endswith("expires=900")
+
+
+def test_cache_stops_serving_urls_inside_the_safety_margin(service):
+    with patch("app.services.s3.time.time", return_value=1_000_000.0):
+        service.generate_presigned_url("audio/a.mp3", expires_in=900)
+    # 900 s lifetime, 300 s margin: reusable for 600 s
+    with patch("app.services.s3.time.time", return_value=1_000_599.0):
+        service.generate_presigned_url("audio/a.mp3", expires_in=900)
+    assert service.s3_client.generate_presigned_url.call_count == 1
+    with patch("app.services.s3.time.time", return_value=1_000_601.0):
+        service.generate_presigned_url("audio/a.mp3", expires_in=900)
+    assert service.s3_client.generate_presigned_url.call_count == 2
+
+
+def test_cache_is_bounded():
+    cache = PresignedUrlCache(max_entries=2, bucket_seconds=60, margin_seconds=10)
+    for key in ("a", "b", "c"):
+        cache.put("bucket", key, 60, key)
+
+    assert cache.get("bucket", "a", 60) is None
+    assert cache.get("bucket", "c", 60) == "c"
+
+
+@pytest_asyncio.fixture
+async def api(async_db: AsyncSession, service):
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_s3_service] = lambda: service
+    main_app.dependency_overrides[get_current_active_user] = lambda: USER
+    main_app.dependency_overrides[get_current_user_async] = lambda: USER
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_signs_each_key_once(api, service):
+    paths = ["audio/a.mp3", "audio/b.mp3", "audio/a.mp3"]
+
+    response = await api.post("/api/v1/files/presigned-urls", json={"file_paths": paths})
+    again = await api.post("/api/v1/files/presigned-urls", json={"file_paths": paths[:2], "expires": 3000})
+
+    assert response.status_code == 200
+    assert response.json()["urls"] == {
+        "audio/a.mp3": "https://s3.test/audio/a.mp3?expires=3600",
+        "audio/b.mp3": "https://s3.test/audio/b.mp3?expires=3600",
+    }
+    assert again.json() == response.json()
+    assert service.s3_client.generate_presigned_url.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_limits_batch_size(api):
+    response = await api.post("/api/v1/files/presigned-urls", json={"file_paths": [f"a/{i}" for i in range(101)]})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_song_list_embeds_signed_urls_on_request(api, service, async_db: AsyncSession):
+    async_db.add_all([
+        *(Song(title=f"Signed {i}", duration=100, file_path=f"audio/signed-{i}.mp3") for i in range(3)),
+        Song(title="Scraped", source_url="https://blog.example/track.mp3"),
+    ])
+    await async_db.commit()
+
+    plain = (await api.get("/api/v1/songs/")).json()
+    signed = (await api.get("/api/v1/songs/", params={"signed_urls": "true"})).json()
+
+    assert [song["file_url"] for song in plain] == [None, None, None, None]
+    assert [song["file_url"] for song in signed] == [
+        *(f"https://s3.test/audio/signed-{i}.mp3?expires=3600" for i in range(3)),
+        # Linked songs are played from their source
+        "https://blog.example/track.mp3",
+    ]
+    assert service.s3_client.generate_presigned_url.call_count == 3
+    assert [{**song, "file_url": None} for song in signed] == plain
+    assert "file_path" not in signed[0]
+
+
+@pytest.mark.asyncio
+async def test_signing_errors_are_not_sent_to_clients(async_db: AsyncSession, service):
+    async_db.add(Song(title="Song", duration=100, file_path="audio/a.mp3"))
+    await async_db.commit()
+    service.s3_client.generate_presigned_url.side_effect = RuntimeError("secret-bucket: AccessDenied")
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_s3_service] = lambda: service
+    main_app.dependency_overrides[get_current_user_async] = lambda: USER
+    try:
+        transport = ASGITransport(app=main_app, raise_app_exceptions=False)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/v1/songs/", params={"signed_urls": "true"})
+    finally:
+        main_app.dependency_overrides.clear()
+
+    assert response.status_code == 500
+    assert "secret-bucket" not in response.text
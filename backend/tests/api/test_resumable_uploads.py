@@ -0,0 +1,193 @@
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+
+import boto3
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_user
+from app.core.config import settings
+from app.models.upload_session import UploadSession
+from app.models.user import User
+from app.services import resumable_uploads
+from app.services.resumable_uploads import append_chunk, collect_abandoned_uploads
+from app.services.s3 import S3Service, get_s3_service
+from main import app as main_app
+from tests.conftest import AsyncTestingSessionLocal
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "listener-resumable"
+PART_SIZE = 4096
+AUDIO = b"ID3" + bytes(range(256)) * 70  # 4.4 parts
+USER = User(id=5, email="resume@example.com", username="resume")
+
+
+@pytest_asyncio.fixture
+async def api(async_db: AsyncSession, monkeypatch):
+    async_db.sync_session.expire_on_commit = False
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", BUCKET)
+    monkeypatch.setattr(settings, "UPLOAD_SESSION_PART_SIZE", PART_SIZE)
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", PART_SIZE)
+    with moto.mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET)
+
+        async def override_db():
+            yield async_db
+
+        main_app.dependency_overrides[get_async_db] = override_db
+        main_app.dependency_overrides[get_s3_service] = lambda: S3Service(client=s3_client)
+        main_app.dependency_overrides[get_current_active_user] = lambda: USER
+        try:
+            async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+                client.s3 = s3_client
+                client.db = async_db
+                yield client
+        finally:
+            main_app.dependency_overrides.clear()
+
+
+async def _open(api, filename="long-mix.mp3", content_type="audio/mpeg", size=len(AUDIO)):
+    return await api.post(
+        "/api/v1/files/uploads/audio/sessions",
+        json={"filename": filename, "content_type": content_type, "size": size},
+    )
+
+
+async def _patch(api, session_id, offset, content):
+    return await api.patch(
+        f"/api/v1/files/uploads/sessions/{session_id}", content=content, headers={"Upload-Offset": str(offset)}
+    )
+
+
+def _multipart_uploads(s3_client):
+    return s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", [])
+
+
+@pytest.mark.asyncio
+async def test_chunks_resume_from_stored_parts_and_assemble(api):
+    session = (await _open(api)).json()
+
+    # 2.5 parts: the half part is dropped and resent with the next chunk
+    first = await _patch(api, session["id"], 0, AUDIO[: int(PART_SIZE * 2.5)])
+    status = await api.get(f"/api/v1/files/uploads/sessions/{session['id']}")
+    stale = await _patch(api, session["id"], 0, AUDIO[:PART_SIZE])
+    early = await api.post(f"/api/v1/files/uploads/sessions/{session['id']}/complete")
+    rest = await _patch(api, session["id"], 2 * PART_SIZE, AUDIO[2 * PART_SIZE:])
+    done = await api.post(f"/api/v1/files/uploads/sessions/{session['id']}/complete")
+
+    assert session["offset"] == 0 and session["part_size"] == PART_SIZE
+    assert first.json()["offset"] == status.json()["offset"] == 2 * PART_SIZE
+    assert stale.status_code == early.status_code == 409
+    assert stale.headers["Upload-Offset"] == str(2 * PART_SIZE)
+    assert rest.json()["offset"] == len(AUDIO)
+    assert done.status_code == 200
+    file_path = done.json()["file_path"]
+    assert file_path.startswith("audio/") and file_path.endswith(".mp3")
+    stored = api.s3.get_object(Bucket=BUCKET, Key=file_path)
+    assert stored["Body"].read() == AUDIO
+    assert stored["ContentType"] == "audio/mpeg"
+    assert await crud.upload_session.get(api.db, session["id"]) is None
+    assert _multipart_uploads(api.s3) == []
+
+
+@pytest.mark.asyncio
+async def test_dropped_connection_keeps_transferred_parts(api):
+    upload = await crud.upload_session.get(api.db, (await _open(api)).json()["id"])
+
+    async def dropped():
+        for start in range(0, 3 * PART_SIZE + 100, 1000):
+            yield AUDIO[start:min(start + 1000, 3 * PART_SIZE + 100)]
+        raise ConnectionResetError("client went away")
+
+    with pytest.raises(ConnectionResetError):
+        await append_chunk(api.db, S3Service(client=api.s3), upload, 0, dropped())
+
+    assert upload.received == 3 * PART_SIZE
+    resumed = await _patch(api, upload.id, 3 * PART_SIZE, AUDIO[3 * PART_SIZE:])
+    assert resumed.json()["offset"] == len(AUDIO)
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_is_validated_before_storage(api):
+    wrong_type = (await _open(api, filename="notes.txt", content_type="text/plain")).json()
+    short = (await _open(api, size=100)).json()
+
+    # Declared sizes over the limit are refused before any chunk is sent
+    rejected_size = await _open(api, size=60 * 1024 * 1024)
+    rejected_type = await _patch(api, wrong_type["id"], 0, AUDIO[:PART_SIZE])
+    overrun = await _patch(api, short["id"], 0, AUDIO[:200])
+
+    assert rejected_type.status_code == overrun.status_code == 400
+    assert "Invalid file type" in rejected_type.json()["detail"]
+    assert _multipart_uploads(api.s3) == []
+    assert rejected_size.status_code == 400 and "too large" in rejected_size.json()["detail"]
+    assert len(await crud.upload_session.get_stale(api.db, before=datetime.utcnow(), limit=10)) == 2
+
+
+@pytest.mark.asyncio
+async def test_other_users_sessions_are_hidden(api):
+    session = (await _open(api)).json()
+    main_app.dependency_overrides[get_current_active_user] = lambda: User(id=6, email="x@example.com", username="x")
+
+    assert (await api.get(f"/api/v1/files/uploads/sessions/{session['id']}")).status_code == 404
+    assert (await _patch(api, session["id"], 0, AUDIO)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_abandoned_sessions_are_aborted(api):
+    idle = (await _open(api)).json()
+    active = (await _open(api)).json()
+    cancelled = (await _open(api)).json()
+    for session in (idle, active, cancelled):
+        await _patch(api, session["id"], 0, AUDIO[:PART_SIZE])
+    await api.db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == idle["id"])
+        .values(updated_at=datetime.utcnow() - timedelta(days=2))
+    )
+    await api.db.commit()
+    aborted_before = REGISTRY.get_sample_value("upload_sessions_abandoned_total") or 0.0
+
+    deleted = await api.delete(f"/api/v1/files/uploads/sessions/{cancelled['id']}")
+    collected = await collect_abandoned_uploads(
+        s3_service=S3Service(client=api.s3),
+        session_factory=partial(AsyncTestingSessionLocal, expire_on_commit=False),
+    )
+
+    assert deleted.status_code == 204
+    assert collected == 1
+    assert await crud.upload_session.get(api.db, idle["id"]) is None
+    assert [u["UploadId"] for u in _multipart_uploads(api.s3)] == [
+        (await crud.upload_session.get(api.db, active["id"])).s3_upload_id
+    ]
+    assert REGISTRY.get_sample_value("upload_sessions_abandoned_total") == aborted_before + 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_sessions_are_swept_periodically(monkeypatch):
+    sweeps = []
+
+    async def sweep():
+        sweeps.append(len(sweeps))
+        if len(sweeps) == 1:
+            raise RuntimeError("database unavailable")
+
+    async def three_sweeps():
+        while len(sweeps) < 3:
+            await asyncio.sleep(0)
+
+    monkeypatch.setattr(resumable_uploads, "collect_abandoned_uploads", sweep)
+    task = asyncio.create_task(resumable_uploads.collect_abandoned_uploads_forever(interval=0))
+    try:
+        # A failed sweep does not stop the next one
+        await asyncio.wait_for(three_sweeps(), timeout=1)
+    finally:
+        task.cancel()
@@ -0,0 +1,287 @@
+import io
+import wave
+from datetime import datetime
+from functools import partial
+
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_async_db, get_current_active_superuser_async
+from app.models.blob import Blob
+from app.models.comment import Comment
+from app.models.song import Song
+from app.models.song_fingerprint import SongFingerprint
+from app.models.song_tag import SongTag
+from app.models.tag import Tag
+from app.models.user import User
+from app.models.user_song import UserSong
+from app.services.audio_cache import AudioFileCache
+from app.services.fingerprint import best_alignment, fingerprint_samples
+from app.services.media_jobs import fingerprint_song, shutdown_media_pool
+from app.services.scraped_audio import fingerprint_scraped_songs
+from main import app as main_app
+from tests.conftest import AsyncTestingSessionLocal
+
+RATE = 8000
+session_factory = partial(AsyncTestingSessionLocal, expire_on_commit=False)
+
+
+def _track(seed: int, seconds: float = 15.0) -> np.ndarray:
+    """Random melody of decaying equal-tempered notes with harmonics."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    out = np.zeros_like(t)
+    start = 0.0
+    while start < seconds:
+        pitch = 110 * 2 ** (rng.integers(0, 48) / 12)
+        length = rng.choice([0.125, 0.25, 0.375, 0.5])
+        note = (t >= start) & (t < start + length)
+        envelope = np.exp(-(t[note] - start) * rng.uniform(4, 10))
+        for harmonic in (1, 2, 3):
+            out[note] += np.sin(2 * np.pi * pitch * harmonic * t[note]) * envelope * rng.uniform(0.2, 0.5) / harmonic
+        start += length
+    return (out / np.abs(out).max() * 0.8).astype(np.float32)
+
+
+def _reencoded(samples: np.ndarray, seed: int = 99) -> np.ndarray:
+    """Quieter, noisier copy with a short lead-in, like another encode of the track."""
+    noise = np.random.default_rng(seed).normal(0, 0.02, samples.size).astype(np.float32)
+    return np.concatenate([np.zeros(700, dtype=np.float32), samples * 0.6 + noise])
+
+
+def _wav(samples: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _score(query: np.ndarray, stored: np.ndarray):
+    candidates = stored[np.isin(stored[:, 0], query[:, 0])]
+    return best_alignment(query, np.full(len(candidates), 1), candidates[:, 0], candidates[:, 1])
+
+
+def test_fingerprints_survive_reencoding_but_separate_tracks():
+    original = fingerprint_samples(_track(1))
+    resampled = np.interp(np.arange(int(_track(1).size * 44100 / RATE)) * RATE / 44100, np.arange(_track(1).size), _track(1))
+
+    copy_score = _score(fingerprint_samples(_reencoded(_track(1))), original)
+    resampled_score = _score(fingerprint_samples(resampled.astype(np.float32), 44100), original)
+    other_score = _score(fingerprint_samples(_track(2)), original)
+
+    assert original.shape[1] == 2 and len(original) > 200
+    assert copy_score[1] > 10 * max(other_score[1] if other_score else 1, 1)
+    assert resampled_score[1] > 10 * max(other_score[1] if other_score else 1, 1)
+
+
+def test_silence_has_no_fingerprint():
+    assert len(fingerprint_samples(np.zeros(RATE * 5, dtype=np.float32))) == 0
+    assert _score(np.empty((0, 2), dtype=np.int64), np.empty((0, 2), dtype=np.int64)) is None
+
+
+class FakeStore:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def download(self, s3_key: str, path: str) -> None:
+        if s3_key not in self.objects:
+            raise FileNotFoundError(s3_key)
+        with open(path, "wb") as f:
+            f.write(self.objects[s3_key])
+
+
+@pytest_asyncio.fixture
+async def catalog(async_db: AsyncSession, tmp_path):
+    async_db.sync_session.expire_on_commit = False
+    files = {
+        "audio/original.wav": _wav(_track(1)),
+        "audio/blog-repost.wav": _wav(_reencoded(_track(1))),
+        "audio/another-repost.wav": _wav(_reencoded(_track(1), seed=7)),
+        "audio/different.wav": _wav(_track(2)),
+    }
+    songs = {name: Song(title=name, duration=15, file_path=f"audio/{name}.wav") for name in (
+        "original", "blog-repost", "another-repost", "different",
+    )}
+    async_db.add_all(songs.values())
+    await async_db.commit()
+    cache = AudioFileCache(str(tmp_path), max_bytes=1 << 26, download=FakeStore(files).download)
+    yield async_db, songs, partial(fingerprint_song, audio_cache=cache, session_factory=session_factory)
+    shutdown_media_pool()
+
+
+@pytest.mark.asyncio
+async def test_fingerprinting_flags_duplicates_of_the_original(catalog):
+    db, songs, fingerprint = catalog
+    flagged_before = REGISTRY.get_sample_value("song_duplicates_flagged_total") or 0.0
+
+    results = {}
+    for name in ("original", "blog-repost", "another-repost", "different"):
+        results[name] = await fingerprint(songs[name].id, songs[name].file_path)
+    for song in songs.values():
+        await db.refresh(song)
+    indexed = await db.scalar(
+        select(SongFingerprint.song_id).where(SongFingerprint.song_id == songs["different"].id).limit(1)
+    )
+
+    assert results == {
+        "original": None,
+        "blog-repost": songs["original"].id,
+        # Points at the original, not at the first repost
+        "another-repost": songs["original"].id,
+        "different": None,
+    }
+    assert songs["blog-repost"].duplicate_of_id == songs["original"].id
+    assert songs["different"].duplicate_of_id is None
+    assert indexed == songs["different"].id
+    assert REGISTRY.get_sample_value("song_duplicates_flagged_total") == flagged_before + 2
+
+
+@pytest.mark.asyncio
+async def test_missing_audio_is_skipped(catalog):
+    _, _, fingerprint = catalog
+
+    assert await fingerprint(12345, "audio/missing.wav") is None
+
+
+@pytest.mark.asyncio
+async def test_scraped_songs_are_fingerprinted_from_their_links(catalog):
+    db, songs, fingerprint = catalog
+    await fingerprint(songs["original"].id, songs["original"].file_path)
+    sources = {
+        "https://blog.example/repost": httpx.Response(
+            302, headers={"Location": "https://cdn.example/repost.wav"}
+        ),
+        "https://cdn.example/repost.wav": httpx.Response(
+            200, content=_wav(_reencoded(_track(1))), headers={"Content-Type": "audio/wav"}
+        ),
+        "https://w.soundcloud.com/player/?url=track1": httpx.Response(
+            200, content=b"<html></html>", headers={"Content-Type": "text/html"}
+        ),
+        "https://cdn.example/huge.mp3": httpx.Response(
+            200, content=b"x", headers={"Content-Type": "audio/mpeg", "Content-Length": str(1 << 40)}
+        ),
+    }
+    scraped = [
+        Song(title=url, source_url=url)
+        for url in ["https://blog.example/repost", "https://w.soundcloud.com/player/?url=track1", "https://cdn.example/huge.mp3"]
+    ]
+    db.add_all(scraped)
+    await db.commit()
+    fetched = []
+
+    def handler(request):
+        fetched.append(str(request.url))
+        return sources[str(request.url)]
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        first = await fingerprint_scraped_songs(client=client, batch_size=2, session_factory=session_factory)
+        again = await fingerprint_scraped_songs(client=client, session_factory=session_factory)
+    for song in scraped:
+        await db.refresh(song)
+
+    assert first == 1
+    assert again == 0
+    assert scraped[0].duplicate_of_id == songs["original"].id
+    assert [song.duplicate_of_id for song in scraped[1:]] == [None, None]
+    # Every link is tried once
+    assert all(song.source_fingerprinted_at is not None for song in scraped)
+    assert sorted(fetched) == sorted(sources)
+
+
+@pytest_asyncio.fixture
+async def merge_client(async_db: AsyncSession):
+    async_db.sync_session.expire_on_commit = False
+    admin = User(id=1, email="admin@example.com", username="admin", is_superuser=True)
+    listeners = [User(email=f"l{i}@example.com", username=f"l{i}", password="x") for i in range(2)]
+    original = Song(title="Original", duration=200, file_path="audio/a.mp3")
+    async_db.add_all([*listeners, original])
+    await async_db.commit()
+    duplicate = Song(title="Original (blog rip)", duration=200, file_path="audio/b.mp3", duplicate_of_id=original.id)
+    rock, live = Tag(name="rock"), Tag(name="live")
+    async_db.add_all([duplicate, rock, live])
+    await async_db.commit()
+    later = datetime(2026, 10, 1)
+    async_db.add_all([
+        UserSong(user_id=listeners[0].id, song_id=original.id, is_favorite=False, play_count=2),
+        UserSong(user_id=listeners[0].id, song_id=duplicate.id, is_favorite=True, play_count=3, last_played=later),
+        UserSong(user_id=listeners[1].id, song_id=duplicate.id, is_favorite=True, play_count=1),
+        SongTag(song_id=original.id, tag_id=rock.id),
+        SongTag(song_id=duplicate.id, tag_id=rock.id),
+        SongTag(song_id=duplicate.id, tag_id=live.id),
+        Comment(content="great", user_id=listeners[1].id, song_id=duplicate.id, target_type="song"),
+    ])
+    await async_db.commit()
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_active_superuser_async] = lambda: admin
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client, async_db, original, duplicate, listeners, (rock, live)
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_merge_moves_history_into_the_original(merge_client):
+    client, db, original, duplicate, listeners, tags = merge_client
+
+    response = await client.post(f"/api/v1/songs/{duplicate.id}/merge")
+    not_flagged = await client.post(f"/api/v1/songs/{original.id}/merge")
+    history = {
+        row.user_id: row
+        for row in (await db.execute(select(UserSong).where(UserSong.song_id == original.id))).scalars()
+    }
+    song_tags = (await db.scalars(select(SongTag.tag_id).where(SongTag.song_id == original.id))).all()
+    comment_song = await db.scalar(select(Comment.song_id))
+
+    assert response.status_code == 200
+    assert response.json()["id"] == original.id
+    assert not_flagged.status_code == 409
+    assert await db.get(Song, duplicate.id) is None
+    assert history[listeners[0].id].is_favorite is True
+    assert history[listeners[0].id].play_count == 5
+    assert history[listeners[0].id].last_played == datetime(2026, 10, 1)
+    assert history[listeners[1].id].play_count == 1
+    assert sorted(song_tags) == sorted(tag.id for tag in tags)
+    assert comment_song == original.id
+
+
+@pytest.mark.asyncio
+async def test_merging_releases_only_the_duplicates_reference(async_db: AsyncSession):
+    async_db.sync_session.expire_on_commit = False
+    admin = User(id=1, email="admin@example.com", username="admin", is_superuser=True)
+    original = Song(title="Original", duration=200, file_path="audio/shared.mp3")
+    # Uploaded twice: both songs hold a reference to one object
+    async_db.add_all([original, Blob(sha256="a" * 64, file_path="audio/shared.mp3", size=10, ref_count=2)])
+    await async_db.commit()
+    duplicate = Song(title="Original (again)", duration=200, file_path="audio/shared.mp3", duplicate_of_id=original.id)
+    async_db.add(duplicate)
+    await async_db.commit()
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_active_superuser_async] = lambda: admin
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            response = await client.post(f"/api/v1/songs/{duplicate.id}/merge")
+    finally:
+        main_app.dependency_overrides.clear()
+    blob = await async_db.scalar(select(Blob))
+
+    assert response.status_code == 200
+    assert response.json()["id"] == original.id
+    assert blob.ref_count == 1
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+
+import boto3
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_async_db, get_current_user_async
+from app.core.config import settings
+from app.models.song import Song
+from app.models.user import User
+from app.services.audio_cache import AudioFileCache, get_audio_cache
+from app.services.s3 import S3Service
+from main import app as main_app
+
+AUDIO = bytes(range(256)) * 40
+
+
+class FakeStore:
+    """Blocking downloader over an in-memory bucket, counting calls."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def download(self, s3_key: str, path: str) -> None:
+        self.calls.append(s3_key)
+        self.gate.wait(5)
+        if s3_key not in self.objects:
+            raise FileNotFoundError(s3_key)
+        with open(path, "wb") as f:
+            f.write(self.objects[s3_key])
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_download(tmp_path):
+    store = FakeStore({"audio/a.mp3": AUDIO})
+    cache = AudioFileCache(str(tmp_path), max_bytes=1 << 20, download=store.download)
+    store.gate.clear()
+
+    waiters = [asyncio.create_task(cache.get_path("audio/a.mp3")) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    store.gate.set()
+    paths = await asyncio.gather(*waiters)
+    hits_before = _sample("audio_cache_lookups_total", result="hit")
+    again = await cache.get_path("audio/a.mp3")
+
+    assert store.calls == ["audio/a.mp3"]
+    assert len(set(paths)) == 1 and again == paths[0]
+    assert open(again, "rb").read() == AUDIO
+    assert _sample("audio_cache_lookups_total", result="hit") == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_files(tmp_path):
+    store = FakeStore({f"audio/{name}.mp3": b"x" * 400 for name in "abc"})
+    cache = AudioFileCache(str(tmp_path), max_bytes=1000, download=store.download)
+
+    a = await cache.get_path("audio/a.mp3")
+    b = await cache.get_path("audio/b.mp3")
+    await cache.get_path("audio/a.mp3")
+    await cache.get_path("audio/c.mp3")
+
+    assert os.path.exists(a) and not os.path.exists(b)
+    assert cache.size == 800
+    # A restarted worker picks up what is on disk
+    assert AudioFileCache(str(tmp_path), max_bytes=1000, download=store.download).size == 800
+
+
+@pytest.mark.asyncio
+async def test_leased_files_outlive_eviction(tmp_path):
+    store = FakeStore({f"audio/{name}.mp3": bytes([i]) * 400 for i, name in enumerate("abc")})
+    cache = AudioFileCache(str(tmp_path), max_bytes=1000, download=store.download)
+
+    a = await cache.get_path("audio/a.mp3")
+    lease = await cache.lease("audio/a.mp3")
+    await cache.get_path("audio/b.mp3")
+    await cache.get_path("audio/c.mp3")
+
+    assert not os.path.exists(a)
+    assert lease.endswith(".mp3") and open(lease, "rb").read() == b"\x00" * 400
+    assert cache.size == 800
+    cache.release(lease)
+    assert not os.path.exists(lease)
+
+
+@pytest.mark.asyncio
+async def test_missing_objects_leave_no_partial_files(tmp_path):
+    cache = AudioFileCache(str(tmp_path), max_bytes=1000, download=FakeStore({}).download)
+
+    with pytest.raises(FileNotFoundError):
+        await cache.get_path("audio/missing.mp3")
+
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_reads_through_from_s3(tmp_path, monkeypatch):
+    moto = pytest.importorskip("moto")
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", "listener-stream")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="listener-stream")
+        client.put_object(Bucket="listener-stream", Key="audio/s3.mp3", Body=AUDIO)
+        cache = AudioFileCache(str(tmp_path), max_bytes=1 << 20, download=S3Service(client=client).download_file)
+
+        path = await cache.get_path("audio/s3.mp3")
+        with pytest.raises(FileNotFoundError):
+            await cache.get_path("audio/absent.mp3")
+
+    assert open(path, "rb").read() == AUDIO
+
+
+@pytest_asyncio.fixture
+async def stream_client(async_db: AsyncSession, tmp_path):
+    async_db.sync_session.expire_on_commit = False
+    user = User(id=1, email="stream@example.com", username="stream")
+    song = Song(title="Streamed", duration=100, file_path="audio/streamed.mp3")
+    async_db.add(song)
+    await async_db.commit()
+    cache = AudioFileCache(str(tmp_path), max_bytes=1 << 20, download=FakeStore({song.file_path: AUDIO}).download)
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = lambda: user
+    main_app.dependency_overrides[get_audio_cache] = lambda: cache
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            client.song_id = song.id
+            client.cache = cache
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_stream_serves_whole_file_and_ranges(stream_client):
+    url = f"/api/v1/songs/{stream_client.song_id}/stream"
+    partial_before = _sample("audio_stream_bytes_total", status="206")
+
+    full = await stream_client.get(url)
+    ranged = await stream_client.get(url, headers={"Range": "bytes=100-199"})
+    suffix = await stream_client.get(url, headers={"Range": "bytes=-10"})
+    unsatisfiable = await stream_client.get(url, headers={"Range": f"bytes={len(AUDIO)}-"})
+
+    assert full.status_code == 200
+    assert full.content == AUDIO
+    assert full.headers["content-type"] == "audio/mpeg"
+    assert full.headers["accept-ranges"] == "bytes"
+    assert ranged.status_code == 206
+    assert ranged.content == AUDIO[100:200]
+    assert ranged.headers["content-range"] == f"bytes 100-199/{len(AUDIO)}"
+    assert suffix.content == AUDIO[-10:]
+    assert unsatisfiable.status_code == 416
+    assert _sample("audio_stream_bytes_total", status="206") == partial_before + 110
+    # Leases end with their responses
+    assert os.listdir(os.path.join(stream_client.cache.directory, "leases")) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_of_a_linked_song_redirects_to_its_source(stream_client, async_db: AsyncSession):
+    song = Song(title="Scraped", source_url="https://blog.example/track.mp3")
+    async_db.add(song)
+    await async_db.commit()
+
+    response = await stream_client.get(f"/api/v1/songs/{song.id}/stream")
+
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://blog.example/track.mp3"
+
+
+@pytest.mark.asyncio
+async def test_stream_unknown_song_is_404(stream_client):
+    response = await stream_client.get("/api/v1/songs/999999/stream")
+
+    assert response.status_code == 404
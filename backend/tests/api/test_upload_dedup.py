@@ -0,0 +1,161 @@
+import hashlib
+import io
+from functools import partial
+
+import boto3
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_superuser_async, get_current_active_user
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.songs.song import SongCreate, SongUpdate
+from app.services.blobs import collect_unreferenced_blobs, content_key, hash_file
+from app.services.s3 import S3Service, get_s3_service
+from main import app as main_app
+from tests.conftest import AsyncTestingSessionLocal
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "listener-dedup"
+AUDIO = b"ID3" + bytes(range(256)) * 64
+USER = User(id=3, email="dedup@example.com", username="dedup", is_superuser=True)
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_hash_file_streams_and_rewinds():
+    fileobj = io.BytesIO(AUDIO)
+
+    digest, size = hash_file(fileobj, chunk_size=1000)
+
+    assert digest == hashlib.sha256(AUDIO).hexdigest()
+    assert size == len(AUDIO)
+    assert fileobj.tell() == 0
+    assert content_key("audio", digest, "Track.MP3") == f"audio/{digest}.mp3"
+
+
+@pytest_asyncio.fixture
+async def api(async_db: AsyncSession, monkeypatch):
+    async_db.sync_session.expire_on_commit = False
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", BUCKET)
+    with moto.mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET)
+
+        async def override_db():
+            yield async_db
+
+        main_app.dependency_overrides[get_async_db] = override_db
+        main_app.dependency_overrides[get_s3_service] = lambda: S3Service(client=s3_client)
+        main_app.dependency_overrides[get_current_active_user] = lambda: USER
+        main_app.dependency_overrides[get_current_active_superuser_async] = lambda: USER
+        try:
+            async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+                client.s3 = s3_client
+                client.db = async_db
+                yield client
+        finally:
+            main_app.dependency_overrides.clear()
+
+
+async def _upload(api, name: str, content: bytes = AUDIO):
+    return await api.post(
+        "/api/v1/files/upload/audio", files={"file": (name, content, "audio/mpeg")}
+    )
+
+
+def _keys(s3_client):
+    return [obj["Key"] for obj in s3_client.list_objects_v2(Bucket=BUCKET).get("Contents", [])]
+
+
+@pytest.mark.asyncio
+async def test_reupload_returns_existing_key_without_transfer(api):
+    saved_before = _sample("s3_upload_deduplicated_bytes_total", prefix="audio")
+
+    first = await _upload(api, "song.mp3")
+    second = await _upload(api, "same-song-renamed.mp3")
+    other = await _upload(api, "other.mp3", AUDIO + b"!")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["deduplicated"] is False
+    assert second.json()["deduplicated"] is True
+    assert second.json()["file_path"] == first.json()["file_path"]
+    assert first.json()["file_path"] == f"audio/{hashlib.sha256(AUDIO).hexdigest()}.mp3"
+    assert sorted(_keys(api.s3)) == sorted([first.json()["file_path"], other.json()["file_path"]])
+    # References are taken by songs, not uploads
+    assert [b.ref_count for b in await crud.blob.get_multi(api.db)] == [0, 0]
+    assert _sample("s3_upload_deduplicated_bytes_total", prefix="audio") == saved_before + len(AUDIO)
+
+
+async def _collect(api, **kwargs) -> int:
+    return await collect_unreferenced_blobs(
+        s3_service=S3Service(client=api.s3),
+        session_factory=partial(AsyncTestingSessionLocal, expire_on_commit=False),
+        **kwargs,
+    )
+
+
+async def _ref_counts(api):
+    return {b.file_path: b.ref_count for b in await crud.blob.get_multi(api.db)}
+
+
+@pytest.mark.asyncio
+async def test_songs_hold_the_object_until_the_last_is_deleted(api):
+    file_path = (await _upload(api, "song.mp3")).json()["file_path"]
+    await _upload(api, "song.mp3")
+    songs = [
+        await crud.song.create_async(api.db, obj_in=SongCreate(title=f"Copy {i}", file_path=file_path))
+        for i in range(2)
+    ]
+    legacy = await crud.song.create_async(api.db, obj_in=SongCreate(title="Legacy", file_path="audio/legacy-uuid.mp3"))
+    counts_after_create = await _ref_counts(api)
+
+    first = await api.delete(f"/api/v1/songs/{songs[0].id}")
+    collected_after_first = await _collect(api, max_age=0)
+    second = await api.delete(f"/api/v1/songs/{songs[1].id}")
+    untracked = await api.delete(f"/api/v1/songs/{legacy.id}")
+
+    assert counts_after_create == {file_path: 2}
+    assert first.status_code == second.status_code == untracked.status_code == 204
+    assert collected_after_first == 0
+    assert await _ref_counts(api) == {file_path: 0}
+    assert await _collect(api, max_age=0) == 1
+    assert _keys(api.s3) == []
+    assert await crud.blob.get_multi(api.db) == []
+
+    # Uploading the content again stores it afresh
+    again = await _upload(api, "song.mp3")
+    assert again.json()["file_path"] == file_path
+    assert again.json()["deduplicated"] is False
+    assert _keys(api.s3) == [file_path]
+
+
+@pytest.mark.asyncio
+async def test_fresh_uploads_are_kept_until_their_song_is_created(api):
+    file_path = (await _upload(api, "song.mp3")).json()["file_path"]
+
+    assert await _collect(api) == 0
+    assert _keys(api.s3) == [file_path]
+
+    assert await _collect(api, max_age=0) == 1
+    assert _keys(api.s3) == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_created_and_updated_songs_move_references(api):
+    first = (await _upload(api, "first.mp3")).json()["file_path"]
+    second = (await _upload(api, "second.mp3", AUDIO + b"!")).json()["file_path"]
+
+    songs = await crud.song.create_many(
+        api.db, objs_in=[SongCreate(title=f"Song {i}", file_path=first) for i in range(3)]
+    )
+    await crud.song.update(api.db, db_obj=songs[0], obj_in=SongUpdate(file_path=second))
+
+    assert await _ref_counts(api) == {first: 2, second: 1}
@@ -0,0 +1,155 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app import crud
+from app.api.conditional import Validators
+from app.api.dependencies import get_async_db, get_current_user_async
+from app.models.band import Band
+from app.models.blog import Blog
+from app.models.comment import Comment
+from app.models.song import Song
+from app.models.tag import Tag
+from app.models.user import User
+from main import app as main_app
+
+
+@pytest_asyncio.fixture
+async def user(async_db: AsyncSession) -> User:
+    async_db.sync_session.expire_on_commit = False
+    user = User(email="etag@example.com", username="etag", password="password123")
+    async_db.add(user)
+    await async_db.commit()
+    return user
+
+
+@pytest_asyncio.fixture
+async def etag_client(async_db: AsyncSession, user: User):
+    async def override_db():
+        yield async_db
+
+    async def override_user():
+        return user
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = override_user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+def _request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_validators_compare_weakly_and_prefer_if_none_match():
+    validators = Validators.for_row(7, datetime(2024, 5, 1, 12, 30, 15, 250000))
+
+    assert validators.etag == 'W/"7-1714566615250000"'
+    assert validators.not_modified(_request(if_none_match='"7-1714566615250000"')).status_code == 304
+    assert validators.not_modified(_request(if_none_match='W/"1-1", W/"7-1714566615250000"')) is not None
+    assert validators.not_modified(_request(if_none_match="*")) is not None
+    assert validators.not_modified(_request(if_none_match='W/"7-1"')) is None
+    # If-None-Match wins over a matching If-Modified-Since
+    assert validators.not_modified(
+        _request(if_none_match='W/"7-1"', if_modified_since="Wed, 01 May 2024 12:30:15 GMT")
+    ) is None
+    assert validators.not_modified(_request(if_modified_since="Wed, 01 May 2024 12:30:15 GMT")) is not None
+    assert validators.not_modified(_request(if_modified_since="Wed, 01 May 2024 12:30:14 GMT")) is None
+    assert validators.not_modified(_request(if_modified_since="yesterday")) is None
+
+
+@pytest.mark.asyncio
+async def test_resource_gets_answer_304_from_one_column_query(
+    etag_client, async_db: AsyncSession, user: User, assert_max_queries
+):
+    song = Song(title="Polled", duration=100, file_path="audio/polled.mp3")
+    band = Band(name="Polled Band")
+    blog = Blog(name="Polled Blog", url="https://polled.example.com")
+    tag = Tag(name="polled")
+    async_db.add_all([song, band, blog, tag])
+    await async_db.flush()
+    comment = Comment(content="Polled", user_id=user.id, target_type="song", song_id=song.id)
+    async_db.add(comment)
+    await async_db.commit()
+
+    for url in (
+        f"/api/v1/songs/{song.id}",
+        f"/api/v1/bands/{band.id}",
+        f"/api/v1/blogs/{blog.id}",
+        f"/api/v1/tags/{tag.id}",
+        f"/api/v1/comments/{comment.id}",
+    ):
+        first = await etag_client.get(url)
+        assert first.status_code == 200, url
+        assert first.headers["etag"].startswith('W/"')
+
+        with assert_max_queries(1):
+            cached = await etag_client.get(url, headers={"If-None-Match": first.headers["etag"]})
+        assert cached.status_code == 304, url
+        assert cached.content == b""
+        assert cached.headers["etag"] == first.headers["etag"]
+
+        since = await etag_client.get(url, headers={"If-Modified-Since": first.headers["last-modified"]})
+        assert since.status_code == 304, url
+
+
+@pytest.mark.asyncio
+async def test_update_changes_etag(etag_client, async_db: AsyncSession):
+    tag = Tag(name="mutable")
+    async_db.add(tag)
+    await async_db.commit()
+
+    etag = (await etag_client.get(f"/api/v1/tags/{tag.id}")).headers["etag"]
+    await crud.tag.update(async_db, db_obj=tag, obj_in={"description": "Changed"})
+
+    response = await etag_client.get(f"/api/v1/tags/{tag.id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Changed"
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_missing_resource_is_404_even_when_conditional(etag_client):
+    response = await etag_client.get("/api/v1/blogs/999", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_active_blogs_etag_tracks_the_collection(etag_client, async_db: AsyncSession, assert_max_queries):
+    blogs = [Blog(name=f"Active {i}", url=f"https://active{i}.example.com") for i in range(3)]
+    async_db.add_all(blogs)
+    await async_db.commit()
+
+    async def etag_after(change=None) -> str:
+        if change is not None:
+            await change()
+        response = await etag_client.get("/api/v1/blogs/active")
+        assert response.status_code == 200
+        return response.headers["etag"]
+
+    etag = await etag_after()
+    with assert_max_queries(1):
+        cached = await etag_client.get("/api/v1/blogs/active", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    deactivated = await etag_after(
+        lambda: crud.blog.update(async_db, db_obj=blogs[0], obj_in={"is_active": False})
+    )
+    assert deactivated != etag
+    renamed = await etag_after(lambda: crud.blog.update(async_db, db_obj=blogs[1], obj_in={"name": "Renamed"}))
+    assert renamed != deactivated
+    removed = await etag_after(lambda: crud.blog.remove_many(async_db, ids=[blogs[2].id]))
+    assert removed != renamed
@@ -0,0 +1,110 @@
+from typing import List
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_async_db, get_current_active_superuser_async, get_current_user_async
+from app.api.responses import SchemaJSONResponse, type_adapter
+from app.models.song import Song
+from app.models.user import User
+from app.models.user_song import UserSong
+from app.schemas.blogs.blog import Blog as BlogSchema
+from app.schemas.songs.song import SongWithDetails
+from main import app as main_app
+
+
+@pytest_asyncio.fixture
+async def admin(async_db: AsyncSession) -> User:
+    # Match AsyncSessionLocal; route results are serialized after commit
+    async_db.sync_session.expire_on_commit = False
+    admin = User(email="json@example.com", username="json", password="password123", is_superuser=True)
+    async_db.add(admin)
+    await async_db.commit()
+    return admin
+
+
+@pytest_asyncio.fixture
+async def json_client(async_db: AsyncSession, admin: User):
+    async def override_db():
+        yield async_db
+
+    async def override_user():
+        return admin
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = override_user
+    main_app.dependency_overrides[get_current_active_superuser_async] = override_user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+def test_schema_response_matches_response_model_serialization():
+    songs = [
+        SongWithDetails(
+            id=i, title=f"Song {i}", duration=100, created_at="2024-01-01T00:00:00", updated_at="2024-01-02T00:00:00",
+            favorite_count=1, band_name="Band", is_favorited=True,
+        )
+        for i in range(3)
+    ]
+
+    response = SchemaJSONResponse(songs, List[SongWithDetails])
+
+    assert response.media_type == "application/json"
+    assert response.body == type_adapter(List[SongWithDetails]).dump_json(songs)
+    assert type_adapter(List[SongWithDetails]) is response.adapter
+
+
+@pytest.mark.asyncio
+async def test_blog_routes_validate_once(json_client):
+    # Routes return ORM objects; only the response model validates them
+    with patch.object(BlogSchema, "model_validate", side_effect=AssertionError("validated by hand")):
+        created = await json_client.post("/api/v1/blogs/", json={"name": "Once", "url": "https://once.example.com"})
+        assert created.status_code == 200
+        blog_id = created.json()["id"]
+
+        fetched = await json_client.get(f"/api/v1/blogs/{blog_id}")
+        active = await json_client.get("/api/v1/blogs/active")
+        updated = await json_client.put(f"/api/v1/blogs/{blog_id}", json={"description": "Updated"})
+        deleted = await json_client.delete(f"/api/v1/blogs/{blog_id}")
+        missing = await json_client.get(f"/api/v1/blogs/{blog_id}")
+
+    assert fetched.json() == created.json()
+    assert [blog["name"] for blog in active.json()] == ["Once"]
+    assert updated.json()["description"] == "Updated"
+    assert deleted.json()["id"] == blog_id
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_filtered_by_response_model(json_client, admin: User):
+    response = await json_client.get("/api/v1/users/me/async")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == admin.id
+    assert body["username"] == "json"
+    assert "password" not in body
+
+
+@pytest.mark.asyncio
+async def test_favorites_are_serialized_without_revalidation(json_client, async_db: AsyncSession, admin: User):
+    song = Song(title="Favorite", duration=120, file_path="audio/favorite.mp3")
+    async_db.add(song)
+    await async_db.flush()
+    async_db.add(UserSong(user_id=admin.id, song_id=song.id, is_favorite=True))
+    await async_db.commit()
+
+    with patch.object(SongWithDetails, "model_validate", side_effect=AssertionError("revalidated")):
+        response = await json_client.get("/api/v1/users/me/favorites")
+
+    assert response.status_code == 200
+    [favorite] = response.json()
+    assert favorite["title"] == "Favorite"
+    assert favorite["is_favorited"] is True
+    assert "file_path" not in favorite
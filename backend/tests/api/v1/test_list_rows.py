@@ -0,0 +1,127 @@
+from typing import List
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.api.dependencies import get_async_db, get_current_user_async
+from app.api.responses import row_projection
+from app.models.blog import Blog
+from app.models.comment import Comment
+from app.models.song import Song
+from app.models.tag import Tag
+from app.models.user import User
+from main import app as main_app
+
+
+@pytest_asyncio.fixture
+async def user(async_db: AsyncSession) -> User:
+    user = User(email="rows@example.com", username="rows", password="password123")
+    async_db.add(user)
+    await async_db.commit()
+    await async_db.refresh(user)
+    return user
+
+
+@pytest_asyncio.fixture
+async def rows_client(async_db: AsyncSession, user: User):
+    async def override_db():
+        yield async_db
+
+    async def override_user():
+        return user
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = override_user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+async def _orm_response(async_db: AsyncSession, model, schema, *where) -> list:
+    """What the endpoint returned before: ORM objects through the response model."""
+    objs = (await async_db.scalars(select(model).where(*where).order_by(model.id))).all()
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_python(adapter.validate_python(objs, from_attributes=True), mode="json")
+
+
+def test_row_projection_uses_schema_defaults_for_non_columns():
+    projection = row_projection(Song, schemas.Song)
+
+    assert [column.key for column in projection.columns] == [
+        "title", "duration", "band_id", "blog_id", "cover_image_url", "release_date", "id", "created_at", "updated_at",
+        "duplicate_of_id", "source_url",
+    ]
+    assert projection.constants == {
+        "favorite_count": 0, "file_url": None, "cover_image_variant_url": None, "manifest_url": None,
+    }
+    assert row_projection(Song, schemas.Song) is projection
+
+
+@pytest.mark.asyncio
+async def test_read_songs_matches_orm_response(rows_client, async_db: AsyncSession, assert_max_queries):
+    await async_db.execute(insert(Song), [
+        {"title": f"Song {i}", "duration": 100 + i, "file_path": f"audio/{i}.mp3", "release_date": "2024-01-0%d" % (i + 1)}
+        for i in range(5)
+    ])
+    await async_db.commit()
+
+    with assert_max_queries(1):
+        response = await rows_client.get("/api/v1/songs/", params={"limit": 10})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == await _orm_response(async_db, Song, schemas.Song)
+    assert async_db.identity_map.keys() == {(User, (1,), None)}
+
+
+@pytest.mark.asyncio
+async def test_read_blogs_matches_orm_response(rows_client, async_db: AsyncSession):
+    await async_db.execute(insert(Blog), [
+        {"name": f"Blog {i}", "url": f"https://blog{i}.example.com", "is_active": i != 1} for i in range(3)
+    ])
+    await async_db.commit()
+
+    response = await rows_client.get("/api/v1/blogs/", params={"skip": 1})
+
+    assert response.status_code == 200
+    assert response.json() == (await _orm_response(async_db, Blog, schemas.Blog))[1:]
+
+
+@pytest.mark.asyncio
+async def test_read_tags_matches_orm_response(rows_client, async_db: AsyncSession):
+    await async_db.execute(insert(Tag), [{"name": "rock", "description": "Loud"}, {"name": "jazz"}])
+    await async_db.commit()
+
+    response = await rows_client.get("/api/v1/tags/")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body == await _orm_response(async_db, Tag, schemas.Tag)
+    assert body[0]["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_read_comments_by_target_matches_orm_response(rows_client, async_db: AsyncSession, user: User):
+    song_id = await async_db.scalar(
+        insert(Song).values(title="Commented", duration=1, file_path="audio/c.mp3").returning(Song.id)
+    )
+    await async_db.execute(insert(Comment), [
+        {"content": f"Comment {i}", "user_id": user.id, "target_type": "song", "song_id": song_id if i < 3 else None,
+         "band_id": None, "blog_id": None}
+        for i in range(4)
+    ])
+    await async_db.commit()
+
+    response = await rows_client.get(f"/api/v1/comments/by-target/song/{song_id}")
+
+    assert response.status_code == 200
+    expected = await _orm_response(async_db, Comment, schemas.Comment, Comment.song_id == song_id)
+    assert len(expected) == 3
+    assert response.json() == expected
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_superuser_async
+from app.models.band import Band
+from app.models.song import Song
+from app.models.tag import Tag
+from app.models.user import User
+from main import app as main_app
+
+
+@pytest_asyncio.fixture
+async def bulk_client(async_db: AsyncSession):
+    # Match AsyncSessionLocal; bulk results are not refreshed after commit
+    async_db.sync_session.expire_on_commit = False
+    admin = User(email="bulk@example.com", username="bulk", password="password123", is_superuser=True)
+    async_db.add(admin)
+    await async_db.commit()
+    await async_db.refresh(admin)
+
+    async def override_db():
+        yield async_db
+
+    async def override_superuser():
+        return admin
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_active_superuser_async] = override_superuser
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+
+
+def _ndjson(rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_row_errors_without_aborting(bulk_client, async_db: AsyncSession):
+    band = Band(name="Bulk Band")
+    async_db.add(band)
+    await async_db.commit()
+    await async_db.refresh(band)
+
+    body = _ndjson([
+        {"title": "One", "duration": 100, "file_path": "audio/1.mp3", "band_id": band.id, "tags": ["indie", "rock"]},
+        {"title": "Two", "duration": "long", "file_path": "audio/2.mp3"},
+        "{not json",
+        {"title": "Three", "duration": 120, "file_path": "audio/3.mp3", "band_id": 999},
+        "",
+        {"title": "Four", "duration": 130, "file_path": "audio/4.mp3", "tags": ["rock"]},
+        {"title": "Five", "duration": 140, "file_path": "audio/5.mp3"},
+    ])
+    response = await bulk_client.post(
+        "/api/v1/songs/bulk?batch_size=2",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 3
+    assert result["failed"] == 3
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["error"].startswith("duration:")
+    assert result["errors"][1]["error"].startswith("Invalid JSON")
+    assert result["errors"][2]["error"] == "Band with id 999 not found"
+
+    titles = (await async_db.scalars(select(Song.title).where(Song.id.in_(result["ids"])))).all()
+    assert sorted(titles) == ["Five", "Four", "One"]
+    tags = (await async_db.scalars(select(Tag.name).order_by(Tag.name))).all()
+    assert tags == ["indie", "rock"]
+
+
+@pytest.mark.asyncio
+async def test_rows_the_database_rejects_are_isolated(bulk_client, async_db: AsyncSession):
+    # Stand-ins for constraint violations that validation cannot catch
+    await async_db.execute(text(
+        "CREATE TRIGGER reject_song BEFORE INSERT ON song WHEN NEW.title = 'Rejected' "
+        "BEGIN SELECT RAISE(ABORT, 'song rejected'); END"
+    ))
+    await async_db.execute(text(
+        "CREATE TRIGGER reject_tag BEFORE INSERT ON song_tag "
+        "WHEN (SELECT name FROM tag WHERE id = NEW.tag_id) = 'broken' "
+        "BEGIN SELECT RAISE(ABORT, 'tag rejected'); END"
+    ))
+    await async_db.commit()
+
+    body = _ndjson([
+        {"title": "Kept", "duration": 100, "file_path": "audio/1.mp3", "tags": ["rock"]},
+        {"title": "Rejected", "duration": 100, "file_path": "audio/2.mp3"},
+        {"title": "Bad tag", "duration": 100, "file_path": "audio/3.mp3", "tags": ["broken"]},
+        {"title": "Also kept", "duration": 100, "file_path": "audio/4.mp3", "tags": ["rock"]},
+    ])
+    response = await bulk_client.post(
+        "/api/v1/songs/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert [(error["line"], error["error"]) for error in result["errors"]] == [
+        (2, "song rejected"), (3, "tag rejected"),
+    ]
+    titles = (await async_db.scalars(select(Song.title).where(Song.id.in_(result["ids"])))).all()
+    assert sorted(titles) == ["Also kept", "Kept"]
+    assert (await async_db.scalars(select(Song.title).order_by(Song.id))).all() == ["Kept", "Also kept"]
+
+
+@pytest.mark.asyncio
+async def test_missing_durations_come_from_the_analysis(bulk_client, async_db: AsyncSession):
+    await crud.audio_analysis.save(async_db, file_path="audio/known.mp3", values={"duration": 187.6})
+
+    body = _ndjson([
+        {"title": "Known", "file_path": "audio/known.mp3"},
+        {"title": "Pending", "file_path": "audio/pending.mp3"},
+        {"title": "Given", "duration": 90, "file_path": "audio/known.mp3"},
+    ])
+    result = (await bulk_client.post("/api/v1/songs/bulk", content=body)).json()
+    durations = dict((await async_db.execute(select(Song.title, Song.duration))).all())
+
+    assert result["created"] == 3
+    assert durations == {"Known": 188, "Pending": None, "Given": 90}
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_requires_superuser(async_db: AsyncSession):
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            response = await client.post("/api/v1/songs/bulk", content=_ndjson([]))
+    finally:
+        main_app.dependency_overrides.clear()
+    assert response.status_code == 401
@@ -4,6 +4,7 @@ import pytest
 import json
 import asyncio
 import greenlet
+from contextlib import contextmanager
 from typing import Generator, Dict, Any, List, AsyncGenerator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -37,6 +38,7 @@ from app.models.user_band import UserBand
 from app.models.song_tag import SongTag
 from app.models.band_tag import BandTag
 from app.models.blog_tag import BlogTag
+from app.crud.tag import tag_cache
 from app.models.comment import Comment
 
 from app.db.base import Base
@@ -45,6 +47,7 @@ from app.api.dependencies import get_async_db, get_current_active_user
 from app.core.config import settings
 from app.core.security import create_access_token, get_password_hash
 from app.db.session import get_db
+from app.db.instrumentation import capture_queries, instrument_engine
 
 def run_in_greenlet(fn, *args, **kwargs):
     """Run a function in a greenlet"""
@@ -71,6 +74,10 @@ async_engine = create_async_engine(
     connect_args={"check_same_thread": False},
     poolclass=NullPool
 )
+# Count statements on the test engines too
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 AsyncTestingSessionLocal = sessionmaker(
     autocommit=False, 
     autoflush=False, 
@@ -431,4 +438,33 @@ async def authenticated_user(
 # Fixture for test data directory
 @pytest.fixture(scope="function")
 def test_data_dir() -> str:
-    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data") 
\ No newline at end of file
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+# Fixture to cap the number of SQL statements a block may issue
+@pytest.fixture(scope="function")
+def assert_max_queries():
+    """
+    Fail if the wrapped block (e.g. one endpoint call) runs too many statements.
+
+    Usage:
+        with assert_max_queries(3):
+            await client.get("/api/v1/songs/1")
+    """
+    @contextmanager
+    def _assert_max_queries(max_queries: int):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"Expected at most {max_queries} queries, got {stats.count}:\n"
+            + "\n".join(f"{n}x {shape}" for shape, n in stats.shapes.most_common())
+        )
+    return _assert_max_queries
+
+
+# Tables are recreated per test, so cached tag ids must not outlive a test
+@pytest.fixture(autouse=True)
+def clear_tag_cache():
+    tag_cache.clear()
+    yield
+    tag_cache.clear()
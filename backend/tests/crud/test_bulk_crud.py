@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models.song import Song
+from app.models.tag import Tag
+from app.schemas.songs.song import SongCreate
+
+
+@pytest.fixture(autouse=True)
+def no_expire_on_commit(async_db: AsyncSession):
+    # Match AsyncSessionLocal; bulk results are not refreshed after commit
+    async_db.sync_session.expire_on_commit = False
+
+
+def _songs(count):
+    return [SongCreate(title=f"Bulk {i}", duration=100 + i, file_path=f"audio/{i}.mp3") for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_create_many_inserts_in_chunks(async_db: AsyncSession, assert_max_queries):
+    # One INSERT ... RETURNING per chunk where the dialect can order RETURNING rows,
+    # plus one blob reference UPDATE per chunk
+    batched = async_db.get_bind().dialect.name == "postgresql"
+    with assert_max_queries(6 if batched else 28):
+        songs = await crud.song.create_many(async_db, objs_in=_songs(25), chunk_size=10)
+
+    assert [song.title for song in songs] == [f"Bulk {i}" for i in range(25)]
+    assert all(song.id is not None and song.created_at is not None for song in songs)
+    assert await async_db.scalar(select(func.count()).select_from(Song)) == 25
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_updates_conflicting_rows(async_db: AsyncSession):
+    [rock] = await crud.tag.create_many(async_db, objs_in=[{"name": "rock", "description": "old"}])
+
+    tags = await crud.tag.upsert_many(
+        async_db,
+        objs_in=[{"name": "rock", "description": "new"}, {"name": "jazz", "description": "fresh"}],
+        index_elements=["name"],
+    )
+
+    assert [(tag.name, tag.description) for tag in tags] == [("rock", "new"), ("jazz", "fresh")]
+    assert tags[0].id == rock.id
+    assert await async_db.scalar(select(func.count()).select_from(Tag)) == 2
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_do_nothing_keeps_existing_rows(async_db: AsyncSession):
+    await crud.tag.create_many(async_db, objs_in=[{"name": "rock", "description": "old"}])
+
+    tags = await crud.tag.upsert_many(
+        async_db,
+        objs_in=[{"name": "rock", "description": "new"}, {"name": "jazz"}],
+        index_elements=["name"],
+        update_fields=[],
+    )
+
+    assert [tag.name for tag in tags] == ["jazz"]
+    rock = await crud.tag.get_by_name(async_db, name="rock")
+    assert rock.description == "old"
+
+
+@pytest.mark.asyncio
+async def test_update_many_and_remove_many(async_db: AsyncSession):
+    songs = await crud.song.create_many(async_db, objs_in=_songs(4))
+    ids = [song.id for song in songs]
+
+    updated = await crud.song.update_many(
+        async_db, objs_in=[{"id": ids[0], "title": "First"}, {"id": ids[1], "duration": 1}]
+    )
+    assert updated == 2
+    titles = dict((await async_db.execute(select(Song.id, Song.title))).all())
+    assert titles[ids[0]] == "First"
+
+    # Missing keys are not counted
+    assert await crud.song.update_many(
+        async_db, objs_in=[{"id": 999, "title": "Missing"}, {"id": ids[3], "title": "Last"}]
+    ) == 1
+
+    removed = await crud.song.remove_many(async_db, ids=[ids[0], ids[2], 999])
+    assert sorted(removed) == [ids[0], ids[2]]
+    remaining = (await async_db.scalars(select(Song.id).order_by(Song.id))).all()
+    assert remaining == [ids[1], ids[3]]
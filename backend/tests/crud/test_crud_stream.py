@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models.blog import Blog
+from app.models.song import Song
+
+
+async def _seed_songs(async_db: AsyncSession, count: int) -> None:
+    await async_db.execute(
+        insert(Song),
+        [{"title": f"Song {i:03d}", "duration": i, "file_path": f"audio/{i}.mp3"} for i in range(count)],
+    )
+    await async_db.commit()
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_every_row_in_keyset_batches(async_db: AsyncSession, assert_max_queries):
+    await _seed_songs(async_db, 25)
+
+    # 25 rows in batches of 10: three queries, the last one short
+    with assert_max_queries(3):
+        songs = [song async for song in crud.song.stream(async_db, batch_size=10)]
+
+    assert [song.title for song in songs] == [f"Song {i:03d}" for i in range(25)]
+    assert all(isinstance(song, Song) for song in songs)
+
+
+@pytest.mark.asyncio
+async def test_stream_applies_filters(async_db: AsyncSession):
+    await _seed_songs(async_db, 12)
+
+    durations = [
+        song.duration
+        async for song in crud.song.stream(async_db, where=[Song.duration % 3 == 0], batch_size=2)
+    ]
+
+    assert durations == [0, 3, 6, 9]
+
+
+@pytest.mark.asyncio
+async def test_stream_projects_columns_without_hydrating_objects(async_db: AsyncSession):
+    await _seed_songs(async_db, 5)
+
+    rows = [row async for row in crud.song.stream(async_db, columns=[Song.title], batch_size=2)]
+
+    assert [row.title for row in rows] == [f"Song {i:03d}" for i in range(5)]
+    # The primary key is appended so iteration can continue after each batch
+    assert [row.id for row in rows] == sorted(row.id for row in rows)
+    assert async_db.identity_map.keys() == set()
+
+
+@pytest.mark.asyncio
+async def test_stream_continues_when_rows_change_between_batches(async_db: AsyncSession):
+    await _seed_songs(async_db, 6)
+
+    seen = []
+    async for song in crud.song.stream(async_db, columns=[Song.id, Song.title], batch_size=2):
+        seen.append(song.title)
+        if song.title == "Song 001":
+            # Offset paging would skip a row after this delete; keyset does not
+            await crud.song.remove_many(async_db, ids=[song.id - 1])
+
+    assert seen == [f"Song {i:03d}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_stream_active_blogs(async_db: AsyncSession):
+    await async_db.execute(
+        insert(Blog),
+        [
+            {"name": f"Blog {i}", "url": f"https://blog{i}.example.com", "is_active": i % 2 == 0}
+            for i in range(7)
+        ],
+    )
+    await async_db.commit()
+
+    names = [row.name async for row in crud.blog.stream_active_blogs(async_db, columns=[Blog.name], batch_size=3)]
+
+    assert names == ["Blog 0", "Blog 2", "Blog 4", "Blog 6"]
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models.comment import Comment
+from app.models.song import Song
+from app.models.song_tag import SongTag
+from app.models.tag import Tag
+from app.models.user import User
+from app.schemas.songs.song import SongUpdate
+
+
+async def _song(async_db: AsyncSession, **kwargs) -> Song:
+    song = Song(title="Original", duration=100, file_path="audio/original.mp3", **kwargs)
+    async_db.add(song)
+    await async_db.commit()
+    await async_db.refresh(song)
+    return song
+
+
+@pytest.mark.asyncio
+async def test_update_writes_set_fields_with_one_statement(async_db: AsyncSession, assert_max_queries):
+    song = await _song(async_db)
+    async_db.sync_session.expire_on_commit = False
+
+    with assert_max_queries(1):
+        updated = await crud.song.update(
+            async_db,
+            db_obj=song,
+            obj_in=SongUpdate(
+                title="Renamed",
+                cover_image_url="https://img.example.com/cover.png",
+                release_date="2024-05-01",
+                tags=["ignored"],
+            ),
+        )
+
+    assert updated is song
+    assert song.title == "Renamed"
+    assert song.duration == 100
+    assert song.cover_image_url == "https://img.example.com/cover.png"
+    assert song.release_date == "2024-05-01"
+
+
+@pytest.mark.asyncio
+async def test_update_refreshes_when_session_expires_on_commit(async_db: AsyncSession):
+    song = await _song(async_db)
+
+    await crud.song.update(async_db, db_obj=song, obj_in={"duration": 200})
+
+    assert song.duration == 200
+    assert song.title == "Original"
+
+
+@pytest.mark.asyncio
+async def test_remove_deletes_with_one_statement(async_db: AsyncSession, assert_max_queries):
+    user = User(email="writes@example.com", username="writes", password="password123")
+    song = await _song(async_db)
+    async_db.add(user)
+    await async_db.commit()
+    await async_db.refresh(user)
+    await async_db.refresh(song)
+    comment = Comment(content="Nice", user_id=user.id, song_id=song.id)
+    async_db.add(comment)
+    await async_db.commit()
+    await async_db.refresh(comment)
+    comment_id = comment.id
+
+    with assert_max_queries(1):
+        removed = await crud.comment.remove(async_db, id=comment_id)
+
+    assert removed.id == comment_id
+    assert await crud.comment.remove(async_db, id=comment_id) is None
+    assert await async_db.scalar(select(func.count()).select_from(Comment)) == 0
+
+
+@pytest.mark.asyncio
+async def test_remove_clears_association_rows(async_db: AsyncSession):
+    song = Song(title="Tagged", duration=100, file_path="audio/tagged.mp3", tags=[Tag(name="writes-tag")])
+    async_db.add(song)
+    await async_db.commit()
+    await async_db.refresh(song)
+
+    removed = await crud.song.remove(async_db, id=song.id)
+
+    assert removed is not None
+    assert await async_db.scalar(select(func.count()).select_from(SongTag)) == 0
+    assert await async_db.scalar(select(func.count()).select_from(Tag)) == 1
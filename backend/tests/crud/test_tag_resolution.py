@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.crud.tag import normalize_tag_names, tag_cache
+from app.models.song_tag import SongTag
+from app.models.tag import Tag
+from app.schemas.songs.song import SongCreate, SongUpdate
+
+
+@pytest.fixture(autouse=True)
+def no_expire_on_commit(async_db: AsyncSession):
+    # Match AsyncSessionLocal
+    async_db.sync_session.expire_on_commit = False
+
+
+def test_normalize_tag_names():
+    assert normalize_tag_names([" rock", "jazz ", "", "  ", "rock", "Jazz"]) == ["rock", "jazz", "Jazz"]
+
+
+@pytest.mark.asyncio
+async def test_resolve_ids_batches_misses_and_caches_existing(async_db: AsyncSession, assert_max_queries):
+    async_db.add(Tag(name="rock"))
+    await async_db.commit()
+
+    # One upsert for all missing names plus one SELECT for those that already existed
+    with assert_max_queries(2):
+        ids = await crud.tag.resolve_ids(async_db, names=["rock", " jazz", "punk", "jazz"])
+    await async_db.commit()
+    assert list(ids) == ["rock", "jazz", "punk"]
+    stored = dict((await async_db.execute(select(Tag.name, Tag.id))).tuples().all())
+    assert stored == ids
+
+    # Tags inserted by this call are cached once read back as existing rows
+    assert tag_cache.get_many(ids) == {"rock": ids["rock"]}
+    await crud.tag.resolve_ids(async_db, names=["jazz", "punk"])
+    with assert_max_queries(0):
+        assert await crud.tag.resolve_ids(async_db, names=["rock", "jazz", "punk"]) == ids
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_tags_are_not_cached(async_db: AsyncSession):
+    await crud.tag.resolve_ids(async_db, names=["ghost"])
+    await async_db.rollback()
+
+    assert tag_cache.get_many(["ghost"]) == {}
+    assert await async_db.scalar(select(func.count()).select_from(Tag)) == 0
+
+
+@pytest.mark.asyncio
+async def test_rename_and_delete_invalidate_cache(async_db: AsyncSession):
+    async_db.add_all([Tag(name="old"), Tag(name="doomed")])
+    await async_db.commit()
+    ids = await crud.tag.resolve_ids(async_db, names=["old", "doomed"])
+    assert tag_cache.get_many(["old", "doomed"]) == ids
+
+    tag = await crud.tag.get(async_db, id=ids["old"])
+    await crud.tag.update(async_db, db_obj=tag, obj_in={"name": "new"})
+    await crud.tag.remove(async_db, id=ids["doomed"])
+
+    assert tag_cache.get_many(["old", "doomed"]) == {}
+    renamed = await crud.tag.resolve_ids(async_db, names=["old", "new"])
+    await async_db.commit()
+    assert renamed["new"] == ids["old"]
+    assert renamed["old"] != ids["old"]
+
+
+@pytest.mark.asyncio
+async def test_song_tags_are_resolved_in_one_batch(async_db: AsyncSession, assert_max_queries):
+    names = [f"tag-{i}" for i in range(10)]
+    song_in = SongCreate(title="Tagged", duration=100, file_path="audio/tagged.mp3", tags=names)
+
+    # Tag upsert, song insert, blob reference, song_tag delete + insert and the final refresh
+    with assert_max_queries(6):
+        song = await crud.song.create_async(async_db, obj_in=song_in)
+
+    tag_names = (await async_db.scalars(
+        select(Tag.name).join(SongTag, SongTag.tag_id == Tag.id).where(SongTag.song_id == song.id)
+    )).all()
+    assert sorted(tag_names) == sorted(names)
+
+    await crud.song.update_async(async_db, db_obj=song, obj_in=SongUpdate(tags=["tag-1", "fresh"]))
+    tag_names = (await async_db.scalars(
+        select(Tag.name).join(SongTag, SongTag.tag_id == Tag.id).where(SongTag.song_id == song.id)
+    )).all()
+    assert sorted(tag_names) == ["fresh", "tag-1"]
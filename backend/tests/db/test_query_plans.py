@@ -0,0 +1,39 @@
+import importlib.util
+import os
+import sqlite3
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPT = os.path.join(BACKEND_DIR, "scripts", "check_query_plans.py")
+
+spec = importlib.util.spec_from_file_location("check_query_plans", SCRIPT)
+check_query_plans = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(check_query_plans)
+
+SMALL_DATASET = [
+    "--users", "200", "--bands", "50", "--blogs", "20", "--songs", "1000",
+    "--comments", "1500", "--small-table-rows", "10", "--repeat", "1",
+]
+
+
+def test_hot_queries_use_indexes(tmp_path, capsys):
+    url = f"sqlite:///{tmp_path / 'plans.db'}"
+
+    assert check_query_plans.main(["--database-url", url, *SMALL_DATASET]) == 0
+    assert "FAIL" not in capsys.readouterr().out
+
+
+def test_missing_index_fails_the_check(tmp_path, capsys):
+    path = tmp_path / "plans.db"
+    url = f"sqlite:///{path}"
+    check_query_plans.main(["--database-url", url, *SMALL_DATASET])
+    capsys.readouterr()
+
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX ix_user_follow_followed_following")
+    conn.commit()
+    conn.close()
+
+    assert check_query_plans.main(["--database-url", url, *SMALL_DATASET]) == 1
+    out = capsys.readouterr().out
+    assert "FAIL" in out.split("services.follows.get_user_followers_async")[0].splitlines()[-1]
+    assert "sequential scan on:" in out
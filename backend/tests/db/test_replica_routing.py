@@ -0,0 +1,158 @@
+import json
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.middleware import ReplicaStickinessMiddleware
+from app.crud.base import read_only
+from app.crud.tag import tag as crud_tag
+from app.db.base import Base
+from app.db.session import STICKY_COOKIE, ReplicaRouter, RoutingSession, set_sticky_key, use_replica
+from app.models.tag import Tag
+from app.schemas.tags.tag import TagCreate
+
+
+@pytest_asyncio.fixture
+async def routed_session_factory(tmp_path):
+    """Session factory with one SQLite file as primary and another as replica."""
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}", poolclass=NullPool)
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+    for engine, name in ((primary, "primary"), (replica, "replica")):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Tag.__table__.insert().values(name=f"{name}-tag"))
+
+    router = ReplicaRouter([replica.sync_engine], sticky_seconds=60)
+    session_class = type("TestRoutingSession", (RoutingSession,), {"replica_router": router})
+    factory = sessionmaker(
+        primary, class_=AsyncSession, sync_session_class=session_class, expire_on_commit=False
+    )
+    yield factory, router
+    await primary.dispose()
+    await replica.dispose()
+
+
+async def _tag_names(db: AsyncSession):
+    return sorted(tag.name for tag in await crud_tag.get_multi(db))
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_primary_by_default(routed_session_factory):
+    factory, _ = routed_session_factory
+    async with factory() as db:
+        tag = await crud_tag.get_by_name(db, name="primary-tag")
+        assert tag is not None
+
+
+@pytest.mark.asyncio
+async def test_read_only_crud_method_uses_replica(routed_session_factory):
+    factory, _ = routed_session_factory
+    async with factory() as db:
+        assert await _tag_names(db) == ["replica-tag"]
+        # The read-only scope ends with the call
+        assert await crud_tag.get_by_name(db, name="primary-tag") is not None
+
+
+@pytest.mark.asyncio
+async def test_writes_stay_on_primary_inside_read_only_scope(routed_session_factory):
+    factory, _ = routed_session_factory
+    async with factory() as db:
+        with use_replica(db):
+            db.add(Tag(name="written-tag"))
+            await db.flush()
+            # After a flush the transaction's reads must see the write
+            assert await crud_tag.get_by_name(db, name="written-tag") is not None
+        await db.commit()
+
+    async with factory() as db:
+        assert await crud_tag.get_by_name(db, name="written-tag") is not None
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_stickiness(routed_session_factory):
+    factory, router = routed_session_factory
+    async with factory() as db:
+        set_sticky_key(db, 42)
+        await crud_tag.create(db, obj_in=TagCreate(name="fresh-tag"))
+
+    assert router.is_sticky(42)
+    async with factory() as db:
+        set_sticky_key(db, 42)
+        assert "fresh-tag" in await _tag_names(db)
+
+    async with factory() as db:
+        set_sticky_key(db, 7)
+        assert await _tag_names(db) == ["replica-tag"]
+
+
+@pytest.mark.asyncio
+async def test_stickiness_cookie_holds_across_workers(routed_session_factory):
+    factory, router = routed_session_factory
+
+    async def app(scope, receive, send):
+        async with factory() as db:
+            if scope["method"] == "POST":
+                await crud_tag.create(db, obj_in=TagCreate(name="cookie-tag"))
+                names = []
+            else:
+                names = await _tag_names(db)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": json.dumps(names).encode()})
+
+    transport = ASGITransport(app=ReplicaStickinessMiddleware(app, sticky_seconds=60))
+    async with AsyncClient(transport=transport, base_url="http://test") as writer:
+        written = await writer.post("/")
+        # The next request may be served by a worker that did not see the write
+        router._sticky_until.clear()
+        read_back = await writer.get("/")
+    async with AsyncClient(transport=transport, base_url="http://test") as other_client:
+        other = await other_client.get("/")
+
+    assert STICKY_COOKIE in written.cookies
+    assert "cookie-tag" in read_back.json()
+    assert other.json() == ["replica-tag"]
+    assert STICKY_COOKIE not in other.cookies
+
+
+@pytest.mark.asyncio
+async def test_read_only_decorator_accepts_keyword_session(routed_session_factory):
+    factory, _ = routed_session_factory
+
+    class Reader:
+        @read_only
+        async def names(self, *, db_session: AsyncSession):
+            result = await db_session.execute(select(Tag.name))
+            return list(result.scalars())
+
+    async with factory() as db:
+        assert await Reader().names(db_session=db) == ["replica-tag"]
+
+
+def test_round_robin_and_least_loaded_selection():
+    class FakePool:
+        def __init__(self, checked_out):
+            self.checked_out = checked_out
+
+        def checkedout(self):
+            return self.checked_out
+
+    class FakeEngine:
+        def __init__(self, name, checked_out=0):
+            self.name = name
+            self.pool = FakePool(checked_out)
+
+    a, b, c = FakeEngine("a"), FakeEngine("b"), FakeEngine("c")
+    router = ReplicaRouter([a, b, c])
+    assert [router.choose().name for _ in range(4)] == ["a", "b", "c", "a"]
+
+    b.pool.checked_out = 5
+    c.pool.checked_out = 5
+    router = ReplicaRouter([a, b, c], selection="least_loaded")
+    assert {router.choose().name for _ in range(3)} == {"a"}
+
+    assert ReplicaRouter([]).choose() is None
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_current_active_superuser_async
+from app.core.middleware import SQLTimingMiddleware
+from app.db import slow_queries
+from app.db.instrumentation import add_statement_listener, remove_statement_listener
+from app.db.slow_queries import SlowQueryLog, parameter_shape, slow_query_log
+from app.models.tag import Tag
+from app.models.user import User
+from main import app as main_app
+
+
+@pytest.fixture
+def slow_log():
+    """Slow query log that records every statement."""
+    log = SlowQueryLog(threshold_ms=0, max_entries=3, explain_sample_rate=1.0)
+    add_statement_listener(log)
+    yield log
+    remove_statement_listener(log)
+
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape({"name": "secret", "id": 3}) == {"name": "str", "id": "int"}
+    assert parameter_shape(("secret", 3, None)) == ["str", "int", "NoneType"]
+    assert parameter_shape([("a",), ("b",)]) == {"executemany": 2, "row": ["str"]}
+
+
+@pytest.mark.asyncio
+async def test_slow_statements_are_kept_in_ring_buffer(async_db: AsyncSession, slow_log):
+    for tag_id in range(5):
+        await async_db.execute(select(Tag).where(Tag.id == tag_id))
+
+    entries = slow_log.entries()
+    assert len(entries) == 3
+    assert entries[0]["statement"].startswith("SELECT tag.")
+    assert entries[0]["parameters"] == ["int"]
+    assert entries[0]["route"] is None
+    # Plans are only captured for dialects with an EXPLAIN prefix
+    assert entries[0]["plan"] is None
+
+
+@pytest.mark.asyncio
+async def test_threshold_filters_fast_statements(async_db: AsyncSession):
+    log = SlowQueryLog(threshold_ms=60_000)
+    add_statement_listener(log)
+    try:
+        await async_db.execute(text("SELECT 1"))
+    finally:
+        remove_statement_listener(log)
+    assert log.entries() == []
+
+
+@pytest.mark.asyncio
+async def test_route_is_recorded_for_requests(async_db: AsyncSession, slow_log):
+    app = FastAPI()
+
+    @app.get("/tags/{tag_id}")
+    async def read_tag(tag_id: int):
+        await async_db.execute(select(Tag).where(Tag.id == tag_id))
+        return {}
+
+    transport = ASGITransport(app=SQLTimingMiddleware(app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/tags/1")
+
+    assert slow_log.entries()[0]["route"] == "GET /tags/{tag_id}"
+
+
+@pytest.mark.asyncio
+async def test_plan_is_captured_in_background(async_db: AsyncSession, slow_log, monkeypatch):
+    monkeypatch.setitem(slow_queries.EXPLAIN_PREFIXES, "sqlite", "EXPLAIN QUERY PLAN ")
+    slow_log.register_engine(async_db.bind)
+
+    await async_db.execute(select(Tag).where(Tag.name == "rock"))
+    [entry] = [e for e in slow_log.entries() if e["statement"].startswith("SELECT tag.")]
+    # Recorded immediately; the plan arrives once the background task runs
+    assert entry["plan"] is None
+    for _ in range(50):
+        if entry["plan"] is not None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert "tag" in entry["plan"].lower()
+    assert not entry["plan"].startswith("EXPLAIN failed")
+    # The EXPLAIN itself is never logged as a slow query
+    assert not any(e["statement"].startswith("EXPLAIN") for e in slow_log.entries())
+
+
+@pytest.mark.asyncio
+async def test_slow_query_endpoint_lists_entries(async_db: AsyncSession):
+    async def override_superuser():
+        return User(email="admin@example.com", username="admin", password="password123", is_superuser=True)
+
+    slow_query_log.clear()
+    await async_db.execute(text("SELECT 1"))
+    main_app.dependency_overrides[get_current_active_superuser_async] = override_superuser
+    slow_query_log.threshold_ms, threshold = 0, slow_query_log.threshold_ms
+    try:
+        await async_db.execute(select(Tag).where(Tag.id == 1))
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            response = await client.get("/api/v1/diagnostics/slow-queries")
+    finally:
+        slow_query_log.threshold_ms = threshold
+        main_app.dependency_overrides.clear()
+        slow_query_log.clear()
+
+    assert response.status_code == 200
+    assert any(row["statement"].startswith("SELECT tag.") for row in response.json())
@@ -0,0 +1,117 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.api.dependencies import get_async_db, get_current_active_superuser_async, get_current_user_async
+from app.core.middleware import SQLTimingMiddleware
+from app.db.instrumentation import RouteSQLStats, capture_queries, route_sql_stats, statement_shape
+from app.models.band import Band
+from app.models.song import Song
+from app.models.tag import Tag
+from app.models.user import User
+from main import app as main_app
+
+
+def test_statement_shape_folds_whitespace_and_in_lists():
+    assert statement_shape("SELECT *\n  FROM song WHERE id IN (?, ?, ?)") == "SELECT * FROM song WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM song WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == "SELECT * FROM song WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM song WHERE id = $1") == "SELECT * FROM song WHERE id = $1"
+
+
+@pytest.mark.asyncio
+async def test_capture_queries_counts_statements(async_db: AsyncSession):
+    with capture_queries() as outer:
+        with capture_queries() as inner:
+            await async_db.execute(select(Tag))
+            await async_db.execute(select(Tag))
+        await async_db.execute(select(Band))
+
+    assert inner.count == 2
+    assert outer.count == 3
+    assert outer.total_time > 0
+    assert inner.repeated_shapes(1) == {statement_shape(str(select(Tag).compile())): 2}
+
+
+@pytest.mark.asyncio
+async def test_song_details_query_budget(async_db: AsyncSession, assert_max_queries):
+    band = Band(name="Budget Band")
+    song = Song(title="Budget Song", duration=120, file_path="audio/budget.mp3", band=band)
+    song.tags = [Tag(name="budget-a"), Tag(name="budget-b")]
+    async_db.add(song)
+    await async_db.commit()
+    await async_db.refresh(song)
+
+    # song, band, tags and user data
+    with assert_max_queries(4):
+        details = await crud.song.get_song_with_details(async_db, id=song.id, user_id=1)
+    assert details["band"]["name"] == "Budget Band"
+
+
+@pytest.mark.asyncio
+async def test_middleware_sets_server_timing_and_flags_n_plus_one(async_db: AsyncSession, caplog):
+    stats = RouteSQLStats()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        for _ in range(item_id):
+            await async_db.execute(select(Tag).where(Tag.id == item_id))
+        return {"ok": True}
+
+    wrapped = SQLTimingMiddleware(app, n_plus_one_threshold=3, stats=stats)
+    async with AsyncClient(transport=ASGITransport(app=wrapped), base_url="http://test") as client:
+        response = await client.get("/items/2")
+        assert response.headers["server-timing"].startswith("db;dur=")
+        assert 'desc="2 queries"' in response.headers["server-timing"]
+
+        with caplog.at_level(logging.WARNING, logger="app.core.middleware"):
+            await client.get("/items/5")
+        assert "Possible N+1 on GET /items/{item_id}" in caplog.text
+
+    [row] = stats.snapshot()
+    assert row["route"] == "GET /items/{item_id}"
+    assert row["requests"] == 2
+    assert row["queries"] == 7
+    assert row["max_queries"] == 5
+    assert row["n_plus_one_requests"] == 1
+    assert len(row["n_plus_one_shapes"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_song_endpoint_reports_queries(async_db: AsyncSession, assert_max_queries):
+    user = User(email="timing@example.com", username="timing", password="password123", is_superuser=True)
+    song = Song(title="Timed Song", duration=100, file_path="audio/timed.mp3")
+    async_db.add_all([user, song])
+    await async_db.commit()
+    await async_db.refresh(user)
+    await async_db.refresh(song)
+
+    async def override_db():
+        yield async_db
+
+    async def override_user():
+        return user
+
+    main_app.dependency_overrides[get_async_db] = override_db
+    main_app.dependency_overrides[get_current_user_async] = override_user
+    main_app.dependency_overrides[get_current_active_superuser_async] = override_user
+    route_sql_stats.reset()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            with assert_max_queries(4):
+                response = await client.get(f"/api/v1/songs/{song.id}")
+            assert response.status_code == 200
+            assert "db;dur=" in response.headers["server-timing"]
+
+            response = await client.get("/api/v1/diagnostics/sql")
+            assert response.status_code == 200
+            routes = {row["route"]: row for row in response.json()}
+            assert routes["GET /api/v1/songs/{song_id}"]["requests"] == 1
+    finally:
+        main_app.dependency_overrides.clear()
+        route_sql_stats.reset()
@@ -6,34 +6,32 @@ import io
 import os
 from fastapi import UploadFile
 
-from app.services.s3 import S3Service
+from app.services.s3 import S3Service, get_s3_client
 from app.core.config import settings
 
 
 @pytest.fixture
 def s3_service():
-    """Fixture for S3Service with mocked boto3 client."""
-    with patch("boto3.client") as mock_client:
-        mock_s3 = MagicMock()
-        mock_client.return_value = mock_s3
-        service = S3Service()
-        service.s3_client = mock_s3
-        yield service
+    """Fixture for S3Service with a mocked boto3 client."""
+    yield S3Service(client=MagicMock())
 
 
 class TestS3Service:
     """Tests for S3 storage service."""
     
-    def test_init_creates_s3_client(self):
-        """Test that S3Service initializes a boto3 S3 client."""
-        with patch("boto3.client") as mock_client:
-            S3Service()
-            mock_client.assert_called_once_with(
-                "s3",
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
-            )
+    def test_services_share_one_pooled_client(self):
+        """Test that S3Service reuses a single pooled boto3 client."""
+        get_s3_client.cache_clear()
+        try:
+            with patch("boto3.client") as mock_client:
+                first, second = S3Service(), S3Service()
+                assert first.s3_client is second.s3_client
+                mock_client.assert_called_once()
+                _, kwargs = mock_client.call_args
+                assert kwargs["region_name"] == (settings.AWS_REGION or None)
+                assert kwargs["config"].max_pool_connections == settings.S3_MAX_POOL_CONNECTIONS
+        finally:
+            get_s3_client.cache_clear()
     
     def test_upload_file_success(self, s3_service):
         """Test successful file upload to S3."""
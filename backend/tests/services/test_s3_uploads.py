@@ -0,0 +1,168 @@
+import asyncio
+import io
+import threading
+import time
+
+import boto3
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from starlette.datastructures import Headers
+
+from app.api.dependencies import get_async_db, get_current_active_user
+from app.core.config import settings
+from app.models.user import User
+from app.services.s3 import S3Service, UploadPool, UploadQueueFull, get_s3_service
+from main import app as main_app
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "listener-test-uploads"
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    """boto3 client talking to moto's in-process S3."""
+    monkeypatch.setattr(settings, "AWS_S3_BUCKET", BUCKET)
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def _upload(name: str, content: bytes, content_type: str) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(content), filename=name, size=len(content),
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_async_upload_stores_object_and_records_throughput(s3_client):
+    pool = UploadPool(workers=2, max_pending=4)
+    service = S3Service(client=s3_client, pool=pool)
+    content = b"ID3" + b"\x00" * 200_000
+    bytes_before = _sample("s3_upload_bytes_total", prefix="audio")
+
+    try:
+        key = await service.upload_file_async(_upload("track.mp3", content, "audio/mpeg"), "audio")
+    finally:
+        pool.shutdown()
+
+    stored = s3_client.get_object(Bucket=BUCKET, Key=key)
+    assert key.startswith("audio/") and key.endswith(".mp3")
+    assert stored["Body"].read() == content
+    assert stored["ContentType"] == "audio/mpeg"
+    assert _sample("s3_upload_bytes_total", prefix="audio") == bytes_before + len(content)
+    assert _sample("s3_upload_throughput_bytes_per_second_count", prefix="audio") >= 1
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency_without_blocking_the_loop():
+    pool = UploadPool(workers=2, max_pending=10)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def transfer() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    ticks = 0
+
+    async def heartbeat() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        await asyncio.gather(*(pool.run(transfer) for _ in range(6)))
+    finally:
+        beat.cancel()
+        pool.shutdown()
+
+    assert peak == 2
+    # Three waves of 50 ms; the loop kept ticking the whole time
+    assert ticks >= 10
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_uploads():
+    pool = UploadPool(workers=1, max_pending=1)
+    release = threading.Event()
+    rejections_before = _sample("s3_upload_rejections_total")
+
+    first = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0)
+    try:
+        with pytest.raises(UploadQueueFull):
+            await pool.run(lambda: None)
+    finally:
+        release.set()
+        await first
+        pool.shutdown()
+
+    assert _sample("s3_upload_rejections_total") == rejections_before + 1
+
+
+@pytest_asyncio.fixture
+async def upload_client(s3_client, async_db):
+    pool = UploadPool(workers=1, max_pending=1)
+
+    async def override_db():
+        yield async_db
+
+    main_app.dependency_overrides[get_s3_service] = lambda: S3Service(client=s3_client, pool=pool)
+    main_app.dependency_overrides[get_current_active_user] = lambda: User(id=1, email="u@example.com", username="u")
+    main_app.dependency_overrides[get_async_db] = override_db
+    try:
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            client.pool = pool
+            yield client
+    finally:
+        main_app.dependency_overrides.clear()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_upload_endpoint_uses_shared_service(upload_client, s3_client):
+    response = await upload_client.post(
+        "/api/v1/files/upload/image",
+        files={"file": ("cover.png", b"\x89PNG" + b"\x00" * 1000, "image/png")},
+    )
+
+    assert response.status_code == 200
+    file_path = response.json()["file_path"]
+    assert s3_client.head_object(Bucket=BUCKET, Key=file_path)["ContentLength"] == 1004
+    assert BUCKET in response.json()["url"]
+
+
+@pytest.mark.asyncio
+async def test_upload_endpoint_sheds_load_when_saturated(upload_client):
+    release = threading.Event()
+    busy = asyncio.create_task(upload_client.pool.run(release.wait))
+    await asyncio.sleep(0)
+    try:
+        response = await upload_client.post(
+            "/api/v1/files/upload/audio",
+            files={"file": ("song.mp3", b"ID3", "audio/mpeg")},
+        )
+    finally:
+        release.set()
+        await busy
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
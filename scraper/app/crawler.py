@@ -0,0 +1,218 @@
+"""
+Asynchronous blog crawler.
+
+Blogs are fetched by a fixed number of worker tasks sharing one pooled
+HTTP client. Each host additionally gets at most a few requests at a time,
+started a minimum interval apart, so a crawl of many blogs on one platform
+stays polite. Requests carry ``If-None-Match`` / ``If-Modified-Since``
+from the blog's stored validators, so an unchanged blog costs a 304.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.feeds import FoundSong, parse_feed
+
+
+@dataclass
+class BlogSource:
+    """What the crawler needs to know about a blog."""
+
+    id: int
+    url: str
+    rss_feed_url: Optional[str] = None
+    etag: Optional[str] = None
+    last_scraped_at: Optional[str] = None  # ISO format datetime (UTC)
+
+    @property
+    def fetch_url(self) -> str:
+        """The feed if the blog has one, else its front page."""
+        return self.rss_feed_url or self.url
+
+
+@dataclass
+class CrawlResult:
+    """Outcome of fetching one blog."""
+
+    blog_id: int
+    status: str  # "changed", "unchanged" or "error"
+    songs: List[FoundSong] = field(default_factory=list)
+    etag: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a response exceeds the crawler's ``max_bytes``."""
+
+
+class HostLimiter:
+    """Per-host concurrency limit and minimum spacing between requests."""
+
+    def __init__(self, max_concurrency: int, min_interval: float):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrency: Requests in flight per host
+            min_interval: Seconds between starting two requests to a host
+        """
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Hold one of a host's request slots, waiting for its turn."""
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            # Reserve the next start time before sleeping, so waiters queue up
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class BlogCrawler:
+    """Fetches and parses many blogs concurrently."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        concurrency: int,
+        per_host_concurrency: int,
+        per_host_interval: float,
+        max_bytes: int,
+    ):
+        """
+        Initialize the crawler.
+
+        Args:
+            client: Pooled HTTP client shared by all requests
+            concurrency: Blogs fetched at once
+            per_host_concurrency: Requests in flight per host
+            per_host_interval: Seconds between starting two requests to a host
+            max_bytes: Larger responses are reported as errors
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.max_bytes = max_bytes
+        self.hosts = HostLimiter(per_host_concurrency, per_host_interval)
+
+    async def crawl(self, blogs: AsyncIterable[BlogSource]) -> AsyncIterator[CrawlResult]:
+        """
+        Fetch blogs, yielding each result as it completes.
+
+        Blogs are taken from ``blogs`` only as workers free up, so it may be
+        a lazy stream over the database.
+
+        Args:
+            blogs: Blogs to fetch
+
+        Yields:
+            CrawlResult: One per blog, in completion order
+        """
+        sources = blogs.__aiter__()
+        # An async generator cannot be advanced by two workers at once
+        next_lock = asyncio.Lock()
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        done = object()
+
+        async def next_blog() -> Optional[BlogSource]:
+            async with next_lock:
+                try:
+                    return await sources.__anext__()
+                except StopAsyncIteration:
+                    return None
+
+        async def worker() -> None:
+            try:
+                while (blog := await next_blog()) is not None:
+                    await results.put(await self.fetch(blog))
+            finally:
+                await results.put(done)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                result = await results.get()
+                if result is done:
+                    running -= 1
+                else:
+                    yield result
+            for task in workers:
+                # Re-raise anything that escaped a worker
+                task.result()
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def fetch(self, blog: BlogSource) -> CrawlResult:
+        """
+        Conditionally fetch and parse one blog. Never raises.
+
+        Args:
+            blog: Blog to fetch
+
+        Returns:
+            CrawlResult: Songs found, or "unchanged" on 304, or the error
+        """
+        url = blog.fetch_url
+        headers = {}
+        if blog.etag:
+            headers["If-None-Match"] = blog.etag
+        if blog.last_scraped_at:
+            since = _http_date(blog.last_scraped_at)
+            if since:
+                headers["If-Modified-Since"] = since
+        try:
+            async with self.hosts.slot(urlsplit(url).hostname or ""):
+                async with self.client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304:
+                        return CrawlResult(blog.id, "unchanged", etag=blog.etag)
+                    if response.status_code != 200:
+                        return CrawlResult(blog.id, "error", error=f"HTTP {response.status_code}")
+                    body = await self._read(response)
+                    final_url = str(response.url)
+                    etag = response.headers.get("etag")
+        except httpx.HTTPError as e:
+            return CrawlResult(blog.id, "error", error=f"{type(e).__name__}: {e}".rstrip(": "))
+        except ResponseTooLarge:
+            return CrawlResult(blog.id, "error", error=f"Response larger than {self.max_bytes} bytes")
+        try:
+            # lxml releases the GIL while parsing; keep the loop fetching
+            songs = await asyncio.to_thread(parse_feed, body, final_url)
+        except Exception as e:
+            return CrawlResult(blog.id, "error", error=f"Unparseable content: {e}")
+        return CrawlResult(blog.id, "changed", songs=songs, etag=etag)
+
+    async def _read(self, response: httpx.Response) -> bytes:
+        if int(response.headers.get("content-length") or 0) > self.max_bytes:
+            raise ResponseTooLarge()
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > self.max_bytes:
+                raise ResponseTooLarge()
+        return bytes(body)
+
+
+def _http_date(iso: str) -> Optional[str]:
+    try:
+        moment = datetime.fromisoformat(iso)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
@@ -0,0 +1,197 @@
+"""
+Database access for the crawler.
+
+The scraper runs as its own service, so it describes the columns it uses
+of the backend's ``blog``, ``song``, ``tag`` and ``song_tag`` tables with
+SQLAlchemy Core rather than importing the backend's models. The schema itself is owned by the
+backend's migrations.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, insert, select, update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from app.feeds import FoundSong
+
+STREAM_BATCH_SIZE = 500
+
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+metadata = MetaData()
+
+blog = Table(
+    "blog", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("url", String, nullable=False),
+    Column("rss_feed_url", String),
+    Column("is_active", Boolean, nullable=False, default=True),
+    Column("last_scraped_at", String),  # ISO format datetime (UTC)
+    Column("scrape_etag", String),
+    Column("created_at", DateTime, nullable=False, default=datetime.utcnow),
+    Column("updated_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+song = Table(
+    "song", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("duration", Integer),
+    Column("file_path", String, index=True),
+    Column("source_url", String, index=True),
+    Column("blog_id", Integer, ForeignKey("blog.id")),
+    Column("cover_image_url", String),
+    Column("release_date", String),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+tag = Table(
+    "tag", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False, unique=True),
+    Column("created_at", DateTime, nullable=False, default=datetime.utcnow),
+    Column("updated_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+song_tag = Table(
+    "song_tag", metadata,
+    Column("song_id", Integer, ForeignKey("song.id"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tag.id"), primary_key=True),
+    Column("created_at", DateTime, nullable=False, default=datetime.utcnow),
+    Column("updated_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+def active_blogs_page(engine: Engine, *, after_id: int = 0, limit: int = STREAM_BATCH_SIZE) -> List[tuple]:
+    """
+    One keyset page of active blogs, in id order.
+
+    Each page is a short query of its own (``WHERE id > :after_id ORDER BY
+    id LIMIT :limit``), so no connection is held between pages.
+
+    Args:
+        engine: Database engine
+        after_id: Id of the last blog of the previous page
+        limit: Blogs per page
+
+    Returns:
+        List[tuple]: ``id``, ``url``, ``rss_feed_url``, ``scrape_etag`` and
+        ``last_scraped_at`` of each blog; fewer than ``limit`` on the last page
+    """
+    query = select(
+        blog.c.id, blog.c.url, blog.c.rss_feed_url, blog.c.scrape_etag, blog.c.last_scraped_at
+    ).where(blog.c.is_active == True, blog.c.id > after_id).order_by(blog.c.id).limit(limit)  # noqa: E712
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(query)]
+
+
+def store_blog_songs(
+    engine: Engine, *, blog_id: int, songs: Sequence[FoundSong], etag: Optional[str], scraped_at: datetime
+) -> int:
+    """
+    Insert a blog's new songs with their tags and record its validators, in one transaction.
+
+    Songs whose link is already stored (by any blog) are skipped. New songs
+    keep their link in ``source_url``, with no uploaded file and no
+    duration until the backend knows one. Tags are resolved for all new
+    songs at once, creating the missing ones.
+
+    Args:
+        engine: Database engine
+        blog_id: Blog the songs were found on
+        songs: Songs found in its feed
+        etag: ``ETag`` of the response, for the next ``If-None-Match``
+        scraped_at: Time of the fetch (UTC)
+
+    Returns:
+        int: Number of songs inserted
+    """
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        new = songs
+        if songs:
+            known = set(connection.scalars(
+                select(song.c.source_url).where(song.c.source_url.in_([found.url for found in songs]))
+            ))
+            new = [found for found in songs if found.url not in known]
+        if new:
+            song_ids = connection.scalars(insert(song).returning(song.c.id, sort_by_parameter_order=True), [
+                {
+                    "title": found.title[:500], "source_url": found.url, "blog_id": blog_id,
+                    "cover_image_url": found.cover_image_url, "release_date": found.release_date,
+                    "created_at": now, "updated_at": now,
+                }
+                for found in new
+            ]).all()
+            tag_ids = resolve_tag_ids(connection, (name for found in new for name in found.tags))
+            song_tags = [
+                {"song_id": song_id, "tag_id": tag_ids[name], "created_at": now, "updated_at": now}
+                for song_id, found in zip(song_ids, new)
+                for name in _normalize_tag_names(found.tags)
+            ]
+            if song_tags:
+                connection.execute(insert(song_tag), song_tags)
+        connection.execute(
+            update(blog).where(blog.c.id == blog_id)
+            .values(scrape_etag=etag, last_scraped_at=scraped_at.isoformat(), updated_at=now)
+        )
+    return len(new)
+
+
+def resolve_tag_ids(connection: Connection, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Map tag names to ids, creating missing tags.
+
+    One ``INSERT ... ON CONFLICT DO NOTHING`` for all names plus one SELECT,
+    so tags created concurrently by the API or another run are reused.
+
+    Args:
+        connection: Connection in the caller's transaction
+        names: Tag names; stripped and deduplicated
+
+    Returns:
+        Dict[str, int]: Tag id per normalized name
+    """
+    names = _normalize_tag_names(names)
+    if not names:
+        return {}
+    dialect = connection.dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    now = datetime.utcnow()
+    connection.execute(
+        _UPSERT_INSERTS[dialect](tag).on_conflict_do_nothing(index_elements=["name"]),
+        [{"name": name, "created_at": now, "updated_at": now} for name in names],
+    )
+    return dict(connection.execute(select(tag.c.name, tag.c.id).where(tag.c.name.in_(names))).all())
+
+
+def touch_blogs(engine: Engine, *, blog_ids: List[int], scraped_at: datetime) -> None:
+    """
+    Record a fetch of unchanged blogs (``304 Not Modified``) in one statement.
+
+    Args:
+        engine: Database engine
+        blog_ids: Blogs whose content was unchanged
+        scraped_at: Time of the run (UTC)
+    """
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, len(blog_ids), STREAM_BATCH_SIZE):
+            connection.execute(
+                update(blog).where(blog.c.id.in_(blog_ids[start:start + STREAM_BATCH_SIZE]))
+                .values(last_scraped_at=scraped_at.isoformat(), updated_at=now)
+            )
+
+
+def _normalize_tag_names(names: Iterable[str]) -> List[str]:
+    # Matches the backend's normalize_tag_names
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
@@ -0,0 +1,179 @@
+"""
+Extraction of songs from blog feeds and pages.
+
+RSS and Atom items contribute their audio enclosures plus any audio links
+and player embeds in their content, tagged with the item's categories;
+plain HTML pages are scanned for the same links. Parsing uses lxml directly, with entity resolution and network
+access disabled.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Iterator, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from lxml import etree, html
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".ogg", ".oga", ".flac", ".wav", ".aac", ".opus")
+# Players whose embeds are stored as the song's link
+EMBED_HOSTS = ("soundcloud.com", "bandcamp.com")
+
+_XML_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True, huge_tree=False)
+
+
+@dataclass
+class FoundSong:
+    """A song link found on a blog."""
+
+    title: str
+    url: str
+    cover_image_url: Optional[str] = None
+    release_date: Optional[str] = None  # ISO format date
+    tags: List[str] = field(default_factory=list)
+
+
+def parse_feed(body: bytes, base_url: str) -> List[FoundSong]:
+    """
+    Find the songs in a feed or page.
+
+    Args:
+        body: Response body
+        base_url: URL the body was fetched from, for relative links
+
+    Returns:
+        List[FoundSong]: Songs in document order, each URL once
+    """
+    if not body.strip():
+        return []
+    root = None
+    if body.lstrip()[:5] in (b"<?xml", b"<rss ", b"<rss>", b"<feed") or b"<rss" in body[:512]:
+        root = etree.fromstring(body, _XML_PARSER)
+    if root is not None and _local(root.tag) in ("rss", "feed", "RDF"):
+        songs = _feed_songs(root, base_url)
+    else:
+        songs = list(_html_songs(body, base_url, title=None))
+    seen, unique = set(), []
+    for song in songs:
+        if song.url not in seen:
+            seen.add(song.url)
+            unique.append(song)
+    return unique
+
+
+def _feed_songs(root: etree._Element, base_url: str) -> List[FoundSong]:
+    songs = []
+    for item in root.iter():
+        if not isinstance(item.tag, str) or _local(item.tag) not in ("item", "entry"):
+            continue
+        children = {}
+        for child in item:
+            if isinstance(child.tag, str):
+                children.setdefault(_local(child.tag), []).append(child)
+        title = _text(children.get("title")) or ""
+        link = _item_link(children) or base_url
+        released = _date(_text(children.get("pubDate") or children.get("published") or children.get("date")))
+        cover = _item_image(children)
+        tags = _categories(children)
+        for url in _enclosures(children, link):
+            songs.append(FoundSong(title or _title_from_url(url), url, cover, released, list(tags)))
+        for key in ("encoded", "content", "description", "summary"):
+            for content in children.get(key, []):
+                markup = "".join(content.itertext()).strip()
+                if markup:
+                    for song in _html_songs(markup.encode(), link, title=title or None):
+                        songs.append(FoundSong(song.title, song.url, cover, released, list(tags)))
+    return songs
+
+
+def _html_songs(body: bytes, base_url: str, title: Optional[str]) -> Iterator[FoundSong]:
+    try:
+        document = html.document_fromstring(body)
+    except (etree.ParserError, ValueError):
+        return
+    for element in document.iter("a", "audio", "source", "iframe"):
+        attribute = "href" if element.tag == "a" else "src"
+        raw = element.get(attribute)
+        if not raw:
+            continue
+        url = urljoin(base_url, raw.strip())
+        if element.tag == "iframe":
+            if not _is_embed(url):
+                continue
+        elif not _is_audio(url):
+            continue
+        text = element.text_content().strip() if element.tag == "a" else ""
+        yield FoundSong(text or title or _title_from_url(url), url)
+
+
+def _enclosures(children: dict, base_url: str) -> Iterator[str]:
+    for element in children.get("enclosure", []) + children.get("content", []) + children.get("link", []):
+        url = element.get("url") or (element.get("href") if element.get("rel") == "enclosure" else None)
+        if not url:
+            continue
+        media_type = element.get("type") or ""
+        if media_type.startswith("audio/") or _is_audio(url):
+            yield urljoin(base_url, url)
+
+
+def _item_link(children: dict) -> Optional[str]:
+    for element in children.get("link", []):
+        href = element.get("href")
+        if href and element.get("rel", "alternate") == "alternate":
+            return href
+        if element.text and element.text.strip():
+            return element.text.strip()
+    return None
+
+
+def _item_image(children: dict) -> Optional[str]:
+    for key in ("thumbnail", "image"):
+        for element in children.get(key, []):
+            url = element.get("url") or element.get("href") or (element.text or "").strip()
+            if url:
+                return url
+    return None
+
+
+def _categories(children: dict) -> List[str]:
+    # RSS puts the name in the text, Atom in the term attribute
+    names = (element.get("term") or "".join(element.itertext()) for element in children.get("category", []))
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+
+def _is_audio(url: str) -> bool:
+    return urlsplit(url).path.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def _is_embed(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == embed or host.endswith(f".{embed}") for embed in EMBED_HOSTS)
+
+
+def _title_from_url(url: str) -> str:
+    name = os.path.splitext(os.path.basename(urlsplit(url).path))[0]
+    return name.replace("_", " ").replace("-", " ").strip() or url
+
+
+def _date(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).date().isoformat()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).date().isoformat()
+    except ValueError:
+        return None
+
+
+def _text(elements: Optional[list]) -> Optional[str]:
+    if not elements:
+        return None
+    text = "".join(elements[0].itertext()).strip()
+    return text or None
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
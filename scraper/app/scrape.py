@@ -0,0 +1,93 @@
+"""
+One scrape run: crawl every active blog and store what was found.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from sqlalchemy.engine import Engine
+
+from app import config, db
+from app.crawler import BlogCrawler, BlogSource
+
+logger = logging.getLogger(__name__)
+
+
+async def crawl_blogs(engine: Engine, client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    """
+    Crawl every active blog once and store the songs found.
+
+    Blogs are read from the database a keyset page at a time, off the event
+    loop, as crawler workers free up. Results are stored one blog at a time, off the event loop, while other
+    blogs are being fetched; unchanged blogs are recorded in one statement
+    at the end.
+
+    Args:
+        engine: Database engine
+        client: HTTP client (default: a pooled client from the settings)
+
+    Returns:
+        Dict[str, Any]: ``status``, ``blogs_processed``, ``songs_found``,
+        ``unchanged`` and ``errors`` (one message per failed blog)
+    """
+    started = datetime.utcnow()
+    summary: Dict[str, Any] = {"status": "success", "blogs_processed": 0, "songs_found": 0, "unchanged": 0, "errors": []}
+    unchanged = []
+    owns_client = client is None
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=config.SCRAPER_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=config.SCRAPER_CONCURRENCY, max_keepalive_connections=config.SCRAPER_CONCURRENCY
+            ),
+            headers={"User-Agent": config.SCRAPER_USER_AGENT},
+        )
+    crawler = BlogCrawler(
+        client,
+        concurrency=config.SCRAPER_CONCURRENCY,
+        per_host_concurrency=config.SCRAPER_PER_HOST_CONCURRENCY,
+        per_host_interval=config.SCRAPER_PER_HOST_INTERVAL,
+        max_bytes=config.SCRAPER_MAX_BYTES,
+    )
+    try:
+        async for result in crawler.crawl(_active_blogs(engine)):
+            summary["blogs_processed"] += 1
+            if result.status == "unchanged":
+                unchanged.append(result.blog_id)
+            elif result.status == "error":
+                summary["errors"].append(f"Blog {result.blog_id}: {result.error}")
+            else:
+                try:
+                    summary["songs_found"] += await asyncio.to_thread(
+                        db.store_blog_songs, engine,
+                        blog_id=result.blog_id, songs=result.songs, etag=result.etag, scraped_at=started,
+                    )
+                except Exception as e:
+                    logger.exception("Could not store the songs of blog %s", result.blog_id)
+                    summary["errors"].append(f"Blog {result.blog_id}: {e}")
+        await asyncio.to_thread(db.touch_blogs, engine, blog_ids=unchanged, scraped_at=started)
+    finally:
+        if owns_client:
+            await client.aclose()
+    summary["unchanged"] = len(unchanged)
+    if summary["errors"]:
+        summary["status"] = "partial" if summary["blogs_processed"] > len(summary["errors"]) else "error"
+    logger.info(
+        "Scraped %d blogs (%d unchanged): %d new songs, %d errors",
+        summary["blogs_processed"], summary["unchanged"], summary["songs_found"], len(summary["errors"]),
+    )
+    return summary
+
+
+async def _active_blogs(engine: Engine) -> AsyncIterator[BlogSource]:
+    after_id = 0
+    while True:
+        rows = await asyncio.to_thread(db.active_blogs_page, engine, after_id=after_id)
+        for row in rows:
+            yield BlogSource(*row)
+        if len(rows) < db.STREAM_BATCH_SIZE:
+            return
+        after_id = rows[-1][0]
@@ -1,10 +1,15 @@
+import asyncio
 import os
 from celery import Celery
+from sqlalchemy import create_engine
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
+from app import config  # noqa: E402  (settings read the loaded environment)
+from app.scrape import crawl_blogs  # noqa: E402
+
 # Create Celery app
 app = Celery('scraper')
 
@@ -24,16 +29,14 @@ app.conf.beat_schedule = {
 @app.task
 def scrape_blogs():
     """
-    Task to scrape all registered blogs for new content.
-    This is a placeholder - implementation will be added in later steps.
-    
+    Task to scrape all active blogs for new songs.
+
     Returns:
         dict: Task result summary
     """
-    # Placeholder for now
-    return {
-        "status": "success",
-        "blogs_processed": 0,
-        "songs_found": 0,
-        "errors": []
-    } 
\ No newline at end of file
+    engine = create_engine(config.DATABASE_URL, pool_pre_ping=True)
+    try:
+        return asyncio.run(crawl_blogs(engine))
+    finally:
+        engine.dispose()
+
@@ -0,0 +1,167 @@
+"""
+Benchmark of a scrape run against a local fixture HTTP server.
+
+Serves an RSS feed for each of ``--blogs`` blogs, spread over ``--hosts``
+loopback addresses (127.0.0.1, 127.0.0.2, ...) so per-host limits apply as
+they would across blog platforms, with ``--latency`` ms added per request.
+Feeds carry an ETag and honour ``If-None-Match``. Runs ``crawl_blogs`` on a
+fresh SQLite database twice: a cold run that stores every song, then a
+warm run where every blog answers 304. With ``--serial`` a one-at-a-time
+crawl is timed too, for comparison:
+
+    python scripts/bench_crawler.py
+    python scripts/bench_crawler.py --blogs 500 --hosts 50 --latency 100 --serial
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, func, insert, select  # noqa: E402
+
+from app import config, db  # noqa: E402
+from app.scrape import crawl_blogs  # noqa: E402
+
+
+def feed(blog: int, songs: int) -> bytes:
+    """RSS feed of one blog: half enclosures, half links in post content."""
+    items = []
+    for i in range(songs):
+        url = f"https://cdn.example/blog{blog}/track{i}.mp3"
+        if i % 2:
+            media = f'<enclosure url="{url}" type="audio/mpeg" length="1000"/>'
+        else:
+            media = f'<description><![CDATA[<p>New tune: <a href="{url}">Track {i}</a></p>]]></description>'
+        items.append(
+            f"<item><title>Post {i}</title><link>https://blog{blog}.example/{i}</link>"
+            f"<pubDate>Mon, 06 Jan 2025 10:00:00 +0000</pubDate>{media}</item>"
+        )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Blog {blog}</title>{"".join(items)}</channel></rss>'.encode()
+
+
+def serve(args: argparse.Namespace) -> ThreadingHTTPServer:
+    """Start the fixture server on all loopback addresses."""
+    feeds = {f"/blog/{i}/feed.xml": feed(i, args.songs) for i in range(args.blogs)}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = feeds.get(self.path)
+            if args.latency:
+                time.sleep(args.latency / 1000)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            etag = f'"{hash(body) & 0xFFFFFFFF:x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("0.0.0.0", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fresh_database(path: str, args: argparse.Namespace, port: int):
+    """SQLite database with the blog and song tables and the fixture blogs."""
+    if os.path.exists(path):
+        os.unlink(path)
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def wal(connection, _):
+        # Let page reads coexist with the writes of stored results
+        connection.execute("PRAGMA journal_mode=WAL")
+
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(db.blog), [
+            {
+                "name": f"Blog {i}", "url": f"http://127.0.0.{1 + i % args.hosts}:{port}/blog/{i}/",
+                "rss_feed_url": f"http://127.0.0.{1 + i % args.hosts}:{port}/blog/{i}/feed.xml",
+            }
+            for i in range(args.blogs)
+        ])
+    return engine
+
+
+async def timed_run(engine) -> Dict[str, Any]:
+    start = time.perf_counter()
+    summary = await crawl_blogs(engine)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def report(label: str, summary: Dict[str, Any], engine) -> None:
+    with engine.connect() as connection:
+        stored = connection.scalar(select(func.count()).select_from(db.song))
+    print(
+        f"{label:<8} {summary['seconds']:7.2f}s  {summary['blogs_processed'] / summary['seconds']:8.1f} blogs/s  "
+        f"processed={summary['blogs_processed']} unchanged={summary['unchanged']} "
+        f"new_songs={summary['songs_found']} errors={len(summary['errors'])} stored={stored}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blogs", type=int, default=300)
+    parser.add_argument("--hosts", type=int, default=30, help="Loopback addresses the blogs are spread over (max 254)")
+    parser.add_argument("--songs", type=int, default=20, help="Songs per feed")
+    parser.add_argument("--latency", type=float, default=50, help="Added server latency per request, in ms")
+    parser.add_argument("--concurrency", type=int, default=config.SCRAPER_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=config.SCRAPER_PER_HOST_CONCURRENCY)
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between requests to one host")
+    parser.add_argument("--serial", action="store_true", help="Also time a one-blog-at-a-time crawl")
+    args = parser.parse_args()
+
+    server = serve(args)
+    port = server.server_address[1]
+    path = os.path.join(tempfile.gettempdir(), "bench_crawler.db")
+    print(
+        f"{args.blogs} blogs on {args.hosts} hosts, {args.songs} songs each, {args.latency:g} ms latency; "
+        f"concurrency {args.concurrency}, {args.per_host} per host every {args.interval:g}s"
+    )
+    config.SCRAPER_CONCURRENCY = args.concurrency
+    config.SCRAPER_PER_HOST_CONCURRENCY = args.per_host
+    config.SCRAPER_PER_HOST_INTERVAL = args.interval
+    try:
+        engine = fresh_database(path, args, port)
+        report("cold", asyncio.run(timed_run(engine)), engine)
+        report("warm", asyncio.run(timed_run(engine)), engine)
+        engine.dispose()
+        if args.serial:
+            config.SCRAPER_CONCURRENCY = config.SCRAPER_PER_HOST_CONCURRENCY = 1
+            engine = fresh_database(path, args, port)
+            report("serial", asyncio.run(timed_run(engine)), engine)
+            engine.dispose()
+    finally:
+        server.shutdown()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app import db
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A file, not :memory:, so threads running the queries share the database
+    engine = create_engine(f"sqlite:///{tmp_path / 'scraper.db'}")
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import httpx
+
+from app.crawler import BlogCrawler, BlogSource, HostLimiter
+
+FEED = b"""<?xml version="1.0"?><rss version="2.0"><channel>
+<item><title>Song</title><enclosure url="https://cdn.example/song.mp3" type="audio/mpeg"/></item>
+</channel></rss>"""
+
+
+def _crawler(handler, max_bytes: int = 1024 * 1024) -> BlogCrawler:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return BlogCrawler(client, concurrency=4, per_host_concurrency=2, per_host_interval=0, max_bytes=max_bytes)
+
+
+def _fetch(handler, blog: BlogSource, **kwargs):
+    async def run():
+        crawler = _crawler(handler, **kwargs)
+        async with crawler.client:
+            return await crawler.fetch(blog)
+
+    return asyncio.run(run())
+
+
+def test_changed_feed_is_parsed():
+    def handler(request):
+        return httpx.Response(200, content=FEED, headers={"ETag": '"v2"'})
+
+    result = _fetch(handler, BlogSource(1, "https://blog.example/", "https://blog.example/feed.xml"))
+
+    assert result.status == "changed"
+    assert result.etag == '"v2"'
+    assert [song.url for song in result.songs] == ["https://cdn.example/song.mp3"]
+
+
+def test_validators_are_sent_and_304_is_unchanged():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(304)
+
+    blog = BlogSource(1, "https://blog.example/", etag='"v1"', last_scraped_at="2025-01-06T10:00:00")
+    result = _fetch(handler, blog)
+
+    assert result.status == "unchanged"
+    assert result.etag == '"v1"'
+    assert requests[0].url == "https://blog.example/"
+    assert requests[0].headers["If-None-Match"] == '"v1"'
+    assert requests[0].headers["If-Modified-Since"] == "Mon, 06 Jan 2025 10:00:00 GMT"
+
+
+def test_first_fetch_is_unconditional():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=b"<html></html>")
+
+    _fetch(handler, BlogSource(1, "https://blog.example/"))
+
+    assert "If-None-Match" not in requests[0].headers
+    assert "If-Modified-Since" not in requests[0].headers
+
+
+def test_non_200_is_an_error():
+    result = _fetch(lambda request: httpx.Response(503), BlogSource(1, "https://blog.example/"))
+
+    assert result.status == "error"
+    assert result.error == "HTTP 503"
+
+
+def test_oversized_bodies_are_errors():
+    async def chunks():
+        for _ in range(4):
+            yield b"x" * 40
+
+    declared = _fetch(
+        lambda request: httpx.Response(200, content=b"x" * 200), BlogSource(1, "https://a.example/"), max_bytes=100
+    )
+    streamed = _fetch(
+        lambda request: httpx.Response(200, content=chunks()), BlogSource(2, "https://b.example/"), max_bytes=100
+    )
+
+    assert declared.status == streamed.status == "error"
+    assert declared.error == "Response larger than 100 bytes"
+
+
+def test_network_errors_are_reported():
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    result = _fetch(handler, BlogSource(1, "https://blog.example/"))
+
+    assert result.status == "error"
+    assert result.error == "ConnectError: refused"
+
+
+def test_host_limiter_spaces_requests_to_one_host():
+    async def run():
+        limiter = HostLimiter(max_concurrency=3, min_interval=0.05)
+        starts = {}
+
+        async def request(host, i):
+            async with limiter.slot(host):
+                starts[(host, i)] = time.monotonic()
+
+        await asyncio.gather(*(request("a.example", i) for i in range(3)), request("b.example", 0))
+        return starts
+
+    starts = asyncio.run(run())
+    same_host = sorted(starts[("a.example", i)] for i in range(3))
+
+    assert all(later - earlier >= 0.045 for earlier, later in zip(same_host, same_host[1:]))
+    # Other hosts are not held back
+    assert starts[("b.example", 0)] - same_host[0] < 0.04
+
+
+def test_crawl_yields_every_blog_from_an_async_source():
+    def handler(request):
+        return httpx.Response(304 if request.url.host == "b.example" else 200, content=FEED)
+
+    async def blogs():
+        for i, host in enumerate(["a.example", "b.example", "c.example"] * 3):
+            await asyncio.sleep(0)
+            yield BlogSource(i, f"https://{host}/{i}")
+
+    async def run():
+        crawler = _crawler(handler)
+        async with crawler.client:
+            return [result async for result in crawler.crawl(blogs())]
+
+    results = asyncio.run(run())
+
+    assert sorted(result.blog_id for result in results) == list(range(9))
+    assert sorted(result.status for result in results).count("unchanged") == 3
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from app import db
+from app.feeds import FoundSong
+
+SCRAPED_AT = datetime(2025, 1, 6, 10, 0)
+
+
+def _add_blogs(engine, count: int, **values):
+    with engine.begin() as connection:
+        connection.execute(insert(db.blog), [
+            {"name": f"Blog {i}", "url": f"https://blog{i}.example/", **values} for i in range(count)
+        ])
+
+
+def test_store_blog_songs_skips_known_links_and_records_validators(engine):
+    _add_blogs(engine, 2)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(insert(db.song).values(
+            title="Known", source_url="https://cdn.example/known.mp3", blog_id=2,
+            created_at=now, updated_at=now,
+        ))
+
+    stored = db.store_blog_songs(
+        engine, blog_id=1, etag='"v1"', scraped_at=SCRAPED_AT,
+        songs=[
+            FoundSong("Known", "https://cdn.example/known.mp3"),
+            FoundSong("New", "https://cdn.example/new.mp3", "https://cdn.example/new.jpg", "2025-01-05"),
+        ],
+    )
+
+    with engine.connect() as connection:
+        songs = connection.execute(
+            select(
+                db.song.c.title, db.song.c.blog_id, db.song.c.cover_image_url, db.song.c.release_date,
+                db.song.c.file_path, db.song.c.duration,
+            ).order_by(db.song.c.id)
+        ).all()
+        blog = connection.execute(
+            select(db.blog.c.scrape_etag, db.blog.c.last_scraped_at).where(db.blog.c.id == 1)
+        ).one()
+    assert stored == 1
+    assert songs == [
+        ("Known", 2, None, None, None, None),
+        ("New", 1, "https://cdn.example/new.jpg", "2025-01-05", None, None),
+    ]
+    assert blog == ('"v1"', "2025-01-06T10:00:00")
+
+
+def test_store_blog_songs_tags_new_songs(engine):
+    _add_blogs(engine, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(db.tag).values(name="rock"))
+
+    db.store_blog_songs(
+        engine, blog_id=1, etag=None, scraped_at=SCRAPED_AT,
+        songs=[
+            FoundSong("A", "https://cdn.example/a.mp3", tags=["rock", " live ", "rock"]),
+            FoundSong("B", "https://cdn.example/b.mp3", tags=["live"]),
+            FoundSong("C", "https://cdn.example/c.mp3"),
+        ],
+    )
+
+    with engine.connect() as connection:
+        tags = dict(connection.execute(select(db.tag.c.name, db.tag.c.id)).all())
+        song_tags = connection.execute(
+            select(db.song.c.title, db.tag.c.name)
+            .join(db.song_tag, db.song_tag.c.song_id == db.song.c.id)
+            .join(db.tag, db.tag.c.id == db.song_tag.c.tag_id)
+            .order_by(db.song.c.title, db.tag.c.name)
+        ).all()
+    assert tags == {"rock": 1, "live": 2}
+    assert song_tags == [("A", "live"), ("A", "rock"), ("B", "live")]
+
+
+def test_active_blogs_are_paged_by_id(engine):
+    _add_blogs(engine, 5)
+    with engine.begin() as connection:
+        connection.execute(db.blog.update().where(db.blog.c.id == 2).values(is_active=False))
+
+    first = db.active_blogs_page(engine, limit=2)
+    second = db.active_blogs_page(engine, after_id=first[-1][0], limit=2)
+    last = db.active_blogs_page(engine, after_id=second[-1][0], limit=2)
+
+    assert [row[0] for row in first + second + last] == [1, 3, 4, 5]
+    assert len(last) == 0
+    assert first[0] == (1, "https://blog0.example/", None, None, None)
+
+
+def test_touch_blogs_records_the_fetch_only(engine):
+    _add_blogs(engine, 3, scrape_etag='"v1"')
+
+    db.touch_blogs(engine, blog_ids=[1, 3], scraped_at=SCRAPED_AT)
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(db.blog.c.last_scraped_at, db.blog.c.scrape_etag).order_by(db.blog.c.id)
+        ).all()
+    assert rows == [("2025-01-06T10:00:00", '"v1"'), (None, '"v1"'), ("2025-01-06T10:00:00", '"v1"')]
@@ -0,0 +1,101 @@
+from app.feeds import FoundSong, parse_feed
+
+RSS = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:media="http://search.yahoo.com/mrss/">
+  <channel>
+    <title>Blog</title>
+    <item>
+      <title>Night Drive</title>
+      <link>https://blog.example/posts/night-drive</link>
+      <pubDate>Mon, 06 Jan 2025 10:00:00 +0000</pubDate>
+      <category>synthwave</category>
+      <category> Night </category>
+      <enclosure url="/media/night-drive.mp3" type="audio/mpeg" length="1000"/>
+      <media:thumbnail url="https://blog.example/covers/night.jpg"/>
+      <content:encoded><![CDATA[
+        <p>Also <a href="https://cdn.example/b-side.ogg">The B-side</a>
+        and <a href="/media/night-drive.mp3">again</a>, not <a href="/about">this</a>.</p>
+      ]]></content:encoded>
+    </item>
+    <item>
+      <title>Embeds</title>
+      <link>https://blog.example/posts/embeds</link>
+      <description><![CDATA[
+        <iframe src="https://w.soundcloud.com/player/?url=track1"></iframe>
+        <iframe src="https://bandcamp.com/EmbeddedPlayer/album=1"></iframe>
+        <iframe src="https://www.youtube.com/embed/x"></iframe>
+      ]]></description>
+    </item>
+  </channel>
+</rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Atom blog</title>
+  <entry>
+    <title>Field Recording</title>
+    <link rel="alternate" href="https://atom.example/2025/field"/>
+    <link rel="enclosure" type="audio/mpeg" href="https://atom.example/audio/field.mp3"/>
+    <link rel="enclosure" type="image/jpeg" href="https://atom.example/audio/field.jpg"/>
+    <published>2025-02-03T08:00:00Z</published>
+    <category term="ambient"/>
+  </entry>
+</feed>"""
+
+
+def test_rss_enclosures_and_content_links():
+    songs = parse_feed(RSS, "https://blog.example/feed.xml")
+
+    assert songs[:2] == [
+        FoundSong(
+            "Night Drive", "https://blog.example/media/night-drive.mp3",
+            "https://blog.example/covers/night.jpg", "2025-01-06", ["synthwave", "Night"],
+        ),
+        FoundSong(
+            "The B-side", "https://cdn.example/b-side.ogg",
+            "https://blog.example/covers/night.jpg", "2025-01-06", ["synthwave", "Night"],
+        ),
+    ]
+
+
+def test_player_embeds_are_songs():
+    urls = [song.url for song in parse_feed(RSS, "https://blog.example/feed.xml")]
+
+    assert urls[2:] == [
+        "https://w.soundcloud.com/player/?url=track1",
+        "https://bandcamp.com/EmbeddedPlayer/album=1",
+    ]
+
+
+def test_atom_enclosure_links():
+    songs = parse_feed(ATOM, "https://atom.example/feed")
+
+    assert songs == [
+        FoundSong("Field Recording", "https://atom.example/audio/field.mp3", None, "2025-02-03", ["ambient"]),
+    ]
+
+
+def test_each_url_is_reported_once():
+    urls = [song.url for song in parse_feed(RSS, "https://blog.example/feed.xml")]
+
+    assert len(urls) == len(set(urls)) == 4
+
+
+def test_html_pages_are_scanned_with_relative_links():
+    page = b"""<html><body>
+      <a href="tracks/first_take.mp3"></a>
+      <audio src="/audio/live.m4a"></audio>
+      <a href="https://elsewhere.example/">Not audio</a>
+    </body></html>"""
+
+    songs = parse_feed(page, "https://band.example/music/")
+
+    assert [(song.title, song.url) for song in songs] == [
+        ("first take", "https://band.example/music/tracks/first_take.mp3"),
+        ("live", "https://band.example/audio/live.m4a"),
+    ]
+
+
+def test_empty_body_has_no_songs():
+    assert parse_feed(b"  ", "https://blog.example/") == []
@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app import db
+from app.scrape import crawl_blogs
+
+
+def _feed(host: str) -> bytes:
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><item><title>{host}</title>'
+        f'<category>demo</category><enclosure url="https://{host}/song.mp3" type="audio/mpeg"/>'
+        f"</item></channel></rss>"
+    ).encode()
+
+
+def test_crawl_stores_songs_and_validators(engine, monkeypatch):
+    # Several keyset pages
+    monkeypatch.setattr(db, "STREAM_BATCH_SIZE", 2)
+    hosts = ["new1.example", "new2.example", "same.example", "down.example", "new3.example"]
+    with engine.begin() as connection:
+        connection.execute(insert(db.blog), [
+            {"name": host, "url": f"https://{host}/", "scrape_etag": '"v1"' if host == "same.example" else None}
+            for host in hosts
+        ])
+
+    def handler(request):
+        host = request.url.host
+        if host == "down.example":
+            return httpx.Response(500)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=_feed(host), headers={"ETag": f'"{host}"'})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await crawl_blogs(engine, client)
+
+    summary = asyncio.run(run())
+
+    with engine.connect() as connection:
+        blogs = dict(connection.execute(select(db.blog.c.name, db.blog.c.scrape_etag)).all())
+        scraped = connection.scalar(select(func.count()).where(db.blog.c.last_scraped_at.is_not(None)))
+        songs = connection.scalars(select(db.song.c.title).order_by(db.song.c.title)).all()
+        tagged = connection.scalar(select(func.count()).select_from(db.song_tag))
+    assert summary["status"] == "partial"
+    assert summary["blogs_processed"] == 5
+    assert summary["songs_found"] == 3
+    assert summary["unchanged"] == 1
+    assert summary["errors"] == ["Blog 4: HTTP 500"]
+    assert songs == ["new1.example", "new2.example", "new3.example"]
+    assert tagged == 3
+    assert blogs["new1.example"] == '"new1.example"'
+    assert blogs["same.example"] == '"v1"'
+    assert scraped == 4